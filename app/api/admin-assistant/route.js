@@ -3,7 +3,7 @@ import Anthropic from '@anthropic-ai/sdk'
 import * as Sentry from '@sentry/nextjs'
 import { createClient } from '@supabase/supabase-js'
 import { waitUntil } from '@vercel/functions'
-import { TOOLS_DEFINITIONS, executeTool, generateExecutionPlan } from '@/lib/adminAssistantTools'
+import { TOOLS_DEFINITIONS, READ_ONLY_TOOLS, executeTool, generateExecutionPlan } from '@/lib/adminAssistantTools'
 import { checkRateLimit, getIdentifier } from '@/lib/rateLimit'
 
 // El flujo puede encadenar hasta 3 llamadas a Claude (15-30s+), y algunas
@@ -103,6 +103,45 @@ function fallbackMessage(toolResults, generic) {
   return generic
 }
 
+// Server-Timing por fase (auth, preferencias, cada ronda de Claude y de
+// herramientas): con él scripts/assistant_stream.py separa la latencia del
+// primer razonamiento de la de las rondas de tools sin tocar el body.
+// Fases: auth, profile, job_insert, prefs, llm_r{n} (+ llm_retry_r{n}),
+// tools_r{n} (solo si esa ronda ejecutó lecturas), tool_{nombre} al ejecutar
+// acciones confirmadas, job_done. Completo solo en la respuesta síncrona: con
+// `background: true` la respuesta lleva lo medido hasta crear el job y el
+// resto ocurre después de responder (el sondeo GET ?jobId= no lo lleva).
+// También lleva los tokens consumidos en el turno (tokens_in/tokens_out/
+// tokens_cache_read, como `desc`, sumando todas las rondas) para que
+// scripts/result_store.py detecte regresiones de coste, no solo de tiempo.
+function createServerTiming() {
+  const entries = []
+  const tokens = { in: 0, out: 0, cache_read: 0 }
+  return {
+    async measure(name, fn) {
+      const start = performance.now()
+      try {
+        return await fn()
+      } finally {
+        entries.push(`${name};dur=${(performance.now() - start).toFixed(1)}`)
+      }
+    },
+    tokens(usage) {
+      tokens.in += usage?.input_tokens || 0
+      tokens.out += usage?.output_tokens || 0
+      tokens.cache_read += usage?.cache_read_input_tokens || 0
+    },
+    header() {
+      const counts = tokens.in || tokens.out
+        ? [`tokens_in;desc=${tokens.in}`, `tokens_out;desc=${tokens.out}`, `tokens_cache_read;desc=${tokens.cache_read}`]
+        : []
+      return [...entries, ...counts].join(', ')
+    }
+  }
+}
+
+const NO_SERVER_TIMING = { measure: (_name, fn) => fn(), tokens: () => {}, header: () => '' }
+
 const DIET_RULES = `
 SISTEMA NL ELITE — REGLAS DEL PROGRAMA NUTRICIONAL:
 
@@ -294,7 +333,7 @@ CORRECCIÓN DE UNA NOTA YA GUARDADA — MUY IMPORTANTE: si le muestras al admin
 Responde siempre de forma amigable y profesional. Si algo falla, explica el problema de forma sencilla.`
 
 // Ejecuta las tool calls ya confirmadas por el admin (acciones que escriben datos).
-async function runToolExecution({ toolCallsToExecute, adminToken, updateStage }) {
+async function runToolExecution({ toolCallsToExecute, adminToken, updateStage, timing = NO_SERVER_TIMING }) {
   const results = {}
   const errors = []
 
@@ -303,7 +342,7 @@ async function runToolExecution({ toolCallsToExecute, adminToken, updateStage })
   for (const toolCall of toolCallsToExecute) {
     try {
       const args = typeof toolCall.args === 'string' ? JSON.parse(toolCall.args) : toolCall.args
-      const result = await executeTool(toolCall.name, args, adminToken)
+      const result = await timing.measure(`tool_${toolCall.name}`, () => executeTool(toolCall.name, args, adminToken))
       results[toolCall.id] = result
     } catch (err) {
       errors.push({ id: toolCall.id, name: toolCall.name, error: err.message })
@@ -344,19 +383,6 @@ function isShortConfirmation(content) {
   return !!content && SHORT_CONFIRMATION.test(content.trim())
 }
 
-// Herramientas que solo leen datos — se ejecutan automáticamente sin pedir
-// confirmación al admin. Cualquier otra herramienta (asignar, guardar,
-// borrar, modificar) se devuelve al cliente como plan de confirmación.
-const READ_ONLY_TOOLS = [
-  'find_member', 'get_member_summary', 'get_gym_dashboard', 'list_trainers',
-  'list_recent_posts', 'generate_diet_plan', 'list_workouts', 'get_member_activity',
-  'list_members', 'generate_ai_diet_from_recipes', 'refine_ai_diet', 'generate_member_routine',
-  'search_exercise_catalog',
-  'swap_routine_exercise', 'remove_routine_exercise', 'add_routine_exercise',
-  'modify_routine_exercise', 'modify_routine_day',
-  'list_member_notes', 'list_admin_preferences'
-]
-
 // Llamada normal al asistente: puede encadenar hasta 3 llamadas a Claude
 // (interpretar → ejecutar tools de lectura → interpretar resultados). Puede
 // tardar bastante, por eso corre como job en segundo plano (ver POST).
@@ -375,7 +401,7 @@ const MAX_ASSISTANT_ROUNDS = 4
 // a Claude (interpretar → ejecutar tools de lectura → interpretar
 // resultados → ...). Puede tardar bastante, por eso corre como job en
 // segundo plano (ver POST).
-async function runAssistantChat({ anthropic, messages, adminToken, adminPreferencesText, updateStage, lastRoutineContext, lastDietContext }) {
+async function runAssistantChat({ anthropic, messages, adminToken, adminPreferencesText, updateStage, lastRoutineContext, lastDietContext, timing = NO_SERVER_TIMING }) {
   const systemPrompt = buildSystemPrompt(adminPreferencesText)
   // El prompt de sistema + el catálogo de herramientas suman varios miles de
   // tokens fijos que se repiten en CADA una de las hasta 4 llamadas
@@ -436,7 +462,7 @@ ${convo[lastIdx].content}`
   for (let round = 0; round < MAX_ASSISTANT_ROUNDS; round++) {
     await updateStage?.(STAGE_BY_ROUND[round] || 'Preparando la respuesta...')
 
-    const resp = await anthropic.messages.create({
+    const resp = await timing.measure(`llm_r${round}`, () => anthropic.messages.create({
       model: CLAUDE_MODEL,
       system: cachedSystem,
       messages: convo,
@@ -449,7 +475,8 @@ ${convo[lastIdx].content}`
       // controla desde el prompt (ver reglas fijas del asistente), no con un
       // parámetro de sampling.
       max_tokens: round === 0 ? 4000 : 3000
-    })
+    }))
+    timing.tokens(resp.usage)
 
     let content = resp.content
     let text = extractText(content)
@@ -464,7 +491,7 @@ ${convo[lastIdx].content}`
     if (calls.length === 0 && toolChoice.type === 'auto' && (isStallingWithoutAction(text) || !text)) {
       try {
         await updateStage?.('Ejecutando la acción anunciada...')
-        const retry = await anthropic.messages.create({
+        const retry = await timing.measure(`llm_retry_r${round}`, () => anthropic.messages.create({
           model: CLAUDE_MODEL,
           system: cachedSystem,
           messages: [
@@ -477,7 +504,8 @@ ${convo[lastIdx].content}`
           thinking: NO_THINKING,
           output_config: LOW_EFFORT,
           max_tokens: round === 0 ? 4000 : 3000
-        })
+        }))
+        timing.tokens(retry.usage)
         content = retry.content
         text = extractText(content)
         calls = normalizeToolCalls(content)
@@ -504,14 +532,18 @@ ${convo[lastIdx].content}`
     // Ejecutar automáticamente las herramientas de solo lectura, aunque
     // vengan mezcladas con acciones que necesitan confirmación — así el
     // admin ve igualmente esos datos en el plan de confirmación.
-    if (autoExecute.length > 0) await updateStage?.('Consultando datos del gimnasio...')
-    for (const call of autoExecute) {
-      try {
-        const args = JSON.parse(call.function.arguments || '{}')
-        toolResults[call.id] = await executeTool(call.function.name, args, adminToken)
-      } catch (err) {
-        toolResults[call.id] = { success: false, error: err.message }
-      }
+    if (autoExecute.length > 0) {
+      await updateStage?.('Consultando datos del gimnasio...')
+      await timing.measure(`tools_r${round}`, async () => {
+        for (const call of autoExecute) {
+          try {
+            const args = JSON.parse(call.function.arguments || '{}')
+            toolResults[call.id] = await executeTool(call.function.name, args, adminToken)
+          } catch (err) {
+            toolResults[call.id] = { success: false, error: err.message }
+          }
+        }
+      })
     }
 
     // Hay acciones que escriben datos: se devuelven para que el admin
@@ -565,12 +597,18 @@ function friendlyJobError(error) {
 
 export async function POST(request) {
   const supabaseAdmin = getSupabaseAdmin()
+  const timing = createServerTiming()
   try {
     // 1. Rate Limiting (Más amplio para el chat del asistente)
     const identifier = getIdentifier(request)
-    const { success: limitOk } = await checkRateLimit(identifier, 100, 60000) // 100 reqs/min
+    const { success: limitOk, resetMs } = await checkRateLimit(identifier, 100, 60000) // 100 reqs/min
     if (!limitOk) {
-      return NextResponse.json({ error: 'Too many requests. Límite de 100/min alcanzado.' }, { status: 429 })
+      // Retry-After: los scripts de test (scripts/rate_limiter.py) esperan
+      // justo lo que falta para la siguiente ventana en vez de adivinar.
+      return NextResponse.json(
+        { error: 'Too many requests. Límite de 100/min alcanzado.' },
+        { status: 429, headers: { 'Retry-After': String(Math.max(1, Math.ceil(resetMs / 1000))) } }
+      )
     }
 
     const { messages, executeTools = false, toolCallsToExecute = [], background = false, lastRoutineContext = null, lastDietContext = null } = await request.json()
@@ -583,16 +621,16 @@ export async function POST(request) {
       return NextResponse.json({ error: 'No autorizado' }, { status: 401 })
     }
 
-    const { data: { user }, error: authError } = await supabaseAdmin.auth.getUser(adminToken)
+    const { data: { user }, error: authError } = await timing.measure('auth', () => supabaseAdmin.auth.getUser(adminToken))
     if (authError || !user) {
       return NextResponse.json({ error: 'Token inválido' }, { status: 401 })
     }
 
-    const { data: profile } = await supabaseAdmin
+    const { data: profile } = await timing.measure('profile', () => supabaseAdmin
       .from('profiles')
       .select('role')
       .eq('id', user.id)
-      .single()
+      .single())
 
     if (!profile || !['admin', 'trainer'].includes(profile.role)) {
       return NextResponse.json({ error: 'Permisos insuficientes' }, { status: 403 })
@@ -609,7 +647,7 @@ export async function POST(request) {
     // Sin ese flag, esta ruta se comporta exactamente igual que siempre
     // (síncrona, resultado completo en la misma respuesta) — cero riesgo
     // para los dispositivos que aún no tienen la próxima build.
-    const { data: job } = await supabaseAdmin
+    const { data: job } = await timing.measure('job_insert', () => supabaseAdmin
       .from('assistant_jobs')
       .insert({
         created_by: user.id,
@@ -617,7 +655,7 @@ export async function POST(request) {
         request: { messages: messages || null, executeTools, toolCallsToExecute },
       })
       .select('id')
-      .single()
+      .single())
 
     // Actualiza el paso actual mientras el job sigue en processing, para que
     // el cliente pueda mostrar algo más útil que un spinner genérico durante
@@ -636,7 +674,7 @@ export async function POST(request) {
       let adminPreferencesText = ''
       if (!(executeTools && toolCallsToExecute?.length > 0)) {
         try {
-          const { data } = await supabaseAdmin.rpc('rpc_get_admin_preferences_text')
+          const { data } = await timing.measure('prefs', () => supabaseAdmin.rpc('rpc_get_admin_preferences_text'))
           adminPreferencesText = data || ''
         } catch (e) {
           console.warn('rpc_get_admin_preferences_text falló, se ignoran preferencias:', e.message)
@@ -644,14 +682,14 @@ export async function POST(request) {
       }
 
       const result = executeTools && toolCallsToExecute?.length > 0
-        ? await runToolExecution({ toolCallsToExecute, adminToken, updateStage })
-        : await runAssistantChat({ anthropic: getAnthropic(), messages, adminToken, adminPreferencesText, updateStage, lastRoutineContext, lastDietContext })
+        ? await runToolExecution({ toolCallsToExecute, adminToken, updateStage, timing })
+        : await runAssistantChat({ anthropic: getAnthropic(), messages, adminToken, adminPreferencesText, updateStage, lastRoutineContext, lastDietContext, timing })
 
       if (job?.id) {
-        await supabaseAdmin
+        await timing.measure('job_done', () => supabaseAdmin
           .from('assistant_jobs')
           .update({ status: 'done', result, updated_at: new Date().toISOString() })
-          .eq('id', job.id)
+          .eq('id', job.id))
       }
       return result
     }
@@ -672,12 +710,12 @@ export async function POST(request) {
             .eq('id', job.id)
         })
       )
-      return NextResponse.json({ jobId: job.id })
+      return NextResponse.json({ jobId: job.id }, { headers: { 'Server-Timing': timing.header() } })
     }
 
     // Modo síncrono (comportamiento de siempre): se espera aquí mismo.
     const result = await runAndFinish()
-    return NextResponse.json({ jobId: job?.id, ...result })
+    return NextResponse.json({ jobId: job?.id, ...result }, { headers: { 'Server-Timing': timing.header() } })
   } catch (error) {
     Sentry.captureException(error, { tags: { endpoint: 'admin-assistant' } })
     console.error('Admin Assistant Error:', error)
@@ -0,0 +1,88 @@
+import { NextResponse } from 'next/server'
+import { createClient } from '@supabase/supabase-js'
+import { TOOLS_DEFINITIONS, READ_ONLY_TOOLS, EXTERNAL_API_TOOLS, executeTool } from '@/lib/adminAssistantTools'
+
+// Punto de entrada SOLO para benchmarks (scripts/tool_bench.py): ejecuta una
+// herramienta del asistente directamente, sin pasar por Claude, para medir
+// su coste de base de datos aislado de la latencia del modelo.
+//
+// Desactivado por defecto: responde 404 salvo que el despliegue tenga
+// ENABLE_TOOL_BENCH=1 (solo lectura) o ENABLE_TOOL_BENCH=writes (también
+// herramientas que escriben — únicamente contra una base de pruebas).
+// Nunca activarlo en producción.
+export const maxDuration = 60
+
+const getSupabaseAdmin = () => createClient(
+  process.env.NEXT_PUBLIC_SUPABASE_URL,
+  process.env.SUPABASE_SERVICE_ROLE_KEY,
+  { auth: { autoRefreshToken: false, persistSession: false } }
+)
+
+const benchMode = () => process.env.ENABLE_TOOL_BENCH
+
+async function authorize(request) {
+  const authHeader = request.headers.get('Authorization')
+  const adminToken = authHeader?.startsWith('Bearer ') ? authHeader.slice(7) : null
+  if (!adminToken) return { error: NextResponse.json({ error: 'No autorizado' }, { status: 401 }) }
+
+  const supabaseAdmin = getSupabaseAdmin()
+  const { data: { user }, error: authError } = await supabaseAdmin.auth.getUser(adminToken)
+  if (authError || !user) return { error: NextResponse.json({ error: 'Token inválido' }, { status: 401 }) }
+
+  const { data: profile } = await supabaseAdmin
+    .from('profiles')
+    .select('role')
+    .eq('id', user.id)
+    .single()
+  if (!profile || !['admin', 'trainer'].includes(profile.role)) {
+    return { error: NextResponse.json({ error: 'Permisos insuficientes' }, { status: 403 }) }
+  }
+  return { adminToken }
+}
+
+// GET: catálogo de herramientas con su esquema de parámetros, para que el
+// benchmark genere argumentos sintéticos sin duplicar las definiciones.
+export async function GET(request) {
+  if (!benchMode()) return NextResponse.json({ error: 'Not found' }, { status: 404 })
+  const { error } = await authorize(request)
+  if (error) return error
+
+  return NextResponse.json({
+    writes: benchMode() === 'writes',
+    tools: TOOLS_DEFINITIONS.map(t => ({
+      name: t.function.name,
+      parameters: t.function.parameters,
+      readOnly: READ_ONLY_TOOLS.includes(t.function.name),
+      externalApi: EXTERNAL_API_TOOLS.includes(t.function.name)
+    }))
+  })
+}
+
+// POST { tool, args }: ejecuta la herramienta tal cual lo haría el asistente
+// (executeTool con el JWT del admin) y devuelve el resultado y su duración.
+export async function POST(request) {
+  if (!benchMode()) return NextResponse.json({ error: 'Not found' }, { status: 404 })
+  const { adminToken, error } = await authorize(request)
+  if (error) return error
+
+  const { tool, args = {} } = await request.json()
+  if (!READ_ONLY_TOOLS.includes(tool) && benchMode() !== 'writes') {
+    return NextResponse.json(
+      { error: `${tool} escribe datos: requiere ENABLE_TOOL_BENCH=writes` },
+      { status: 403 }
+    )
+  }
+
+  const start = performance.now()
+  try {
+    const result = await executeTool(tool, args, adminToken)
+    const ms = performance.now() - start
+    return NextResponse.json({ result, ms }, { headers: { 'Server-Timing': `tool;dur=${ms.toFixed(1)}` } })
+  } catch (err) {
+    const ms = performance.now() - start
+    return NextResponse.json(
+      { error: err.message, ms },
+      { status: 422, headers: { 'Server-Timing': `tool;dur=${ms.toFixed(1)}` } }
+    )
+  }
+}
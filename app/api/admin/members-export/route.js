@@ -0,0 +1,104 @@
+import { createClient } from '@supabase/supabase-js'
+import { NextResponse } from 'next/server'
+
+// GET /api/admin/members-export?format=ndjson|csv
+// Exportación completa de la plantilla de socios, para cuando de verdad hacen
+// falta todos (list_members del asistente solo devuelve páginas). Recorre
+// rpc_list_members por cursor (nombre, id) y va enviando cada página según
+// se lee: ni el servidor ni el cliente tienen nunca la lista entera en memoria.
+export const maxDuration = 60
+
+const PAGE_SIZE = 500
+const CSV_COLUMNS = ['id', 'name', 'email', 'trainer_name', 'has_diet', 'has_workout', 'has_premium', 'created_at']
+
+const csvField = (value) => {
+  if (value === null || value === undefined) return ''
+  const text = String(value)
+  return /[",\n\r]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text
+}
+
+export async function GET(req) {
+  if (process.env.STATIC_EXPORT === 'true') {
+    return NextResponse.json({ static: true })
+  }
+
+  // Auth: solo admin
+  const token = req.headers.get('authorization')?.replace(/^Bearer\s+/i, '')
+  if (!token) return NextResponse.json({ error: 'No autorizado' }, { status: 401 })
+
+  const supabaseAdmin = createClient(
+    process.env.NEXT_PUBLIC_SUPABASE_URL,
+    process.env.SUPABASE_SERVICE_ROLE_KEY,
+    { auth: { autoRefreshToken: false, persistSession: false } }
+  )
+  const { data: { user: caller }, error: authErr } = await supabaseAdmin.auth.getUser(token)
+  if (authErr || !caller) return NextResponse.json({ error: 'Token inválido' }, { status: 401 })
+
+  const { data: callerProfile } = await supabaseAdmin
+    .from('profiles')
+    .select('role')
+    .eq('id', caller.id)
+    .maybeSingle()
+  if (callerProfile?.role !== 'admin') {
+    return NextResponse.json({ error: 'Prohibido' }, { status: 403 })
+  }
+
+  const format = new URL(req.url).searchParams.get('format') === 'csv' ? 'csv' : 'ndjson'
+
+  // rpc_list_members comprueba is_admin(): se llama con el JWT del admin
+  const client = createClient(
+    process.env.NEXT_PUBLIC_SUPABASE_URL,
+    process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY,
+    {
+      global: { headers: { Authorization: `Bearer ${token}` } },
+      auth: { persistSession: false, autoRefreshToken: false }
+    }
+  )
+
+  const encoder = new TextEncoder()
+  let after = null
+  let done = false
+
+  // pull: la siguiente página solo se pide cuando el cliente ha consumido la anterior
+  const stream = new ReadableStream({
+    start(controller) {
+      if (format === 'csv') controller.enqueue(encoder.encode(CSV_COLUMNS.join(',') + '\n'))
+    },
+    async pull(controller) {
+      if (done) return controller.close()
+      const { data, error } = await client.rpc('rpc_list_members', {
+        p_limit: PAGE_SIZE,
+        p_after_name: after?.name ?? null,
+        p_after_id: after?.id ?? null
+      })
+      if (error) {
+        // Las cabeceras ya se enviaron: el error viaja como última línea
+        console.error('[members-export] error leyendo socios:', error)
+        controller.enqueue(encoder.encode(format === 'csv'
+          ? `# error: ${error.message}\n`
+          : JSON.stringify({ error: error.message }) + '\n'))
+        return controller.close()
+      }
+      const rows = data || []
+      if (rows.length) {
+        const lines = rows.map(r => format === 'csv'
+          ? CSV_COLUMNS.map(c => csvField(r[c])).join(',')
+          : JSON.stringify(r))
+        controller.enqueue(encoder.encode(lines.join('\n') + '\n'))
+        const last = rows[rows.length - 1]
+        after = { name: last.name || '', id: last.id }
+      }
+      done = rows.length < PAGE_SIZE
+      if (done) controller.close()
+    }
+  })
+
+  const date = new Date().toISOString().split('T')[0]
+  return new Response(stream, {
+    headers: {
+      'Content-Type': format === 'csv' ? 'text/csv; charset=utf-8' : 'application/x-ndjson; charset=utf-8',
+      'Content-Disposition': `attachment; filename="socios-${date}.${format === 'csv' ? 'csv' : 'ndjson'}"`,
+      'Cache-Control': 'no-store'
+    }
+  })
+}
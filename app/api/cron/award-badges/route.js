@@ -44,7 +44,8 @@ export async function GET(request) {
     return NextResponse.json({ error: membersError.message }, { status: 500 })
   }
 
-  const results = { members: members?.length || 0, badges: badges?.length || 0, awarded: 0, errors: [] }
+  const useSummaries = await rollupsAreFresh(supabase)
+  const results = { members: members?.length || 0, badges: badges?.length || 0, awarded: 0, useSummaries, errors: [] }
 
   for (const member of members || []) {
     try {
@@ -59,7 +60,7 @@ export async function GET(request) {
 
       // Una sola pasada de stats por socio, reutilizada para todas sus
       // insignias pendientes (evita repetir las mismas consultas 7 veces).
-      const stats = await computeMemberStats(supabase, member.id, pending)
+      const stats = await computeMemberStats(supabase, member.id, pending, useSummaries)
 
       for (const badge of pending) {
         if (meetsCondition(badge, stats)) {
@@ -97,14 +98,50 @@ function meetsCondition(badge, stats) {
   }
 }
 
-async function computeMemberStats(supabase, memberId, pendingBadges) {
+// Los resúmenes solo valen si scripts/activity_rollups.py ha pasado hace poco
+// para las dos fuentes (corre como job con --every): si el job se para, el
+// cron vuelve a los datos brutos en vez de dejar de dar insignias.
+const ROLLUP_MAX_AGE_MS = 6 * 60 * 60 * 1000
+const ROLLUP_SOURCES = ['daily_activity', 'workout_checkins']
+
+async function rollupsAreFresh(supabase) {
+  const { data, error } = await supabase
+    .from('activity_rollup_state')
+    .select('source, watermark')
+  if (error || !data) return false
+  const oldest = Date.now() - ROLLUP_MAX_AGE_MS
+  return ROLLUP_SOURCES.every(source => {
+    const row = data.find(r => r.source === source)
+    return row && new Date(row.watermark).getTime() >= oldest
+  })
+}
+
+async function computeMemberStats(supabase, memberId, pendingBadges, useSummaries) {
   const needsWorkouts = pendingBadges.some(b => ['first_workout', 'workouts_count'].includes(b.condition_type))
   const needsStreak = pendingBadges.some(b => b.condition_type === 'streak')
   const needsChallenges = pendingBadges.some(b => b.condition_type === 'challenge_completed')
 
   const stats = { totalWorkouts: 0, longestStreak: 0, challengesCompleted: 0 }
 
-  if (needsWorkouts) {
+  // Resumen precalculado (scripts/activity_rollups.py): una fila por socio en
+  // vez de leer todos sus check-ins y días de actividad. Va con el retraso de
+  // la última pasada del job; sin fila (socio nuevo), con el job parado o sin
+  // la migración se calcula como siempre desde los datos brutos.
+  let fromSummary = false
+  if (useSummaries && (needsWorkouts || needsStreak)) {
+    const { data: summary, error } = await supabase
+      .from('member_activity_summary')
+      .select('total_workouts, longest_streak')
+      .eq('member_id', memberId)
+      .maybeSingle()
+    if (!error && summary) {
+      stats.totalWorkouts = summary.total_workouts
+      stats.longestStreak = summary.longest_streak
+      fromSummary = true
+    }
+  }
+
+  if (needsWorkouts && !fromSummary) {
     const { count } = await supabase
       .from('workout_checkins')
       .select('id', { count: 'exact', head: true })
@@ -112,7 +149,7 @@ async function computeMemberStats(supabase, memberId, pendingBadges) {
     stats.totalWorkouts = count || 0
   }
 
-  if (needsStreak) {
+  if (needsStreak && !fromSummary) {
     const [{ data: checkins }, { data: activity }] = await Promise.all([
       supabase.from('workout_checkins').select('checked_in_at').eq('member_id', memberId),
       supabase.from('daily_activity').select('activity_date').eq('member_id', memberId).gt('steps', 0),
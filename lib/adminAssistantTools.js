@@ -164,10 +164,15 @@ export const TOOLS_DEFINITIONS = [
     type: "function",
     function: {
       name: "get_gym_dashboard",
-      description: "Obtener resumen general del gimnasio: total socios, entrenadores, altas del mes, checkins, etc.",
+      description: "Obtener resumen general del gimnasio: total socios, entrenadores, altas del mes, checkins, etc. Sale de una foto de hace pocos minutos (snapshot_at)",
       parameters: {
         type: "object",
-        properties: {}
+        properties: {
+          fresh: {
+            type: "boolean",
+            description: "Recalcular ahora en vez de usar la foto (solo si el admin pide datos al momento)"
+          }
+        }
       }
     }
   },
@@ -336,13 +341,21 @@ export const TOOLS_DEFINITIONS = [
     type: "function",
     function: {
       name: "list_members",
-      description: "Listar todos los socios del gimnasio con información básica",
+      description: "Listar los socios del gimnasio con información básica, por páginas en orden alfabético. Si la respuesta trae next_cursor hay más socios: pásalo en cursor para ver la página siguiente (solo si el admin lo pide)",
       parameters: {
         type: "object",
         properties: {
           limit: {
             type: "integer",
-            description: "Número máximo de socios a mostrar (por defecto 20)"
+            description: "Socios por página (por defecto 20, máximo 50)"
+          },
+          cursor: {
+            type: "string",
+            description: "next_cursor de la página anterior; vacío para la primera"
+          },
+          search: {
+            type: "string",
+            description: "Filtrar por texto en nombre o email (opcional)"
           }
         }
       }
@@ -785,9 +798,49 @@ export const TOOLS_DEFINITIONS = [
   }
   ]
 
+// Herramientas que solo leen datos — se ejecutan automáticamente sin pedir
+// confirmación al admin. Cualquier otra herramienta (asignar, guardar,
+// borrar, modificar) se devuelve al cliente como plan de confirmación.
+export const READ_ONLY_TOOLS = [
+  'find_member', 'get_member_summary', 'get_gym_dashboard', 'list_trainers',
+  'list_recent_posts', 'generate_diet_plan', 'list_workouts', 'get_member_activity',
+  'list_members', 'generate_ai_diet_from_recipes', 'refine_ai_diet', 'generate_member_routine',
+  'search_exercise_catalog',
+  'swap_routine_exercise', 'remove_routine_exercise', 'add_routine_exercise',
+  'modify_routine_exercise', 'modify_routine_day',
+  'list_member_notes', 'list_admin_preferences'
+]
+
+// Herramientas que además llaman a OpenAI o a APIs externas: su latencia no
+// es solo de base de datos, así que scripts/tool_bench.py las salta salvo
+// que se pidan explícitamente.
+export const EXTERNAL_API_TOOLS = [
+  'generate_ai_diet_from_recipes', 'refine_ai_diet', 'generate_member_routine',
+  'bulk_import_recipes', 'search_recipe_ideas'
+]
+
 // Helper para obtener el cliente correcto (autenticado si está disponible)
 const getSupabaseClient = (params) => params?._supabaseClient || supabase
 
+// Páginas de list_members: tope por llamada para no meter la plantilla
+// entera en el contexto del modelo (la exportación completa va por
+// /api/admin/members-export)
+const MAX_MEMBERS_PAGE = 50
+
+// Cursor opaco de rpc_list_members: la última fila (nombre, id) en base64url
+export function encodeMemberCursor(member) {
+  return Buffer.from(JSON.stringify([member.name || '', member.id])).toString('base64url')
+}
+
+export function decodeMemberCursor(cursor) {
+  if (!cursor) return null
+  try {
+    const [name, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'))
+    if (typeof name === 'string' && typeof id === 'string') return { name, id }
+  } catch {}
+  throw new Error('Cursor de paginación no válido: empieza de nuevo sin cursor')
+}
+
 // Dispara la generación del plan de recetas justo al asignar una dieta,
 // en segundo plano (no bloquea la respuesta de la herramienta al admin).
 function triggerRecipePlanGeneration(memberId, dietId, adminToken) {
@@ -805,6 +858,27 @@ export const toolExecutors = {
   async search_exercise_catalog(params) {
     const { query, muscle_group } = params
     const client = getSupabaseClient(params)
+
+    // Índice de trigramas (scripts/exercise_index.py): sin tildes, tolera
+    // erratas y cruza español/inglés ("sentadilla hack" → "Hack squat"),
+    // ordenado por puntuación, sin traerse el catálogo entero
+    const { data: ranked, error: rankError } = await client.rpc('rpc_search_exercises', {
+      p_query: query || '',
+      p_muscle_group: muscle_group || null,
+      p_limit: 10
+    })
+    if (!rankError) {
+      const results = (ranked || []).map(({ name, muscle_primary, default_sets, default_reps, default_rest_seconds }) =>
+        ({ name, muscle_primary, default_sets, default_reps, default_rest_seconds }))
+      return {
+        success: true,
+        exercises: results,
+        count: results.length,
+        message: results.length ? `Encontré ${results.length} ejercicio(s)` : 'Ningún ejercicio del catálogo coincide con esa búsqueda — prueba con otro término o grupo muscular.'
+      }
+    }
+
+    // Fallback (migración del índice sin aplicar): catálogo entero y subcadena
     let q = client
       .from('exercises')
       .select('name, name_aliases, muscle_primary, default_sets, default_reps, default_rest_seconds')
@@ -922,7 +996,9 @@ export const toolExecutors = {
 
   async get_gym_dashboard(params) {
     const client = getSupabaseClient(params)
-    const { data, error } = await client.rpc('rpc_get_gym_dashboard')
+    // Lee la foto que refresca scripts/dashboard_snapshot.py; la RPC solo
+    // recuenta las tablas si tiene más de 15 min o si se pide fresh
+    const { data, error } = await client.rpc('rpc_get_gym_dashboard', { p_force_fresh: params.fresh === true })
     if (error) throw new Error(error.message)
     return { success: true, dashboard: data }
   },
@@ -1081,17 +1157,29 @@ export const toolExecutors = {
     const startDate = new Date()
     startDate.setDate(startDate.getDate() - days)
 
-    const { data, error } = await client
-      .from('daily_activity')
-      .select('activity_date, steps, distance_km, calories_kcal')
-      .eq('member_id', member_id)
-      .gte('activity_date', startDate.toISOString().split('T')[0])
-      .order('activity_date', { ascending: false })
+    // Todo sale de los rollups de scripts/activity_rollups.py: la ventana de
+    // member_activity_days (una fila compacta por día) y rachas/totales de
+    // member_activity_summary, sin recorrer daily_activity ni workout_checkins
+    const [{ data: dayRows, error }, { data: rollup }] = await Promise.all([
+      client
+        .from('member_activity_days')
+        .select('day, steps, distance_km, calories_kcal, workouts')
+        .eq('member_id', member_id)
+        .gte('day', startDate.toISOString().split('T')[0])
+        .order('day', { ascending: false }),
+      client
+        .from('member_activity_summary')
+        .select('current_streak, longest_streak, last_active_date, active_days, total_steps, total_workouts, rolled_up_at')
+        .eq('member_id', member_id)
+        .maybeSingle()
+    ])
     
     if (error) throw new Error(error.message)
+    const data = (dayRows || []).map(({ day, ...rest }) => ({ activity_date: day, ...rest }))
     
+    const yesterday = new Date(Date.now() - 86400000).toISOString().split('T')[0]
     const totalSteps = data?.reduce((sum, d) => sum + (d.steps || 0), 0) || 0
-    const totalDistance = data?.reduce((sum, d) => sum + (d.distance_km || 0), 0) || 0
+    const totalDistance = data?.reduce((sum, d) => sum + (Number(d.distance_km) || 0), 0) || 0
     const totalCalories = data?.reduce((sum, d) => sum + (d.calories_kcal || 0), 0) || 0
     const avgSteps = data?.length ? Math.round(totalSteps / data.length) : 0
     
@@ -1104,7 +1192,18 @@ export const toolExecutors = {
         total_calories: Math.round(totalCalories),
         avg_steps_per_day: avgSteps,
         days_tracked: data?.length || 0
-      }
+      },
+      // Sin fila (socio nuevo o job aún sin pasar) no hay histórico que mostrar.
+      // La racha solo sigue viva si el último día activo fue hoy o ayer (UTC)
+      history: rollup ? {
+        current_streak: rollup.last_active_date >= yesterday ? rollup.current_streak : 0,
+        longest_streak: rollup.longest_streak,
+        last_active_date: rollup.last_active_date,
+        active_days: rollup.active_days,
+        total_steps: rollup.total_steps,
+        total_workouts: rollup.total_workouts,
+        updated_at: rollup.rolled_up_at
+      } : null
     }
   },
 
@@ -1129,24 +1228,59 @@ export const toolExecutors = {
   },
 
   async list_members(params) {
-    const { limit = 20 } = params
+    const { cursor, search = '' } = params
+    const limit = Math.min(Math.max(parseInt(params.limit, 10) || 20, 1), MAX_MEMBERS_PAGE)
     const client = getSupabaseClient(params)
-    // Usar el RPC que ya existe para buscar socios
-    const { data, error } = await client.rpc('rpc_find_member', { p_search: '' })
+    const after = decodeMemberCursor(cursor)
+    // Se pide una fila de más para saber si hay página siguiente sin contar
+    const { data, error } = await client.rpc('rpc_list_members', {
+      p_limit: limit + 1,
+      p_after_name: after?.name ?? null,
+      p_after_id: after?.id ?? null,
+      p_search: search || null
+    })
 
+    let rows = data
     if (error) {
-      // Fallback: buscar en profiles directamente
-      const { data: profiles, error: err2 } = await client
-        .from('profiles')
-        .select('id, name, email, role, has_premium, created_at')
-        .order('name')
-        .limit(limit)
-      
-      if (err2) throw new Error(err2.message)
-      return { success: true, members: profiles || [], count: profiles?.length || 0 }
+      // Fallback (migración de rpc_list_members sin aplicar): mismo orden y
+      // mismo cursor directamente sobre profiles. PostgREST no ordena por
+      // coalesce(name, ''), así que los socios sin nombre (el primer tramo del
+      // orden de la RPC) se leen aparte por id y después los que tienen nombre
+      const term = search.replace(/[,()*"\\]/g, ' ').trim()
+      const memberQuery = () => {
+        let query = client
+          .from('profiles')
+          .select('id, name, email, role, has_premium, created_at')
+          .eq('role', 'member')
+        if (term) query = query.or(`name.ilike.*${term}*,email.ilike.*${term}*`)
+        return query
+      }
+      rows = []
+      if (!after || after.name === '') {
+        let query = memberQuery().or('name.is.null,name.eq.""').order('id').limit(limit + 1)
+        if (after) query = query.gt('id', after.id)
+        const { data: unnamed, error: err2 } = await query
+        if (err2) throw new Error(err2.message)
+        rows = unnamed || []
+      }
+      if (rows.length <= limit) {
+        let query = memberQuery().order('name').order('id').limit(limit + 1 - rows.length)
+        if (after?.name) {
+          const name = `"${after.name.replace(/\\/g, '\\\\').replace(/"/g, '\\"')}"`
+          query = query.or(`name.gt.${name},and(name.eq.${name},id.gt.${after.id})`)
+        } else {
+          query = query.gt('name', '')
+        }
+        const { data: named, error: err2 } = await query
+        if (err2) throw new Error(err2.message)
+        rows = rows.concat(named || [])
+      }
     }
-    
-    return { success: true, members: data || [], count: data?.length || 0 }
+
+    const members = (rows || []).slice(0, limit)
+    const last = members[members.length - 1]
+    const next_cursor = rows?.length > limit ? encodeMemberCursor(last) : null
+    return { success: true, members, count: members.length, next_cursor, has_more: next_cursor !== null }
   },
 
   async search_recipe_ideas(params) {
@@ -19,13 +19,14 @@ setInterval(() => {
  * @param {string} identifier - Unique ID (token hash or IP)
  * @param {number} limit - Max requests per window
  * @param {number} windowMs - Window size in ms
- * @returns {Promise<{success: boolean, remaining: number}>}
+ * @returns {Promise<{success: boolean, remaining: number, resetMs: number}>}
+ *   resetMs = ms hasta que se abre la siguiente ventana (para Retry-After)
  */
 export async function checkRateLimit(identifier, limit = 10, windowMs = 60000) {
   const now = Date.now()
   if (!rates.has(identifier)) {
     rates.set(identifier, { count: 1, firstRequest: now, lastRequest: now })
-    return { success: true, remaining: limit - 1 }
+    return { success: true, remaining: limit - 1, resetMs: windowMs }
   }
 
   const data = rates.get(identifier)
@@ -35,16 +36,16 @@ export async function checkRateLimit(identifier, limit = 10, windowMs = 60000) {
   if (now - data.firstRequest > windowMs) {
     data.count = 1
     data.firstRequest = now
-    return { success: true, remaining: limit - 1 }
+    return { success: true, remaining: limit - 1, resetMs: windowMs }
   }
 
   if (data.count >= limit) {
     console.warn(`[RateLimit] Blocked ${identifier}. Limit: ${limit}/min`)
-    return { success: false, remaining: 0 }
+    return { success: false, remaining: 0, resetMs: windowMs - (now - data.firstRequest) }
   }
 
   data.count++
-  return { success: true, remaining: limit - data.count }
+  return { success: true, remaining: limit - data.count, resetMs: windowMs - (now - data.firstRequest) }
 }
 
 export function getIdentifier(req) {
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Activity rollups: per-member days, ISO weeks and streak/total summary
+Keeps member_activity_days, member_activity_weeks and member_activity_summary
+(supabase/migrations/20261018120000_activity_rollups_and_streaks.sql) up to
+date from daily_activity and workout_checkins, so get_member_activity and the
+badge cron read one summary row instead of reducing the whole history.
+
+Incremental by default: the (member, day) pairs with rows changed since the
+watermark of each source (activity_rollup_state: daily_activity.updated_at,
+workout_checkins.created_at) are recomputed from the raw rows, then only
+the weeks and members they fall in. A member whose changes are all after
+their last active day only has the open streak re-read; anyone else is
+recomputed from their compact day rows. Days and weeks are recomputed from
+the source and appended totals only cover days that were inactive before, so
+re-reading rows is harmless: each run goes back --overlap minutes before the
+watermark to catch transactions that committed late. Deleted rows are not seen by a watermark; --full
+rebuilds everything and --check says when that is needed.
+
+Usage:
+    DATABASE_URL=... python scripts/activity_rollups.py [--full] [--overlap 10] [--every 900]
+    DATABASE_URL=... python scripts/activity_rollups.py --check [--sample 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from synthetic_data import is_local
+
+DEFAULT_OVERLAP_MINUTES = 10
+DEFAULT_EVERY = 900
+SOURCES = {
+    # source -> (table, column the watermark follows)
+    "daily_activity": ("public.daily_activity", "updated_at"),
+    "workout_checkins": ("public.workout_checkins", "created_at"),
+}
+TABLES = {"days": "public.member_activity_days", "weeks": "public.member_activity_weeks",
+          "summary": "public.member_activity_summary"}
+
+# (member, day) pairs to recompute. The check-in day is its UTC date, like
+# checked_in_at.slice(0, 10) in cron/award-badges
+CHANGED_DAYS = """
+CREATE TEMP TABLE _changed_days ON COMMIT DROP AS
+SELECT DISTINCT member_id, day FROM (
+  SELECT member_id, activity_date AS day FROM public.daily_activity
+  WHERE updated_at > %(since_daily_activity)s::timestamptz
+  UNION ALL
+  SELECT member_id, (checked_in_at AT TIME ZONE 'UTC')::date FROM public.workout_checkins
+  WHERE created_at > %(since_workout_checkins)s::timestamptz
+) changed
+WHERE member_id IS NOT NULL
+"""
+# --full: every pair, without the watermark predicates (daily_activity.updated_at
+# is nullable and `NULL > '-infinity'` is not true)
+ALL_DAYS = """
+CREATE TEMP TABLE _changed_days ON COMMIT DROP AS
+SELECT DISTINCT member_id, day FROM (
+  SELECT member_id, activity_date AS day FROM public.daily_activity
+  UNION ALL
+  SELECT member_id, (checked_in_at AT TIME ZONE 'UTC')::date FROM public.workout_checkins
+) changed
+WHERE member_id IS NOT NULL
+"""
+SAMPLE_DAYS = """
+CREATE TEMP TABLE _changed_days ON COMMIT DROP AS
+SELECT DISTINCT member_id, day FROM (
+  SELECT member_id, activity_date AS day FROM public.daily_activity WHERE member_id = ANY(%(members)s::uuid[])
+  UNION ALL
+  SELECT member_id, (checked_in_at AT TIME ZONE 'UTC')::date FROM public.workout_checkins
+  WHERE member_id = ANY(%(members)s::uuid[])
+) changed
+"""
+
+REFRESH_DAYS = """
+DELETE FROM {days} d USING _changed_days c WHERE d.member_id = c.member_id AND d.day = c.day;
+INSERT INTO {days} (member_id, day, steps, distance_km, calories_kcal, workouts)
+SELECT member_id, day, sum(steps), sum(distance_km), sum(calories_kcal), sum(workouts)
+FROM (
+  SELECT a.member_id, a.activity_date AS day, coalesce(a.steps, 0) AS steps,
+         coalesce(a.distance_km, 0) AS distance_km, coalesce(a.calories_kcal, 0) AS calories_kcal, 0 AS workouts
+  FROM _changed_days c
+  JOIN public.daily_activity a ON a.member_id = c.member_id AND a.activity_date = c.day
+  UNION ALL
+  SELECT w.member_id, c.day, 0, 0, 0, 1
+  FROM _changed_days c
+  JOIN public.workout_checkins w ON w.member_id = c.member_id
+   AND w.checked_in_at >= (c.day::timestamp AT TIME ZONE 'UTC')
+   AND w.checked_in_at < ((c.day + 1)::timestamp AT TIME ZONE 'UTC')
+) rows
+GROUP BY member_id, day;
+"""
+
+REFRESH_WEEKS = """
+CREATE TEMP TABLE _changed_weeks ON COMMIT DROP AS
+SELECT DISTINCT member_id, date_trunc('week', day)::date AS week_start FROM _changed_days;
+DELETE FROM {weeks} w USING _changed_weeks c WHERE w.member_id = c.member_id AND w.week_start = c.week_start;
+INSERT INTO {weeks} (member_id, week_start, steps, distance_km, calories_kcal, workouts, days_tracked, active_days)
+SELECT d.member_id, c.week_start, sum(d.steps), sum(d.distance_km), sum(d.calories_kcal), sum(d.workouts),
+       count(*), count(*) FILTER (WHERE d.active)
+FROM _changed_weeks c
+JOIN {days} d ON d.member_id = c.member_id AND d.day >= c.week_start AND d.day < c.week_start + 7
+GROUP BY d.member_id, c.week_start;
+"""
+
+# Streaks by gaps-and-islands (day - row_number is constant inside a run).
+# `append` members (every changed day after their last active day) only
+# re-read the open run and add the changed days to their totals; the rest
+# are recomputed from all their day rows.
+REFRESH_SUMMARY = """
+WITH touched AS (
+  SELECT member_id, min(day) AS first_changed FROM _changed_days GROUP BY member_id
+), scope AS (
+  SELECT t.member_id,
+         coalesce(s.last_active_date < t.first_changed AND s.current_streak_start IS NOT NULL, false) AS append,
+         s.current_streak_start, s.longest_streak, s.active_days, s.total_steps, s.total_workouts
+  FROM touched t
+  LEFT JOIN {summary} s ON s.member_id = t.member_id
+), days AS (
+  SELECT d.member_id, d.day, d.active
+  FROM scope sc
+  JOIN {days} d ON d.member_id = sc.member_id
+   AND d.day >= CASE WHEN sc.append THEN sc.current_streak_start ELSE '-infinity'::date END
+), runs AS (
+  SELECT member_id, min(day) AS start_day, max(day) AS end_day, count(*) AS length
+  FROM (SELECT member_id, day, day - (row_number() OVER (PARTITION BY member_id ORDER BY day))::int AS island
+        FROM days WHERE active) active_days
+  GROUP BY member_id, island
+), streaks AS (
+  SELECT member_id, max(length) AS longest, max(end_day) AS last_active,
+         (array_agg(length ORDER BY end_day DESC))[1] AS current,
+         (array_agg(start_day ORDER BY end_day DESC))[1] AS current_start
+  FROM runs GROUP BY member_id
+), totals AS (
+  SELECT d.member_id, count(*) FILTER (WHERE d.active) AS active_days, sum(d.steps) AS steps,
+         sum(d.workouts) AS workouts
+  FROM scope sc
+  JOIN {days} d ON d.member_id = sc.member_id
+  WHERE NOT sc.append OR (d.member_id, d.day) IN (SELECT member_id, day FROM _changed_days)
+  GROUP BY d.member_id
+)
+INSERT INTO {summary} (member_id, current_streak, current_streak_start, longest_streak, last_active_date,
+                       active_days, total_steps, total_workouts, rolled_up_at)
+SELECT sc.member_id, coalesce(st.current, 0), st.current_start,
+       greatest(coalesce(st.longest, 0), CASE WHEN sc.append THEN sc.longest_streak ELSE 0 END),
+       st.last_active,
+       coalesce(t.active_days, 0) + CASE WHEN sc.append THEN sc.active_days ELSE 0 END,
+       coalesce(t.steps, 0) + CASE WHEN sc.append THEN sc.total_steps ELSE 0 END,
+       coalesce(t.workouts, 0) + CASE WHEN sc.append THEN sc.total_workouts ELSE 0 END,
+       now()
+FROM scope sc
+LEFT JOIN streaks st ON st.member_id = sc.member_id
+LEFT JOIN totals t ON t.member_id = sc.member_id
+ON CONFLICT (member_id) DO UPDATE SET
+  current_streak = EXCLUDED.current_streak, current_streak_start = EXCLUDED.current_streak_start,
+  longest_streak = EXCLUDED.longest_streak, last_active_date = EXCLUDED.last_active_date,
+  active_days = EXCLUDED.active_days, total_steps = EXCLUDED.total_steps,
+  total_workouts = EXCLUDED.total_workouts, rolled_up_at = EXCLUDED.rolled_up_at
+"""
+
+def load_watermarks(conn) -> Dict[str, Optional[object]]:
+    rows = dict(conn.execute("SELECT source, watermark FROM public.activity_rollup_state").fetchall())
+    return {source: rows.get(source) for source in SOURCES}
+
+def refresh(conn, tables: Dict[str, str], timings: Dict[str, float]) -> Dict[str, int]:
+    """Recompute days, weeks and summaries for the pairs in _changed_days; returns rows written per table"""
+    counts = {"changed_days": conn.execute("SELECT count(*) FROM _changed_days").fetchone()[0]}
+    for name, sql in (("days", REFRESH_DAYS), ("weeks", REFRESH_WEEKS), ("summary", REFRESH_SUMMARY)):
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(sql.format(**tables))
+        # Multi-statement strings: the INSERT is the last result
+        while cursor.nextset():
+            pass
+        counts[name] = cursor.rowcount
+        timings[name] = time.perf_counter() - start
+    return counts
+
+def run_rollups(conn, full: bool, overlap_minutes: float) -> Dict:
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    # One transaction: readers see the old rollups or the new ones, never half
+    with conn.transaction():
+        # Two runs at once would race on the same buckets; the second one waits
+        conn.execute("SELECT pg_advisory_xact_lock(hashtext('activity_rollups'))")
+        started_at = conn.execute("SELECT now()").fetchone()[0]
+        watermarks = load_watermarks(conn)
+        if full or any(w is None for w in watermarks.values()):
+            full = True
+            conn.execute(f"TRUNCATE {', '.join(TABLES.values())}")
+            since = {f"since_{source}": "-infinity" for source in SOURCES}
+        else:
+            since = {f"since_{source}": w - timedelta(minutes=overlap_minutes) for source, w in watermarks.items()}
+
+        t0 = time.perf_counter()
+        conn.execute(ALL_DAYS if full else CHANGED_DAYS, since)
+        timings["changed"] = time.perf_counter() - t0
+        counts = refresh(conn, TABLES, timings)
+
+        for source, (table, column) in SOURCES.items():
+            where = "" if full else f" WHERE {column} > %s::timestamptz"
+            changed = conn.execute(f"SELECT count(*) FROM {table}{where}",
+                                   () if full else (since[f"since_{source}"],)).fetchone()[0]
+            conn.execute("INSERT INTO public.activity_rollup_state (source, watermark, last_rows, updated_at) "
+                         "VALUES (%(source)s, %(watermark)s, %(rows)s, now()) "
+                         "ON CONFLICT (source) DO UPDATE SET watermark = EXCLUDED.watermark, "
+                         "last_rows = EXCLUDED.last_rows, updated_at = now()",
+                         {"source": source, "watermark": started_at, "rows": changed})
+            counts[source] = changed
+    return {"full": full, "since": since, "watermark": started_at, "counts": counts, "timings": timings,
+            "seconds": time.perf_counter() - start}
+
+# ---------------------------------------------------------------------------
+# Consistency check
+# ---------------------------------------------------------------------------
+
+CHECK_TABLES = {"days": "_check_days", "weeks": "_check_weeks", "summary": "_check_summary"}
+COMPARE = {
+    "days": ("member_id, day, steps, distance_km, calories_kcal, workouts", "member_id, day"),
+    "weeks": ("member_id, week_start, steps, distance_km, calories_kcal, workouts, days_tracked, active_days",
+              "member_id, week_start"),
+    "summary": ("member_id, current_streak, current_streak_start, longest_streak, last_active_date, active_days, "
+                "total_steps, total_workouts", "member_id"),
+}
+
+def check(conn, sample: int, seed: int) -> Dict[str, List]:
+    """
+    Rebuild the rollups of the sampled members (0 = all) from the raw rows
+    into temp tables, with the same SQL in full mode, and diff both ways.
+    Returns table -> up to 5 example differences, plus counts.
+    """
+    members = [r[0] for r in conn.execute(
+        "SELECT DISTINCT member_id::text FROM public.daily_activity WHERE member_id IS NOT NULL "
+        "UNION SELECT DISTINCT member_id::text FROM public.workout_checkins WHERE member_id IS NOT NULL").fetchall()]
+    if sample and sample < len(members):
+        members = random.Random(seed).sample(members, sample)
+    report: Dict[str, List] = {"members": [len(members)]}
+    with conn.transaction(force_rollback=True):
+        for name, table in CHECK_TABLES.items():
+            conn.execute(f"CREATE TEMP TABLE {table} (LIKE {TABLES[name]} INCLUDING ALL) ON COMMIT DROP")
+        conn.execute(SAMPLE_DAYS, {"members": members})
+        refresh(conn, CHECK_TABLES, {})
+        for name, (columns, key) in COMPARE.items():
+            scope = "member_id = ANY(%(members)s::uuid[])"
+            missing = conn.execute(f"SELECT {columns} FROM {CHECK_TABLES[name]} EXCEPT "
+                                   f"SELECT {columns} FROM {TABLES[name]} WHERE {scope} ORDER BY {key}",
+                                   {"members": members}).fetchall()
+            extra = conn.execute(f"SELECT {columns} FROM {TABLES[name]} WHERE {scope} EXCEPT "
+                                 f"SELECT {columns} FROM {CHECK_TABLES[name]} ORDER BY {key}",
+                                 {"members": members}).fetchall()
+            checked = conn.execute(f"SELECT count(*) FROM {CHECK_TABLES[name]}").fetchone()[0]
+            report[name] = [checked, missing, extra]
+    return report
+
+def print_check(report: Dict[str, List]) -> bool:
+    ok = True
+    print(f"🔍 Comprobando rollups contra los datos brutos de {report['members'][0]} socios")
+    for name in COMPARE:
+        checked, missing, extra = report[name]
+        if not missing and not extra:
+            print(f"   ✅ {TABLES[name]}: {checked} filas coinciden")
+            continue
+        ok = False
+        print(f"   ❌ {TABLES[name]}: {len(missing)} filas faltan o difieren, {len(extra)} sobran (de {checked})")
+        for row in missing[:3]:
+            print(f"      esperado {tuple(str(v) for v in row)}")
+        for row in extra[:3]:
+            print(f"      guardado {tuple(str(v) for v in row)}")
+    if not ok:
+        print("💡 Filas borradas o cambios fuera de la marca de agua: relanza con --full")
+    return ok
+
+def print_run(result: Dict):
+    counts, timings = result["counts"], result["timings"]
+    mode = "completa" if result["full"] else "incremental"
+    print(f"📊 Pasada {mode}: {counts['daily_activity']} filas de daily_activity y {counts['workout_checkins']} "
+          f"check-ins leídos, {counts['changed_days']} (socio, día) cambiados → {counts['days']} días, "
+          f"{counts['weeks']} semanas, {counts['summary']} resúmenes en {result['seconds']:.2f}s")
+    print(f"   cambios {timings.get('changed', 0):.2f}s, días {timings['days']:.2f}s, semanas {timings['weeks']:.2f}s, "
+          f"resúmenes {timings['summary']:.2f}s")
+    print(f"✅ Marca de agua → {result['watermark']:%Y-%m-%d %H:%M:%S%z}")
+
+def run_loop(conn, full: bool, overlap_minutes: float, every: float):
+    """One pass (or --full), then an incremental pass every `every` seconds when set"""
+    while True:
+        try:
+            print_run(run_rollups(conn, full, overlap_minutes))
+        except Exception as e:  # psycopg.Error; in a loop one failed pass must not end the job
+            if not every:
+                raise
+            print(f"❌ Pasada fallida: {str(e).splitlines()[0]}")
+        if not every:
+            return
+        full = False
+        time.sleep(every)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rollups de actividad por socio (días, semanas, rachas)")
+    parser.add_argument("--full", action="store_true", help="reconstruye todo desde cero (backfill)")
+    parser.add_argument("--every", type=float, default=0,
+                        help=f"pasada incremental cada N segundos sin salir (0 = una vez; p. ej. {DEFAULT_EVERY})")
+    parser.add_argument("--overlap", type=float, default=DEFAULT_OVERLAP_MINUTES,
+                        help=f"minutos que se releen antes de la marca de agua (por defecto {DEFAULT_OVERLAP_MINUTES})")
+    parser.add_argument("--check", action="store_true", help="compara los rollups con los datos brutos, sin escribir")
+    parser.add_argument("--sample", type=int, default=0, help="con --check: solo N socios al azar (0 = todos)")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de la muestra de --check")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permite un DATABASE_URL que no es local (el job de producción)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import psycopg
+
+    args = parse_args()
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+    if not is_local(dsn) and not args.allow_remote:
+        raise SystemExit("❌ DATABASE_URL no apunta a una base local; usa --allow-remote para el job de producción")
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        if args.check:
+            sys.exit(0 if print_check(check(conn, args.sample, args.seed)) else 1)
+        run_loop(conn, args.full, args.overlap, max(args.every, 0))
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Load generator / latency benchmark for /api/admin-assistant
+Used by `backend_test.py bench`: drives the endpoint at a fixed concurrency
+(closed loop) or a target request rate (open loop) and reports latency
+percentiles, throughput and error classes per scenario.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import httpx
+
+from assistant_client import build_payload, make_async_client, token_usage
+
+# Error classes reported in the breakdown (anything else is "ok"). pool_timeout
+# is the client running out of connections, not the server being slow
+ERROR_CLASSES = ["timeout", "pool_timeout", "429", "4xx", "5xx", "connection", "bad_json"]
+
+def classify_response(response: httpx.Response) -> str:
+    """Map an HTTP response to "ok" or one of ERROR_CLASSES"""
+    code = response.status_code
+    if code == 429:
+        return "429"
+    if code >= 500:
+        return "5xx"
+    if code >= 400:
+        return "4xx"
+    try:
+        response.json()
+    except ValueError:
+        return "bad_json"
+    return "ok"
+
+async def timed_request(client: httpx.AsyncClient, endpoint: str, message: str):
+    """One request -> (outcome, elapsed_seconds, response_bytes, tokens or None)"""
+    start = time.perf_counter()
+    size, tokens = 0, None
+    try:
+        response = await client.post(endpoint, json=build_payload(message))
+        outcome = classify_response(response)
+        size = len(response.content)
+        tokens = token_usage(response.headers.get("server-timing"))
+    except httpx.PoolTimeout:
+        outcome = "pool_timeout"
+    except httpx.TimeoutException:
+        outcome = "timeout"
+    except httpx.HTTPError:
+        outcome = "connection"
+    return outcome, time.perf_counter() - start, size, tokens
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+class BenchResults:
+    """Per-scenario latency samples and outcome counts"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)  # scenario -> [seconds] (successful requests only)
+        self.sizes = defaultdict(list)  # scenario -> [response bytes] (successful requests only)
+        self.tokens = defaultdict(list)  # scenario -> [input + output tokens] (when the route reports them)
+        self.outcomes = defaultdict(Counter)  # scenario -> Counter(outcome)
+        self.client_waits: List[float] = []  # open loop: seconds each request waited for a free connection
+        self.wall_time = 0.0
+
+    def record(self, scenario: str, outcome: str, elapsed: float, size: int = 0, tokens: int = None):
+        self.outcomes[scenario][outcome] += 1
+        if outcome == "ok":
+            self.latencies[scenario].append(elapsed)
+            self.sizes[scenario].append(size)
+            if tokens is not None:
+                self.tokens[scenario].append(tokens)
+
+    def summary(self) -> Dict[str, Dict]:
+        rows = {}
+        for scenario in sorted(self.outcomes):
+            lat = sorted(self.latencies[scenario])
+            outcomes = self.outcomes[scenario]
+            total = sum(outcomes.values())
+            rows[scenario] = {
+                "requests": total,
+                "ok": outcomes["ok"],
+                "p50": percentile(lat, 50),
+                "p90": percentile(lat, 90),
+                "p99": percentile(lat, 99),
+                "max": lat[-1] if lat else 0.0,
+                "throughput": outcomes["ok"] / self.wall_time if self.wall_time else 0.0,
+                "errors": {cls: outcomes[cls] for cls in ERROR_CLASSES if outcomes[cls]},
+            }
+        return rows
+
+    def print_report(self):
+        print("\n" + "=" * 100)
+        print("📊 BENCHMARK REPORT")
+        print("=" * 100)
+        print(f"{'Scenario':<28}{'req':>6}{'ok':>6}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}{'ok/s':>8}  errors")
+        for scenario, row in self.summary().items():
+            errors = ", ".join(f"{k}={v}" for k, v in row["errors"].items()) or "-"
+            print(f"{scenario:<28}{row['requests']:>6}{row['ok']:>6}"
+                  f"{row['p50']:>8.2f}{row['p90']:>8.2f}{row['p99']:>8.2f}{row['max']:>8.2f}"
+                  f"{row['throughput']:>8.2f}  {errors}")
+        total = sum(sum(c.values()) for c in self.outcomes.values())
+        print(f"\n⏱️ {total} requests in {self.wall_time:.1f}s "
+              f"({total / self.wall_time if self.wall_time else 0:.2f} req/s overall)")
+        waits = sorted(self.client_waits)
+        if waits and waits[-1] > 0.001:
+            queued = sum(1 for w in waits if w > 0.001)
+            print(f"⏳ Client wait for a free connection (included in the latencies above): "
+                  f"p50 {percentile(waits, 50):.2f}s, p99 {percentile(waits, 99):.2f}s, max {waits[-1]:.2f}s "
+                  f"({queued}/{len(waits)} requests waited)")
+            print("⚠️ Requests queued in the client: raise --max-in-flight, or the server is not "
+                  "keeping up with --rate")
+
+async def run_closed_loop(endpoint: str, scenarios: Dict[str, str], concurrency: int,
+                          total_requests: int, timeout: int) -> BenchResults:
+    """`concurrency` workers each send a new request as soon as the previous one finishes"""
+    results = BenchResults()
+    names = list(scenarios)
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(names[i % len(names)])
+
+    async with make_async_client(concurrency, timeout) as client:
+        async def worker():
+            while True:
+                try:
+                    scenario = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results.record(scenario, *await timed_request(client, endpoint, scenarios[scenario]))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        results.wall_time = time.perf_counter() - start
+    return results
+
+async def run_open_loop(endpoint: str, scenarios: Dict[str, str], rate: float,
+                        total_requests: int, timeout: int, max_in_flight: int = 100) -> BenchResults:
+    """
+    Poisson arrivals at `rate` req/s regardless of how fast the server answers.
+    Latency runs from the scheduled arrival, so time spent waiting for one of
+    the `max_in_flight` connections counts (no coordinated omission); that
+    wait is also kept apart in `client_waits`.
+    """
+    results = BenchResults()
+    names = list(scenarios)
+    slots = asyncio.Semaphore(max_in_flight)
+
+    async with make_async_client(max_in_flight, timeout) as client:
+        async def one(scenario, arrived):
+            async with slots:
+                waited = time.perf_counter() - arrived
+                outcome, elapsed, size, tokens = await timed_request(client, endpoint, scenarios[scenario])
+            results.client_waits.append(waited)
+            results.record(scenario, outcome, waited + elapsed, size, tokens)
+
+        start = time.perf_counter()
+        arrival = start
+        tasks = []
+        for i in range(total_requests):
+            # Absolute schedule: a late wake-up does not push later arrivals back
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(names[i % len(names)], arrival)))
+            arrival += random.expovariate(rate)
+        await asyncio.gather(*tasks)
+        results.wall_time = time.perf_counter() - start
+    return results
+
+def run_benchmark(endpoint: str, scenarios: Dict[str, str], concurrency: int = 4,
+                  rate: float = None, total_requests: int = 20, timeout: int = 60,
+                  max_in_flight: int = 100) -> BenchResults:
+    """Entry point used by backend_test.py: open loop if `rate` is set, closed loop otherwise"""
+    if rate:
+        print(f"🚀 Open loop: {total_requests} requests at {rate} req/s "
+              f"(max {max_in_flight} in flight) → {endpoint}")
+        coro = run_open_loop(endpoint, scenarios, rate, total_requests, timeout, max_in_flight)
+    else:
+        print(f"🚀 Closed loop: {total_requests} requests, concurrency {concurrency} → {endpoint}")
+        coro = run_closed_loop(endpoint, scenarios, concurrency, total_requests, timeout)
+    results = asyncio.run(coro)
+    results.print_report()
+    return results
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Shared client for the Admin Assistant test scripts.
+Pooled httpx client (scripts/http_client.py) + concurrency cap so independent
+scenarios run in parallel, and the sync request helper of the sequential runs
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+import http_client
+from rate_limiter import log_retry
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 60
+
+def build_payload(message: str) -> Dict[str, Any]:
+    """Request body for a single-turn conversation"""
+    return {
+        "messages": [
+            {
+                "role": "user",
+                "content": message
+            }
+        ]
+    }
+
+def default_headers() -> Dict[str, str]:
+    """JSON headers, plus the admin's Supabase JWT from ASSISTANT_TOKEN if set (the route requires it)"""
+    headers = {"Content-Type": "application/json"}
+    token = os.environ.get("ASSISTANT_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """'llm_r0;dur=812.4, tools_r0;dur=95' -> {"llm_r0": 0.8124, "tools_r0": 0.095} (seconds, repeats summed)"""
+    phases: Dict[str, float] = {}
+    for entry in (header or "").split(","):
+        duration = re.search(r"\bdur=([\d.]+)", entry)
+        if not duration:
+            continue
+        name = entry.split(";")[0].strip()
+        phases[name] = phases.get(name, 0.0) + float(duration.group(1)) / 1000
+    return phases
+
+def parse_server_counts(header: Optional[str]) -> Dict[str, int]:
+    """Numeric `desc` entries without a duration: 'tokens_in;desc=3120' -> {"tokens_in": 3120}"""
+    counts: Dict[str, int] = {}
+    for entry in (header or "").split(","):
+        value = re.search(r'\bdesc="?(\d+)"?', entry)
+        if value and "dur=" not in entry:
+            name = entry.split(";")[0].strip()
+            counts[name] = counts.get(name, 0) + int(value.group(1))
+    return counts
+
+def token_usage(header: Optional[str]) -> Optional[int]:
+    """Input + output tokens of the turn, None when the route did not call Claude"""
+    counts = parse_server_counts(header)
+    if "tokens_in" not in counts and "tokens_out" not in counts:
+        return None
+    return counts.get("tokens_in", 0) + counts.get("tokens_out", 0)
+
+def make_async_client(concurrency: int = DEFAULT_CONCURRENCY, timeout: int = DEFAULT_TIMEOUT) -> httpx.AsyncClient:
+    """Keep-alive pool sized to the concurrency cap (one connection per in-flight request)"""
+    return http_client.make_async_client(headers=default_headers(), pool_size=concurrency, read_timeout=timeout,
+                                         pool_timeout=None, on_timing=http_client.env_timing_hooks())
+
+def api_request(endpoint: str, message: str, timeout: int = DEFAULT_TIMEOUT, scheduler=None,
+                cassette=None) -> Dict[Any, Any]:
+    """
+    One sequential request over the process-wide pooled client, printing as it goes.
+    Returns the JSON body, or {"error": ...}; scheduler and cassette as in async_api_request.
+    """
+    payload = build_payload(message)
+    print(f"🔄 Sending request: {message}")
+
+    def fetch():
+        send = lambda: http_client.shared_client().post(endpoint, json=payload, headers=default_headers(),
+                                                        timeout=http_client.timeouts(timeout))
+        try:
+            response = scheduler.call(send, on_retry=log_retry) if scheduler else send()
+        except httpx.TimeoutException:
+            print(f"⏰ Request timed out after {timeout} seconds")
+            return {"error": "Request timeout"}
+        except httpx.HTTPError as e:
+            print(f"🚫 Request failed: {str(e)}")
+            return {"error": str(e)}
+
+        print(f"📊 Status Code: {response.status_code}")
+        if response.status_code == 200:
+            try:
+                return response.json()
+            except ValueError:
+                return {"error": f"Invalid JSON: {response.text[:200]}"}
+        print(f"❌ Error Response: {response.text}")
+        return {"error": f"HTTP {response.status_code}: {response.text}"}
+
+    return cassette.call(endpoint, message, payload, fetch) if cassette is not None else fetch()
+
+async def async_api_request(client: httpx.AsyncClient, endpoint: str, message: str,
+                            scheduler=None, cassette=None) -> Dict[Any, Any]:
+    """
+    Async twin of api_request: same return shape ({"error": ...} on failure).
+    With a rate_limiter.RateLimitScheduler, 429/503 are retried per its policy;
+    with a cassette.Cassette, stored responses are replayed per its mode.
+    """
+    if cassette is not None:
+        return await cassette.acall(endpoint, message, build_payload(message),
+                                    lambda: async_api_request(client, endpoint, message, scheduler))
+    send = lambda: client.post(endpoint, json=build_payload(message))
+    try:
+        response = await (scheduler.acall(send, on_retry=log_retry) if scheduler else send())
+    except httpx.TimeoutException:
+        return {"error": "Request timeout"}
+    except httpx.HTTPError as e:
+        return {"error": str(e)}
+
+    if response.status_code == 200:
+        try:
+            return response.json()
+        except ValueError:
+            return {"error": f"Invalid JSON: {response.text[:200]}"}
+    return {"error": f"HTTP {response.status_code}: {response.text}"}
+
+async def fetch_all(endpoint: str, messages, concurrency: int = DEFAULT_CONCURRENCY,
+                    timeout: int = DEFAULT_TIMEOUT, scheduler=None, cassette=None):
+    """
+    Send every message to `endpoint` concurrently (at most `concurrency` in flight).
+    Returns a list of (response, elapsed_seconds) in the same order as `messages`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with make_async_client(concurrency, timeout) as client:
+        async def one(message):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await async_api_request(client, endpoint, message, scheduler, cassette)
+                elapsed = time.perf_counter() - start
+                status = "❌" if "error" in response else "📨"
+                print(f"{status} [{elapsed:6.2f}s] {message}")
+                return response, elapsed
+
+        return await asyncio.gather(*(one(m) for m in messages))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Async job client for the admin-assistant background flow
+POST {background: true} returns {jobId}; GET ?jobId=... reports status/stage
+from the assistant_jobs table. Submits many jobs in parallel over one pooled
+client, polls them on a backoff schedule and records how long each stage
+took — the latency admins actually see on long diet/routine generations.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from assistant_bench import percentile
+from assistant_client import build_payload, make_async_client
+
+# Poll schedule: start fast (cheap reads catch quick jobs), back off to the cap
+POLL_INITIAL = 0.25
+POLL_FACTOR = 1.5
+POLL_MAX_INTERVAL = 3.0
+POLL_DEADLINE = 300  # same as maxDuration in route.js
+
+def poll_intervals(initial: float = POLL_INITIAL, factor: float = POLL_FACTOR,
+                   cap: float = POLL_MAX_INTERVAL):
+    """Infinite backoff schedule: 0.25, 0.375, 0.56, ... capped at 3s"""
+    interval = initial
+    while True:
+        yield interval
+        interval = min(cap, interval * factor)
+
+class JobTrace:
+    """Timeline of one job as observed by the poller (times relative to submit)"""
+
+    def __init__(self, scenario: str):
+        self.scenario = scenario
+        self.job_id: Optional[str] = None
+        self.submit_latency = 0.0
+        self.stages: List[tuple] = []  # (stage, first_seen_at)
+        self.first_stage_at: Optional[float] = None
+        self.done_at: Optional[float] = None
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.polls = 0
+        self.result = None
+
+    def observe_stage(self, stage: Optional[str], at: float):
+        if stage and (not self.stages or self.stages[-1][0] != stage):
+            self.stages.append((stage, at))
+            if self.first_stage_at is None:
+                self.first_stage_at = at
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Seconds spent in each stage (until the next one, or until done)"""
+        durations = {}
+        for i, (stage, start) in enumerate(self.stages):
+            end = self.stages[i + 1][1] if i + 1 < len(self.stages) else self.done_at
+            if end is not None:
+                durations[stage] = durations.get(stage, 0.0) + (end - start)
+        return durations
+
+async def submit_job(client: httpx.AsyncClient, endpoint: str, message: str) -> Dict:
+    response = await client.post(endpoint, json={**build_payload(message), "background": True})
+    if response.status_code != 200:
+        return {"error": f"HTTP {response.status_code}: {response.text[:200]}"}
+    try:
+        return response.json()
+    except ValueError:
+        return {"error": f"Invalid JSON: {response.text[:200]}"}
+
+async def run_job(client: httpx.AsyncClient, endpoint: str, scenario: str, message: str,
+                  deadline: float = POLL_DEADLINE) -> JobTrace:
+    """Submit one job and poll it to completion"""
+    trace = JobTrace(scenario)
+    start = time.perf_counter()
+    try:
+        submitted = await submit_job(client, endpoint, message)
+    except httpx.HTTPError as e:
+        submitted = {"error": str(e) or type(e).__name__}
+    trace.submit_latency = time.perf_counter() - start
+
+    if "error" in submitted or not submitted.get("jobId"):
+        trace.status = "error"
+        trace.error = submitted.get("error") or "Respuesta sin jobId"
+        return trace
+    trace.job_id = submitted["jobId"]
+
+    for interval in poll_intervals():
+        elapsed = time.perf_counter() - start
+        if elapsed > deadline:
+            trace.status = "timeout"
+            break
+        await asyncio.sleep(interval)
+        try:
+            response = await client.get(endpoint, params={"jobId": trace.job_id})
+        except httpx.HTTPError:
+            continue  # same as the app: a failed poll is retried, not fatal
+        trace.polls += 1
+        at = time.perf_counter() - start
+        if response.status_code != 200:
+            # 404 "Job no encontrado", 401/403...: no status will ever come
+            trace.done_at = at
+            trace.status = "error"
+            trace.error = f"HTTP {response.status_code}: {response.text[:200]}"
+            break
+        try:
+            data = response.json()
+        except ValueError:
+            continue
+        trace.observe_stage(data.get("stage"), at)
+        if data.get("status") in ("done", "error"):
+            trace.done_at = at
+            trace.status = data["status"]
+            trace.error = data.get("error")
+            trace.result = data.get("result")
+            break
+    return trace
+
+async def run_jobs(endpoint: str, scenarios: Dict[str, str], total_jobs: int,
+                   concurrency: int, timeout: int = 60) -> List[JobTrace]:
+    """Submit `total_jobs` (round-robin over scenarios), at most `concurrency` open at once"""
+    names = list(scenarios)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with make_async_client(concurrency, timeout) as client:
+        async def one(i):
+            scenario = names[i % len(names)]
+            async with semaphore:
+                return await run_job(client, endpoint, scenario, scenarios[scenario])
+
+        return await asyncio.gather(*(one(i) for i in range(total_jobs)))
+
+def print_job_report(traces: List[JobTrace]):
+    by_scenario = defaultdict(list)
+    for trace in traces:
+        by_scenario[trace.scenario].append(trace)
+
+    print("\n" + "=" * 100)
+    print("📊 BACKGROUND JOB REPORT (seconds)")
+    print("=" * 100)
+    print(f"{'Scenario':<24}{'jobs':>5}{'done':>6}{'submit p50':>12}{'1st stage p50':>15}"
+          f"{'done p50':>10}{'done p90':>10}{'done max':>10}{'polls/job':>11}")
+    for scenario, items in sorted(by_scenario.items()):
+        done = [t for t in items if t.status == "done"]
+        submit = sorted(t.submit_latency for t in items)
+        first = sorted(t.first_stage_at for t in items if t.first_stage_at is not None)
+        total = sorted(t.done_at for t in done)
+        polls = sum(t.polls for t in items) / len(items)
+        print(f"{scenario:<24}{len(items):>5}{len(done):>6}{percentile(submit, 50):>12.2f}"
+              f"{percentile(first, 50):>15.2f}{percentile(total, 50):>10.2f}{percentile(total, 90):>10.2f}"
+              f"{(total[-1] if total else 0):>10.2f}{polls:>11.1f}")
+
+        stage_samples = defaultdict(list)
+        for trace in done:
+            for stage, seconds in trace.stage_durations().items():
+                stage_samples[stage].append(seconds)
+        for stage, samples in stage_samples.items():
+            samples.sort()
+            print(f"    ↳ {stage:<40} p50 {percentile(samples, 50):6.2f}  max {samples[-1]:6.2f}")
+
+    failed = [t for t in traces if t.status != "done"]
+    for trace in failed:
+        print(f"❌ {trace.scenario} job {trace.job_id or '-'}: {trace.status} {trace.error or ''}")
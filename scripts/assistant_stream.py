@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Streaming latency breakdown for /api/admin-assistant
+Used by `backend_test.py stream`: reads each response as a stream instead of
+waiting for response.json(), and records connect time, time to first byte,
+body transfer time and response size per request, plus the phases the route
+reports in its Server-Timing header (auth, llm_r0, tools_r0, llm_r1, ...), so
+the seconds can be attributed to the first model round vs. later tool rounds.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from assistant_bench import percentile
+from assistant_client import build_payload, make_async_client, parse_server_timing, token_usage
+
+class RequestTiming:
+    """Where one request's wall time went (seconds from the start of the call)"""
+
+    def __init__(self, scenario: str):
+        self.scenario = scenario
+        self.outcome = "ok"
+        self.status: Optional[int] = None
+        self.connect = 0.0  # TCP + TLS; 0 when a pooled connection was reused
+        self.ttfb = 0.0  # until the response headers arrived
+        self.transfer = 0.0  # first body chunk to last
+        self.total = 0.0
+        self.size = 0
+        self.server: Dict[str, float] = {}
+        self.tokens: Optional[int] = None
+
+class _Trace:
+    """httpx trace hook: timestamps of the connection/request events"""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.events: Dict[str, float] = {}
+
+    async def __call__(self, event: str, info: dict):
+        self.events[event] = time.perf_counter() - self.start
+
+    def span(self, begin: str, end: str) -> float:
+        started = next((t for e, t in self.events.items() if e.endswith(begin)), None)
+        finished = next((t for e, t in self.events.items() if e.endswith(end)), None)
+        return finished - started if started is not None and finished is not None else 0.0
+
+async def streamed_request(client: httpx.AsyncClient, endpoint: str, scenario: str, message: str) -> RequestTiming:
+    timing = RequestTiming(scenario)
+    start = time.perf_counter()
+    trace = _Trace(start)
+    try:
+        async with client.stream("POST", endpoint, json=build_payload(message),
+                                 extensions={"trace": trace}) as response:
+            timing.ttfb = time.perf_counter() - start
+            timing.status = response.status_code
+            timing.server = parse_server_timing(response.headers.get("server-timing"))
+            timing.tokens = token_usage(response.headers.get("server-timing"))
+            first_chunk = None
+            async for chunk in response.aiter_bytes():
+                if first_chunk is None:
+                    first_chunk = time.perf_counter()
+                timing.size += len(chunk)
+            if first_chunk is not None:
+                timing.transfer = time.perf_counter() - first_chunk
+        if response.status_code == 429:
+            timing.outcome = "429"
+        elif response.status_code >= 400:
+            timing.outcome = "5xx" if response.status_code >= 500 else "4xx"
+    except httpx.TimeoutException:
+        timing.outcome = "timeout"
+    except httpx.HTTPError:
+        timing.outcome = "connection"
+    timing.total = time.perf_counter() - start
+    timing.connect = (trace.span("connect_tcp.started", "connect_tcp.complete")
+                      + trace.span("start_tls.started", "start_tls.complete"))
+    return timing
+
+async def run_stream(endpoint: str, scenarios: Dict[str, str], total_requests: int,
+                     concurrency: int, timeout: int = 60) -> List[RequestTiming]:
+    """`total_requests` round-robin over the scenarios, at most `concurrency` in flight"""
+    names = list(scenarios)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with make_async_client(concurrency, timeout) as client:
+        async def one(i):
+            scenario = names[i % len(names)]
+            async with semaphore:
+                timing = await streamed_request(client, endpoint, scenario, scenarios[scenario])
+            mark = "📨" if timing.outcome == "ok" else "❌"
+            print(f"{mark} [{timing.total:6.2f}s] ttfb {timing.ttfb:5.2f}s {timing.size:>7} B  {scenario}")
+            return timing
+
+        return await asyncio.gather(*(one(i) for i in range(total_requests)))
+
+def print_stream_report(timings: List[RequestTiming]):
+    by_scenario = defaultdict(list)
+    for timing in timings:
+        by_scenario[timing.scenario].append(timing)
+
+    print("\n" + "=" * 100)
+    print("📊 STREAMING LATENCY BREAKDOWN (p50 / p90 seconds)")
+    print("=" * 100)
+    print(f"{'Scenario':<24}{'ok':>4}{'connect':>14}{'ttfb':>14}{'transfer':>14}{'total':>14}{'size p50':>10}")
+
+    def cell(values: List[float]) -> str:
+        values = sorted(values)
+        return f"{percentile(values, 50):6.2f}/{percentile(values, 90):<6.2f}"
+
+    for scenario, items in sorted(by_scenario.items()):
+        ok = [t for t in items if t.outcome == "ok"]
+        sizes = sorted(float(t.size) for t in ok)
+        print(f"{scenario:<24}{len(ok):>4}  {cell([t.connect for t in ok]):>12}  {cell([t.ttfb for t in ok]):>12}"
+              f"  {cell([t.transfer for t in ok]):>12}  {cell([t.total for t in ok]):>12}"
+              f"{percentile(sizes, 50):>10.0f}")
+
+        # Server-Timing phases, in the order the route reports them
+        phase_samples: Dict[str, List[float]] = {}
+        for timing in ok:
+            for phase, seconds in timing.server.items():
+                phase_samples.setdefault(phase, []).append(seconds)
+        for phase, samples in phase_samples.items():
+            samples.sort()
+            share = sum(samples) / sum(t.ttfb for t in ok) if ok else 0
+            print(f"    ↳ {phase:<22} p50 {percentile(samples, 50):6.2f}  p90 {percentile(samples, 90):6.2f}"
+                  f"  ({share:4.0%} of ttfb, in {len(samples)}/{len(ok)} requests)")
+        if ok and not phase_samples:
+            print("    ↳ (no Server-Timing header: the server does not report phases)")
+
+    for timing in timings:
+        if timing.outcome != "ok":
+            print(f"❌ {timing.scenario}: {timing.outcome} (HTTP {timing.status or '-'}) after {timing.total:.2f}s")
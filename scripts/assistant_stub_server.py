@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for /api/admin-assistant
+Answers with canned, schema-faithful payloads (same message/toolCalls/
+toolResults/executionPlan shape as app/api/admin-assistant/route.js and the
+executors in lib/adminAssistantTools.js) so the test scripts and the
+benchmark run offline, fast and deterministically.
+
+Usage:
+    python scripts/assistant_stub_server.py --port 8787 --latency-ms 200 --error-rate 0.05
+    ASSISTANT_BASE_URL=http://127.0.0.1:8787 python scripts/backend_test.py
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+TOOLS_FILE = os.path.join(os.path.dirname(__file__), "..", "lib", "adminAssistantTools.js")
+
+# Demo dataset (same members the live preview environment has)
+SAID_ID = "5b0c6a1e-1111-4c3b-9a51-000000000001"
+MARIA_ID = "5b0c6a1e-1111-4c3b-9a51-000000000002"
+TRAINER_ID = "5b0c6a1e-2222-4c3b-9a51-000000000001"
+
+MEMBERS = [
+    {"id": SAID_ID, "name": "Said", "email": "socio@demo.com", "trainer_name": "Entrenador Demo",
+     "has_diet": True, "has_workout": True},
+    {"id": MARIA_ID, "name": "María", "email": "maria@demo.com", "trainer_name": "Entrenador Demo",
+     "has_diet": False, "has_workout": True},
+]
+
+MACROS = {"calories": 2210, "protein_g": 176, "carbs_g": 235, "fat_g": 72}
+
+ROUTINE = {
+    "routine_name": "Rutina Hipertrofia – Said",
+    "routine_description": "Torso/pierna 4 días",
+    "medical_rationale": "",
+    "days": [
+        {"day_number": 1, "day_name": "Torso", "exercises": [
+            {"exercise_id": "ex-1", "exercise_name": "Press banca con barra", "sets": 4, "reps": "8-10",
+             "rest_seconds": 90, "superset_group": None, "notes": ""},
+            {"exercise_id": "ex-2", "exercise_name": "Remo con barra", "sets": 4, "reps": "8-10",
+             "rest_seconds": 90, "superset_group": None, "notes": ""},
+        ]},
+        {"day_number": 2, "day_name": "Pierna", "exercises": [
+            {"exercise_id": "ex-3", "exercise_name": "Hack squat", "sets": 4, "reps": "8-12",
+             "rest_seconds": 120, "superset_group": None, "notes": ""},
+        ]},
+    ],
+}
+
+DIET_TEXT = """# Dieta NL Elite
+## MACROS DIARIOS
+- Calorías: 2210 kcal | Proteína: 176g | Carbohidratos: 235g | Grasas: 72g
+## REGLAS GENERALES
+- Sal obligatoria en todas las comidas
+## SUPLEMENTACIÓN
+- Omega 3, multivitamínico, D3K2
+## FLUIDOS
+- Agua: 4-6 litros al día
+"""
+
+def _activity(days):
+    rows = [{"activity_date": f"2026-10-{17 - i:02d}", "steps": 8000 + 250 * i,
+             "distance_km": round(5.6 + 0.2 * i, 2), "calories_kcal": 320 + 10 * i, "workouts": i % 2}
+            for i in range(min(days, 7))]
+    total_steps = sum(r["steps"] for r in rows)
+    return {
+        "success": True,
+        "activity": rows,
+        "summary": {
+            "total_steps": total_steps,
+            "total_distance_km": round(sum(r["distance_km"] for r in rows), 2),
+            "total_calories": sum(r["calories_kcal"] for r in rows),
+            "avg_steps_per_day": round(total_steps / len(rows)) if rows else 0,
+            "days_tracked": len(rows),
+        },
+    }
+
+def _routine_edit(args, message):
+    return {"success": True, "routine_generated": True, "routine_data": args.get("routine_data") or ROUTINE,
+            "member_name": "Said", "member_id": SAID_ID, "message": message}
+
+def _find_member(args):
+    needle = (args.get("search") or "").lower()
+    found = [m for m in MEMBERS if needle in m["name"].lower() or needle in m["email"]]
+    return {"success": True, "members": found, "count": len(found),
+            "message": f"Encontré {len(found)} socio(s)" if found else "No encontré ningún socio con ese nombre"}
+
+def _member_cursor(member):
+    """Same opaque cursor as encodeMemberCursor(): base64url of [name, id], no padding"""
+    raw = json.dumps([member["name"] or "", member["id"]], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _list_members(args):
+    limit = min(max(int(args.get("limit") or 20), 1), 50)
+    needle = (args.get("search") or "").lower()
+    rows = sorted((m for m in MEMBERS if needle in m["name"].lower() or needle in m["email"]),
+                  key=lambda m: (m["name"], m["id"]))
+    cursor = args.get("cursor")
+    if cursor:
+        name, member_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        rows = [m for m in rows if (m["name"], m["id"]) > (name, member_id)]
+    page = rows[:limit]
+    next_cursor = _member_cursor(page[-1]) if len(rows) > limit else None
+    return {"success": True, "members": page, "count": len(page), "next_cursor": next_cursor,
+            "has_more": next_cursor is not None}
+
+# Tool name -> canned executor result (mirrors toolExecutors in lib/adminAssistantTools.js)
+CANNED_RESULTS = {
+    "find_member": _find_member,
+    "get_member_summary": lambda a: {"success": True, "summary": {
+        "member": {"id": SAID_ID, "name": "Said", "email": "socio@demo.com", "created_at": "2026-03-01T10:00:00Z"},
+        "trainer": {"id": TRAINER_ID, "name": "Entrenador Demo"},
+        "diet": {"name": "Dieta NL Elite", **MACROS},
+        "workout": {"name": ROUTINE["routine_name"]},
+        "latest_weight": 80.5, "total_checkins": 42}},
+    "apply_full_member_plan": lambda a: {"success": True, "result": {"success": True, "macros": MACROS, "diet_id": str(uuid.uuid4())}},
+    "assign_trainer_to_member": lambda a: {"success": True, "result": {"success": True}},
+    "create_invitation_code": lambda a: {"success": True, "result": {"code": "NLVIP-STUB", "max_uses": a.get("max_uses", 10)}},
+    "create_notice": lambda a: {"success": True, "result": {"id": str(uuid.uuid4()), "title": a.get("title")}},
+    "hide_post": lambda a: {"success": True, "result": {"success": True}},
+    "get_gym_dashboard": lambda a: {"success": True, "dashboard": {
+        "total_members": 2, "total_trainers": 1, "new_members_this_month": 1, "active_challenges": 3,
+        "total_checkins_this_week": 9, "posts_today": 2, "reported_posts": 0,
+        "snapshot_at": "2026-10-18T06:00:00Z", "age_seconds": 120, "source": "live" if a.get("fresh") else "snapshot"}},
+    "list_trainers": lambda a: {"success": True, "trainers": [
+        {"id": TRAINER_ID, "name": "Entrenador Demo", "email": "trainer@demo.com", "member_count": 2}]},
+    "list_recent_posts": lambda a: {"success": True, "posts": [
+        {"id": str(uuid.uuid4()), "content": "¡Nuevo PR en sentadilla!", "created_at": "2026-10-17T18:00:00Z",
+         "is_hidden": False, "author": {"name": "Said"}}][:a.get("limit", 5)]},
+    "generate_diet_plan": lambda a: {"success": True, "diet_plan": DIET_TEXT, "macros": MACROS, "member_name": "Said",
+                                     "goal": "Pérdida de grasa", "profile_data": {"weight": 80.5, "height": 178, "age": 31, "sex": "male"}},
+    "assign_workout_to_member": lambda a: {"success": True, "message": "Rutina asignada correctamente"},
+    "list_workouts": lambda a: {"success": True, "workouts": [
+        {"id": str(uuid.uuid4()), "name": ROUTINE["routine_name"], "description": ROUTINE["routine_description"], "goal_tag": "hipertrofia"}]},
+    "unhide_post": lambda a: {"success": True, "message": "Post restaurado y visible"},
+    "get_member_activity": lambda a: _activity(int(a.get("days", 7))),
+    "update_member_macros": lambda a: {"success": True, "message": "Macros actualizados correctamente",
+                                       "macros": {k: a.get(k) for k in MACROS}},
+    "list_members": _list_members,
+    "generate_ai_diet_from_recipes": lambda a: {"success": True, "diet_generated": True, "member_id": a.get("member_id", SAID_ID),
+        "diet_data": {"fullDietContent": DIET_TEXT, "macros": MACROS, "member_name": "Said", "tipo_dieta": "Recomposición", "physique_analysis": None},
+        "message": "✅ Dieta NL Elite generada para Said: Recomposición. Macros: 2210 kcal, 176g proteína, 235g carbos, 72g grasa."},
+    "refine_ai_diet": lambda a: {"success": True, "diet_generated": True, "member_id": a.get("member_id", SAID_ID),
+        "diet_data": {"fullDietContent": DIET_TEXT, "macros": MACROS, "member_name": "Said", "physique_analysis": None},
+        "message": "✅ Dieta ajustada para Said."},
+    "save_ai_diet": lambda a: {"success": True, "message": "✅ Dieta NL Elite guardada y asignada correctamente a Said.",
+                               "template_id": str(uuid.uuid4())},
+    "generate_member_routine": lambda a: {"success": True, "routine_generated": True, "routine_data": ROUTINE, "replaced": [],
+        "injuries": [], "physique_analysis": None, "member_name": "Said", "member_id": a.get("member_id", SAID_ID),
+        "message": f"✅ Rutina generada para Said: \"{ROUTINE['routine_name']}\". Revisa el plan y confírmalo para asignárselo."},
+    "save_member_routine": lambda a: {"success": True, "message": f"✅ Rutina \"{ROUTINE['routine_name']}\" guardada y asignada al socio.",
+                                      "workout_template_id": str(uuid.uuid4())},
+    "search_exercise_catalog": lambda a: {"success": True, "count": 1, "message": "Encontré 1 ejercicio(s)", "exercises": [
+        {"name": "Hack squat", "muscle_primary": "cuádriceps", "default_sets": 4, "default_reps": "8-12", "default_rest_seconds": 120}]},
+    "swap_routine_exercise": lambda a: _routine_edit(a, f"✅ Cambiado \"{a.get('exercise_name_to_replace')}\" por \"{a.get('new_exercise_name')}\" en el día {a.get('day_index')}."),
+    "remove_routine_exercise": lambda a: _routine_edit(a, f"✅ Quitado \"{a.get('exercise_name')}\" del día {a.get('day_index')}."),
+    "add_routine_exercise": lambda a: _routine_edit(a, f"✅ Añadido \"{a.get('exercise_name')}\" al día {a.get('day_index')} (4x8-10, descanso 90s)."),
+    "modify_routine_exercise": lambda a: _routine_edit(a, f"✅ Actualizado \"{a.get('exercise_name')}\" del día {a.get('day_index')}."),
+    "modify_routine_day": lambda a: _routine_edit(a, f"✅ Día {a.get('day_index')} actualizado."),
+    "add_food_aversion": lambda a: {"success": True, "message": f"Anotado: {a.get('food_name')}", "total_aversions": 1},
+    "list_food_aversions": lambda a: {"success": True, "aversions": [{"food_name": "salmón", "reason": "no le gusta"}], "count": 1,
+                                      "message": "El socio tiene 1 aversión(es) registrada(s):", "aversion_list": "• salmón (no le gusta)"},
+    "remove_food_aversion": lambda a: {"success": True, "message": f"Eliminado: {a.get('food_name')}", "total_aversions": 0},
+    "add_member_note": lambda a: {"success": True, "message": "Nota guardada", "total_notes": 1},
+    "list_member_notes": lambda a: {"success": True, "notes": [{"note": "hombro sensible al hacer press"}], "count": 1,
+                                    "message": "El socio tiene 1 nota(s) guardada(s):", "note_list": "• hombro sensible al hacer press"},
+    "remove_member_note": lambda a: {"success": True, "message": "Nota eliminada", "total_notes": 0},
+    "remember_admin_preference": lambda a: {"success": True, "message": "Preferencia guardada", "total_preferences": 1},
+    "list_admin_preferences": lambda a: {"success": True, "preferences": [{"note": "resúmenes breves"}], "count": 1,
+                                         "message": "Hay 1 preferencia(s) general(es) guardada(s):", "preference_list": "• resúmenes breves"},
+    "remove_admin_preference": lambda a: {"success": True, "message": "Preferencia eliminada", "total_preferences": 0},
+}
+
+# Same split as READ_ONLY_TOOLS in lib/adminAssistantTools.js: anything else comes back as a confirmation plan
+READ_ONLY_TOOLS = {
+    "find_member", "get_member_summary", "get_gym_dashboard", "list_trainers",
+    "list_recent_posts", "generate_diet_plan", "list_workouts", "get_member_activity",
+    "list_members", "generate_ai_diet_from_recipes", "refine_ai_diet", "generate_member_routine",
+    "search_exercise_catalog",
+    "swap_routine_exercise", "remove_routine_exercise", "add_routine_exercise",
+    "modify_routine_exercise", "modify_routine_day",
+    "list_member_notes", "list_admin_preferences",
+}
+
+# Prompt keyword -> tool calls the model would make (first match wins)
+PROMPT_ROUTES = [
+    (r"actividad|pasos", [("find_member", {"search": "Said"}), ("get_member_activity", {"member_id": SAID_ID, "days": 7})]),
+    (r"dieta", [("find_member", {"search": "Said"}), ("generate_diet_plan", {"member_id": SAID_ID, "goal": "fat_loss"})]),
+    (r"resumen del gimnasio|dashboard", [("get_gym_dashboard", {})]),
+    (r"lista (todos )?los socios|listar socios", [("list_members", {"limit": 20})]),
+    (r"rutinas", [("list_workouts", {})]),
+    (r"entrenadores", [("list_trainers", {})]),
+    (r"posts|publicaciones", [("list_recent_posts", {"limit": 5})]),
+    (r"ejercicio|cat[aá]logo", [("search_exercise_catalog", {"query": "hack"})]),
+    (r"c[oó]digo", [("create_invitation_code", {"trainer_id": TRAINER_ID, "max_uses": 10, "expire_days": 30})]),
+    (r"aviso", [("create_notice", {"title": "Aviso", "message": "Mensaje de prueba"})]),
+    (r"busca|socio", [("find_member", {"search": "Said"})]),
+]
+
+TOOL_DESCRIPTIONS = {
+    "create_invitation_code": ("🎟️", "Crear código de invitación (10 usos, 30 días)"),
+    "create_notice": ("📢", 'Crear aviso: "Aviso" (para todos)'),
+}
+
+def tool_names_in_repo():
+    """Tool names declared in TOOLS_DEFINITIONS (lib/adminAssistantTools.js)"""
+    with open(TOOLS_FILE, encoding="utf-8") as f:
+        source = f.read()
+    definitions = source.split("export const toolExecutors", 1)[0]
+    return re.findall(r'name:\s*"([a-z_]+)"', definitions)
+
+def tool_definitions_in_repo():
+    """TOOLS_DEFINITIONS evaluated with node (the array is a plain object literal), for the bench catalog"""
+    with open(TOOLS_FILE, encoding="utf-8") as f:
+        source = f.read()
+    literal = source.split("export const TOOLS_DEFINITIONS =", 1)[1].split("\n// ", 1)[0]
+    output = subprocess.run(["node", "-e", f"process.stdout.write(JSON.stringify({literal}))"],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+# Mirrors EXTERNAL_API_TOOLS in lib/adminAssistantTools.js
+EXTERNAL_API_TOOLS = {
+    "generate_ai_diet_from_recipes", "refine_ai_diet", "generate_member_routine",
+    "bulk_import_recipes", "search_recipe_ideas",
+}
+
+def tool_catalog():
+    """Same shape GET /api/admin-assistant/tools returns (with ENABLE_TOOL_BENCH=writes)"""
+    return {"writes": True, "tools": [
+        {"name": t["function"]["name"], "parameters": t["function"]["parameters"],
+         "readOnly": t["function"]["name"] in READ_ONLY_TOOLS,
+         "externalApi": t["function"]["name"] in EXTERNAL_API_TOOLS}
+        for t in tool_definitions_in_repo()]}
+
+def route_prompt(text):
+    for pattern, calls in PROMPT_ROUTES:
+        if re.search(pattern, text, re.IGNORECASE):
+            return calls
+    return []
+
+def tool_call(name, args):
+    return {"id": f"toolu_stub_{uuid.uuid4().hex[:16]}", "function": {"name": name, "arguments": json.dumps(args)}}
+
+def chat_response(messages):
+    """Same shape runAssistantChat returns"""
+    last_user = next((m.get("content") for m in reversed(messages or []) if m.get("role") == "user"), "") or ""
+    calls = [tool_call(name, args) for name, args in route_prompt(str(last_user))]
+
+    tool_results = {}
+    confirm = []
+    for call in calls:
+        name = call["function"]["name"]
+        if name in READ_ONLY_TOOLS:
+            tool_results[call["id"]] = CANNED_RESULTS[name](json.loads(call["function"]["arguments"]))
+        else:
+            confirm.append(call)
+
+    if confirm:
+        plan = []
+        for call in confirm:
+            name = call["function"]["name"]
+            icon, description = TOOL_DESCRIPTIONS.get(name, ("🔧", name))
+            plan.append({"id": call["id"], "name": name, "icon": icon, "description": description,
+                         "args": json.loads(call["function"]["arguments"]), "result": None, "needsConfirmation": True})
+        return {"message": "Voy a realizar las siguientes acciones. ¿Confirmas?", "toolCalls": confirm,
+                "executionPlan": plan, "needsConfirmation": True, "toolResults": tool_results}
+
+    if not calls:
+        message = "¡Hola! Soy el asistente del gimnasio NL VIP TEAM. ¿En qué puedo ayudarte?"
+    else:
+        message = " ".join(r.get("message") or "Aquí tienes la información de los socios del gimnasio."
+                           for r in tool_results.values())
+    return {"message": message, "toolCalls": [], "needsConfirmation": False, "toolResults": tool_results}
+
+def execute_response(tool_calls):
+    """Same shape runToolExecution returns"""
+    results, errors = {}, []
+    for call in tool_calls or []:
+        name = call.get("name")
+        args = call.get("args") or {}
+        if isinstance(args, str):
+            args = json.loads(args)
+        if name not in CANNED_RESULTS:
+            errors.append({"id": call.get("id"), "name": name, "error": f"Herramienta desconocida: {name}"})
+            results[call.get("id")] = {"success": False, "error": f"Herramienta desconocida: {name}"}
+        else:
+            results[call.get("id")] = CANNED_RESULTS[name](args)
+    out = {"success": not errors, "results": results}
+    if errors:
+        out["errors"] = errors
+    return out
+
+# Stages route.js writes to assistant_jobs.stage, in order, for a read-only turn
+JOB_STAGES = ["Pensando en qué hacer...", "Consultando datos del gimnasio...", "Interpretando los resultados..."]
+
+class StubJobs:
+    """In-memory assistant_jobs: each job walks JOB_STAGES over `job_ms` and then is done"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def create(self, result, job_ms):
+        job_id = str(uuid.uuid4())
+        with self.lock:
+            self.jobs[job_id] = {"started": time.monotonic(), "duration": job_ms / 1000, "result": result}
+        return job_id
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if not job:
+            return None
+        progress = (time.monotonic() - job["started"]) / job["duration"] if job["duration"] else 1
+        if progress >= 1:
+            return {"status": "done", "result": job["result"], "error": None, "stage": None}
+        stage = JOB_STAGES[min(len(JOB_STAGES) - 1, int(progress * len(JOB_STAGES)))]
+        return {"status": "processing", "result": None, "error": None, "stage": stage}
+
+class StubConfig:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit_rate=0.0, seed=None, job_ms=1500):
+        self.job_ms = job_ms
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """(delay_seconds, injected_status or None) — one locked draw keeps runs reproducible per seed"""
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    jobs = StubJobs()
+    catalog = None
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path not in ("/api/admin-assistant", "/api/admin-assistant/tools"):
+            return self._send(404, {"error": "Not found"})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "JSON inválido"})
+        if path == "/api/admin-assistant/tools":
+            return self._run_tool(body)
+
+        delay, injected = self.config.draw()
+        if injected:
+            time.sleep(delay)
+            phases = []
+        else:
+            phases = self._simulate_phases(delay, body)
+        if injected == 429:
+            return self._send(429, {"error": "Too many requests. Límite de 100/min alcanzado."}, {"Retry-After": "1"})
+        if injected == 500:
+            return self._send(500, {"error": "Error del asistente (inyectado por el stub)"})
+
+        if body.get("executeTools") and body.get("toolCallsToExecute"):
+            result = execute_response(body["toolCallsToExecute"])
+        else:
+            result = chat_response(body.get("messages"))
+
+        if body.get("background"):
+            # New clients: answer with the jobId only and let them poll GET ?jobId=
+            jitter = self.config.jitter_ms
+            with self.config.lock:
+                job_ms = max(0.0, self.config.job_ms + self.config.rng.uniform(-jitter, jitter))
+            timing = ", ".join(f"{name};dur={ms:.1f}" for name, ms in phases)
+            return self._send(200, {"jobId": self.jobs.create(result, job_ms)}, {"Server-Timing": timing})
+        timing = ", ".join([f"{name};dur={ms:.1f}" for name, ms in phases] + self._token_counts(phases, body))
+        self._send(200, {"jobId": str(uuid.uuid4()), **result}, {"Server-Timing": timing})
+
+    def _simulate_phases(self, delay, body):
+        """
+        Spend `delay` the way route.js does and report it as Server-Timing with
+        the route's phase names: auth/profile/job_insert, then prefs, the Claude
+        rounds and tools_r0 (only when that round ran read-only tools), or one
+        tool_<name> per confirmed call, then job_done. A background submit
+        answers after job_insert, like the route
+        """
+        setup = [("auth", 0.04), ("profile", 0.005), ("job_insert", 0.005)]
+        calls = body.get("toolCallsToExecute") or []
+        if body.get("background"):
+            split = [(name, share / 0.05) for name, share in setup]
+        elif body.get("executeTools") and calls:
+            split = setup + [(f"tool_{call.get('name')}", 0.9 / len(calls)) for call in calls] + [("job_done", 0.05)]
+        elif route_prompt(str((body.get("messages") or [{}])[-1].get("content", ""))):
+            split = setup + [("prefs", 0.01), ("llm_r0", 0.5), ("tools_r0", 0.1), ("llm_r1", 0.29), ("job_done", 0.05)]
+        else:
+            split = setup + [("prefs", 0.01), ("llm_r0", 0.89), ("job_done", 0.05)]
+        phases = []
+        for name, share in split:
+            start = time.perf_counter()
+            time.sleep(delay * share)
+            phases.append((name, (time.perf_counter() - start) * 1000))
+        return phases
+
+    def _token_counts(self, phases, body):
+        """tokens_in/out/cache_read entries like route.js: ~3.2k cached prompt tokens per Claude round"""
+        rounds = sum(1 for name, _ in phases if name.startswith("llm_"))
+        if not rounds:
+            return []
+        prompt = len(json.dumps(body.get("messages") or [], ensure_ascii=False)) // 4
+        return [f"tokens_in;desc={rounds * (120 + prompt)}", f"tokens_out;desc={rounds * 90}",
+                f"tokens_cache_read;desc={rounds * 3200}"]
+
+    def _run_tool(self, body):
+        """Direct tool dispatch like app/api/admin-assistant/tools/route.js: the whole delay is tool time"""
+        delay, injected = self.config.draw()
+        start = time.perf_counter()
+        time.sleep(delay)
+        tool = body.get("tool")
+        if injected == 500 or tool not in CANNED_RESULTS:
+            ms = (time.perf_counter() - start) * 1000
+            error = "Error inyectado por el stub" if tool in CANNED_RESULTS else f"Herramienta desconocida: {tool}"
+            return self._send(422, {"error": error, "ms": ms}, {"Server-Timing": f"tool;dur={ms:.1f}"})
+        result = CANNED_RESULTS[tool](body.get("args") or {})
+        ms = (time.perf_counter() - start) * 1000
+        self._send(200, {"result": result, "ms": ms}, {"Server-Timing": f"tool;dur={ms:.1f}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/admin-assistant/tools":
+            if StubHandler.catalog is None:
+                StubHandler.catalog = tool_catalog()
+            return self._send(200, StubHandler.catalog)
+        if url.path == "/api/admin/members-export":
+            return self._export_members(parse_qs(url.query).get("format", ["ndjson"])[0])
+        if url.path != "/api/admin-assistant":
+            return self._send(404, {"error": "Not found"})
+        job_id = parse_qs(url.query).get("jobId", [None])[0]
+        if not job_id:
+            return self._send(400, {"error": "jobId requerido"})
+        status = self.jobs.status(job_id)
+        if status is None:
+            return self._send(404, {"error": "Job no encontrado"})
+        self._send(200, status)
+
+    def _export_members(self, fmt):
+        """Chunked stream like app/api/admin/members-export/route.js (one chunk per member here)"""
+        columns = ["id", "name", "email", "trainer_name", "has_diet", "has_workout"]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        lines = [",".join(columns)] if fmt == "csv" else []
+        for member in sorted(MEMBERS, key=lambda m: (m["name"], m["id"])):
+            lines.append(",".join(str(member.get(c, "")) for c in columns) if fmt == "csv"
+                         else json.dumps(member, ensure_ascii=False))
+        for line in lines:
+            data = (line + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, fmt, *args):
+        if os.environ.get("STUB_VERBOSE"):
+            super().log_message(fmt, *args)
+
+def check_tool_coverage():
+    """Every tool in TOOLS_DEFINITIONS must have a canned result"""
+    missing = [name for name in tool_names_in_repo() if name not in CANNED_RESULTS]
+    if missing:
+        print(f"❌ Tools without canned results: {', '.join(missing)}")
+        return False
+    print(f"✅ All {len(tool_names_in_repo())} tools have canned results")
+    return True
+
+def make_server(host="127.0.0.1", port=8787, **config):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": StubConfig(**config), "jobs": StubJobs()})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for /api/admin-assistant")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Injected latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform ± jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429 + Retry-After")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible latency/errors")
+    parser.add_argument("--job-ms", type=float, default=1500, help="Processing time of background jobs (± jitter)")
+    parser.add_argument("--check", action="store_true", help="Only verify tool coverage against lib/adminAssistantTools.js")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_tool_coverage() else 1)
+    check_tool_coverage()
+
+    server = make_server(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+                         job_ms=args.job_ms)
+    print(f"🧩 Admin Assistant stub listening on http://{args.host}:{args.port}/api/admin-assistant")
+    print(f"💡 export ASSISTANT_BASE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
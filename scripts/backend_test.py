@@ -4,65 +4,56 @@ Backend Test Suite for Admin Assistant API
 Tests all functionality of the /api/admin-assistant endpoint
 """
 
-import requests
+import argparse
+import os
 import json
 import time
 import sys
 from typing import Dict, Any
 
+from assistant_client import api_request
+from cassette import cassette_from_env
+from rate_limiter import scheduler_from_env
+
 # Configuration
-BASE_URL = "https://fitness-clubhouse.preview.emergentagent.com"
+# ASSISTANT_BASE_URL=http://127.0.0.1:8787 points the suite at scripts/assistant_stub_server.py
+BASE_URL = os.environ.get("ASSISTANT_BASE_URL", "https://fitness-clubhouse.preview.emergentagent.com").rstrip("/")
 API_ENDPOINT = f"{BASE_URL}/api/admin-assistant"
 TIMEOUT = 60  # 60 seconds timeout for API calls
 
+# Retries 429/503 honouring Retry-After instead of fixed sleeps between tests
+SCHEDULER = scheduler_from_env()
+
+# ASSISTANT_CASSETTE=record|replay|refresh replays stored responses instead of paying LLM latency
+CASSETTE = cassette_from_env()
+
+# Prompt sent by each test (shared by the sequential and the async runner)
+PROMPTS = {
+    "basic_chat": "Hola",
+    "find_member": "Busca al socio Said",
+    "generate_diet_plan": "Genera una dieta para Said con objetivo pérdida de grasa",
+    "gym_dashboard": "Dame el resumen del gimnasio",
+    "list_members": "Lista todos los socios",
+    "list_workouts": "Lista las rutinas disponibles",
+    "get_member_activity": "Ver actividad física del socio Said de los últimos 7 días",
+}
+
+# list_members never returns more than this per call (MAX_MEMBERS_PAGE in lib/adminAssistantTools.js)
+MAX_MEMBERS_PAGE = 50
+
 def make_api_request(message: str, timeout: int = TIMEOUT) -> Dict[Any, Any]:
     """Make a request to the Admin Assistant API"""
-    payload = {
-        "messages": [
-            {
-                "role": "user", 
-                "content": message
-            }
-        ]
-    }
-    
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    print(f"🔄 Sending request: {message}")
     print(f"📡 URL: {API_ENDPOINT}")
-    
-    try:
-        response = requests.post(
-            API_ENDPOINT, 
-            json=payload, 
-            headers=headers, 
-            timeout=timeout
-        )
-        
-        print(f"📊 Status Code: {response.status_code}")
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"❌ Error Response: {response.text}")
-            return {"error": f"HTTP {response.status_code}: {response.text}"}
-            
-    except requests.exceptions.Timeout:
-        print(f"⏰ Request timed out after {timeout} seconds")
-        return {"error": "Request timeout"}
-    except requests.exceptions.RequestException as e:
-        print(f"🚫 Request failed: {str(e)}")
-        return {"error": str(e)}
+    return api_request(API_ENDPOINT, message, timeout, SCHEDULER, CASSETTE)
 
-def test_basic_chat():
+def test_basic_chat(response=None):
     """Test 1: Basic Chat Test"""
     print("\n" + "="*60)
     print("🧪 TEST 1: BASIC CHAT TEST")
     print("="*60)
     
-    response = make_api_request("Hola")
+    if response is None:
+        response = make_api_request(PROMPTS["basic_chat"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -75,13 +66,14 @@ def test_basic_chat():
         print(f"❌ FAILED: No message in response: {response}")
         return False
 
-def test_find_member():
+def test_find_member(response=None):
     """Test 2: Find Member Tool Test"""
     print("\n" + "="*60)
     print("🧪 TEST 2: FIND MEMBER TOOL TEST")
     print("="*60)
     
-    response = make_api_request("Busca al socio Said")
+    if response is None:
+        response = make_api_request(PROMPTS["find_member"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -121,13 +113,14 @@ def test_find_member():
     print(f"❌ FAILED: No member info found in response: {response}")
     return False
 
-def test_generate_diet_plan():
+def test_generate_diet_plan(response=None):
     """Test 3: Generate Diet Plan Tool Test (MAIN TEST)"""
     print("\n" + "="*60)
     print("🧪 TEST 3: GENERATE DIET PLAN TOOL TEST (MAIN)")
     print("="*60)
     
-    response = make_api_request("Genera una dieta para Said con objetivo pérdida de grasa")
+    if response is None:
+        response = make_api_request(PROMPTS["generate_diet_plan"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -203,13 +196,14 @@ def test_generate_diet_plan():
     
     return success
 
-def test_gym_dashboard():
+def test_gym_dashboard(response=None):
     """Test 4: Gym Dashboard Tool Test"""
     print("\n" + "="*60)
     print("🧪 TEST 4: GYM DASHBOARD TOOL TEST")
     print("="*60)
     
-    response = make_api_request("Dame el resumen del gimnasio")
+    if response is None:
+        response = make_api_request(PROMPTS["gym_dashboard"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -261,13 +255,14 @@ def test_gym_dashboard():
     print(f"❌ FAILED: No dashboard data found in response: {response}")
     return False
 
-def test_list_members():
+def test_list_members(response=None):
     """Test 5: List Members Tool Test (NEW)"""
     print("\n" + "="*60)
     print("🧪 TEST 5: LIST MEMBERS TOOL TEST (NEW)")
     print("="*60)
     
-    response = make_api_request("Lista todos los socios")
+    if response is None:
+        response = make_api_request(PROMPTS["list_members"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -283,7 +278,12 @@ def test_list_members():
             if "members" in result:
                 members = result["members"]
                 count = result.get("count", len(members))
-                print(f"👥 Found {count} members:")
+                print(f"👥 Found {count} members (next_cursor: {'yes' if result.get('next_cursor') else 'no'}):")
+                
+                # The tool pages its results: a whole roster here would flood the LLM context
+                if len(members) > MAX_MEMBERS_PAGE:
+                    print(f"❌ FAILED: {len(members)} members in one page (max {MAX_MEMBERS_PAGE})")
+                    return False
                 
                 # Check for expected members (Said and María)
                 expected_members = ["Said", "María"]
@@ -321,13 +321,14 @@ def test_list_members():
     print(f"❌ FAILED: No members data found in response: {response}")
     return False
 
-def test_list_workouts():
+def test_list_workouts(response=None):
     """Test 6: List Workouts Tool Test (NEW)"""
     print("\n" + "="*60)
     print("🧪 TEST 6: LIST WORKOUTS TOOL TEST (NEW)")
     print("="*60)
     
-    response = make_api_request("Lista las rutinas disponibles")
+    if response is None:
+        response = make_api_request(PROMPTS["list_workouts"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -371,13 +372,14 @@ def test_list_workouts():
     print(f"❌ FAILED: No workouts data found in response: {response}")
     return False
 
-def test_get_member_activity():
+def test_get_member_activity(response=None):
     """Test 7: Get Member Activity Tool Test (NEW)"""
     print("\n" + "="*60)
     print("🧪 TEST 7: GET MEMBER ACTIVITY TOOL TEST (NEW)")
     print("="*60)
     
-    response = make_api_request("Ver actividad física del socio Said de los últimos 7 días")
+    if response is None:
+        response = make_api_request(PROMPTS["get_member_activity"])
     
     if "error" in response:
         print(f"❌ FAILED: {response['error']}")
@@ -429,53 +431,93 @@ def test_get_member_activity():
     print(f"❌ FAILED: No activity data found in response: {response}")
     return False
 
-def run_all_tests():
+# (name, test function, PROMPTS key)
+TESTS = [
+    ("Basic Chat", test_basic_chat, "basic_chat"),
+    ("Find Member Tool", test_find_member, "find_member"),
+    ("Generate Diet Plan Tool", test_generate_diet_plan, "generate_diet_plan"),
+    ("Gym Dashboard Tool", test_gym_dashboard, "gym_dashboard"),
+    ("List Members Tool (NEW)", test_list_members, "list_members"),
+    ("List Workouts Tool (NEW)", test_list_workouts, "list_workouts"),
+    ("Get Member Activity Tool (NEW)", test_get_member_activity, "get_member_activity")
+]
+
+def run_test(test_name, test_func, response=None):
+    """Run one test, returning (passed, elapsed_seconds)"""
+    start = time.perf_counter()
+    try:
+        result = test_func(response) if response is not None else test_func()
+        
+        if result:
+            print(f"🎉 {test_name}: PASSED")
+        else:
+            print(f"💥 {test_name}: FAILED")
+            
+    except Exception as e:
+        print(f"💥 {test_name}: EXCEPTION - {str(e)}")
+        result = False
+    
+    return bool(result), time.perf_counter() - start
+
+def prefetch_responses(concurrency):
+    """
+    Async mode: send every test prompt concurrently through one pooled client.
+    Returns {PROMPTS key: (response, elapsed_seconds)}.
+    """
+    import asyncio
+    from assistant_client import fetch_all
+    
+    keys = [key for _, _, key in TESTS]
+    print(f"⚡ Sending {len(keys)} requests concurrently (max {concurrency} in flight)...")
+    responses = asyncio.run(fetch_all(API_ENDPOINT, [PROMPTS[k] for k in keys], concurrency, TIMEOUT,
+                                     SCHEDULER, CASSETTE))
+    return dict(zip(keys, responses))
+
+def save_results(kind, rows):
+    """--save: append this run to the result store (see scripts/result_store.py)"""
+    from result_store import save_run, store_path
+    
+    run_id = save_run(kind, rows, BASE_URL)
+    print(f"💾 Saved run {run_id} → {store_path()}")
+
+def run_all_tests(use_async=False, concurrency=4, save=False):
     """Run all tests and provide summary"""
     print("🚀 STARTING ADMIN ASSISTANT API TESTS")
     print("=" * 80)
     
-    tests = [
-        ("Basic Chat", test_basic_chat),
-        ("Find Member Tool", test_find_member),
-        ("Generate Diet Plan Tool", test_generate_diet_plan),
-        ("Gym Dashboard Tool", test_gym_dashboard),
-        ("List Members Tool (NEW)", test_list_members),
-        ("List Workouts Tool (NEW)", test_list_workouts),
-        ("Get Member Activity Tool (NEW)", test_get_member_activity)
-    ]
-    
+    suite_start = time.perf_counter()
+    prefetched = prefetch_responses(concurrency) if use_async else {}
     results = []
     
-    for test_name, test_func in tests:
-        try:
-            result = test_func()
-            results.append((test_name, result))
-            
-            if result:
-                print(f"🎉 {test_name}: PASSED")
-            else:
-                print(f"💥 {test_name}: FAILED")
-                
-        except Exception as e:
-            print(f"💥 {test_name}: EXCEPTION - {str(e)}")
-            results.append((test_name, False))
-        
-        # Wait between tests
-        time.sleep(2)
+    for test_name, test_func, key in TESTS:
+        if key in prefetched:
+            # Request already done: checking is local, so report the request time
+            response, request_elapsed = prefetched[key]
+            result, _ = run_test(test_name, test_func, response)
+            elapsed = request_elapsed
+        else:
+            result, elapsed = run_test(test_name, test_func)
+        results.append((test_name, result, elapsed))
     
     # Summary
     print("\n" + "="*80)
     print("📋 TEST SUMMARY")
     print("="*80)
     
-    passed = sum(1 for _, result in results if result)
+    passed = sum(1 for _, result, _ in results if result)
     total = len(results)
     
-    for test_name, result in results:
+    for test_name, result, elapsed in results:
         status = "✅ PASSED" if result else "❌ FAILED"
-        print(f"{test_name}: {status}")
+        print(f"{test_name}: {status} ({elapsed:.1f}s)")
     
     print(f"\n🏆 OVERALL: {passed}/{total} tests passed")
+    print(f"⏱️ Total time: {time.perf_counter() - suite_start:.1f}s")
+    if CASSETTE.enabled:
+        print(CASSETTE.report())
+    if save:
+        from result_store import rows_from_tests
+        save_results("tests", rows_from_tests(results))
     
     if passed == total:
         print("🎉 ALL TESTS PASSED! Admin Assistant API is working correctly.")
@@ -487,14 +529,182 @@ def run_all_tests():
         print("💥 MULTIPLE TESTS FAILED. Major issues detected.")
         return False
 
+def run_benchmark(args):
+    """`bench` subcommand: load-test the endpoint with the test prompts"""
+    from assistant_bench import run_benchmark as bench
+    
+    scenarios = {key: PROMPTS[key] for key in (args.scenarios or PROMPTS)}
+    results = bench(API_ENDPOINT, scenarios, concurrency=max(1, args.concurrency),
+                    rate=args.rate, total_requests=args.requests, timeout=TIMEOUT,
+                    max_in_flight=max(1, args.max_in_flight))
+    if args.save:
+        from result_store import rows_from_bench
+        save_results("bench", rows_from_bench(results))
+    # Non-zero exit only if nothing succeeded at all (the numbers are the output)
+    return any(row["ok"] for row in results.summary().values())
+
+def run_jobs(args):
+    """`jobs` subcommand: submit background jobs in parallel and poll them to completion"""
+    import asyncio
+    from assistant_jobs import run_jobs as submit_and_poll, print_job_report
+    
+    scenarios = {key: PROMPTS[key] for key in (args.scenarios or PROMPTS)}
+    print(f"🚀 {args.requests} background jobs, {args.concurrency} open at once → {API_ENDPOINT}")
+    traces = asyncio.run(submit_and_poll(API_ENDPOINT, scenarios, args.requests,
+                                         max(1, args.concurrency), TIMEOUT))
+    print_job_report(traces)
+    return all(t.status == "done" for t in traces)
+
+def run_stream(args):
+    """`stream` subcommand: connect/TTFB/transfer/size per request plus the route's Server-Timing phases"""
+    import asyncio
+    from assistant_stream import run_stream as stream, print_stream_report
+    
+    scenarios = {key: PROMPTS[key] for key in (args.scenarios or PROMPTS)}
+    print(f"🚀 {args.requests} streamed requests, concurrency {args.concurrency} → {API_ENDPOINT}")
+    timings = asyncio.run(stream(API_ENDPOINT, scenarios, args.requests, max(1, args.concurrency), TIMEOUT))
+    print_stream_report(timings)
+    if args.save:
+        from result_store import rows_from_stream
+        save_results("stream", rows_from_stream(timings))
+    return any(t.outcome == "ok" for t in timings)
+
+def run_tools(args):
+    """`tools` subcommand: each tool's own latency through the test-only dispatch (no LLM)"""
+    import asyncio
+    from tool_bench import run_tools as bench_tools, print_tool_report
+    
+    overrides = {}
+    if args.args:
+        with open(args.args, encoding="utf-8") as f:
+            overrides = json.load(f)
+    print(f"🚀 {args.runs} calls per tool, concurrency {args.concurrency} → {BASE_URL}/api/admin-assistant/tools")
+    try:
+        samples, skipped = asyncio.run(bench_tools(BASE_URL, args.runs, max(1, args.concurrency), TIMEOUT,
+                                                   only=args.only, include_writes=args.include_writes,
+                                                   include_external=args.include_external, overrides=overrides))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return False
+    print_tool_report(samples, skipped)
+    if args.save:
+        from result_store import rows_from_tools
+        save_results("tools", rows_from_tools(samples))
+    return any(s.outcome == "ok" for items in samples.values() for s in items)
+
+def run_pages(args):
+    """`pages` subcommand: walk list_members by next_cursor and check every page is bounded"""
+    from member_pages import walk_members, read_export, print_walk
+    
+    print(f"🚀 list_members pages of {args.limit} → {BASE_URL}/api/admin-assistant/tools")
+    walk = walk_members(BASE_URL, max(1, args.limit), args.max_bytes, args.search, TIMEOUT)
+    export = read_export(BASE_URL, args.export) if args.export and walk.sizes else None
+    print_walk(walk, export)
+    if args.save and walk.latencies:
+        save_results("pages", {"list_members": {"requests": len(walk.latencies), "ok": len(walk.sizes),
+                                                "latency": sorted(walk.latencies), "size": walk.sizes,
+                                                "tokens": []}})
+    return walk.ok and not (export and export["error"])
+
+# --concurrency default per subcommand (None = the test suite in --async mode)
+DEFAULT_CONCURRENCY = {None: 4, "bench": 4, "jobs": 8, "stream": 1, "tools": 1}
+
+def parse_args():
+    # Defined once and shared: accepted before or after the subcommand, and no
+    # parser writes a default that could silently overwrite the other position
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument("--cassette", choices=["off", "record", "replay", "refresh"], default=argparse.SUPPRESS,
+                        help="Response cache mode (default: ASSISTANT_CASSETTE or off)")
+    shared.add_argument("--save", action="store_true", default=argparse.SUPPRESS,
+                        help="Store the run for `result_store.py compare` (tests, bench, stream, tools, pages)")
+    concurrent = argparse.ArgumentParser(add_help=False)
+    concurrent.add_argument("--concurrency", type=int, default=argparse.SUPPRESS,
+                            help="Requests in flight: --async test suite and bench workers 4, jobs open at once 8, "
+                                 "stream and tools 1 (so timings are not queueing)")
+    parser = argparse.ArgumentParser(description="Admin Assistant API Backend Test Suite",
+                                     parents=[shared, concurrent])
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Send all test requests concurrently (requires httpx)")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    bench = subparsers.add_parser("bench", parents=[shared, concurrent],
+                                  help="Latency/throughput benchmark (requires httpx)")
+    bench.add_argument("--rate", type=float, default=None,
+                       help="Open loop: target requests/second (overrides --concurrency)")
+    bench.add_argument("--max-in-flight", type=int, default=100,
+                       help="Open loop: client connections; arrivals beyond this queue in the client "
+                            "and the wait counts in the latency (default: 100)")
+    bench.add_argument("--requests", type=int, default=20,
+                       help="Total requests, spread round-robin over the scenarios (default: 20)")
+    bench.add_argument("--scenarios", nargs="+", choices=sorted(PROMPTS),
+                       help="Subset of scenarios to drive (default: all)")
+    
+    jobs = subparsers.add_parser("jobs", parents=[shared, concurrent],
+                                 help="Background-job latency: submit + poll GET ?jobId (requires httpx)")
+    jobs.add_argument("--requests", type=int, default=14,
+                      help="Total jobs, round-robin over the scenarios (default: 14)")
+    jobs.add_argument("--scenarios", nargs="+", choices=sorted(PROMPTS),
+                      help="Subset of scenarios (default: all)")
+    
+    stream = subparsers.add_parser("stream", parents=[shared, concurrent],
+                                   help="Where the seconds go: connect/TTFB/transfer + Server-Timing phases (requires httpx)")
+    stream.add_argument("--requests", type=int, default=7,
+                        help="Total requests, round-robin over the scenarios (default: 7)")
+    stream.add_argument("--scenarios", nargs="+", choices=sorted(PROMPTS),
+                        help="Subset of scenarios (default: all)")
+    
+    tools = subparsers.add_parser("tools", parents=[shared, concurrent],
+                                  help="Per-tool latency without the LLM (server needs ENABLE_TOOL_BENCH; requires httpx)")
+    tools.add_argument("--runs", type=int, default=10,
+                       help="Calls per tool (default: 10)")
+    tools.add_argument("--only", nargs="+",
+                       help="Subset of tools (default: every read-only tool)")
+    tools.add_argument("--args",
+                       help='JSON file {"tool": {"arg": value}} overriding the synthetic arguments')
+    tools.add_argument("--include-writes", action="store_true",
+                       help="Also run tools that write (server needs ENABLE_TOOL_BENCH=writes; test DB only)")
+    tools.add_argument("--include-external", action="store_true",
+                       help="Also run tools that call OpenAI/external APIs")
+    
+    pages = subparsers.add_parser("pages", parents=[shared], help="Walk list_members page by page and check bounded payloads (server needs ENABLE_TOOL_BENCH; requires httpx)")
+    pages.add_argument("--limit", type=int, default=20,
+                       help="Members per page (default: 20)")
+    pages.add_argument("--max-bytes", type=int, default=16384,
+                       help="Fail when a page result is larger than this (default: 16384)")
+    pages.add_argument("--search",
+                       help="Only members whose name or email contains this")
+    pages.add_argument("--export", choices=["ndjson", "csv"],
+                       help="Also stream /api/admin/members-export and compare it with the pages (not compared with --search)")
+    args = parser.parse_args()
+    if not hasattr(args, "concurrency"):
+        args.concurrency = DEFAULT_CONCURRENCY.get(args.command, 1)
+    args.cassette = getattr(args, "cassette", None)
+    args.save = getattr(args, "save", False)
+    return args
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.cassette:
+        CASSETTE = cassette_from_env(args.cassette)
+    
     print("🧪 Admin Assistant API Backend Test Suite")
     print(f"🌐 Testing endpoint: {API_ENDPOINT}")
     print(f"⏰ Timeout: {TIMEOUT} seconds per request")
     
-    success = run_all_tests()
+    if args.command == "bench":
+        success = run_benchmark(args)
+    elif args.command == "jobs":
+        success = run_jobs(args)
+    elif args.command == "stream":
+        success = run_stream(args)
+    elif args.command == "tools":
+        success = run_tools(args)
+    elif args.command == "pages":
+        success = run_pages(args)
+    else:
+        success = run_all_tests(use_async=args.use_async, concurrency=max(1, args.concurrency), save=args.save)
     
     if success:
         sys.exit(0)
     else:
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
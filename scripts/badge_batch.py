@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Batch badge evaluator: the whole of cron/award-badges in a few set-based queries
+app/api/cron/award-badges/route.js does, for every member, one query for the
+badges they already have and up to four more for their stats (check-in
+count, every check-in and active day for the streak, completed challenges):
+round trips grow linearly with the gym. This job reads members by pages
+(keyset on id) and, per page, one query per source for the whole page;
+workout counts and longest streaks are computed with NumPy for all the page
+at once, and every new user_badges row goes in with one bulk INSERT ...
+ON CONFLICT DO NOTHING (a concurrent cron run is harmless, like the 23505
+the route ignores).
+
+Semantics are those of meetsCondition()/longestConsecutiveStreak() in the
+route: active day = UTC date of a workout_checkins.checked_in_at or a
+daily_activity day with steps > 0; the longest streak ever, not the current
+one. --verify N runs the route's per-member algorithm (same queries, ported
+as is) on N members and compares stats and badges one by one; it doubles
+as the benchmark of the old path.
+
+Usage:
+    DATABASE_URL=... python scripts/badge_batch.py [--dry-run] [--page-size 5000] [--verify 200] [--save]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from synthetic_data import is_local
+
+DEFAULT_PAGE_SIZE = 5000
+INSERT_BATCH = 10000
+# Days come as offsets from 2000-01-01; biased so any real date packs as positive
+DAY_BIAS = 1 << 20
+
+WORKOUT_TYPES = ("first_workout", "workouts_count")
+
+# m.idx is the position of the member in the page (1-based), so rows come
+# back already as array indices and never need a uuid -> index lookup
+PAGE_CHECKIN_DAYS = """
+SELECT m.idx - 1, (c.checked_in_at AT TIME ZONE 'UTC')::date - DATE '2000-01-01'
+FROM unnest(%(ids)s::uuid[]) WITH ORDINALITY AS m(id, idx)
+JOIN public.workout_checkins c ON c.member_id = m.id
+"""
+PAGE_ACTIVE_DAYS = """
+SELECT m.idx - 1, a.activity_date - DATE '2000-01-01'
+FROM unnest(%(ids)s::uuid[]) WITH ORDINALITY AS m(id, idx)
+JOIN public.daily_activity a ON a.member_id = m.id AND a.steps > 0
+"""
+PAGE_CHALLENGES = """
+SELECT m.idx - 1, count(*)
+FROM unnest(%(ids)s::uuid[]) WITH ORDINALITY AS m(id, idx)
+JOIN public.challenge_participants cp ON cp.member_id = m.id AND cp.completed = true
+GROUP BY m.idx
+"""
+PAGE_AWARDED = """
+SELECT m.idx - 1, ub.badge_id::text
+FROM unnest(%(ids)s::uuid[]) WITH ORDINALITY AS m(id, idx)
+JOIN public.user_badges ub ON ub.member_id = m.id
+"""
+INSERT_BADGES = """
+INSERT INTO public.user_badges (member_id, badge_id, awarded_at)
+SELECT member_id, badge_id, now() FROM unnest(%(members)s::uuid[], %(badges)s::uuid[]) AS t(member_id, badge_id)
+ON CONFLICT (badge_id, member_id) DO NOTHING
+"""
+
+class Badge:
+    def __init__(self, id: str, title: str, condition_type: str, condition_value: Optional[int]):
+        self.id = id
+        self.title = title
+        self.type = condition_type
+        # Number(null) === 0 in the route: a badge without a value is met by everyone
+        self.value = int(condition_value or 0)
+
+def load_badges(conn) -> List[Badge]:
+    rows = conn.execute("SELECT id::text, title, condition_type, condition_value FROM public.badges ORDER BY title")
+    return [Badge(*row) for row in rows.fetchall()]
+
+def member_pages(conn, page_size: int):
+    """Member ids in pages of `page_size`, keyset on id (stable while the job runs)"""
+    last = None
+    while True:
+        rows = conn.execute("SELECT id::text FROM public.profiles WHERE role = 'member' "
+                            "AND (%(last)s::uuid IS NULL OR id > %(last)s::uuid) ORDER BY id LIMIT %(n)s",
+                            {"last": last, "n": page_size}).fetchall()
+        if not rows:
+            return
+        yield [r[0] for r in rows]
+        last = rows[-1][0]
+
+def pairs(conn, sql: str, ids: List[str]) -> np.ndarray:
+    """(member index, value) rows of a page query as an int64 array of shape (n, 2)"""
+    rows = conn.execute(sql, {"ids": ids}).fetchall()
+    return np.array(rows, dtype=np.int64).reshape(-1, 2)
+
+# ---------------------------------------------------------------------------
+# Vectorized stats
+# ---------------------------------------------------------------------------
+
+def workout_counts(checkins: np.ndarray, n: int) -> np.ndarray:
+    return np.bincount(checkins[:, 0], minlength=n)
+
+def longest_streaks(days: np.ndarray, n: int) -> np.ndarray:
+    """
+    Longest run of consecutive active days per member, for all members at
+    once: (member, day) pairs are deduplicated and sorted as one int64 key,
+    a run starts wherever the member changes or the gap is not one day, and
+    the longest run of each member is a maximum over its run lengths.
+    """
+    longest = np.zeros(n, dtype=np.int64)
+    if not len(days):
+        return longest
+    keys = np.unique((days[:, 0] << 32) | (days[:, 1] + DAY_BIAS))
+    member, day = keys >> 32, keys & 0xFFFFFFFF
+    starts = np.empty(len(keys), dtype=bool)
+    starts[0] = True
+    starts[1:] = (member[1:] != member[:-1]) | (day[1:] - day[:-1] != 1)
+    run_lengths = np.diff(np.append(np.flatnonzero(starts), len(keys)))
+    np.maximum.at(longest, member[starts], run_lengths)
+    return longest
+
+def condition_values(badge: Badge, stats: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    """The stat a badge compares against, None for types the route never awards"""
+    if badge.type in WORKOUT_TYPES:
+        return stats["workouts"]
+    if badge.type == "streak":
+        return stats["streak"]
+    if badge.type == "challenge_completed":
+        return stats["challenges"]
+    return None
+
+def threshold(badge: Badge) -> int:
+    return 1 if badge.type == "first_workout" else badge.value
+
+def evaluate_page(conn, ids: List[str], badges: List[Badge], counters: Counter) -> Tuple[Dict[str, np.ndarray],
+                                                                                        List[Tuple[str, str]]]:
+    """Stats of every member in the page and the (member_id, badge_id) pairs newly earned"""
+    n = len(ids)
+    types = {b.type for b in badges}
+    column = {b.id: i for i, b in enumerate(badges)}
+    awarded = np.zeros((n, len(badges)), dtype=bool)
+    for idx, badge_id in conn.execute(PAGE_AWARDED, {"ids": ids}).fetchall():
+        if badge_id in column:
+            awarded[idx, column[badge_id]] = True
+    counters["rows"] += int(awarded.sum())
+    counters["queries"] += 1
+
+    stats = {name: np.zeros(n, dtype=np.int64) for name in ("workouts", "streak", "challenges")}
+    if types & {*WORKOUT_TYPES, "streak"}:
+        checkins = pairs(conn, PAGE_CHECKIN_DAYS, ids)
+        stats["workouts"] = workout_counts(checkins, n)
+        counters["rows"] += len(checkins)
+        counters["queries"] += 1
+        if "streak" in types:
+            active = pairs(conn, PAGE_ACTIVE_DAYS, ids)
+            stats["streak"] = longest_streaks(np.concatenate([checkins, active]), n)
+            counters["rows"] += len(active)
+            counters["queries"] += 1
+    if "challenge_completed" in types:
+        completed = pairs(conn, PAGE_CHALLENGES, ids)
+        stats["challenges"][completed[:, 0]] = completed[:, 1]
+        counters["rows"] += len(completed)
+        counters["queries"] += 1
+
+    earned = []
+    for b, badge in enumerate(badges):
+        values = condition_values(badge, stats)
+        if values is None:
+            continue
+        for idx in np.flatnonzero((values >= threshold(badge)) & ~awarded[:, b]):
+            earned.append((ids[idx], badge.id))
+    return stats, earned
+
+def insert_badges(conn, earned: List[Tuple[str, str]]) -> int:
+    inserted = 0
+    for start in range(0, len(earned), INSERT_BATCH):
+        chunk = earned[start:start + INSERT_BATCH]
+        cursor = conn.execute(INSERT_BADGES, {"members": [m for m, _ in chunk], "badges": [b for _, b in chunk]})
+        inserted += cursor.rowcount
+    return inserted
+
+def run_batch(conn, page_size: int, dry_run: bool) -> Dict:
+    start = time.perf_counter()
+    badges = load_badges(conn)
+    counters: Counter = Counter(queries=1)
+    stats_by_member: Dict[str, Tuple[int, int, int]] = {}
+    earned: List[Tuple[str, str]] = []
+    read_seconds = 0.0
+    for ids in member_pages(conn, page_size):
+        counters["pages"] += 1
+        counters["members"] += len(ids)
+        counters["queries"] += 1
+        page_start = time.perf_counter()
+        stats, page_earned = evaluate_page(conn, ids, badges, counters)
+        read_seconds += time.perf_counter() - page_start
+        earned += page_earned
+        for i, member_id in enumerate(ids):
+            stats_by_member[member_id] = (int(stats["workouts"][i]), int(stats["streak"][i]),
+                                          int(stats["challenges"][i]))
+    conn.commit()
+
+    write_start = time.perf_counter()
+    inserted = 0
+    if not dry_run and earned:
+        inserted = insert_badges(conn, earned)
+        conn.commit()
+        counters["queries"] += -(-len(earned) // INSERT_BATCH)
+    titles = {b.id: b.title for b in badges}
+    return {
+        "badges": badges, "stats": stats_by_member, "earned": earned, "inserted": inserted,
+        "by_badge": Counter(titles[b] for _, b in earned), "counters": counters,
+        "read_seconds": read_seconds, "write_seconds": time.perf_counter() - write_start,
+        "seconds": time.perf_counter() - start,
+    }
+
+# ---------------------------------------------------------------------------
+# Reference: the route's per-member algorithm, ported as is
+# ---------------------------------------------------------------------------
+
+def longest_consecutive_streak(day_set: Set[str]) -> int:
+    """longestConsecutiveStreak() of the route over 'YYYY-MM-DD' strings"""
+    if not day_set:
+        return 0
+    ordered = sorted(day_set)
+    longest = current = 1
+    for prev, cur in zip(ordered, ordered[1:]):
+        current = current + 1 if (date.fromisoformat(cur) - date.fromisoformat(prev)).days == 1 else 1
+        longest = max(longest, current)
+    return longest
+
+def meets_condition(badge: Badge, stats: Dict[str, int]) -> bool:
+    if badge.type == "first_workout":
+        return stats["totalWorkouts"] >= 1
+    if badge.type == "workouts_count":
+        return stats["totalWorkouts"] >= badge.value
+    if badge.type == "streak":
+        return stats["longestStreak"] >= badge.value
+    if badge.type == "challenge_completed":
+        return stats["challengesCompleted"] >= badge.value
+    return False
+
+def reference_member(conn, member_id: str, badges: List[Badge]) -> Tuple[Dict[str, int], Set[str], int]:
+    """(stats, badge ids it would award, queries made) for one member, the way the route does it"""
+    already = {r[0] for r in conn.execute("SELECT badge_id::text FROM public.user_badges WHERE member_id = %s",
+                                          (member_id,))}
+    pending = [b for b in badges if b.id not in already]
+    stats = {"totalWorkouts": 0, "longestStreak": 0, "challengesCompleted": 0}
+    queries = 1
+    if not pending:
+        return stats, set(), queries
+    types = {b.type for b in pending}
+    if types & set(WORKOUT_TYPES):
+        stats["totalWorkouts"] = conn.execute("SELECT count(*) FROM public.workout_checkins WHERE member_id = %s",
+                                              (member_id,)).fetchone()[0]
+        queries += 1
+    if "streak" in types:
+        # checked_in_at.slice(0, 10) of the UTC timestamp PostgREST returns
+        checkins = conn.execute("SELECT to_char(checked_in_at AT TIME ZONE 'UTC', 'YYYY-MM-DD') "
+                                "FROM public.workout_checkins WHERE member_id = %s", (member_id,)).fetchall()
+        activity = conn.execute("SELECT activity_date::text FROM public.daily_activity "
+                                "WHERE member_id = %s AND steps > 0", (member_id,)).fetchall()
+        stats["longestStreak"] = longest_consecutive_streak({r[0] for r in checkins} | {r[0] for r in activity})
+        queries += 2
+    if "challenge_completed" in types:
+        stats["challengesCompleted"] = conn.execute(
+            "SELECT count(*) FROM public.challenge_participants WHERE member_id = %s AND completed = true",
+            (member_id,)).fetchone()[0]
+        queries += 1
+    return stats, {b.id for b in pending if meets_condition(b, stats)}, queries
+
+def verify(conn, result: Dict, sample: int, seed: int) -> Tuple[List[str], Dict]:
+    """Compare the batch with the reference on `sample` members (0 = all); returns mismatches and timings"""
+    members = sorted(result["stats"])
+    if sample and sample < len(members):
+        members = random.Random(seed).sample(members, sample)
+    earned: Dict[str, Set[str]] = {}
+    for member_id, badge_id in result["earned"]:
+        earned.setdefault(member_id, set()).add(badge_id)
+    titles = {b.id: b.title for b in result["badges"]}
+
+    mismatches, latencies, queries = [], [], 0
+    for member_id in members:
+        start = time.perf_counter()
+        stats, expected, n = reference_member(conn, member_id, result["badges"])
+        latencies.append(time.perf_counter() - start)
+        queries += n
+        conn.commit()
+        got = earned.get(member_id, set())
+        if got != expected:
+            mismatches.append(f"{member_id}: lote {sorted(titles[b] for b in got)} ≠ ruta "
+                              f"{sorted(titles[b] for b in expected)} (stats ruta {stats}, "
+                              f"lote {dict(zip(('workouts', 'streak', 'challenges'), result['stats'][member_id]))})")
+    return mismatches, {"members": len(members), "latencies": latencies, "queries": queries}
+
+def print_report(result: Dict, dry_run: bool):
+    counters = result["counters"]
+    members = counters["members"]
+    print(f"🏅 {members} socios en {counters['pages']} páginas, {len(result['badges'])} insignias: "
+          f"{counters['queries']} consultas, {counters['rows']} filas leídas")
+    print(f"   lectura + cálculo {result['read_seconds']:.2f}s, escritura {result['write_seconds']:.2f}s, "
+          f"total {result['seconds']:.2f}s ({members / max(result['seconds'], 1e-9):,.0f} socios/s)")
+    for title, n in sorted(result["by_badge"].items()):
+        print(f"   {title:<24} {n:>7}")
+    if dry_run:
+        print(f"🔎 --dry-run: {len(result['earned'])} insignias nuevas sin escribir")
+    else:
+        print(f"✅ {result['inserted']} insignias otorgadas ({len(result['earned']) - result['inserted']} ya estaban)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Otorga las insignias de todos los socios en lote (cron/award-badges)")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"socios por página (por defecto {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--dry-run", action="store_true", help="calcula y cuenta, sin escribir user_badges")
+    parser.add_argument("--verify", type=int, metavar="N",
+                        help="compara con el algoritmo socio a socio de la ruta en N socios (0 = todos)")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de la muestra de --verify")
+    parser.add_argument("--save", action="store_true", help="guarda los tiempos en el result store (kind badges)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permite un DATABASE_URL que no es local (el job de producción)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import psycopg
+
+    args = parse_args()
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+    if not is_local(dsn) and not args.allow_remote:
+        raise SystemExit("❌ DATABASE_URL no apunta a una base local; usa --allow-remote para el job de producción")
+
+    with psycopg.connect(dsn) as conn:
+        # --verify compares against what the route would award now, so nothing is written first
+        dry_run = args.dry_run or args.verify is not None
+        result = run_batch(conn, max(args.page_size, 1), dry_run)
+        print_report(result, dry_run)
+        failed = False
+        rows = {"batch": {"requests": 1, "ok": 1, "latency": [result["seconds"]], "size": [], "tokens": []}}
+        if args.verify is not None:
+            mismatches, reference = verify(conn, result, args.verify, args.seed)
+            total = sum(reference["latencies"])
+            per_member = total / max(reference["members"], 1)
+            print(f"\n🧪 Ruta socio a socio en {reference['members']} socios: {reference['queries']} consultas, "
+                  f"{total:.2f}s ({per_member * 1000:.1f}ms/socio → ~{per_member * result['counters']['members']:.1f}s "
+                  f"para todos, sin contar la latencia de red de cada consulta)")
+            for line in mismatches[:20]:
+                print(f"❌ {line}")
+            if mismatches:
+                print(f"❌ {len(mismatches)} socios no coinciden")
+            else:
+                print("✅ Mismas insignias que meetsCondition() en todos")
+            failed = bool(mismatches)
+            rows["reference"] = {"requests": reference["members"], "ok": reference["members"] - len(mismatches),
+                                 "latency": reference["latencies"], "size": [], "tokens": []}
+            if not args.dry_run:
+                print("   (con --verify no se escribe nada; vuelve a lanzarlo sin --verify para otorgar)")
+    if args.save:
+        from result_store import save_run, store_path
+
+        run_id = save_run("badges", rows, dsn.split("@")[-1])
+        print(f"💾 Guardada la ejecución {run_id} → {store_path()}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Record/replay cache for Admin Assistant responses.
+Each response is stored as one JSON file keyed by a hash of the endpoint URL,
+the prompt, the `messages` payload and the server build tag, so re-running the
+test scripts only reaches the live endpoint for cases whose inputs (or server
+code) changed, and a recording from the local stub is never replayed as if it
+came from a deployment.
+
+Modes (ASSISTANT_CASSETTE or --cassette):
+  off      always live, nothing stored (default)
+  record   replay hits, go live on misses and store the new response
+  replay   hits only, whatever their age; a miss is returned as an error,
+           never sent (CI). Nothing is expired or evicted in this mode
+  refresh  always live, overwrite what is stored
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = Path(__file__).resolve().parent / ".cassettes"
+MODES = ("off", "record", "replay", "refresh")
+DEFAULT_MAX_MB = 50
+DEFAULT_MAX_AGE_DAYS = 7
+# What the assistant endpoint runs: any change here invalidates the recordings
+SERVER_SOURCES = ["app/api/admin-assistant", "lib/adminAssistantTools.js", "lib/rateLimit.js"]
+
+def server_build_tag() -> str:
+    """ASSISTANT_BUILD if set (e.g. a deploy id), else a hash of the local server sources"""
+    build = os.environ.get("ASSISTANT_BUILD")
+    if build:
+        return build
+    digest = hashlib.sha256()
+    for source in SERVER_SOURCES:
+        path = REPO_ROOT / source
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            if file.exists():
+                digest.update(file.relative_to(REPO_ROOT).as_posix().encode())
+                digest.update(file.read_bytes())
+    return "src-" + digest.hexdigest()[:12]
+
+class Cassette:
+    def __init__(self, mode: str = "off", directory: Path = DEFAULT_DIR, build: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024, max_age: float = DEFAULT_MAX_AGE_DAYS * 86400):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.build = build if build is not None else (server_build_tag() if mode != "off" else "")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.live = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def key(self, endpoint: str, prompt: str, payload: Dict[str, Any]) -> str:
+        blob = json.dumps({"endpoint": endpoint.rstrip("/"), "prompt": prompt, "messages": payload.get("messages"), "build": self.build},
+                          sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def lookup(self, endpoint: str, prompt: str, payload: Dict[str, Any]) -> Optional[Dict[Any, Any]]:
+        """
+        Stored response, or None when missing. Outside replay an expired entry
+        is a miss and is deleted; replay serves what is stored, however old.
+        """
+        path = self._path(self.key(endpoint, prompt, payload))
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if self.mode != "replay" and time.time() - entry.get("recorded_at", 0) > self.max_age:
+            path.unlink(missing_ok=True)
+            return None
+        return entry["response"]
+
+    def store(self, endpoint: str, prompt: str, payload: Dict[str, Any], response: Dict[Any, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        key = self.key(endpoint, prompt, payload)
+        entry = {"key": key, "endpoint": endpoint, "prompt": prompt, "build": self.build, "recorded_at": time.time(),
+                 "response": response}
+        tmp = self._path(key).with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones until the directory fits in max_bytes (record/refresh)"""
+        if self.mode not in ("record", "refresh"):
+            return
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.json"):
+            stat = path.stat()
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def call(self, endpoint: str, prompt: str, payload: Dict[str, Any],
+             fetch: Callable[[], Dict[Any, Any]]) -> Dict[Any, Any]:
+        """
+        Return the response for `prompt` sent to `endpoint` according to the mode;
+        `fetch` does the live request and returns make_api_request's shape ({"error": ...} on failure).
+        Error responses are never stored.
+        """
+        if not self.enabled:
+            return fetch()
+        if self.mode in ("record", "replay"):
+            cached = self.lookup(endpoint, prompt, payload)
+            if cached is not None:
+                self.hits += 1
+                print(f"📼 Replayed: {prompt}")
+                return cached
+            self.misses += 1
+            if self.mode == "replay":
+                return {"error": f"Cassette miss (replay mode, build {self.build}): {prompt}"}
+        self.live += 1
+        response = fetch()
+        if "error" not in response:
+            self.store(endpoint, prompt, payload, response)
+        return response
+
+    async def acall(self, endpoint: str, prompt: str, payload: Dict[str, Any], fetch) -> Dict[Any, Any]:
+        """Async twin of call(); `fetch` is a coroutine function"""
+        if self.enabled and self.mode in ("record", "replay"):
+            cached = self.lookup(endpoint, prompt, payload)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            if self.mode == "replay":
+                return {"error": f"Cassette miss (replay mode, build {self.build}): {prompt}"}
+        self.live += 1
+        response = await fetch()
+        if self.enabled and "error" not in response:
+            self.store(endpoint, prompt, payload, response)
+        return response
+
+    def report(self) -> str:
+        missing = f", {self.misses} missing" if self.mode == "replay" else ""
+        return f"📼 Cassette {self.mode}: {self.hits} replayed, {self.live} live{missing} ({self.build})"
+
+def cassette_from_env(mode: Optional[str] = None) -> Cassette:
+    """
+    Cassette configured from the environment, shared by both test scripts:
+    ASSISTANT_CASSETTE (mode, default off), ASSISTANT_CASSETTE_DIR,
+    ASSISTANT_CASSETTE_MAX_MB (default 50), ASSISTANT_CASSETTE_MAX_AGE_DAYS (default 7)
+    """
+    return Cassette(
+        mode=mode or os.environ.get("ASSISTANT_CASSETTE", "off"),
+        directory=Path(os.environ.get("ASSISTANT_CASSETTE_DIR", DEFAULT_DIR)),
+        max_bytes=int(float(os.environ.get("ASSISTANT_CASSETTE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+        max_age=float(os.environ.get("ASSISTANT_CASSETTE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)) * 86400,
+    )
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Gym dashboard snapshot refresher and benchmark
+rpc_get_gym_dashboard (supabase/migrations/20261018130000_gym_dashboard_snapshot.sql)
+answers from the one-row gym_dashboard_snapshot table while it is younger
+than p_max_age_seconds and only recounts profiles, workout_checkins,
+feed_posts... when it is stale or p_force_fresh is set. This job keeps it
+fresh so neither the assistant nor the admin screens pay for the counts:
+it calls rpc_refresh_gym_dashboard() once, or every --every seconds.
+
+--bench measures, under admin JWT claims like a PostgREST request, the
+snapshot read against the live recount (p_force_fresh, rolled back) and the
+bare counts, next to the size of the tables they scan. Load a large dataset
+first (python scripts/synthetic_data.py --scale 20) for numbers that mean
+something; fixtures come from scripts/plan_capture.py.
+
+Usage:
+    DATABASE_URL=... python scripts/dashboard_snapshot.py [--every 300]
+    DATABASE_URL=... python scripts/dashboard_snapshot.py --bench [--runs 50] [--save]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from assistant_bench import percentile
+from plan_capture import act_as, fixtures
+from synthetic_data import is_local
+
+DEFAULT_EVERY = 300
+REFRESH = "SELECT public.rpc_refresh_gym_dashboard()"
+LAST = "SELECT computed_at, compute_ms FROM public.gym_dashboard_snapshot WHERE id = 1"
+# Tables the counts scan, to put the latencies in context
+SCANNED = ["profiles", "workout_checkins", "feed_posts", "feed_reports", "challenges"]
+
+# name -> (SQL, runs as admin); "live" writes the snapshot, so every run is rolled back
+CASES: List[Tuple[str, str, bool]] = [
+    ("snapshot", "SELECT public.rpc_get_gym_dashboard()", True),
+    ("live", "SELECT public.rpc_get_gym_dashboard(p_force_fresh => true)", True),
+    ("counts", "SELECT public.gym_dashboard_counts()", False),
+]
+
+# ---------------------------------------------------------------------------
+# Refresh
+# ---------------------------------------------------------------------------
+
+def refresh(conn) -> Dict[str, Any]:
+    data = conn.execute(REFRESH).fetchone()[0]
+    computed_at, compute_ms = conn.execute(LAST).fetchone()
+    return {"data": data, "computed_at": computed_at, "compute_ms": float(compute_ms or 0)}
+
+def print_refresh(result: Dict[str, Any]):
+    data = result["data"]
+    print(f"📊 {result['computed_at']:%Y-%m-%d %H:%M:%S%z}: {data['total_members']} socios, "
+          f"{data['total_trainers']} entrenadores, {data['new_members_this_month']} altas del mes, "
+          f"{data['total_checkins_this_week']} check-ins esta semana, {data['posts_today']} posts hoy, "
+          f"{data['reported_posts']} denunciados ({result['compute_ms']:.1f} ms)")
+
+def run_refresher(conn, every: float):
+    while True:
+        try:
+            print_refresh(refresh(conn))
+        except Exception as e:  # psycopg.Error; in a loop one failed refresh must not end the job
+            if not every:
+                raise
+            print(f"❌ Refresco fallido: {str(e).splitlines()[0]}")
+        if not every:
+            return
+        time.sleep(every)
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def table_sizes(conn) -> Dict[str, int]:
+    return {name: conn.execute(f"SELECT count(*) FROM public.{name}").fetchone()[0] for name in SCANNED}
+
+def measure(conn, sql: str, admin: str, as_admin: bool, runs: int) -> List[float]:
+    latencies = []
+    for _ in range(runs + 1):
+        with conn.transaction(force_rollback=True):
+            if as_admin and not act_as(conn, admin):
+                raise SystemExit("❌ No existe el rol authenticated: crea los roles con scripts/rls_bench.py")
+            start = time.perf_counter()
+            conn.execute(sql).fetchone()
+            latencies.append(time.perf_counter() - start)
+    return sorted(latencies[1:])  # the first one warms the cache
+
+def run_bench(conn, runs: int) -> Dict[str, List[float]]:
+    admin = fixtures(conn, None, None)["admin"]
+    sizes = table_sizes(conn)
+    print("📦 " + ", ".join(f"{name} {count}" for name, count in sizes.items()))
+    refresh(conn)  # a fresh snapshot, so the "snapshot" case never falls back to counting
+    results = {}
+    for name, sql, as_admin in CASES:
+        results[name] = measure(conn, sql, admin, as_admin, runs)
+        print(f"⏱️  {name:<9} {percentile(results[name], 50) * 1000:8.2f} ms")
+    return results
+
+def print_bench(results: Dict[str, List[float]]):
+    print("\n" + "=" * 64)
+    print("📊 RESUMEN DEL GIMNASIO: FOTO FRENTE A RECUENTO EN VIVO")
+    print("=" * 64)
+    print(f"{'Caso':<12}{'p50 ms':>10}{'p95 ms':>10}{'máx ms':>10}{'× foto':>10}")
+    base = percentile(results["snapshot"], 50)
+    for name, latencies in results.items():
+        p50 = percentile(latencies, 50)
+        print(f"{name:<12}{p50 * 1000:10.2f}{percentile(latencies, 95) * 1000:10.2f}"
+              f"{latencies[-1] * 1000:10.2f}{p50 / base if base else 0:9.1f}×")
+
+def rows_for_store(results: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+    return {name: {"requests": len(latencies), "ok": len(latencies), "latency": latencies, "size": [], "tokens": []}
+            for name, latencies in results.items()}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Refresca la foto del resumen del gimnasio (o la compara con el recuento en vivo)")
+    parser.add_argument("--every", type=float, default=0,
+                        help=f"refresca cada N segundos sin salir (0 = una vez; p. ej. {DEFAULT_EVERY})")
+    parser.add_argument("--bench", action="store_true", help="mide la lectura de la foto frente al recuento en vivo")
+    parser.add_argument("--runs", type=int, default=50, help="con --bench: ejecuciones por caso (por defecto 50)")
+    parser.add_argument("--save", action="store_true", help="con --bench: guarda las latencias en el result store (kind dashboard)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permite un DATABASE_URL que no es local (el job de producción)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import psycopg
+
+    args = parse_args()
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+    if not is_local(dsn) and not args.allow_remote:
+        raise SystemExit("❌ DATABASE_URL no apunta a una base local; usa --allow-remote para el job de producción")
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        if not args.bench:
+            run_refresher(conn, max(args.every, 0))
+            sys.exit(0)
+        results = run_bench(conn, max(args.runs, 1))
+    print_bench(results)
+    if args.save:
+        from result_store import save_run, store_path
+
+        run_id = save_run("dashboard", rows_for_store(results), dsn.split("@")[-1])
+        print(f"💾 Guardada la ejecución {run_id} → {store_path()}")
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Exercise catalog search indexer
+Builds the index rpc_search_exercises reads
+(supabase/migrations/20261018150000_exercise_search_index.sql): for every
+exercise in public.exercises (the catalog of sql/EJERCICIOS-CATALOGO.sql,
+seeded from scripts/legacy/exercises-data.js) its search terms — the name,
+each name_aliases entry and their Spanish ↔ English rendering from
+VOCABULARY, so "sentadilla hack" finds "Hack squat" — folded to lowercase
+without accents, and the padded trigrams of each term. The whole index is
+replaced in one transaction; run it again after editing the catalog (edited
+exercises are still found by plain substring until then).
+
+--bench measures recall (@1, @10, MRR) and latency of the index against the
+old search_exercise_catalog path (fetch the global catalog, substring match
+on names and aliases) on QUERIES: Spanish and English names, aliases,
+missing accents and typos, each with the exercise it should find.
+
+Usage:
+    DATABASE_URL=... python scripts/exercise_index.py [--dry-run]
+    DATABASE_URL=... python scripts/exercise_index.py --bench [--runs 20] [--save]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from assistant_bench import percentile
+from synthetic_data import is_local
+
+# Same table as exercise_search_fold() in the migration; build() checks both agree
+FOLD_FROM = "áàâäãåéèêëíìîïóòôöõúùûüñçý"
+FOLD_TO = "aaaaaaeeeeiiiiooooouuuuncy"
+FOLD_TABLE = str.maketrans(FOLD_FROM + FOLD_FROM.upper(), FOLD_TO * 2)
+
+# (Spanish, English) gym vocabulary, already folded. Longer phrases win, so
+# "peso muerto rumano" is translated before "peso muerto"
+VOCABULARY: List[Tuple[str, str]] = [
+    ("sentadilla bulgara", "bulgarian split squat"),
+    ("sentadilla", "squat"),
+    ("peso muerto rumano", "romanian deadlift"),
+    ("peso muerto", "deadlift"),
+    ("jalon al pecho", "lat pulldown"),
+    ("jalon", "pulldown"),
+    ("remo", "row"),
+    ("prensa", "leg press"),
+    ("extension de cuadriceps", "leg extension"),
+    ("curl femoral", "leg curl"),
+    ("zancadas", "lunges"),
+    ("aductor", "adductor"),
+    ("abductor", "abductor"),
+    ("buenos dias", "good morning"),
+    ("patada de gluteo", "glute kickback"),
+    ("patada de triceps", "triceps kickback"),
+    ("extensiones de triceps", "triceps pushdown"),
+    ("extension de triceps sobre la cabeza", "overhead triceps extension"),
+    ("extension lumbar", "back extension"),
+    ("hiperextensiones", "hyperextensions"),
+    ("gemelo de pie", "standing calf raise"),
+    ("gemelo sentado", "seated calf raise"),
+    ("gemelo", "calf raise"),
+    ("elevaciones de piernas", "leg raises"),
+    ("elevaciones laterales", "lateral raise"),
+    ("elevaciones frontales", "front raise"),
+    ("pajaros", "reverse fly"),
+    ("aperturas", "fly"),
+    ("cruce de poleas", "cable crossover"),
+    ("fondos", "dips"),
+    ("press de hombros", "shoulder press"),
+    ("press inclinado", "incline press"),
+    ("press plano", "bench press"),
+    ("banco predicador", "preacher"),
+    ("banco inclinado", "incline bench"),
+    ("curl martillo", "hammer curl"),
+    ("curl concentrado", "concentration curl"),
+    ("plancha", "plank"),
+    ("crunch declinado", "decline crunch"),
+    ("peck deck", "pec deck"),
+    ("multipower", "smith machine"),
+    ("mancuernas", "dumbbells"),
+    ("mancuerna", "dumbbell"),
+    ("barra", "barbell"),
+    ("polea alta", "high cable"),
+    ("polea baja", "low cable"),
+    ("polea", "cable"),
+    ("poleas", "cables"),
+    ("maquina asistida", "assisted machine"),
+    ("maquina", "machine"),
+    ("disco", "plate"),
+    ("discos", "plates"),
+    ("cuerda", "rope"),
+    ("agarre ancho", "wide grip"),
+    ("agarre cerrado", "close grip"),
+    ("agarre neutro", "neutral grip"),
+    ("agarre supino", "underhand grip"),
+    ("unilateral", "single arm"),
+    ("tumbado", "lying"),
+    ("sentado", "seated"),
+    ("posterior", "rear delt"),
+    ("alterno", "alternating"),
+]
+
+# (query, exact catalog name it must find). Exercises missing from the
+# catalog being benchmarked are skipped
+QUERIES: List[Tuple[str, str]] = [
+    ("sentadilla hack", "Hack squat"),
+    ("hack squat", "Hack squat"),
+    ("jalon al pecho", "Jalón al pecho agarre ancho"),
+    ("wide grip lat pulldown", "Jalón al pecho agarre ancho"),
+    ("romanian deadlift", "Peso muerto rumano"),
+    ("peso muerto rumano", "Peso muerto rumano"),
+    ("leg press", "Prensa"),
+    ("leg extension", "Extensión de cuádriceps"),
+    ("extension cuadriceps", "Extensión de cuádriceps"),
+    ("hammer curl", "Curl martillo"),
+    ("preacher curl", "Curl en banco predicador"),
+    ("curl predicador", "Curl en banco predicador"),
+    ("triceps rope pushdown", "Extensiones de tríceps en polea con cuerda"),
+    ("lateral raise machine", "Elevaciones laterales en máquina"),
+    ("elevaciones laterales mancuernas", "Elevaciones laterales con mancuernas"),
+    ("bulgarian split squat", "Sentadilla búlgara"),
+    ("sentadila bulgara", "Sentadilla búlgara"),
+    ("hip thrust", "Hip thrust"),
+    ("lunges", "Zancadas"),
+    ("seated calf raise", "Gemelo sentado"),
+    ("lying leg curl", "Curl femoral tumbado"),
+    ("plank", "Plancha"),
+    ("smith machine squat", "Sentadilla en multipower"),
+    ("face pull", "Face pull"),
+    ("incline dumbbell press", "Press inclinado con mancuernas"),
+    ("pres inclinado mancuernas", "Press inclinado con mancuernas"),
+    ("remo con mancuerna", "Remo con mancuerna"),
+    ("single arm dumbbell row", "Remo con mancuerna"),
+    ("good morning", "Buenos días en polea baja"),
+    ("hiperextensiones", "Hiperextensiones"),
+    ("pec deck", "Peck deck"),
+    ("curl femoral sentado", "Curl femoral sentado"),
+    ("assisted dips machine", "Fondos en máquina asistida"),
+    ("jalón agarre neutro", "Jalón agarre neutro"),
+    ("extensiones triceps cuerda", "Extensiones de tríceps en polea con cuerda"),
+]
+
+CATALOG = "SELECT id::text, name, coalesce(name_aliases, '{}') FROM public.exercises ORDER BY name"
+INSERT_TERMS = """
+INSERT INTO public.exercise_search_terms (exercise_id, term, folded, kind, trigram_count)
+SELECT * FROM unnest(%(exercise_ids)s::uuid[], %(terms)s::text[], %(folded)s::text[], %(kinds)s::text[],
+                     %(counts)s::int[])
+RETURNING id, exercise_id::text, folded
+"""
+INSERT_TRIGRAMS = """
+INSERT INTO public.exercise_search_trigrams (trigram, term_id)
+SELECT * FROM unnest(%(trigrams)s::text[], %(term_ids)s::bigint[])
+"""
+# The old path: the whole global catalog, filtered in JavaScript
+OLD_FETCH = ("SELECT name, name_aliases, muscle_primary, default_sets, default_reps, default_rest_seconds "
+             "FROM public.exercises WHERE is_global = true ORDER BY name")
+SEARCH = "SELECT name, matched, score FROM public.rpc_search_exercises(%(query)s)"
+
+# ---------------------------------------------------------------------------
+# Terms
+# ---------------------------------------------------------------------------
+
+def fold(text: Optional[str]) -> str:
+    """Lowercase, no accents, words separated by one space"""
+    return re.sub(r"[^a-z0-9]+", " ", (text or "").lower().translate(FOLD_TABLE)).strip()
+
+def trigrams(folded: str) -> Set[str]:
+    """pg_trgm-style: each word padded with two spaces before and one after"""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _phrase_pattern(phrases: List[str]) -> re.Pattern:
+    alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9])(?:{alternatives})(?![a-z0-9])")
+
+ES_TO_EN = dict(VOCABULARY)
+EN_TO_ES = {en: es for es, en in reversed(VOCABULARY)}  # first pair wins, like ES_TO_EN
+ES_PATTERN = _phrase_pattern(list(ES_TO_EN))
+EN_PATTERN = _phrase_pattern(list(EN_TO_ES))
+
+def translations(folded: str) -> List[str]:
+    """The term with every known Spanish phrase in English, and vice versa (one pass each)"""
+    out = []
+    for pattern, table in ((ES_PATTERN, ES_TO_EN), (EN_PATTERN, EN_TO_ES)):
+        translated = pattern.sub(lambda m: table[m.group(0)], folded)
+        if translated != folded:
+            out.append(translated)
+    return out
+
+def terms_for(name: str, aliases: List[str]) -> List[Tuple[str, str, str]]:
+    """(term, folded, kind) of one exercise, deduplicated on the folded text"""
+    terms: List[Tuple[str, str, str]] = []
+    seen: Set[str] = set()
+
+    def add(term: str, kind: str):
+        folded = fold(term)
+        if folded and folded not in seen:
+            seen.add(folded)
+            terms.append((term, folded, kind))
+
+    add(name, "name")
+    for alias in aliases:
+        add(alias, "alias")
+    for _, folded, _ in list(terms):
+        for translated in translations(folded):
+            add(translated, "translation")
+    return terms
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def build(conn, dry_run: bool) -> Dict[str, Any]:
+    start = time.perf_counter()
+    catalog = conn.execute(CATALOG).fetchall()
+    rows = [(exercise_id, term, folded, kind)
+            for exercise_id, name, aliases in catalog for term, folded, kind in terms_for(name, aliases)]
+
+    # The RPC folds the query in SQL: any drift with fold() here would make terms unreachable
+    sql_folded = conn.execute("SELECT array_agg(public.exercise_search_fold(t) ORDER BY i) "
+                              "FROM unnest(%s::text[]) WITH ORDINALITY AS x(t, i)",
+                              ([term for _, term, _, _ in rows],)).fetchone()[0] or []
+    drift = [(term, folded, other) for (_, term, folded, _), other in zip(rows, sql_folded) if folded != other]
+    if drift:
+        term, folded, other = drift[0]
+        raise SystemExit(f"❌ fold() y exercise_search_fold() no coinciden en {len(drift)} términos "
+                         f"(p. ej. {term!r}: {folded!r} ≠ {other!r})")
+
+    stats = {"exercises": len(catalog), "terms": len(rows),
+             "kinds": {k: sum(1 for r in rows if r[3] == k) for k in ("name", "alias", "translation")},
+             "trigrams": sum(len(trigrams(r[2])) for r in rows),
+             "distinct": len({g for r in rows for g in trigrams(r[2])}), "dry_run": dry_run}
+    if not dry_run:
+        with conn.transaction():
+            conn.execute("DELETE FROM public.exercise_search_terms")
+            inserted = conn.execute(INSERT_TERMS, {
+                "exercise_ids": [r[0] for r in rows], "terms": [r[1] for r in rows],
+                "folded": [r[2] for r in rows], "kinds": [r[3] for r in rows],
+                "counts": [len(trigrams(r[2])) for r in rows]}).fetchall()
+            pairs = [(g, term_id) for term_id, _, folded in inserted for g in sorted(trigrams(folded))]
+            conn.execute(INSERT_TRIGRAMS, {"trigrams": [p[0] for p in pairs], "term_ids": [p[1] for p in pairs]})
+        conn.execute("ANALYZE public.exercise_search_terms, public.exercise_search_trigrams")
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+def print_build(stats: Dict[str, Any]):
+    kinds = stats["kinds"]
+    verb = "Se indexarían" if stats["dry_run"] else "Indexados"
+    print(f"📚 {verb} {stats['exercises']} ejercicios: {stats['terms']} términos ({kinds['name']} nombres, "
+          f"{kinds['alias']} alias, {kinds['translation']} traducciones), {stats['trigrams']} trigramas "
+          f"({stats['distinct']} distintos) en {stats['seconds']:.2f}s")
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def old_search(catalog: List[Tuple], query: str) -> List[str]:
+    """search_exercise_catalog before the index: substring on name or alias, catalog order, first 10"""
+    needle = query.strip().lower()
+    return [row[0] for row in catalog
+            if needle in row[0].lower() or any(needle in a.lower() for a in row[1] or [])][:10]
+
+def run_bench(conn, runs: int) -> Dict[str, Dict[str, Any]]:
+    from plan_capture import act_as, fixtures
+
+    admin = fixtures(conn, None, None)["admin"]
+    names = {row[0] for row in conn.execute("SELECT name FROM public.exercises WHERE is_global = true")}
+    queries = [(q, expected) for q, expected in QUERIES if expected in names]
+    if len(queries) < len(QUERIES):
+        print(f"⚠️  {len(QUERIES) - len(queries)} consultas sin su ejercicio en el catálogo: se omiten")
+    if not queries:
+        raise SystemExit("❌ Catálogo vacío: python scripts/seed_loader.py scripts/legacy/exercises-data.js --table exercises")
+
+    results: Dict[str, Dict[str, Any]] = {m: {"latency": [], "ranks": {}} for m in ("substring", "index")}
+    for query, expected in queries:
+        for method in results:
+            for run in range(runs + 1):
+                with conn.transaction(force_rollback=True):
+                    act_as(conn, admin)
+                    start = time.perf_counter()
+                    if method == "substring":
+                        found = old_search(conn.execute(OLD_FETCH).fetchall(), query)
+                    else:
+                        found = [row[0] for row in conn.execute(SEARCH, {"query": query})]
+                    elapsed = time.perf_counter() - start
+                if run:  # the first one warms the cache
+                    results[method]["latency"].append(elapsed)
+            results[method]["ranks"][query] = (found.index(expected) + 1 if expected in found else None, found[:3])
+    for method in results:
+        results[method]["latency"].sort()
+    return results
+
+def recall(ranks: Dict[str, Tuple], k: int) -> float:
+    return sum(1 for rank, _ in ranks.values() if rank and rank <= k) / len(ranks)
+
+def print_bench(results: Dict[str, Dict[str, Any]]):
+    print("\n" + "=" * 76)
+    print("📊 BÚSQUEDA EN EL CATÁLOGO DE EJERCICIOS: ÍNDICE DE TRIGRAMAS FRENTE A SUBCADENA")
+    print("=" * 76)
+    print(f"{'Método':<12}{'recall@1':>10}{'recall@10':>11}{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for method, data in results.items():
+        ranks = data["ranks"]
+        mrr = sum(1 / rank for rank, _ in ranks.values() if rank) / len(ranks)
+        print(f"{method:<12}{recall(ranks, 1):10.0%}{recall(ranks, 10):11.0%}{mrr:8.2f}"
+              f"{percentile(data['latency'], 50) * 1000:10.2f}{percentile(data['latency'], 95) * 1000:10.2f}")
+    print()
+    for query, (rank, top) in results["index"]["ranks"].items():
+        if rank != 1:
+            old_rank = results["substring"]["ranks"][query][0]
+            print(f"   {'❌' if rank is None else '⚠️ '} {query!r}: puesto {rank or '-'} "
+                  f"(subcadena {old_rank or '-'}), primeros: {', '.join(top) or '-'}")
+
+def rows_for_store(results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {method: {"requests": len(data["latency"]), "ok": len(data["latency"]), "latency": data["latency"],
+                     "size": [], "tokens": []} for method, data in results.items()}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Índice de búsqueda del catálogo de ejercicios (trigramas, es ↔ en)")
+    parser.add_argument("--dry-run", action="store_true", help="calcula el índice sin escribirlo")
+    parser.add_argument("--bench", action="store_true", help="recall y latencia del índice frente a la búsqueda por subcadena")
+    parser.add_argument("--runs", type=int, default=20, help="con --bench: ejecuciones por consulta (por defecto 20)")
+    parser.add_argument("--save", action="store_true", help="con --bench: guarda las latencias en el result store (kind exercise_search)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permite un DATABASE_URL que no es local (indexar producción)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import psycopg
+
+    args = parse_args()
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+    if not is_local(dsn) and not args.allow_remote:
+        raise SystemExit("❌ DATABASE_URL no apunta a una base local; usa --allow-remote para indexar producción")
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        if not args.bench:
+            print_build(build(conn, args.dry_run))
+            sys.exit(0)
+        results = run_bench(conn, max(args.runs, 1))
+    print_bench(results)
+    if args.save:
+        from result_store import save_run, store_path
+
+        run_id = save_run("exercise_search", rows_for_store(results), dsn.split("@")[-1])
+        print(f"💾 Guardada la ejecución {run_id} → {store_path()}")
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+HTTP client shared by every script and benchmark that talks to the app or PostgREST
+One keep-alive pool per process instead of a fresh connection (and TLS
+handshake) per request, with:
+
+  - separate connect / read timeouts (a dead host fails in seconds, a slow
+    LLM turn still gets its minute)
+  - HTTP/2 when asked for (HTTP2=1 or http2=True) and `pip install h2` is
+    there, HTTP/1.1 keep-alive otherwise
+  - gzip/deflate always, brotli when `pip install brotli` is there (httpx
+    advertises in Accept-Encoding only what it can decode)
+  - pluggable retries: any object with call(send, on_retry) / acall(...),
+    e.g. rate_limiter.RateLimitScheduler (429/503) or TransientRetry below
+  - per-request timing hooks: connect, TLS, time to first byte, download,
+    and whether the connection was reused (HTTP_TIMING=1 prints a summary)
+"""
+
+import atexit
+import importlib.util
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+_warned_http2 = False
+
+def http2_enabled(requested: Optional[bool] = None) -> bool:
+    """HTTP/2 if requested (argument, else HTTP2=1) and h2 is installed; warns once when it is not"""
+    global _warned_http2
+    if requested is None:
+        requested = os.environ.get("HTTP2", "") in ("1", "true", "yes")
+    if not requested:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        if not _warned_http2:
+            print("⚠️  HTTP/2 requested but h2 is not installed (pip install h2): using HTTP/1.1 keep-alive")
+            _warned_http2 = True
+        return False
+    return True
+
+def brotli_enabled() -> bool:
+    return any(importlib.util.find_spec(name) for name in ("brotli", "brotlicffi"))
+
+def timeouts(read: float = DEFAULT_READ_TIMEOUT, connect: float = DEFAULT_CONNECT_TIMEOUT,
+             pool: Optional[float] = DEFAULT_CONNECT_TIMEOUT) -> httpx.Timeout:
+    """Connect and read split; write follows read, pool=None waits for a free connection forever"""
+    return httpx.Timeout(connect=connect, read=read, write=read, pool=pool)
+
+# ---------------------------------------------------------------------------
+# Timing hooks
+# ---------------------------------------------------------------------------
+
+class RequestTiming:
+    """Phases of one request (seconds), filled from httpcore's trace events"""
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        self.status: Optional[int] = None
+        self.http_version = ""
+        self.start = time.perf_counter()
+        self.connect = 0.0   # TCP connect, 0 on a reused connection
+        self.tls = 0.0       # TLS handshake, 0 on a reused or plain-HTTP connection
+        self.wait = 0.0      # request sent -> response headers (server time + one RTT)
+        self.receive = 0.0   # response headers -> body read
+        self.total = 0.0
+        self.reused = True
+        self.events: Dict[str, float] = {}
+
+    def on_event(self, name: str):
+        now = time.perf_counter()
+        phase = name.split(".", 1)[1] if "." in name else name
+        if phase == "connect_tcp.started":
+            self.reused = False
+        elif phase == "send_request_headers.started" and "connect_tcp.started" not in self.events:
+            self.connect = self.tls = 0.0
+        self.events[phase] = now
+        if phase == "connect_tcp.complete":
+            self.connect = now - self.events["connect_tcp.started"]
+        elif phase == "start_tls.complete":
+            self.tls = now - self.events["start_tls.started"]
+        elif phase == "receive_response_headers.complete":
+            self.wait = now - self.events.get("send_request_headers.started", self.start)
+        elif phase == "response_closed.started":
+            self.receive = now - self.events.get("receive_response_headers.complete", now)
+            self.total = now - self.start
+        if phase == "send_request_headers.started":
+            self.events.pop("connect_tcp.started", None)  # next attempt (retry) starts clean
+
+TimingHook = Callable[[RequestTiming], None]
+
+class TimingLog:
+    """A timing hook that keeps every RequestTiming, with a summary of where the time went"""
+
+    def __init__(self):
+        self.timings: List[RequestTiming] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, timing: RequestTiming):
+        with self.lock:
+            self.timings.append(timing)
+
+    def print_summary(self):
+        if not self.timings:
+            return
+        n = len(self.timings)
+        fresh = [t for t in self.timings if not t.reused]
+
+        def mean(values) -> str:
+            values = list(values)
+            return f"{sum(values) / len(values) * 1000:7.1f}ms" if values else f"{'-':>9}"
+
+        versions = sorted({t.http_version for t in self.timings if t.http_version})
+        print(f"\n🌐 HTTP: {n} requests, {len(fresh)} new connections ({1 - len(fresh) / n:.0%} reused), "
+              f"{', '.join(versions) or '?'}")
+        print(f"   connect {mean(t.connect for t in fresh)}  TLS {mean(t.tls for t in fresh)}  "
+              f"TTFB {mean(t.wait for t in self.timings)}  download {mean(t.receive for t in self.timings)}  "
+              f"total {mean(t.total for t in self.timings)}")
+
+def _trace_hooks(hooks: List[TimingHook], is_async: bool):
+    """httpx event hooks that attach a trace to each request and report its timing when the body is closed"""
+    def start(request: httpx.Request) -> RequestTiming:
+        timing = RequestTiming(request.method, str(request.url))
+        request.extensions["timing"] = timing
+        return timing
+
+    def event(timing: RequestTiming, name: str, info: Dict):
+        timing.on_event(name)
+        if name.endswith("response_closed.complete") and timing.status is not None:
+            for hook in hooks:
+                hook(timing)
+
+    def finish(response: httpx.Response):
+        timing = response.request.extensions.get("timing")
+        if timing is not None:
+            timing.status = response.status_code
+            timing.http_version = response.http_version
+
+    if is_async:
+        async def on_request(request: httpx.Request):
+            timing = start(request)
+
+            async def trace(name: str, info: Dict):
+                event(timing, name, info)
+            request.extensions["trace"] = trace
+
+        async def on_response(response: httpx.Response):
+            finish(response)
+    else:
+        def on_request(request: httpx.Request):
+            timing = start(request)
+            request.extensions["trace"] = lambda name, info: event(timing, name, info)
+
+        on_response = finish
+    return {"request": [on_request], "response": [on_response]}
+
+# ---------------------------------------------------------------------------
+# Retry policies
+# ---------------------------------------------------------------------------
+
+class NoRetry:
+    """Send once"""
+
+    def call(self, send: Callable, on_retry: Callable = None):
+        return send()
+
+    async def acall(self, send: Callable, on_retry: Callable = None):
+        return await send()
+
+class TransientRetry:
+    """
+    Retries failures that did not reach the server: connection refused/reset
+    while connecting and connect timeouts, plus the given gateway statuses
+    (default 502/504; pass () for non-idempotent calls such as exec_sql).
+    Exponential backoff with full jitter.
+    """
+
+    CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+    def __init__(self, max_retries: int = 2, statuses=(502, 504), backoff_base: float = 0.2,
+                 backoff_cap: float = 5.0, seed: Optional[int] = None):
+        self.max_retries = max_retries
+        self.statuses = set(statuses)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rng = random.Random(seed)
+        self.retries = 0
+
+    def _delay(self, attempt: int) -> float:
+        self.retries += 1
+        return self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def call(self, send: Callable, on_retry: Callable = None):
+        attempt = 0
+        while True:
+            try:
+                response = send()
+            except self.CONNECT_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                status = None
+            else:
+                if response.status_code not in self.statuses or attempt >= self.max_retries:
+                    return response
+                status = response.status_code
+            wait = self._delay(attempt)
+            if on_retry:
+                on_retry(status, wait, attempt + 1)
+            time.sleep(wait)
+            attempt += 1
+
+    async def acall(self, send: Callable, on_retry: Callable = None):
+        import asyncio
+
+        attempt = 0
+        while True:
+            try:
+                response = await send()
+            except self.CONNECT_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                status = None
+            else:
+                if response.status_code not in self.statuses or attempt >= self.max_retries:
+                    return response
+                status = response.status_code
+            wait = self._delay(attempt)
+            if on_retry:
+                on_retry(status, wait, attempt + 1)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+class RetryTransport(httpx.BaseTransport):
+    """Runs every request of a client through a retry policy; responses of failed attempts are closed"""
+
+    def __init__(self, transport: httpx.BaseTransport, policy, on_retry: Callable = None):
+        self.transport = transport
+        self.policy = policy
+        self.on_retry = on_retry
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        previous: List[httpx.Response] = []
+
+        def send():
+            if previous:
+                previous.pop().close()
+            response = self.transport.handle_request(request)
+            previous.append(response)
+            return response
+        return self.policy.call(send, on_retry=self.on_retry)
+
+    def close(self):
+        self.transport.close()
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy, on_retry: Callable = None):
+        self.transport = transport
+        self.policy = policy
+        self.on_retry = on_retry
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        previous: List[httpx.Response] = []
+
+        async def send():
+            if previous:
+                await previous.pop().aclose()
+            response = await self.transport.handle_async_request(request)
+            previous.append(response)
+            return response
+        return await self.policy.acall(send, on_retry=self.on_retry)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+def _client_options(base_url: str, headers: Optional[Dict[str, str]], pool_size: int, read_timeout: float,
+                    connect_timeout: float, pool_timeout: Optional[float], http2: Optional[bool],
+                    on_timing: Optional[List[TimingHook]], is_async: bool) -> Dict:
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                          keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY)
+    options = {
+        "base_url": base_url,
+        "headers": headers or {},
+        "timeout": timeouts(read_timeout, connect_timeout, pool_timeout),
+        "transport_kwargs": {"limits": limits, "http2": http2_enabled(http2)},
+        "event_hooks": _trace_hooks(on_timing, is_async) if on_timing else None,
+    }
+    return options
+
+def make_client(base_url: str = "", headers: Optional[Dict[str, str]] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                read_timeout: float = DEFAULT_READ_TIMEOUT, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                pool_timeout: Optional[float] = DEFAULT_CONNECT_TIMEOUT, http2: Optional[bool] = None,
+                retry=None, on_retry: Callable = None, on_timing: Optional[List[TimingHook]] = None) -> httpx.Client:
+    """Pooled keep-alive client; `retry` is a policy applied to every request, `on_timing` hooks get a RequestTiming"""
+    options = _client_options(base_url, headers, pool_size, read_timeout, connect_timeout, pool_timeout, http2,
+                              on_timing, is_async=False)
+    transport = httpx.HTTPTransport(**options.pop("transport_kwargs"))
+    if retry is not None:
+        transport = RetryTransport(transport, retry, on_retry)
+    hooks = options.pop("event_hooks")
+    return httpx.Client(transport=transport, event_hooks=hooks, **options)
+
+def make_async_client(base_url: str = "", headers: Optional[Dict[str, str]] = None,
+                      pool_size: int = DEFAULT_POOL_SIZE, read_timeout: float = DEFAULT_READ_TIMEOUT,
+                      connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                      pool_timeout: Optional[float] = DEFAULT_CONNECT_TIMEOUT, http2: Optional[bool] = None,
+                      retry=None, on_retry: Callable = None,
+                      on_timing: Optional[List[TimingHook]] = None) -> httpx.AsyncClient:
+    """Async twin of make_client()"""
+    options = _client_options(base_url, headers, pool_size, read_timeout, connect_timeout, pool_timeout, http2,
+                              on_timing, is_async=True)
+    transport = httpx.AsyncHTTPTransport(**options.pop("transport_kwargs"))
+    if retry is not None:
+        transport = AsyncRetryTransport(transport, retry, on_retry)
+    hooks = options.pop("event_hooks")
+    return httpx.AsyncClient(transport=transport, event_hooks=hooks, **options)
+
+def env_timing_hooks() -> Optional[List[TimingHook]]:
+    """HTTP_TIMING=1: a TimingLog whose summary is printed when the process exits"""
+    if os.environ.get("HTTP_TIMING", "") not in ("1", "true", "yes"):
+        return None
+    log = TimingLog()
+    atexit.register(log.print_summary)
+    return [log]
+
+_shared: Optional[httpx.Client] = None
+_shared_lock = threading.Lock()
+
+def shared_client() -> httpx.Client:
+    """The process-wide sync client (created on first use, closed at exit) for module-level helpers"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = make_client(on_timing=env_timing_hooks())
+            atexit.register(_shared.close)
+        return _shared
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Missing-index advisor
+Lists foreign keys and the filter/sort columns the app actually queries
+(`.from('t').eq(...).order(...)` chains in lib/adminAssistantTools.js and any
+other JS passed in) that no index leads with, based on the schema folded
+from the migrations (scripts/schema_model.py), and writes a migration with
+the suggested CREATE INDEX statements for review.
+"""
+
+import argparse
+import re
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import schema_model
+from schema_model import REPO_ROOT, closing_paren, ident, normalize_name, split_top_level
+
+DEFAULT_SOURCES = [REPO_ROOT / "lib" / "adminAssistantTools.js"]
+JS_EXTENSIONS = {".js", ".jsx", ".ts", ".tsx", ".mjs"}
+EQUALITY = {"eq", "match", "in", "is", "contains"}
+RANGE = {"gt", "gte", "lt", "lte", "neq", "like", "ilike"}
+ORDER = {"order"}
+
+class QueryPattern:
+    def __init__(self, table: str, source: str):
+        self.table = table
+        self.source = source
+        self.equality: List[str] = []
+        self.range: List[str] = []
+        self.order: List[str] = []
+        self.flags: Dict[str, str] = {}  # boolean eq('col', true) -> partial index candidates
+        self.on_conflict: List[str] = []
+        self.limited = False
+
+    def add(self, method: str, args: str):
+        if method in ("limit", "range", "single", "maybeSingle"):
+            self.limited = True
+            return
+        parts = split_top_level(args)
+        if not parts:
+            return
+        if method == "match":
+            for key in re.findall(r"(\w+)\s*:", parts[0]):
+                self.equality.append(key)
+            return
+        if method in ("upsert",):
+            conflict = re.search(r"onConflict\s*:\s*['\"]([^'\"]+)['\"]", args)
+            if conflict:
+                self.on_conflict = [c.strip() for c in conflict.group(1).split(",")]
+            return
+        column = re.match(r"^['\"`]([\w]+)['\"`]$", parts[0].strip())
+        if not column:
+            return  # dynamic column name / embedded resource filter
+        column = column.group(1)
+        if method in EQUALITY:
+            if method == "eq" and len(parts) > 1 and parts[1].strip() in ("true", "false"):
+                self.flags[column] = parts[1].strip()
+            elif column not in self.equality:
+                self.equality.append(column)
+        elif method in RANGE and column not in self.range:
+            self.range.append(column)
+        elif method in ORDER and column not in self.order:
+            self.order.append(column)
+
+    def wanted(self) -> List[str]:
+        """Leading columns an index should have: equality first, then one range/sort column"""
+        tail = [c for c in self.range[:1] or self.order[:1] if c not in self.equality]
+        return self.equality + tail
+
+# ---------------------------------------------------------------------------
+# JS query patterns
+# ---------------------------------------------------------------------------
+
+CALL = re.compile(r"\.\s*(from|eq|neq|gt|gte|lt|lte|like|ilike|in|is|match|contains|order|upsert|limit|range|single|maybeSingle)\s*\(")
+
+def js_files(paths: List[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.suffix in JS_EXTENSIONS
+                                and "node_modules" not in p.parts))
+        else:
+            files.append(path)
+    return files
+
+def query_patterns(path: Path) -> List[QueryPattern]:
+    """
+    `.from('t')` starts a pattern; filter/order calls chained after it, or
+    applied later through the variable it was assigned to (`q = q.eq(...)`),
+    are attached to it.
+    """
+    text = path.read_text(encoding="utf-8")
+    rel = path.relative_to(REPO_ROOT).as_posix() if path.is_relative_to(REPO_ROOT) else str(path)
+    patterns: List[QueryPattern] = []
+    variables: Dict[str, QueryPattern] = {}
+    current: Optional[QueryPattern] = None
+    last_end = 0
+
+    for match in CALL.finditer(text):
+        method = match.group(1)
+        open_at = match.end() - 1
+        args = text[open_at + 1:closing_paren(text, open_at)]
+        between = text[last_end:match.start()]
+        # a `;`, a blank line or a new statement between calls ends the chain
+        chain_broken = re.search(r";|\n\s*\n|\b(const|let|var|return|if|await)\b", between)
+        receiver = re.search(r"(\w+)\s*$", text[:match.start()])
+        if method == "from":
+            table = re.match(r"^\s*['\"`]([\w.]+)['\"`]", args)
+            current = None
+            if table:
+                line = text.count("\n", 0, match.start()) + 1
+                current = QueryPattern(normalize_name(table.group(1)), f"{rel}:{line}")
+                patterns.append(current)
+                assigned = re.search(r"(?:const|let|var)?\s*(\w+)\s*=\s*(?:await\s+)?[\w.]*\s*$",
+                                     text[max(0, match.start() - 120):match.start()])
+                if assigned:
+                    variables[assigned.group(1)] = current
+        else:
+            if chain_broken and receiver and receiver.group(1) in variables:
+                current = variables[receiver.group(1)]
+            elif chain_broken:
+                current = None
+            if current is not None:
+                current.add(method, args)
+        last_end = closing_paren(text, open_at) + 1
+    return [p for p in patterns if p.equality or p.range or p.order or p.flags or p.on_conflict]
+
+# ---------------------------------------------------------------------------
+# Existing indexes
+# ---------------------------------------------------------------------------
+
+def index_columns(sql: str) -> Tuple[str, List[str], bool]:
+    """(table, leading columns, partial?) of a CREATE INDEX statement"""
+    match = re.search(rf"\bon\s+(?:only\s+)?({schema_model.NAME})\s*(?:using\s+\w+\s*)?\(", sql, re.I)
+    if not match:
+        return "", [], False
+    inner = sql[match.end() - 1:closing_paren(sql, match.end() - 1) + 1][1:-1]
+    columns = []
+    for part in split_top_level(inner):
+        column = re.match(r'^("[^"]+"|\w+)(\s+(asc|desc|nulls\s+\w+|\w+_ops))*\s*$', part.strip(), re.I)
+        columns.append(ident(column.group(1)) if column else f"({part.strip()})")
+    rest = sql[closing_paren(sql, match.end() - 1):]
+    return normalize_name(match.group(1)), columns, bool(re.search(r"\bwhere\b", rest, re.I))
+
+def existing_indexes(model: schema_model.SchemaModel) -> Dict[str, List[List[str]]]:
+    """table -> column lists of every index, PK and UNIQUE constraint"""
+    found: Dict[str, List[List[str]]] = {}
+    for index in model.indexes.values():
+        table, columns, _ = index_columns(index["sql"])
+        if table:
+            found.setdefault(table, []).append(columns)
+    for name, table in model.tables.items():
+        for col in table["columns"].values():
+            if col["primary_key"]:
+                found.setdefault(name, []).append([col["name"]])
+        for definition in table["constraints"].values():
+            kind = re.match(r"\w+", definition).group(0).lower()
+            if kind in ("primary", "unique"):
+                inner = definition[definition.index("(") + 1:closing_paren(definition, definition.index("("))]
+                found.setdefault(name, []).append([ident(c.strip()) for c in inner.split(",")])
+    return found
+
+def covered(indexes: List[List[str]], columns: List[str], ordered: bool = True) -> bool:
+    """Some index starts with `columns` (in any order for the equality part when not `ordered`)"""
+    for index in indexes:
+        head = index[:len(columns)]
+        if head == columns or (not ordered and sorted(head) == sorted(columns)):
+            return True
+    return False
+
+# ---------------------------------------------------------------------------
+# Advice
+# ---------------------------------------------------------------------------
+
+class Suggestion:
+    def __init__(self, table: str, columns: List[str], reason: str, source: str, where: str = ""):
+        self.table = table
+        self.columns = columns
+        self.reason = reason
+        self.sources = [source]
+        self.where = where
+
+    @property
+    def name(self) -> str:
+        base = self.table.split(".")[-1]
+        suffix = "_" + "_".join(f"{k}" for k in re.findall(r"\w+", self.where)[:1]) if self.where else ""
+        return f"idx_{base}_{'_'.join(self.columns)}{suffix}"[:63]
+
+    def sql(self) -> str:
+        where = f" WHERE {self.where}" if self.where else ""
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON public.{self.table.split('.')[-1]}({', '.join(self.columns)}){where};"
+
+def advise(model: schema_model.SchemaModel, patterns: List[QueryPattern]) -> Tuple[List[Suggestion], List[str]]:
+    indexes = existing_indexes(model)
+    suggestions: "OrderedDict[str, Suggestion]" = OrderedDict()
+    notes: List[str] = []
+
+    def suggest(table: str, columns: List[str], reason: str, source: str, where: str = ""):
+        item = Suggestion(table, columns, reason, source, where)
+        if item.name in suggestions:
+            if source not in suggestions[item.name].sources:
+                suggestions[item.name].sources.append(source)
+        else:
+            suggestions[item.name] = item
+
+    for name, table in model.tables.items():
+        if "." in name:
+            continue
+        for definition in table["constraints"].values():
+            if not definition.lower().startswith("foreign"):
+                continue
+            inner = definition[definition.index("(") + 1:closing_paren(definition, definition.index("("))]
+            columns = [ident(c.strip()) for c in inner.split(",")]
+            if not covered(indexes.get(name, []), columns, ordered=False):
+                target = definition.split("REFERENCES", 1)[1].split("(")[0].strip()
+                suggest(name, columns, f"FK → {target} sin índice (JOINs y ON DELETE CASCADE recorren la tabla)",
+                        table["source"])
+
+    for pattern in patterns:
+        table = model.tables.get(pattern.table)
+        if table is None:
+            notes.append(f"{pattern.source}: la tabla {pattern.table} no está en el esquema de las migraciones")
+            continue
+        unknown = [c for c in pattern.equality + pattern.range + pattern.order + list(pattern.flags)
+                   if c not in table["columns"]]
+        if unknown:
+            notes.append(f"{pattern.source}: {pattern.table} no tiene la(s) columna(s) {', '.join(unknown)}")
+            continue
+        existing = indexes.get(pattern.table, [])
+        if pattern.on_conflict and not covered(existing, pattern.on_conflict, ordered=False):
+            notes.append(f"{pattern.source}: upsert onConflict ({', '.join(pattern.on_conflict)}) en "
+                         f"{pattern.table} sin UNIQUE que lo respalde: el upsert fallará")
+        wanted = pattern.wanted()
+        if pattern.flags and not pattern.equality:
+            # eq('is_global', true).order('name'): a partial index beats indexing a boolean
+            where = " AND ".join(c if v == "true" else f"NOT {c}" for c, v in pattern.flags.items())
+            columns = wanted or [c for c in ("id",) if c in table["columns"]]
+            if wanted and not covered(existing, wanted):
+                suggest(pattern.table, columns, f"filtro {where} + orden/rango por {', '.join(columns)}",
+                        pattern.source, where)
+            continue
+        equality = pattern.equality
+        if not equality and not pattern.limited:
+            continue  # full ordered listing: reads the whole table either way
+        if equality and not any(covered(existing, [c]) for c in equality):
+            suggest(pattern.table, wanted, f"filtro por {', '.join(equality)} sin índice", pattern.source)
+        elif len(wanted) > len(equality) and not _covers_tail(existing, equality, wanted[-1]):
+            what = f"filtro {', '.join(equality)} + " if equality else ""
+            suggest(pattern.table, wanted, f"{what}orden/rango por {wanted[-1]}: sin índice que lo sirva "
+                    "se lee y ordena todo en memoria", pattern.source)
+    return _drop_prefixes(list(suggestions.values())), notes
+
+def _drop_prefixes(suggestions: List[Suggestion]) -> List[Suggestion]:
+    """
+    Drop a suggestion that is a left prefix of another one on the same table
+    (and same partial WHERE): (role, name) already serves a filter by role.
+    Its sources move to the index that covers it.
+    """
+    kept = []
+    for item in suggestions:
+        wider = [other for other in suggestions if other.table == item.table and other.where == item.where
+                 and len(other.columns) > len(item.columns) and other.columns[:len(item.columns)] == item.columns]
+        if not wider:
+            kept.append(item)
+            continue
+        widest = max(wider, key=lambda other: len(other.columns))
+        widest.sources.extend(source for source in item.sources if source not in widest.sources)
+    return kept
+
+def _covers_tail(indexes: List[List[str]], equality: List[str], tail: str) -> bool:
+    """An index with all equality columns first (any order) followed by the sort/range column"""
+    for index in indexes:
+        if sorted(index[:len(equality)]) == sorted(equality) and index[len(equality):len(equality) + 1] == [tail]:
+            return True
+    return False
+
+def migration_sql(suggestions: List[Suggestion]) -> str:
+    lines = [
+        "-- Índices sugeridos por scripts/index_advisor.py",
+        "-- Claves foráneas sin índice y filtros/ordenaciones que usan las consultas",
+        "-- de la app (lib/adminAssistantTools.js). Revisar antes de aplicar: en tablas",
+        "-- grandes conviene crearlos con CONCURRENTLY fuera de una transacción.",
+        "",
+    ]
+    for item in suggestions:
+        lines.append(f"-- {item.reason}")
+        lines.extend(f"--   {source}" for source in item.sources[:3])
+        lines.append(item.sql())
+        lines.append("")
+    return "\n".join(lines)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sugiere índices que faltan según migraciones y consultas")
+    parser.add_argument("sources", nargs="*", help="archivos o carpetas JS a analizar "
+                                                   "(por defecto lib/adminAssistantTools.js)")
+    parser.add_argument("--write", action="store_true",
+                        help="escribe la migración en supabase/migrations/<timestamp>_missing_indexes.sql")
+    parser.add_argument("-o", "--output", help="escribe la migración en este archivo")
+    parser.add_argument("--no-fk", action="store_true", help="no revisar claves foráneas")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    model = schema_model.build_model()
+    files = js_files([Path(s).resolve() for s in args.sources] or DEFAULT_SOURCES)
+    patterns = [p for f in files for p in query_patterns(f)]
+    suggestions, notes = advise(model, patterns)
+    if args.no_fk:
+        suggestions = [s for s in suggestions if not s.reason.startswith("FK")]
+
+    print(f"🔎 {len(model.tables)} tablas, {sum(len(v) for v in existing_indexes(model).values())} índices/claves, "
+          f"{len(patterns)} consultas en {len(files)} archivo(s)\n")
+    for item in suggestions:
+        print(f"📌 {item.table}({', '.join(item.columns)}){' WHERE ' + item.where if item.where else ''}")
+        print(f"   {item.reason}")
+        for source in item.sources[:3]:
+            print(f"   ↳ {source}")
+    for note in notes:
+        print(f"⚠️  {note}")
+    if not suggestions:
+        print("✅ No faltan índices")
+        sys.exit(0)
+
+    output = args.output
+    if args.write:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        output = str(schema_model.MIGRATIONS_DIR / f"{stamp}_missing_indexes.sql")
+    if output:
+        Path(output).write_text(migration_sql(suggestions), encoding="utf-8")
+        print(f"\n✅ {len(suggestions)} índices → {output}")
+    else:
+        print(f"\n💡 {len(suggestions)} sugerencias. Usa --write para generar la migración.")
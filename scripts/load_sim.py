@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Mixed-workload simulator: member, trainer and admin traffic
+Thousands of virtual users on asyncio, each one a synthetic account
+(scripts/synthetic_data.py: same --scale/--seed, same ids), running weighted
+journeys built from what the app really calls: PostgREST reads and writes
+(workout_set_logs, rpc_update_daily_steps, the premium feed embed, pending
+check-ins...) and the API routes (/api/member-prs, /api/profile,
+/api/checkin/submit, /api/admin-assistant). Reports throughput and latency
+per journey step.
+
+Virtual users authenticate with JWTs signed with SUPABASE_JWT_SECRET (a
+local `supabase start` stand-in, where the synthetic users exist in
+auth.users) or with tokens from a --tokens JSON file
+([{"id", "role", "token"}], for a production-like target). Steps that
+write only run against local targets unless --allow-writes; steps that
+call Claude or OpenAI (check-in submit, admin assistant) only with
+--include-ai.
+
+Usage:
+    python scripts/load_sim.py --users 2000 --duration 300 [--scale 10 --seed 1]
+    python scripts/load_sim.py --users 500 --only member_feed trainer_checkins --save
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from assistant_bench import percentile
+from http_client import env_timing_hooks, make_async_client
+from synthetic_data import DEFAULT_DAYS, SPLITS, Config, Person, gen_trainer_members
+
+DEFAULT_APP_URL = os.environ.get("ASSISTANT_BASE_URL", "http://localhost:3000").rstrip("/")
+DEFAULT_ROLE_MIX = {"member": 0.9, "trainer": 0.08, "admin": 0.02}
+FEED_SELECT = ("*,author:profiles!feed_posts_author_id_fkey(name,role),feed_likes(id,user_id),"
+               "feed_comments(id,content,created_at,commenter:profiles!feed_comments_commenter_id_fkey(name))")
+CHECKIN_SELECT = "*,member:profiles!member_checkins_member_id_fkey(name,email)"
+ASSISTANT_QUESTIONS = ["¿Cuántos socios tenemos?", "Dame el resumen del gimnasio", "Lista los entrenadores",
+                       "¿Qué posts recientes hay en el feed?"]
+
+def sign_jwt(secret: str, user_id: str, email: str, ttl: int = 3600) -> str:
+    """HS256 access token with the claims GoTrue issues for an authenticated user"""
+    def b64(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    now = int(time.time())
+    header = b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = b64(json.dumps({"sub": user_id, "email": email, "role": "authenticated", "aud": "authenticated",
+                              "iat": now, "exp": now + ttl}).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{b64(signature)}"
+
+def is_local_url(url: str) -> bool:
+    return (urlparse(url).hostname or "") in ("localhost", "127.0.0.1", "::1", "0.0.0.0", "host.docker.internal")
+
+class Identity:
+    """Who a virtual user is: a synthetic account and its token"""
+
+    def __init__(self, user_id: str, role: str, email: str, token: str, premium: bool = False,
+                 members: Optional[List[str]] = None):
+        self.id = user_id
+        self.role = role
+        self.email = email
+        self.token = token
+        self.premium = premium
+        self.members = members or []  # trainers: assigned members
+
+def synthetic_identities(config: Config, secret: str) -> Dict[str, List[Identity]]:
+    """role -> identities of every synthetic account, with tokens signed locally"""
+    assigned: Dict[str, List[str]] = defaultdict(list)
+    for trainer_id, member_id, _ in gen_trainer_members(config, 0, config.people):
+        assigned[trainer_id].append(member_id)
+    everyone = list(assigned.values())
+    identities: Dict[str, List[Identity]] = defaultdict(list)
+    for index in range(config.people):
+        p = Person(config, index)
+        # The admin sees every member; give it a sample to look at
+        members = assigned.get(p.id, []) if p.role == "trainer" else [m for ms in everyone for m in ms][:200]
+        identities[p.role].append(Identity(p.id, p.role, p.email, sign_jwt(secret, p.id, p.email),
+                                           p.premium, members if p.role != "member" else []))
+    return identities
+
+def file_identities(path: str) -> Dict[str, List[Identity]]:
+    identities: Dict[str, List[Identity]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for row in json.load(f):
+            identities[row["role"]].append(Identity(row["id"], row["role"], row.get("email", ""), row["token"],
+                                                    row.get("premium", False), row.get("members")))
+    return identities
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+
+class StepStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.bytes = 0
+
+class SimStats:
+    """journey.step -> samples, plus completed journeys and how long each took"""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.steps: Dict[str, StepStats] = defaultdict(StepStats)
+        self.journeys: Dict[str, List[float]] = defaultdict(list)
+        self.skipped: Counter = Counter()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, key: str, outcome: str, elapsed: float, size: int):
+        stats = self.steps[key]
+        stats.outcomes[outcome] += 1
+        stats.bytes += size
+        if outcome == "ok":
+            stats.latencies.append(elapsed)
+
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+# ---------------------------------------------------------------------------
+# A virtual user's session
+# ---------------------------------------------------------------------------
+
+class Session:
+    """What a journey talks to: PostgREST and the app routes, with the user's token and think time"""
+
+    def __init__(self, client: httpx.AsyncClient, args, identity: Identity, stats: SimStats,
+                 rng: random.Random, journey: str):
+        self.client = client
+        self.args = args
+        self.me = identity
+        self.stats = stats
+        self.rng = rng
+        self.journey = journey
+
+    def headers(self, rest: bool) -> Dict[str, str]:
+        headers = {"Authorization": f"Bearer {self.me.token}"}
+        if rest:
+            headers["apikey"] = self.args.anon_key
+        return headers
+
+    async def think(self):
+        if self.args.think > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+
+    async def request(self, step: str, method: str, url: str, rest: bool, write: bool = False,
+                      ai: bool = False, **kwargs) -> Any:
+        """One timed step; returns the decoded JSON body (None on failure or when skipped)"""
+        key = f"{self.journey}.{step}"
+        if (write and not self.args.writes) or (ai and not self.args.include_ai):
+            self.stats.skipped[key] += 1
+            return None
+        await self.think()
+        if time.perf_counter() >= self.stats.deadline:
+            return None  # the run is over: abandon the journey, do not record a step
+        headers = {**self.headers(rest), **kwargs.pop("headers", {})}
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.TimeoutException:
+            self.stats.record(key, "timeout", time.perf_counter() - start, 0)
+            return None
+        except httpx.HTTPError:
+            self.stats.record(key, "connection", time.perf_counter() - start, 0)
+            return None
+        elapsed = time.perf_counter() - start
+        status = response.status_code
+        outcome = "ok" if status < 400 else "429" if status == 429 else "5xx" if status >= 500 else f"{status}"
+        self.stats.record(key, outcome, elapsed, len(response.content))
+        if outcome != "ok" or not response.content:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    async def rest(self, step: str, method: str, table: str, write: bool = False, **kwargs) -> Any:
+        return await self.request(step, method, f"{self.args.supabase_url}/rest/v1/{table}", True, write, **kwargs)
+
+    async def rpc(self, step: str, name: str, body: Dict[str, Any], write: bool = False) -> Any:
+        return await self.request(step, "POST", f"{self.args.supabase_url}/rest/v1/rpc/{name}", True, write,
+                                  json=body)
+
+    async def api(self, step: str, method: str, path: str, write: bool = False, ai: bool = False,
+                  **kwargs) -> Any:
+        return await self.request(step, method, f"{self.args.app_url}{path}", False, write, ai, **kwargs)
+
+# ---------------------------------------------------------------------------
+# Journeys: what one visit of each kind of user does, in the app's order
+# ---------------------------------------------------------------------------
+
+async def member_workout(s: Session):
+    """WorkoutSetLogger: plan, previous sessions, save today's sets, check PRs"""
+    await s.rest("plan", "GET", "member_workouts",
+                 params={"select": "workout_template_id,routine_slot", "member_id": f"eq.{s.me.id}"})
+    await s.rest("history", "GET", "workout_set_logs",
+                 params={"select": "workout_exercise_id,exercise_name,performed_on,set_number,weight_kg,reps",
+                         "member_id": f"eq.{s.me.id}", "order": "performed_on.desc", "limit": "400"})
+    split = s.rng.choice(list(SPLITS))
+    today = date.today().isoformat()
+    for exercise, load in s.rng.sample(SPLITS[split], 3):
+        rows = [{"member_id": s.me.id, "exercise_name": exercise, "performed_on": today, "set_number": n,
+                 "weight_kg": load or None, "reps": s.rng.randint(6, 12)} for n in range(1, 4)]
+        await s.rest("log_sets", "POST", "workout_set_logs", write=True, json=rows,
+                     params={"on_conflict": "member_id,workout_exercise_id,performed_on,set_number"},
+                     headers={"Prefer": "return=minimal,resolution=merge-duplicates"})
+    await s.api("prs", "GET", f"/api/member-prs?memberId={s.me.id}")
+    if s.rng.random() < 0.1:
+        exercise, load = s.rng.choice(SPLITS[split])
+        await s.api("new_pr", "POST", "/api/member-prs", write=True,
+                    json={"memberId": s.me.id, "exercise_name": exercise, "weight_kg": (load or 10) * 1.1, "reps": 3})
+
+async def member_steps(s: Session):
+    """ActivityTracker: sync today's steps, then the week"""
+    await s.rpc("update_steps", "rpc_update_daily_steps",
+                {"p_steps": s.rng.randint(2000, 14000), "p_source": "healthkit"}, write=True)
+    since = (date.today() - timedelta(days=7)).isoformat()
+    await s.rest("week", "GET", "daily_activity",
+                 params={"select": "activity_date,steps,distance_km,calories_kcal", "member_id": f"eq.{s.me.id}",
+                         "activity_date": f"gte.{since}", "order": "activity_date.desc"})
+
+async def member_feed(s: Session):
+    """FeedSection: the feed with likes/comments embedded, sometimes a like"""
+    posts = await s.rest("feed", "GET", "feed_posts",
+                         params={"select": FEED_SELECT, "is_hidden": "eq.false", "order": "created_at.desc",
+                                 "limit": "50"})
+    if posts and s.rng.random() < 0.3:
+        await s.rest("like", "POST", "feed_likes", write=True,
+                     json={"post_id": s.rng.choice(posts)["id"], "user_id": s.me.id},
+                     headers={"Prefer": "return=minimal,resolution=ignore-duplicates"})
+
+async def member_profile(s: Session):
+    await s.rest("profile", "GET", "profiles", params={"select": "*", "id": f"eq.{s.me.id}"})
+    await s.api("update", "POST", "/api/profile", write=True,
+                json={"id": s.me.id, "updates": {"steps_goal": s.rng.choice([6000, 8000, 10000])}})
+
+async def member_checkin(s: Session):
+    """Periodic check-in: photo analysis + diet/routine adaptation on the server (AI)"""
+    group = str(uuid.uuid4())
+    photos = [{"type": t, "path": f"{s.me.id}/{group}/{t}.jpg"} for t in ("front", "side", "back")]
+    await s.api("submit", "POST", "/api/checkin/submit", write=True, ai=True,
+                json={"memberId": s.me.id, "groupId": group,
+                      "weight": round(s.rng.uniform(55, 100), 1), "photos": photos})
+
+async def trainer_checkins(s: Session):
+    """TrainerDashboard: assignments, pending check-ins, one member's progress"""
+    await s.rest("members", "GET", "trainer_members",
+                 params={"select": "member_id,assigned_at", "trainer_id": f"eq.{s.me.id}"})
+    await s.rest("pending", "GET", "member_checkins",
+                 params={"select": CHECKIN_SELECT, "status": "in.(analyzing,draft_ready,failed)",
+                         "order": "created_at.desc"})
+    if s.me.members:
+        await s.rest("progress", "GET", "progress_records",
+                     params={"select": "date,weight_kg,waist_cm", "member_id": f"eq.{s.rng.choice(s.me.members)}",
+                             "order": "date.desc"})
+
+async def trainer_member_detail(s: Session):
+    """MemberDetailPanel: 45 days of logged sets and steps of one member"""
+    if not s.me.members:
+        return
+    member = s.rng.choice(s.me.members)
+    since = (date.today() - timedelta(days=45)).isoformat()
+    await s.rest("set_logs", "GET", "workout_set_logs",
+                 params={"select": "exercise_name,performed_on,set_number,weight_kg,reps", "member_id": f"eq.{member}",
+                         "performed_on": f"gte.{since}", "order": "performed_on.desc,set_number.asc"})
+    await s.rest("activity", "GET", "daily_activity",
+                 params={"select": "activity_date,steps", "member_id": f"eq.{member}",
+                         "activity_date": f"gte.{since}", "order": "activity_date.desc"})
+
+async def admin_dashboard(s: Session):
+    await s.rpc("dashboard", "rpc_get_gym_dashboard", {})
+    await s.rest("pending", "GET", "member_checkins",
+                 params={"select": CHECKIN_SELECT, "status": "in.(analyzing,draft_ready,failed)",
+                         "order": "created_at.desc"})
+
+async def admin_assistant(s: Session):
+    await s.api("ask", "POST", "/api/admin-assistant", ai=True,
+                json={"messages": [{"role": "user", "content": s.rng.choice(ASSISTANT_QUESTIONS)}]})
+
+# name -> (role, weight within the role, journey)
+JOURNEYS: Dict[str, Tuple[str, float, Callable[[Session], Awaitable[None]]]] = {
+    "member_workout": ("member", 35, member_workout),
+    "member_steps": ("member", 30, member_steps),
+    "member_feed": ("member", 27, member_feed),
+    "member_profile": ("member", 6, member_profile),
+    "member_checkin": ("member", 2, member_checkin),
+    "trainer_checkins": ("trainer", 70, trainer_checkins),
+    "trainer_member_detail": ("trainer", 30, trainer_member_detail),
+    "admin_dashboard": ("admin", 80, admin_dashboard),
+    "admin_assistant": ("admin", 20, admin_assistant),
+}
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+async def virtual_user(n: int, client: httpx.AsyncClient, args, identity: Identity, stats: SimStats,
+                       deadline: float, journeys: Dict[str, Tuple[float, Callable]]):
+    rng = random.Random(f"{args.seed}:vu:{n}")
+    await asyncio.sleep(args.ramp * n / max(args.users, 1))
+    names = list(journeys)
+    weights = [journeys[name][0] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        session = Session(client, args, identity, stats, rng, name)
+        start = time.perf_counter()
+        await journeys[name][1](session)
+        if time.perf_counter() < deadline:
+            stats.journeys[name].append(time.perf_counter() - start)
+
+def pick_identities(identities: Dict[str, List[Identity]], users: int, mix: Dict[str, float],
+                    seed: int) -> List[Identity]:
+    rng = random.Random(f"{seed}:pick")
+    roles = [r for r in mix if identities.get(r)]
+    if not roles:
+        raise SystemExit("❌ No identities for any role of the mix")
+    return [rng.choice(identities[rng.choices(roles, [mix[r] for r in roles])[0]]) for _ in range(users)]
+
+async def run_sim(args, identities: List[Identity]) -> SimStats:
+    deadline = time.perf_counter() + args.ramp + args.duration
+    stats = SimStats(deadline)
+    by_role: Dict[str, Dict[str, Tuple[float, Callable]]] = defaultdict(dict)
+    for name, (role, weight, journey) in JOURNEYS.items():
+        if not args.only or name in args.only:
+            by_role[role][name] = (weight, journey)
+
+    # Waiting for a free connection is not a failure: pool_timeout=None
+    async with make_async_client(pool_size=args.connections, read_timeout=args.timeout, pool_timeout=None,
+                                 http2=args.http2 or None, on_timing=env_timing_hooks()) as client:
+        async def progress():
+            while True:
+                await asyncio.sleep(10)
+                done = sum(len(v) for v in stats.journeys.values())
+                calls = sum(sum(s.outcomes.values()) for s in stats.steps.values())
+                errors = sum(n for s in stats.steps.values() for o, n in s.outcomes.items() if o != "ok")
+                print(f"⏱️  {stats.elapsed():6.0f}s  {done:>7} journeys  {calls:>8} requests"
+                      f"  {calls / stats.elapsed():7.1f} req/s  {errors} errors")
+
+        reporter = asyncio.create_task(progress())
+        await asyncio.gather(*(virtual_user(n, client, args, identity, stats, deadline, by_role[identity.role])
+                               for n, identity in enumerate(identities) if by_role.get(identity.role)))
+        reporter.cancel()
+    stats.finished = time.perf_counter()
+    return stats
+
+def print_sim_report(stats: SimStats):
+    elapsed = stats.elapsed()
+    print("\n" + "=" * 112)
+    print(f"📊 MIXED WORKLOAD ({elapsed:.0f}s): throughput and latency per journey step (ms)")
+    print("=" * 112)
+    print(f"{'Step':<36}{'requests':>9}{'req/s':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'KB/req':>8}  errors")
+    for key in sorted(stats.steps):
+        step = stats.steps[key]
+        total = sum(step.outcomes.values())
+        latencies = sorted(step.latencies)
+
+        def ms(p: float) -> str:
+            return f"{percentile(latencies, p) * 1000:9.1f}" if latencies else f"{'-':>9}"
+
+        errors = ", ".join(f"{o} {n}" for o, n in step.outcomes.most_common() if o != "ok")
+        print(f"{key:<36}{total:>9}{total / elapsed:8.1f}{ms(50)}{ms(90)}{ms(99)}{ms(100)}"
+              f"{step.bytes / total / 1024 if total else 0:8.1f}  {errors}")
+
+    print(f"\n{'Journey':<36}{'completed':>10}{'per min':>9}{'p50 s':>9}{'p90 s':>9}")
+    for name, durations in sorted(stats.journeys.items()):
+        durations.sort()
+        print(f"{name:<36}{len(durations):>10}{len(durations) / elapsed * 60:9.1f}"
+              f"{percentile(durations, 50):9.2f}{percentile(durations, 90):9.2f}")
+    for key, n in sorted(stats.skipped.items()):
+        print(f"⏭️  {key}: skipped {n} times (writes need a local target or --allow-writes; AI needs --include-ai)")
+
+def rows_for_store(stats: SimStats) -> Dict[str, Dict[str, Any]]:
+    """--save: one scenario per journey step, in the shape result_store.save_run expects"""
+    return {key: {"requests": sum(step.outcomes.values()), "ok": step.outcomes["ok"], "latency": step.latencies,
+                  "size": [], "tokens": []} for key, step in stats.steps.items()}
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        role, _, share = part.partition("=")
+        mix[role.strip()] = float(share)
+    return mix
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mixed member/trainer/admin workload against the app and PostgREST")
+    parser.add_argument("--users", type=int, default=500, help="Virtual users (default: 500)")
+    parser.add_argument("--duration", type=float, default=120, help="Seconds at full load after the ramp (default: 120)")
+    parser.add_argument("--ramp", type=float, default=30, help="Seconds to start all users (default: 30)")
+    parser.add_argument("--think", type=float, default=2.0, help="Mean think time between steps, s (default: 2)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_ROLE_MIX,
+                        help="Share of users per role (default: member=0.9,trainer=0.08,admin=0.02)")
+    parser.add_argument("--only", nargs="+", choices=list(JOURNEYS), help="Only these journeys")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size (default: 100)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request read timeout, s (default: 30)")
+    parser.add_argument("--http2", action="store_true", help="HTTP/2 to TLS targets (needs `pip install h2`)")
+    parser.add_argument("--app-url", default=DEFAULT_APP_URL, help=f"Next.js app (default: {DEFAULT_APP_URL})")
+    parser.add_argument("--supabase-url", default=os.environ.get("NEXT_PUBLIC_SUPABASE_URL", "http://127.0.0.1:54321"),
+                        help="Supabase API URL (default: NEXT_PUBLIC_SUPABASE_URL or the local one)")
+    parser.add_argument("--anon-key", default=os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY", ""),
+                        help="PostgREST apikey (default: NEXT_PUBLIC_SUPABASE_ANON_KEY)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale the synthetic dataset was loaded with")
+    parser.add_argument("--seed", type=int, default=1, help="Seed the synthetic dataset was loaded with")
+    parser.add_argument("--tokens", help="JSON file [{id, role, token}] instead of signing with SUPABASE_JWT_SECRET")
+    parser.add_argument("--allow-writes", action="store_true", help="Run write steps against a non-local target")
+    parser.add_argument("--include-ai", action="store_true",
+                        help="Run the steps that call Claude/OpenAI (check-in submit, admin assistant)")
+    parser.add_argument("--save", action="store_true", help="Store the step latencies in the result store (kind mixed)")
+    args = parser.parse_args()
+    args.app_url = args.app_url.rstrip("/")
+    args.supabase_url = args.supabase_url.rstrip("/")
+    args.writes = args.allow_writes or (is_local_url(args.app_url) and is_local_url(args.supabase_url))
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.tokens:
+        identities = file_identities(args.tokens)
+    else:
+        secret = os.environ.get("SUPABASE_JWT_SECRET")
+        if not secret:
+            raise SystemExit("❌ Set SUPABASE_JWT_SECRET (local: `supabase status`) or pass --tokens")
+        identities = synthetic_identities(Config(args.scale, args.seed, DEFAULT_DAYS, date.today()), secret)
+    users = pick_identities(identities, args.users, args.mix, args.seed)
+    roles = Counter(u.role for u in users)
+    print(f"🏋️ {args.users} virtual users ({', '.join(f'{n} {r}' for r, n in roles.most_common())}) for "
+          f"{args.duration:.0f}s after a {args.ramp:.0f}s ramp → app {args.app_url}, API {args.supabase_url}")
+    print(f"   writes {'on' if args.writes else 'off'}, AI steps {'on' if args.include_ai else 'off'}, "
+          f"{args.connections} connections, think time {args.think}s\n")
+
+    stats = asyncio.run(run_sim(args, users))
+    print_sim_report(stats)
+    if args.save:
+        from result_store import save_run, store_path
+
+        run_id = save_run("mixed", rows_for_store(stats), args.app_url)
+        print(f"💾 Saved run {run_id} → {store_path()}")
+    failed = sum(n for s in stats.steps.values() for o, n in s.outcomes.items() if o != "ok")
+    sys.exit(1 if failed and failed == sum(sum(s.outcomes.values()) for s in stats.steps.values()) else 0)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Member listing pagination check
+Used by `backend_test.py pages`: walks list_members page by page through the
+test-only /api/admin-assistant/tools entry point (ENABLE_TOOL_BENCH on the
+server), following next_cursor until it is null, and fails when a page is
+over the requested limit or the byte budget (what lands in the LLM context
+and toolResults), repeats a member or never ends. With --export it then reads
+/api/admin/members-export as a stream and checks it has the same members.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+from assistant_client import default_headers
+from http_client import make_client
+
+MAX_PAGES = 10000  # a cursor that never advances must not loop forever
+
+class PageWalk:
+    """Every page of one walk and what went wrong with them"""
+
+    def __init__(self, limit: int, max_bytes: int, search: Optional[str] = None):
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.search = search
+        self.sizes: List[int] = []
+        self.latencies: List[float] = []
+        self.ids: List[str] = []
+        self.errors: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and bool(self.sizes)
+
+def walk_members(base_url: str, limit: int, max_bytes: int, search: Optional[str] = None,
+                 timeout: int = 60) -> PageWalk:
+    endpoint = f"{base_url}/api/admin-assistant/tools"
+    walk = PageWalk(limit, max_bytes, search)
+    seen: Set[str] = set()
+    cursor = None
+    with make_client(headers=default_headers(), read_timeout=timeout) as client:
+        for page in range(1, MAX_PAGES + 1):
+            args: Dict[str, Any] = {"limit": limit}
+            if cursor:
+                args["cursor"] = cursor
+            if search:
+                args["search"] = search
+            start = time.perf_counter()
+            try:
+                response = client.post(endpoint, json={"tool": "list_members", "args": args})
+            except httpx.HTTPError as e:
+                walk.errors.append(f"page {page}: {e}")
+                break
+            walk.latencies.append(time.perf_counter() - start)
+            if response.status_code == 404:
+                walk.errors.append("Tool bench disabled on the server (set ENABLE_TOOL_BENCH=1 and redeploy)")
+                break
+            result = (response.json().get("result") or {}) if response.status_code == 200 else {}
+            if response.status_code != 200 or result.get("success") is False:
+                walk.errors.append(f"page {page}: HTTP {response.status_code} {result.get('error') or response.text[:200]}")
+                break
+
+            members = result.get("members") or []
+            size = len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+            walk.sizes.append(size)
+            if len(members) > limit:
+                walk.errors.append(f"page {page}: {len(members)} members for limit {limit}")
+            if size > max_bytes:
+                walk.errors.append(f"page {page}: {size} bytes, over the {max_bytes} byte budget")
+            for member in members:
+                if member.get("id") in seen:
+                    walk.errors.append(f"page {page}: member {member.get('id')} already returned")
+                seen.add(member.get("id"))
+                walk.ids.append(member.get("id"))
+            print(f"📄 Page {page}: {len(members)} members, {size} bytes, "
+                  f"{walk.latencies[-1] * 1000:.0f} ms{'' if result.get('next_cursor') else ' (last)'}")
+
+            cursor = result.get("next_cursor")
+            if not cursor:
+                break
+            if not members:
+                walk.errors.append(f"page {page}: empty page with a next_cursor")
+                break
+        else:
+            walk.errors.append(f"still paging after {MAX_PAGES} pages")
+    return walk
+
+def read_export(base_url: str, fmt: str = "ndjson", timeout: int = 300) -> Dict[str, Any]:
+    """Stream /api/admin/members-export line by line: {"ids", "bytes", "ttfb", "total", "error"}"""
+    endpoint = f"{base_url}/api/admin/members-export"
+    ids: List[str] = []
+    stats: Dict[str, Any] = {"ids": ids, "bytes": 0, "ttfb": None, "total": 0.0, "error": None}
+    start = time.perf_counter()
+    with make_client(headers=default_headers(), read_timeout=timeout) as client:
+        with client.stream("GET", endpoint, params={"format": fmt}) as response:
+            if response.status_code != 200:
+                stats["error"] = f"HTTP {response.status_code}: {response.read()[:200]!r}"
+                return stats
+            header = fmt == "csv"
+            for line in response.iter_lines():
+                if stats["ttfb"] is None:
+                    stats["ttfb"] = time.perf_counter() - start
+                stats["bytes"] += len(line.encode("utf-8")) + 1
+                if not line or header:
+                    header = False
+                    continue
+                if fmt == "csv":
+                    if line.startswith("# error"):
+                        stats["error"] = line[2:]
+                    else:
+                        ids.append(line.split(",", 1)[0])
+                    continue
+                row = json.loads(line)
+                if "error" in row:
+                    stats["error"] = row["error"]
+                else:
+                    ids.append(row.get("id"))
+    stats["total"] = time.perf_counter() - start
+    return stats
+
+def print_walk(walk: PageWalk, export: Optional[Dict[str, Any]] = None):
+    print("\n" + "=" * 64)
+    print("📋 LIST_MEMBERS PAGINATION")
+    print("=" * 64)
+    if walk.sizes:
+        print(f"{len(walk.sizes)} pages, {len(walk.ids)} members, limit {walk.limit}")
+        print(f"Page size: max {max(walk.sizes)} bytes (budget {walk.max_bytes}), "
+              f"mean {sum(walk.sizes) / len(walk.sizes):.0f} bytes")
+        print(f"Page latency: max {max(walk.latencies) * 1000:.0f} ms, "
+              f"mean {sum(walk.latencies) / len(walk.latencies) * 1000:.0f} ms")
+    if export is not None:
+        if export["error"]:
+            print(f"❌ Export: {export['error']}")
+        else:
+            print(f"Export: {len(export['ids'])} members, {export['bytes']} bytes, "
+                  f"first line after {(export['ttfb'] or 0) * 1000:.0f} ms, {export['total']:.2f}s total")
+            if walk.search:
+                # The export is always the whole roster: a filtered walk is only a subset of it
+                print(f"⚠️  Pages filtered by --search {walk.search!r}: export not compared")
+            else:
+                missing = set(walk.ids) - set(export["ids"])
+                extra = set(export["ids"]) - set(walk.ids)
+                if missing or extra or len(export["ids"]) != len(set(export["ids"])):
+                    walk.errors.append(f"export differs from the pages: {len(missing)} missing, {len(extra)} extra, "
+                                       f"{len(export['ids']) - len(set(export['ids']))} repeated")
+    for error in walk.errors:
+        print(f"❌ {error}")
+    if walk.ok and not (export and export["error"]):
+        print("✅ Every page within limits, no member repeated")
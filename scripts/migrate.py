@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Migration runner for supabase/migrations/*.sql
+Records applied versions in public.schema_migrations and applies only the
+pending files, in filename (timestamp) order. Small migrations are batched
+into one exec_sql call per round trip; each batch is a single transaction,
+so an interrupted run leaves nothing half-applied and simply resumes.
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sql_client import SqlError, client_from_env
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = REPO_ROOT / "supabase" / "migrations"
+LEDGER_MIGRATION = "20260820120000_migration_ledger_and_exec_sql"
+
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_BATCH_BYTES = 64 * 1024  # bigger files go alone in their own call
+
+class Migration:
+    def __init__(self, path: Path):
+        self.path = path
+        self.version = path.stem
+        self.sql = path.read_text(encoding="utf-8")
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    # Full filename order: two files can share a timestamp (20260710000001_*)
+    return [Migration(p) for p in sorted(directory.glob("*.sql"))]
+
+def strip_transaction_control(sql: str) -> str:
+    """
+    Drop top-level BEGIN;/COMMIT; lines (e.g. 20260502000002): the batch is
+    already a transaction and exec_sql cannot run transaction commands.
+    PL/pgSQL blocks use a bare BEGIN without semicolon, so they are untouched.
+    """
+    kept = []
+    for line in sql.splitlines():
+        if line.strip().rstrip(";").strip().upper() in ("BEGIN", "COMMIT") and line.strip().endswith(";"):
+            kept.append(f"-- {line.strip()} (migrate.py: el lote ya es una transacción)")
+        else:
+            kept.append(line)
+    return "\n".join(kept)
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def wrap_migration(migration: Migration) -> str:
+    """Migration body followed by its ledger row, timed with clock_timestamp()"""
+    body = strip_transaction_control(migration.sql).rstrip()
+    if not body.endswith(";"):
+        body += "\n;"
+    return (
+        f"-- >>> {migration.version}\n"
+        "SELECT set_config('migrate.started', clock_timestamp()::text, true);\n"
+        f"{body}\n"
+        "INSERT INTO public.schema_migrations (version, checksum, duration_ms)\n"
+        f"VALUES ({_quote(migration.version)}, {_quote(migration.checksum)},\n"
+        "  round((extract(epoch FROM clock_timestamp() - current_setting('migrate.started')::timestamptz) * 1000)::numeric, 1))\n"
+        "ON CONFLICT (version) DO UPDATE\n"
+        "  SET checksum = EXCLUDED.checksum, duration_ms = EXCLUDED.duration_ms, applied_at = now();\n"
+    )
+
+def make_batches(pending: List[Migration], batch_size: int, batch_bytes: int) -> List[List[Migration]]:
+    batches, current, size = [], [], 0
+    for migration in pending:
+        length = len(migration.sql.encode("utf-8"))
+        if current and (len(current) >= batch_size or size + length > batch_bytes):
+            batches.append(current)
+            current, size = [], 0
+        current.append(migration)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+def bootstrap_sql() -> str:
+    return (MIGRATIONS_DIR / f"{LEDGER_MIGRATION}.sql").read_text(encoding="utf-8")
+
+def fetch_ledger(client) -> Dict[str, Dict]:
+    """version -> ledger row; creates the ledger table if exec_sql exists but the table does not"""
+    try:
+        rows = client.select("schema_migrations", "version,checksum,duration_ms")
+    except SqlError:
+        client.execute(bootstrap_sql())
+        rows = client.select("schema_migrations", "version,checksum,duration_ms")
+    return {row["version"]: row for row in rows}
+
+def apply_batch(client, batch: List[Migration]) -> float:
+    """One round trip for the whole batch; returns its wall time"""
+    start = time.perf_counter()
+    client.execute("\n".join(wrap_migration(m) for m in batch))
+    return time.perf_counter() - start
+
+def run(client, migrations: List[Migration], batch_size: int, batch_bytes: int) -> bool:
+    ledger = fetch_ledger(client)
+    for migration in migrations:
+        applied = ledger.get(migration.version)
+        if applied and applied["checksum"] != migration.checksum:
+            print(f"⚠️  {migration.version} se modificó después de aplicarse (no se vuelve a ejecutar)")
+
+    pending = [m for m in migrations if m.version not in ledger]
+    print(f"📋 {len(migrations)} migraciones, {len(ledger)} ya aplicadas, {len(pending)} pendientes")
+    if not pending:
+        print("✅ La base de datos está al día")
+        return True
+
+    batches = make_batches(pending, batch_size, batch_bytes)
+    total_start = time.perf_counter()
+    for i, batch in enumerate(batches, 1):
+        kb = sum(len(m.sql.encode("utf-8")) for m in batch) / 1024
+        try:
+            elapsed = apply_batch(client, batch)
+            print(f"📦 Lote {i}/{len(batches)}: {len(batch)} migraciones, {kb:.0f} KB, {elapsed * 1000:.0f} ms")
+        except SqlError as e:
+            if len(batch) == 1:
+                print(f"❌ {batch[0].version}: {e}")
+                return False
+            # The batch rolled back as a whole: replay it one by one so the
+            # migrations before the culprit get applied and it gets named
+            print(f"⚠️  Lote {i} falló, reintentando migración a migración...")
+            for migration in batch:
+                try:
+                    apply_batch(client, [migration])
+                except SqlError as single_error:
+                    print(f"❌ {migration.version}: {single_error}")
+                    print("💡 Corrige el archivo y vuelve a ejecutar: se reanuda desde aquí")
+                    return False
+
+    ledger = fetch_ledger(client)
+    for migration in pending:
+        print(f"   ✅ {migration.version:<70} {float(ledger[migration.version]['duration_ms'] or 0):>9.1f} ms")
+    print(f"\n⏱️ {len(pending)} migraciones en {len(batches)} peticiones, "
+          f"{time.perf_counter() - total_start:.2f}s")
+    return True
+
+def baseline(client, migrations: List[Migration], through: str = None):
+    """Mark migrations as applied without running them (databases set up by hand)"""
+    ledger = fetch_ledger(client)
+    marked = [m for m in migrations if m.version not in ledger and (not through or m.version <= through)]
+    if marked:
+        values = ",\n".join(f"({_quote(m.version)}, {_quote(m.checksum)})" for m in marked)
+        client.execute(f"INSERT INTO public.schema_migrations (version, checksum) VALUES\n{values}\n"
+                       "ON CONFLICT (version) DO NOTHING;")
+    print(f"✅ {len(marked)} migraciones marcadas como aplicadas")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Aplica las migraciones pendientes de supabase/migrations")
+    parser.add_argument("--dry-run", action="store_true", help="solo lista las pendientes")
+    parser.add_argument("--baseline", nargs="?", const="", metavar="VERSION",
+                        help="marca como aplicadas (sin ejecutarlas) todas, o hasta VERSION inclusive")
+    parser.add_argument("--bootstrap", action="store_true",
+                        help="imprime el SQL de exec_sql + ledger para pegarlo una vez en el SQL Editor")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="migraciones por petición")
+    parser.add_argument("--batch-bytes", type=int, default=DEFAULT_BATCH_BYTES, help="tamaño máximo de un lote")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.bootstrap:
+        print(bootstrap_sql())
+        sys.exit(0)
+
+    migrations = load_migrations()
+    client = client_from_env(pool_size=1)
+    print(f"🚀 Migraciones → {client.describe()}")
+    try:
+        if args.baseline is not None:
+            baseline(client, migrations, args.baseline or None)
+            sys.exit(0)
+        if args.dry_run:
+            ledger = fetch_ledger(client)
+            for migration in migrations:
+                if migration.version not in ledger:
+                    print(f"   ⏳ {migration.version}")
+            sys.exit(0)
+        ok = run(client, migrations, args.batch_size, args.batch_bytes)
+    except SqlError as e:
+        print(f"❌ {e}")
+        ok = False
+    finally:
+        client.close()
+    sys.exit(0 if ok else 1)
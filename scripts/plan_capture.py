@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Query plan capture and diff for the Admin Assistant RPCs
+Runs the RPCs behind the assistant tools and the PostgREST query shapes of
+the hot read tools under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) against a
+local Postgres (DATABASE_URL, filled by scripts/synthetic_data.py at the
+scale you care about) and stores each capture as one JSON file in
+scripts/.plans/, tagged with the last applied migration, a fingerprint of
+the indexes/functions/policies in the database and the git commit. `diff`
+compares two captures node by node and exits 1 when a table that was read
+through an index is now seq-scanned, or the shared buffers a query touches
+grew beyond the threshold, so a migration that quietly degrades a plan is
+caught before deploy.
+
+The RPCs are plpgsql: EXPLAIN of the call only shows a Function Scan, so
+the statements of the function body (read from pg_proc, i.e. the version
+in the database) are explained too, one by one, with the parameters bound
+to the same values, as `rpc_x#1`, `rpc_x#2`... Everything runs in a
+transaction that is rolled back, as an `authenticated` admin like the app.
+
+Usage:
+    python scripts/plan_capture.py capture [--label L] [--runs N]
+    python scripts/plan_capture.py list
+    python scripts/plan_capture.py diff [OLD] [NEW]   # default: previous vs latest
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from result_store import git_commit
+from sql_splitter import split_statements, strip_comments
+from synthetic_data import is_local
+
+PLANS_DIR = Path(__file__).resolve().parent / ".plans"
+
+# name -> (SQL with %(param)s placeholders, params; "member"/"search" are filled from the fixtures)
+RPC_CASES: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "rpc_find_member": ("SELECT * FROM public.rpc_find_member(%(p_search)s)", {"p_search": "search"}),
+    "rpc_list_members": ("SELECT * FROM public.rpc_list_members(%(p_limit)s::integer, %(p_after_name)s, "
+                         "%(p_after_id)s::uuid, %(p_search)s)",
+                         {"p_limit": "21", "p_after_name": "search",
+                          "p_after_id": "00000000-0000-0000-0000-000000000000", "p_search": ""}),
+    "rpc_list_members:first": ("SELECT * FROM public.rpc_list_members(21)", {}),
+    "rpc_get_member_summary": ("SELECT public.rpc_get_member_summary(%(p_member_id)s)", {"p_member_id": "member"}),
+    "rpc_get_gym_dashboard": ("SELECT public.rpc_get_gym_dashboard()", {}),
+    "rpc_list_trainers": ("SELECT * FROM public.rpc_list_trainers()", {}),
+    # The body reads plpgsql variables, so only the call is captured (":" skips the statements)
+    "rpc_search_exercises:ranked": ("SELECT * FROM public.rpc_search_exercises(%(p_query)s)",
+                                    {"p_query": "sentadilla hack"}),
+    "rpc_list_food_aversions": ("SELECT * FROM public.rpc_list_food_aversions(%(p_member_id)s)", {"p_member_id": "member"}),
+    "rpc_list_member_notes": ("SELECT * FROM public.rpc_list_member_notes(%(p_member_id)s)", {"p_member_id": "member"}),
+    "rpc_get_member_notes_text": ("SELECT public.rpc_get_member_notes_text(%(p_member_id)s)", {"p_member_id": "member"}),
+    "rpc_list_admin_preferences": ("SELECT * FROM public.rpc_list_admin_preferences()", {}),
+    "rpc_get_admin_preferences_text": ("SELECT public.rpc_get_admin_preferences_text()", {}),
+}
+
+# The `.from(...)` chains of the hot read tools in lib/adminAssistantTools.js, as PostgREST runs them
+QUERY_CASES: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "search_exercise_catalog": (
+        "SELECT name, name_aliases, muscle_primary, default_sets, default_reps, default_rest_seconds "
+        "FROM public.exercises WHERE is_global = true ORDER BY name", {}),
+    "search_exercise_catalog:muscle": (
+        "SELECT name, name_aliases, muscle_primary, default_sets, default_reps, default_rest_seconds "
+        "FROM public.exercises WHERE is_global = true AND muscle_primary ILIKE %(pattern)s ORDER BY name",
+        {"pattern": "%pierna%"}),
+    "list_recent_posts": (
+        "SELECT p.id, p.content, p.created_at, p.is_hidden, row_to_json(author) AS author "
+        "FROM public.feed_posts p "
+        "LEFT JOIN LATERAL (SELECT a.name FROM public.profiles a WHERE a.id = p.author_id) author ON true "
+        "ORDER BY p.created_at DESC LIMIT 5", {}),
+    "list_workouts": (
+        "SELECT id, name, description, goal_tag FROM public.workout_templates ORDER BY name", {}),
+    "list_members:fallback": (
+        "SELECT id, name, email, role, has_premium, created_at FROM public.profiles "
+        "WHERE role = 'member' ORDER BY name NULLS FIRST, id LIMIT 21", {}),
+    "get_member_activity": (
+        "SELECT activity_date, steps, distance_km, calories_kcal FROM public.daily_activity "
+        "WHERE member_id = %(member_id)s AND activity_date >= CURRENT_DATE - 7 "
+        "ORDER BY activity_date DESC", {"member_id": "member"}),
+}
+
+SCAN_NODES = {"Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan", "Bitmap Index Scan"}
+INDEXED = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan", "Bitmap Index Scan"}
+DEFAULT_MAX_BUFFERS = 0.5  # relative increase of shared hit+read blocks
+DEFAULT_MIN_BLOCKS = 100  # ...and at least this many blocks more, so 3 → 6 does not fail
+
+# ---------------------------------------------------------------------------
+# Database state: schema version, fingerprint, scale, fixtures
+# ---------------------------------------------------------------------------
+
+def schema_version(conn) -> str:
+    """Last migration in the ledger written by scripts/migrate.py, "unversioned" without one"""
+    if conn.execute("SELECT to_regclass('public.schema_migrations')").fetchone()[0] is None:
+        return "unversioned"
+    row = conn.execute("SELECT max(version) FROM public.schema_migrations").fetchone()
+    return row[0] or "unversioned"
+
+def schema_fingerprint(conn) -> str:
+    """Hash of what can change a plan: indexes, function bodies/volatility and RLS policies"""
+    parts = conn.execute(
+        """
+        SELECT 'i:' || indexdef FROM pg_indexes WHERE schemaname = 'public'
+        UNION ALL
+        SELECT 'f:' || p.proname || '(' || pg_get_function_identity_arguments(p.oid) || ')'
+               || p.provolatile::text || p.prosecdef::text || p.prosrc
+        FROM pg_proc p WHERE p.pronamespace = 'public'::regnamespace
+        UNION ALL
+        SELECT 'p:' || tablename || '.' || policyname || coalesce(qual, '') || coalesce(with_check, '')
+        FROM pg_policies WHERE schemaname = 'public'
+        ORDER BY 1
+        """).fetchall()
+    return hashlib.sha256("\n".join(p[0] for p in parts).encode()).hexdigest()[:16]
+
+def data_scale(conn) -> Dict[str, int]:
+    """Members/trainers and the estimated rows of the big tables: plans are only comparable at the same scale"""
+    scale = {role: n for role, n in conn.execute(
+        "SELECT role, count(*) FROM public.profiles WHERE role IN ('member', 'trainer') GROUP BY role")}
+    for table, rows in conn.execute(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relnamespace = 'public'::regnamespace "
+            "AND relkind = 'r' AND relname IN ('daily_activity', 'workout_set_logs', 'feed_posts', 'feed_likes')"):
+        scale[table] = max(rows, 0)
+    return scale
+
+def fixtures(conn, member: Optional[str], search: Optional[str]) -> Dict[str, str]:
+    """Admin whose claims the queries run under, a member with a trainer, that trainer and a search term"""
+    admin = conn.execute("SELECT id::text FROM public.profiles WHERE role = 'admin' "
+                         "ORDER BY created_at, id LIMIT 1").fetchone()
+    if admin is None:
+        raise SystemExit("❌ No hay ningún admin en profiles: carga datos con scripts/synthetic_data.py")
+    if member is None:
+        row = conn.execute("SELECT p.id::text, p.name FROM public.profiles p "
+                           "JOIN public.trainer_members tm ON tm.member_id = p.id "
+                           "WHERE p.role = 'member' ORDER BY p.created_at, p.id LIMIT 1").fetchone()
+        if row is None:
+            raise SystemExit("❌ No hay socios con entrenador: carga datos con scripts/synthetic_data.py")
+        member, name = row
+        search = search or (name or "a").split()[0][:4]
+    trainer = conn.execute("SELECT trainer_id::text FROM public.trainer_members WHERE member_id = %s LIMIT 1",
+                           (member,)).fetchone()
+    return {"admin": admin[0], "member": member, "trainer": trainer[0] if trainer else "",
+            "search": search or "a"}
+
+# ---------------------------------------------------------------------------
+# Capture
+# ---------------------------------------------------------------------------
+
+def resolve_params(params: Dict[str, str], fixture: Dict[str, str]) -> Dict[str, str]:
+    return {name: fixture.get(value, value) for name, value in params.items()}
+
+def act_as(conn, user_id: Optional[str], role: str = "authenticated") -> bool:
+    """
+    JWT claims of `user_id` under `role` for the rest of the transaction, like
+    a PostgREST request; False when the database has no such role
+    """
+    claims = json.dumps({"sub": user_id, "role": role} if user_id else {"role": role})
+    conn.execute("SELECT set_config('request.jwt.claims', %s, true), "
+                 "set_config('request.jwt.claim.sub', %s, true), "
+                 "set_config('request.jwt.claim.role', %s, true)", (claims, user_id or "", role))
+    if conn.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (role,)).fetchone() is None:
+        return False
+    conn.execute(f"SET LOCAL ROLE {role}")
+    return True
+
+def function_statements(conn, name: str) -> Tuple[List[str], Optional[str]]:
+    """
+    The queries of a plpgsql function body as standalone SQL: RETURN QUERY and
+    PERFORM become plain SELECTs, `INTO var` is dropped and each parameter is
+    replaced by a %(param)s placeholder cast to its type. Returns (statements,
+    owner to run them as when the function is SECURITY DEFINER).
+    """
+    row = conn.execute(
+        "SELECT p.prosrc, l.lanname, coalesce(p.proargnames, '{}'), "
+        "ARRAY(SELECT format_type(t, NULL) FROM unnest(p.proargtypes) t), "
+        "CASE WHEN p.prosecdef THEN p.proowner::regrole::text END "
+        "FROM pg_proc p JOIN pg_language l ON l.oid = p.prolang "
+        "WHERE p.proname = %s AND p.pronamespace = 'public'::regnamespace LIMIT 1", (name,)).fetchone()
+    if row is None or row[1] != "plpgsql":
+        return [], None
+    source, _, names, types, owner = row
+    params = list(zip(names, types))
+    body = strip_comments(source)
+    begin = re.search(r"\bBEGIN\b", body, re.I)
+    end = list(re.finditer(r"\bEND\b\s*;?\s*$", body, re.I))
+    body = body[begin.end() if begin else 0:end[-1].start() if end else len(body)]
+
+    statements = []
+    for statement in split_statements(body):
+        text = statement.text.strip().rstrip(";").strip()
+        text = re.sub(r"^RETURN\s+QUERY\s+", "", text, flags=re.I)
+        text = re.sub(r"^PERFORM\s+", "SELECT ", text, flags=re.I)
+        if not re.match(r"^(SELECT|WITH)\b", text, re.I) or not re.search(r"\bFROM\b", text, re.I):
+            continue  # IF/RAISE/RETURN and writes; a SELECT without FROM has no plan worth keeping
+        text = re.sub(r"\bINTO\s+(STRICT\s+)?[a-z_]\w*(\s*,\s*[a-z_]\w*)*", "", text, count=1, flags=re.I)
+        text = text.replace("%", "%%")
+        for param, kind in params:
+            text = re.sub(rf"(?<![.\w]){re.escape(param)}\b", f"%({param})s::{kind}", text)
+        statements.append(text)
+    return statements, owner
+
+def explain(conn, sql: str, params: Dict[str, Any], runs: int, role: Optional[str] = None) -> Dict[str, Any]:
+    """
+    One warm-up, then `runs` EXPLAIN ANALYZE; keeps the run with the median
+    execution time. `role` runs it as that role (a SECURITY DEFINER body).
+    """
+    plans = []
+    for i in range(runs + 1):
+        # Savepoint rolled back, not released: a failing statement does not abort
+        # the capture and SET LOCAL ROLE does not outlive this run
+        with conn.transaction(force_rollback=True):
+            if role:
+                conn.execute(f"SET LOCAL ROLE {role}")
+            row = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params).fetchone()
+        if i:
+            plans.append(row[0][0])
+    plans.sort(key=lambda p: p["Execution Time"])
+    return plans[len(plans) // 2]
+
+def summarize(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """What diff looks at: timings, buffers of the root node and every scan (relation, node, index, rows)"""
+    root = plan["Plan"]
+    scans = []
+
+    def walk(node: Dict[str, Any]):
+        if node["Node Type"] in SCAN_NODES:
+            scans.append({"relation": node.get("Relation Name") or node.get("Index Name"),
+                          "node": node["Node Type"], "index": node.get("Index Name"),
+                          "rows": node.get("Actual Rows", 0) * node.get("Actual Loops", 1),
+                          "removed": node.get("Rows Removed by Filter", 0)})
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(root)
+    return {"execution_ms": round(plan["Execution Time"], 3), "planning_ms": round(plan["Planning Time"], 3),
+            "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+            "rows": root.get("Actual Rows", 0), "nodes": node_types(root), "scans": scans}
+
+def node_types(node: Dict[str, Any]) -> List[str]:
+    return [node["Node Type"]] + [t for child in node.get("Plans", []) for t in node_types(child)]
+
+def capture(dsn: str, runs: int, only: Optional[List[str]], member: Optional[str],
+            search: Optional[str]) -> Dict[str, Any]:
+    import psycopg
+
+    with psycopg.connect(dsn) as conn:
+        fixture = fixtures(conn, member, search)
+        meta = {"schema_version": schema_version(conn), "fingerprint": schema_fingerprint(conn),
+                "scale": data_scale(conn), "fixtures": fixture,
+                "server": conn.execute("SHOW server_version").fetchone()[0]}
+        conn.rollback()
+
+        cases: Dict[str, Dict[str, Any]] = {}
+        with conn.transaction(force_rollback=True):
+            meta["rls"] = act_as(conn, fixture["admin"])
+            for name, (sql, params) in list(RPC_CASES.items()) + list(QUERY_CASES.items()):
+                if only and name.split(":")[0] not in only:
+                    continue
+                bound = resolve_params(params, fixture)
+                targets = [(name, sql, None)]
+                if name in RPC_CASES and ":" not in name:
+                    statements, owner = function_statements(conn, name)
+                    targets += [(f"{name}#{i}", s, owner) for i, s in enumerate(statements, 1)]
+                for case, text, role in targets:
+                    try:
+                        plan = explain(conn, text, bound, runs, role)
+                        cases[case] = {"sql": text, "params": bound, "summary": summarize(plan), "plan": plan}
+                        s = cases[case]["summary"]
+                        print(f"🔬 {case:<36} {s['execution_ms']:9.2f} ms {s['buffers']:>8} buf  "
+                              f"{', '.join(sorted({x['node'] + ' ' + x['relation'] for x in s['scans']}))[:70]}")
+                    except psycopg.Error as e:
+                        cases[case] = {"sql": text, "params": bound, "error": str(e).splitlines()[0]}
+                        print(f"❌ {case:<36} {cases[case]['error'][:90]}")
+    return {**meta, "cases": cases}
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def save_capture(data: Dict[str, Any], label: Optional[str], directory: Path = PLANS_DIR) -> Path:
+    git = git_commit()
+    capture_id = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + git["commit"][:8]
+    record = {"id": capture_id, "label": label, **git,
+              "captured_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **data}
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{capture_id}.json"
+    path.write_text(json.dumps(record, ensure_ascii=False, indent=1), encoding="utf-8")
+    return path
+
+def load_captures(directory: Path = PLANS_DIR) -> List[Dict[str, Any]]:
+    """Oldest first (file names start with the UTC timestamp)"""
+    if not directory.exists():
+        return []
+    return [json.loads(p.read_text(encoding="utf-8")) for p in sorted(directory.glob("*.json"))]
+
+def resolve_capture(captures: List[Dict[str, Any]], ref: str) -> Optional[Dict[str, Any]]:
+    """'latest', a label, or a prefix of a capture id, migration version or commit (newest match wins)"""
+    for item in reversed(captures):
+        if ref == "latest" or ref == item.get("label") or any(
+                str(item.get(k) or "").startswith(ref) for k in ("id", "schema_version", "commit")):
+            return item
+    return None
+
+def describe(item: Dict[str, Any]) -> str:
+    label = f" [{item['label']}]" if item.get("label") else ""
+    return (f"{item['id']}{label} migración {item['schema_version']}, huella {item['fingerprint'][:8]}, "
+            f"{item['scale'].get('member', 0)} socios")
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+class Change:
+    def __init__(self, case: str, kind: str, detail: str, regression: bool):
+        self.case = case
+        self.kind = kind
+        self.detail = detail
+        self.regression = regression
+
+def scan_list(scans: set) -> str:
+    return ", ".join(sorted(f"{node} {index}" if index else node for node, index in scans))
+
+def diff_case(case: str, old: Dict[str, Any], new: Dict[str, Any], max_buffers: float,
+              min_blocks: int) -> List[Change]:
+    if "error" in new:
+        return [Change(case, "error", new["error"], "error" not in old)]
+    if "error" in old:
+        return [Change(case, "error", f"ya no falla ({old['error'][:60]})", False)]
+    before, after = old["summary"], new["summary"]
+    changes = []
+
+    old_scans: Dict[str, set] = {}
+    for scan in before["scans"]:
+        old_scans.setdefault(scan["relation"], set()).add((scan["node"], scan["index"]))
+    new_scans: Dict[str, set] = {}
+    for scan in after["scans"]:
+        new_scans.setdefault(scan["relation"], set()).add((scan["node"], scan["index"]))
+    for relation, scans in sorted(new_scans.items()):
+        was = old_scans.get(relation)
+        if was is None or was == scans:
+            continue
+        nodes_before = {n for n, _ in was}
+        nodes_after = {n for n, _ in scans}
+        text = f"{relation}: {scan_list(was)} → {scan_list(scans)}"
+        if "Seq Scan" in nodes_after and "Seq Scan" not in nodes_before and nodes_before & INDEXED:
+            changes.append(Change(case, "seq scan", text, True))
+        else:
+            changes.append(Change(case, "scan", text, False))
+
+    grown = after["buffers"] - before["buffers"]
+    if grown >= min_blocks and after["buffers"] > before["buffers"] * (1 + max_buffers):
+        changes.append(Change(case, "buffers", f"{before['buffers']} → {after['buffers']} bloques", True))
+    elif before["nodes"] != after["nodes"] and not changes:
+        changes.append(Change(case, "plan", f"{' > '.join(before['nodes'][:4])} → "
+                                            f"{' > '.join(after['nodes'][:4])}", False))
+    return changes
+
+def diff_captures(old: Dict[str, Any], new: Dict[str, Any], max_buffers: float,
+                  min_blocks: int) -> Tuple[List[Change], List[str]]:
+    changes, notes = [], []
+    if old["scale"] != new["scale"]:
+        notes.append(f"escala distinta ({old['scale']} vs {new['scale']}): los buffers no son comparables")
+    for case in sorted(set(old["cases"]) | set(new["cases"])):
+        if case not in new["cases"]:
+            notes.append(f"{case}: ya no está en la captura nueva")
+        elif case not in old["cases"]:
+            notes.append(f"{case}: nuevo, sin plan anterior")
+        else:
+            changes += diff_case(case, old["cases"][case], new["cases"][case], max_buffers, min_blocks)
+    return changes, notes
+
+def print_diff(old: Dict[str, Any], new: Dict[str, Any], changes: List[Change], notes: List[str]):
+    print("=" * 100)
+    print("📊 CAMBIOS DE PLAN")
+    print(f"   antes:   {describe(old)}")
+    print(f"   después: {describe(new)}")
+    print("=" * 100)
+    for change in changes:
+        print(f"{'❌' if change.regression else 'ℹ️ '} {change.case:<36} {change.kind:<10} {change.detail}")
+    for case in sorted(set(old["cases"]) & set(new["cases"])):
+        a, b = old["cases"][case].get("summary"), new["cases"][case].get("summary")
+        if a and b:
+            print(f"   {case:<36} {a['execution_ms']:9.2f} → {b['execution_ms']:9.2f} ms"
+                  f" {a['buffers']:>8} → {b['buffers']:<8} buf")
+    for note in notes:
+        print(f"⚠️  {note}")
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Captura y compara planes de consulta de los RPCs del asistente")
+    parser.add_argument("--dir", type=Path, default=PLANS_DIR,
+                        help="carpeta de capturas (por defecto scripts/.plans)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_cmd = subparsers.add_parser("capture", help="EXPLAIN ANALYZE de cada caso contra DATABASE_URL")
+    capture_cmd.add_argument("--label", help="nombre para la captura (p. ej. antes-de-20260901)")
+    capture_cmd.add_argument("--runs", type=int, default=3,
+                             help="ejecuciones por consulta tras el calentamiento; se guarda la mediana (por defecto 3)")
+    capture_cmd.add_argument("--only", nargs="+", metavar="CASO",
+                             help=f"solo estos casos: {', '.join(sorted({c.split(':')[0] for c in {**RPC_CASES, **QUERY_CASES}}))}")
+    capture_cmd.add_argument("--member", help="uuid del socio para los casos por socio (por defecto uno con entrenador)")
+    capture_cmd.add_argument("--search", help="texto para rpc_find_member (por defecto el inicio del nombre del socio)")
+    capture_cmd.add_argument("--allow-remote", action="store_true",
+                             help="permite un DATABASE_URL que no es local (EXPLAIN ANALYZE ejecuta las consultas)")
+
+    subparsers.add_parser("list", help="capturas guardadas, de la más antigua a la más reciente")
+
+    diff_cmd = subparsers.add_parser("diff", help="compara dos capturas; sale con 1 si algún plan empeoró")
+    diff_cmd.add_argument("old", nargs="?", help="id/etiqueta/migración/commit (por defecto la penúltima)")
+    diff_cmd.add_argument("new", nargs="?", default="latest", help="id/etiqueta/migración/commit (por defecto la última)")
+    diff_cmd.add_argument("--max-buffers", type=float, default=DEFAULT_MAX_BUFFERS,
+                          help="aumento relativo de bloques permitido (por defecto 0.5)")
+    diff_cmd.add_argument("--min-blocks", type=int, default=DEFAULT_MIN_BLOCKS,
+                          help="aumento absoluto mínimo de bloques para contar como regresión (por defecto 100)")
+    return parser.parse_args()
+
+def main() -> int:
+    args = parse_args()
+
+    if args.command == "capture":
+        dsn = os.environ.get("DATABASE_URL")
+        if not dsn:
+            print("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+            return 2
+        if not is_local(dsn) and not args.allow_remote:
+            print("❌ DATABASE_URL no apunta a una base local; usa --allow-remote si es de pruebas")
+            return 2
+        data = capture(dsn, max(args.runs, 1), args.only, args.member, args.search)
+        if not data["rls"]:
+            print("⚠️  No existe el rol authenticated: los planes no incluyen las políticas RLS")
+        path = save_capture(data, args.label, args.dir)
+        errors = sum(1 for c in data["cases"].values() if "error" in c)
+        print(f"\n✅ {len(data['cases'])} planes ({errors} con error) → {path}")
+        return 0
+
+    captures = load_captures(args.dir)
+    if args.command == "list":
+        if not captures:
+            print(f"📭 No hay capturas en {args.dir}")
+        for item in captures:
+            print(f"{describe(item)}  {len(item['cases'])} planes  {item['captured_at']}")
+        return 0
+
+    new = resolve_capture(captures, args.new)
+    if new is None:
+        print(f"❌ Captura no encontrada: {args.new}")
+        return 2
+    if args.old:
+        old = resolve_capture(captures, args.old)
+    else:
+        older = [c for c in captures if c["id"] < new["id"]]
+        old = older[-1] if older else None
+    if old is None:
+        print(f"❌ No hay captura con la que comparar {new['id']}")
+        return 2
+    changes, notes = diff_captures(old, new, args.max_buffers, args.min_blocks)
+    print_diff(old, new, changes, notes)
+    regressions = [c for c in changes if c.regression]
+    if regressions:
+        print(f"\n❌ {len(regressions)} plan(es) empeoraron")
+        return 1
+    print("\n✅ Ningún plan empeoró")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Adaptive rate-limit scheduler shared by the Admin Assistant test scripts
+Fires immediately while the server is happy; on 429/503 it honours
+Retry-After / RateLimit-* headers, otherwise backs off exponentially with
+full jitter. An optional token bucket caps the steady request rate.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+RETRYABLE_STATUS = {429, 503}
+
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Seconds to wait according to the response headers, or None if they say nothing.
+    Understands Retry-After (delta-seconds or HTTP-date), RateLimit-Reset /
+    X-RateLimit-Reset (delta-seconds, or an epoch timestamp) when remaining is 0.
+    """
+    if headers is None:
+        return None
+    value = headers.get("Retry-After")
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    remaining = headers.get("RateLimit-Remaining") or headers.get("X-RateLimit-Remaining")
+    reset = headers.get("RateLimit-Reset") or headers.get("X-RateLimit-Reset")
+    if reset and (remaining is None or remaining.strip() == "0"):
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        # Large values are epoch timestamps, small ones are deltas
+        return max(0.0, reset - time.time()) if reset > 10 ** 9 else reset
+    return None
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `burst` banked"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+class RateLimitScheduler:
+    """
+    Wraps a request callable with rate limiting and retries.
+
+    - `rate`: optional steady cap in requests/second (None = no cap, fire immediately)
+    - 429/503: wait exactly what the server asks for (Retry-After etc., never
+      capped: retrying earlier only earns another 429), else exponential
+      backoff with full jitter: uniform(0, min(cap, base * 2**attempt))
+    - A server-imposed pause is shared: other requests wait it out too instead
+      of hammering the endpoint while it is throttling us.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_cap: float = 30.0, seed: Optional[int] = None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rng = random.Random(seed)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.retries = 0  # total retries performed (for reporting)
+
+    def _pre_delay(self) -> float:
+        delay = self.bucket.reserve() if self.bucket else 0.0
+        with self.lock:
+            return max(delay, self.paused_until - time.monotonic())
+
+    def _retry_delay(self, attempt: int, headers) -> float:
+        server_delay = parse_retry_after(headers)
+        with self.lock:
+            if server_delay is not None:
+                delay = server_delay
+            else:
+                delay = self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.retries += 1
+        return delay
+
+    def _should_retry(self, attempt: int, status: Optional[int]) -> bool:
+        return status in RETRYABLE_STATUS and attempt < self.max_retries
+
+    def call(self, send: Callable, on_retry: Callable = None):
+        """
+        Run `send()` (returns an object with .status_code and .headers, e.g. a
+        requests/httpx response), retrying on 429/503. Returns the last response.
+        """
+        attempt = 0
+        while True:
+            delay = self._pre_delay()
+            if delay > 0:
+                time.sleep(delay)
+            response = send()
+            if not self._should_retry(attempt, response.status_code):
+                return response
+            wait = self._retry_delay(attempt, response.headers)
+            if on_retry:
+                on_retry(response.status_code, wait, attempt + 1)
+            attempt += 1
+
+    async def acall(self, send: Callable, on_retry: Callable = None):
+        """Async twin of call(): `send()` returns an awaitable response"""
+        attempt = 0
+        while True:
+            delay = self._pre_delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            response = await send()
+            if not self._should_retry(attempt, response.status_code):
+                return response
+            wait = self._retry_delay(attempt, response.headers)
+            if on_retry:
+                on_retry(response.status_code, wait, attempt + 1)
+            attempt += 1
+
+def log_retry(status, wait, attempt):
+    """Default on_retry hook used by the test scripts"""
+    print(f"⏳ HTTP {status} — retry {attempt} in {wait:.1f}s")
+
+def scheduler_from_env() -> RateLimitScheduler:
+    """
+    Scheduler configured from the environment, shared by both test scripts:
+    ASSISTANT_MAX_RPS (steady cap, default none) and ASSISTANT_MAX_RETRIES (default 4)
+    """
+    rate = os.environ.get("ASSISTANT_MAX_RPS")
+    return RateLimitScheduler(
+        rate=float(rate) if rate else None,
+        max_retries=int(os.environ.get("ASSISTANT_MAX_RETRIES", "4")),
+    )
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Result store and regression gate for the Admin Assistant test/benchmark runs
+`backend_test.py --save ...` appends one JSON line per scenario (raw latency,
+response-size and token samples, keyed by run id, git commit and kind) to
+scripts/.results/runs.jsonl. This CLI lists the runs, promotes one to the
+committed baseline (scripts/perf-baseline.jsonl) and compares two runs,
+exiting 1 when p95 latency, payload size, token usage or the error rate
+regressed beyond the thresholds. A change only counts as a regression when
+it is also significant, so two noisy runs of the same code do not fail the
+gate: a bootstrap confidence interval of the p95 difference for latency (a
+tail can move while the median does not), a one-sided Mann-Whitney test for
+the medians. `tests` runs hold one latency sample per test, so their latency
+is reported but never gated; gate latency with `bench --save`.
+
+Usage:
+    python scripts/result_store.py list
+    python scripts/result_store.py compare [OLD] [NEW]   # default: baseline (or previous run) vs latest
+    python scripts/result_store.py baseline [RUN]        # default: latest
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from assistant_bench import percentile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STORE = Path(__file__).resolve().parent / ".results" / "runs.jsonl"
+BASELINE_FILE = Path(__file__).resolve().parent / "perf-baseline.jsonl"
+
+# metric -> (samples key, percentile compared, default max relative increase)
+# Tail percentiles are tested with a bootstrap, medians with Mann-Whitney
+METRICS = {
+    "latency_p95": ("latency", 95, 0.10),
+    "size_p50": ("size", 50, 0.05),
+    "tokens_p50": ("tokens", 50, 0.05),
+}
+DEFAULT_MAX_ERROR_INCREASE = 0.05  # absolute, on the error rate
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MIN_SAMPLES = 5
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 0  # fixed: the same two runs always get the same verdict
+
+def store_path() -> Path:
+    return Path(os.environ.get("ASSISTANT_RESULTS", DEFAULT_STORE))
+
+def git_commit() -> Dict[str, Any]:
+    """{"commit": sha, "dirty": bool} of the working tree, "unknown" outside a checkout"""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": False}
+    return {"commit": sha, "dirty": bool(status.strip())}
+
+def save_run(kind: str, rows: Dict[str, Dict[str, Any]], target: str, path: Optional[Path] = None) -> str:
+    """
+    Append one line per scenario. `rows` maps scenario -> {"requests", "ok",
+    "latency": [s], "size": [bytes], "tokens": [n]}. Returns the run id.
+    """
+    path = path or store_path()
+    git = git_commit()
+    run_id = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + git["commit"][:8]
+    header = {"run": run_id, **git, "kind": kind, "target": target,
+              "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for scenario, row in rows.items():
+            f.write(json.dumps({**header, "scenario": scenario, **row}, ensure_ascii=False) + "\n")
+    return run_id
+
+def load_runs(path: Path) -> "OrderedDict[str, Dict[str, Any]]":
+    """run id -> {"run", "commit", "dirty", "kind", "target", "recorded_at", "scenarios": {name: row}}"""
+    runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    if not path.exists():
+        return runs
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            run = runs.setdefault(row["run"], {k: row.get(k) for k in
+                                               ("run", "commit", "dirty", "kind", "target", "recorded_at")})
+            run.setdefault("scenarios", {})[row["scenario"]] = row
+    return runs
+
+def resolve_run(runs: "OrderedDict[str, Dict[str, Any]]", ref: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """'latest', or a prefix of a run id or commit sha (newest match of `kind` wins)"""
+    candidates = [r for r in reversed(runs.values()) if kind is None or r["kind"] == kind]
+    if ref == "latest":
+        return candidates[0] if candidates else None
+    return next((r for r in candidates if r["run"].startswith(ref) or r["commit"].startswith(ref)), None)
+
+# ---------------------------------------------------------------------------
+# Rows from each harness (scenario -> samples), in the shape save_run expects
+# ---------------------------------------------------------------------------
+
+def rows_from_tests(results) -> Dict[str, Dict[str, Any]]:
+    """run_all_tests: [(test_name, passed, elapsed)]; one sample per test, below any --min-samples"""
+    return {name: {"requests": 1, "ok": int(passed), "latency": [elapsed] if passed else [],
+                   "size": [], "tokens": []} for name, passed, elapsed in results}
+
+def rows_from_bench(results) -> Dict[str, Dict[str, Any]]:
+    """assistant_bench.BenchResults"""
+    return {scenario: {"requests": sum(outcomes.values()), "ok": outcomes["ok"],
+                       "latency": results.latencies[scenario], "size": results.sizes[scenario],
+                       "tokens": results.tokens[scenario]}
+            for scenario, outcomes in results.outcomes.items()}
+
+def rows_from_stream(timings) -> Dict[str, Dict[str, Any]]:
+    """assistant_stream: [RequestTiming]"""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for timing in timings:
+        row = rows.setdefault(timing.scenario, {"requests": 0, "ok": 0, "latency": [], "size": [], "tokens": []})
+        row["requests"] += 1
+        if timing.outcome == "ok":
+            row["ok"] += 1
+            row["latency"].append(timing.total)
+            row["size"].append(timing.size)
+            if timing.tokens is not None:
+                row["tokens"].append(timing.tokens)
+    return rows
+
+def rows_from_tools(samples) -> Dict[str, Dict[str, Any]]:
+    """tool_bench: {tool: [ToolSample]}; latency is the server's `tool` time when reported"""
+    rows = {}
+    for tool, items in samples.items():
+        ok = [s for s in items if s.outcome == "ok"]
+        rows[tool] = {"requests": len(items), "ok": len(ok),
+                      "latency": [s.server if s.server is not None else s.client for s in ok],
+                      "size": [s.size for s in ok], "tokens": []}
+    return rows
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+def relative_change(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return new / old - 1
+
+def mann_whitney_z(old: List[float], new: List[float]) -> float:
+    """
+    Mann-Whitney U as a z-score (normal approximation, tie-corrected): > 0 when
+    `new` tends to be larger than `old`. 0 when every sample is equal.
+    """
+    ranked = sorted([(v, 0) for v in old] + [(v, 1) for v in new])
+    n1, n2, n = len(old), len(new), len(old) + len(new)
+    rank_sum_new, ties, i = 0.0, 0.0, 0
+    while i < n:
+        j = i
+        while j + 1 < n and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        rank_sum_new += average_rank * sum(1 for k in range(i, j + 1) if ranked[k][1])
+        group = j - i + 1
+        ties += group ** 3 - group
+        i = j + 1
+    u = rank_sum_new - n2 * (n2 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    return (u - n1 * n2 / 2) / math.sqrt(variance) if variance > 0 else 0.0
+
+def one_sided_p(z: float) -> float:
+    """P(Z >= z) for a standard normal"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def bootstrap_difference(old: List[float], new: List[float], p: float, confidence: float = DEFAULT_CONFIDENCE,
+                         resamples: int = BOOTSTRAP_RESAMPLES,
+                         seed: int = BOOTSTRAP_SEED) -> Tuple[float, float, float]:
+    """
+    Bootstrap of percentile(new, p) - percentile(old, p), resampling each run
+    with replacement: (lower, upper) with 1 - `confidence` of the resamples
+    beyond each bound (so lower > 0 matches the one-sided test), and the share
+    of resamples on the other side of zero from the observed difference (a
+    one-sided p-value).
+    """
+    rng = random.Random(seed)
+    observed = percentile(sorted(new), p) - percentile(sorted(old), p)
+    differences = sorted(
+        percentile(sorted(rng.choices(new, k=len(new))), p) - percentile(sorted(rng.choices(old, k=len(old))), p)
+        for _ in range(resamples))
+    tail = (1 - confidence) * 100
+    lower, upper = percentile(differences, tail), percentile(differences, 100 - tail)
+    against = sum(1 for d in differences if (d <= 0 if observed > 0 else d >= 0))
+    return lower, upper, against / resamples
+
+class Finding:
+    """One metric of one scenario: old/new value, relative change, p-value and verdict"""
+
+    def __init__(self, scenario: str, metric: str, old: float, new: float, delta: float,
+                 p_value: Optional[float], verdict: str, interval: Optional[Tuple[float, float]] = None):
+        self.scenario = scenario
+        self.metric = metric
+        self.old = old
+        self.new = new
+        self.delta = delta
+        self.p_value = p_value  # of the change in the direction it went; None without a test
+        self.verdict = verdict  # ok | regression | improvement | noise | few samples
+        self.interval = interval  # bootstrap CI of new - old (tail percentiles only)
+
+def compare_runs(old: Dict[str, Any], new: Dict[str, Any], thresholds: Dict[str, float],
+                 max_error_increase: float = DEFAULT_MAX_ERROR_INCREASE,
+                 confidence: float = DEFAULT_CONFIDENCE,
+                 min_samples: int = DEFAULT_MIN_SAMPLES) -> Tuple[List[Finding], List[str]]:
+    """(findings for the scenarios both runs have, notes about the rest)"""
+    findings, notes = [], []
+    for scenario in sorted(set(old["scenarios"]) | set(new["scenarios"])):
+        before, after = old["scenarios"].get(scenario), new["scenarios"].get(scenario)
+        if before is None or after is None:
+            notes.append(f"{scenario}: only in the {'new' if before is None else 'old'} run")
+            continue
+
+        for metric, (key, p, _) in METRICS.items():
+            a, b = sorted(before.get(key) or []), sorted(after.get(key) or [])
+            if not a or not b:
+                continue
+            value_old, value_new = percentile(a, p), percentile(b, p)
+            delta = relative_change(value_old, value_new)
+            threshold = thresholds[metric]
+            p_value, interval = None, None
+            if abs(delta) <= threshold:
+                verdict = "ok"
+            elif min(len(a), len(b)) < min_samples:
+                verdict = "few samples"
+            else:
+                # Beyond the threshold: is it a real shift, or one slow outlier?
+                if p == 50:
+                    z = mann_whitney_z(a, b)
+                    p_value = one_sided_p(z if delta > 0 else -z)
+                else:
+                    # Mann-Whitney tests the whole distribution: a tail that
+                    # moves alone is a p95 regression it would call noise
+                    lower, upper, p_value = bootstrap_difference(a, b, p, confidence)
+                    interval = (lower, upper)
+                significant = p_value < 1 - confidence
+                verdict = ("regression" if delta > 0 else "improvement") if significant else "noise"
+            findings.append(Finding(scenario, metric, value_old, value_new, delta, p_value, verdict, interval))
+
+        error_old = 1 - before["ok"] / before["requests"] if before["requests"] else 0.0
+        error_new = 1 - after["ok"] / after["requests"] if after["requests"] else 0.0
+        increase = error_new - error_old
+        verdict = ("regression" if increase > max_error_increase
+                   else "improvement" if increase < -max_error_increase else "ok")
+        findings.append(Finding(scenario, "error_rate", error_old, error_new, increase, None, verdict))
+    return findings, notes
+
+def describe(run: Dict[str, Any]) -> str:
+    dirty = "+dirty" if run.get("dirty") else ""
+    return f"{run['run']} ({run['kind']}, {run['commit'][:8]}{dirty}, {run['target']})"
+
+def format_value(metric: str, value: float) -> str:
+    if metric == "latency_p95":
+        return f"{value:.3f}s"
+    if metric == "error_rate":
+        return f"{value:.0%}"
+    return f"{value:.0f}"
+
+def print_comparison(old: Dict[str, Any], new: Dict[str, Any], findings: List[Finding], notes: List[str],
+                     confidence: float):
+    marks = {"ok": "  ", "regression": "❌", "improvement": "✅", "noise": "〰️", "few samples": "⚠️"}
+    print("=" * 100)
+    print("📊 RUN COMPARISON")
+    print(f"   old: {describe(old)}")
+    print(f"   new: {describe(new)}")
+    print("=" * 100)
+    print(f"   {'Scenario':<28}{'metric':<14}{'old':>10}{'new':>10}{'change':>9}{'p':>8}  (significant below {1 - confidence:.2f})")
+    for f in findings:
+        change = f"{f.delta:+.1%}" if f.delta != float("inf") else "new"
+        if f.metric == "error_rate":
+            change = f"{f.delta * 100:+.0f}pp"
+        p_value = f"{f.p_value:.3f}" if f.p_value is not None else "-"
+        interval = ""
+        if f.interval:
+            interval = f"  [{f.interval[0]:+.3f}s, {f.interval[1]:+.3f}s]"
+        print(f"{marks[f.verdict]} {f.scenario:<28}{f.metric:<14}{format_value(f.metric, f.old):>10}"
+              f"{format_value(f.metric, f.new):>10}{change:>9}{p_value:>8}  {f.verdict if f.verdict != 'ok' else ''}"
+              f"{interval}")
+    for note in notes:
+        print(f"ℹ️  {note}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stored test/benchmark runs and regression gate")
+    parser.add_argument("--store", type=Path, default=None,
+                        help=f"JSON lines file (default: ASSISTANT_RESULTS or {DEFAULT_STORE.relative_to(REPO_ROOT)})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Stored runs, oldest first")
+
+    compare = subparsers.add_parser("compare", help="Diff two runs; exit 1 on a regression")
+    compare.add_argument("old", nargs="?", help="Run id/commit prefix, or 'baseline' (default: baseline if "
+                                                 "it has this kind, else the previous run of the same kind)")
+    compare.add_argument("new", nargs="?", default="latest", help="Run id/commit prefix (default: latest)")
+    compare.add_argument("--max-latency", type=float, default=METRICS["latency_p95"][2],
+                         help="Allowed relative p95 latency increase (default: 0.10). Not gated for "
+                              "`tests` runs: they store one sample per test, below --min-samples")
+    compare.add_argument("--max-size", type=float, default=METRICS["size_p50"][2],
+                         help="Allowed relative increase of the median payload size (default: 0.05)")
+    compare.add_argument("--max-tokens", type=float, default=METRICS["tokens_p50"][2],
+                         help="Allowed relative increase of the median tokens per turn (default: 0.05)")
+    compare.add_argument("--max-errors", type=float, default=DEFAULT_MAX_ERROR_INCREASE,
+                         help="Allowed absolute increase of the error rate (default: 0.05)")
+    compare.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                         help="Significance needed to call a change (default: 0.95, i.e. p < 0.05)")
+    compare.add_argument("--min-samples", type=int, default=DEFAULT_MIN_SAMPLES,
+                         help="Below this many samples a change is reported but never fails (default: 5)")
+
+    baseline = subparsers.add_parser("baseline", help=f"Copy a run into {BASELINE_FILE.name} (one run per kind)")
+    baseline.add_argument("run", nargs="?", default="latest", help="Run id/commit prefix (default: latest)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    path = args.store or store_path()
+    runs = load_runs(path)
+
+    if args.command == "list":
+        if not runs:
+            print(f"📭 No runs in {path}")
+        for run in runs.values():
+            print(f"{describe(run)}  {len(run['scenarios'])} scenarios  {run['recorded_at']}")
+        return 0
+
+    if args.command == "baseline":
+        run = resolve_run(runs, args.run)
+        if run is None:
+            print(f"❌ Run not found: {args.run}")
+            return 2
+        kept = [r for r in load_runs(BASELINE_FILE).values() if r["kind"] != run["kind"]]
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            for stored in kept + [run]:
+                meta = {k: v for k, v in stored.items() if k != "scenarios"}
+                for row in stored["scenarios"].values():
+                    f.write(json.dumps({**row, **meta}, ensure_ascii=False) + "\n")
+        print(f"📌 Baseline for {run['kind']} is now {describe(run)} → {BASELINE_FILE.relative_to(REPO_ROOT)}")
+        return 0
+
+    new = resolve_run(runs, args.new)
+    if new is None:
+        print(f"❌ Run not found: {args.new}")
+        return 2
+    baselines = load_runs(BASELINE_FILE)
+    if args.old == "baseline" or (args.old is None and resolve_run(baselines, "latest", new["kind"])):
+        old = resolve_run(baselines, "latest", new["kind"])
+    elif args.old is None:
+        older = [r for r in runs.values() if r["kind"] == new["kind"] and r["run"] < new["run"]]
+        old = older[-1] if older else None
+    else:
+        old = resolve_run(runs, args.old) or resolve_run(baselines, args.old)
+    if old is None:
+        print(f"❌ Nothing to compare {new['run']} against (no baseline and no earlier {new['kind']} run)")
+        return 2
+    if old["kind"] != new["kind"]:
+        print(f"⚠️  Comparing different kinds ({old['kind']} vs {new['kind']}): only shared scenarios count")
+
+    thresholds = {"latency_p95": args.max_latency, "size_p50": args.max_size, "tokens_p50": args.max_tokens}
+    findings, notes = compare_runs(old, new, thresholds, args.max_errors, args.confidence, args.min_samples)
+    if new["kind"] == "tests":
+        notes.append("tests runs store one latency sample per test: only the error rate is gated "
+                     "(use `backend_test.py --save bench` to gate latency)")
+    print_comparison(old, new, findings, notes, args.confidence)
+
+    regressions = [f for f in findings if f.verdict == "regression"]
+    if regressions:
+        print(f"\n💥 {len(regressions)} regression(s) beyond the thresholds")
+        return 1
+    print("\n🎉 No regressions beyond the thresholds")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
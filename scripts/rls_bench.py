@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+RLS overhead benchmark
+Runs the same read queries (the tables the app and the assistant read most,
+all behind row level security) against a local Postgres, first as
+service_role (BYPASSRLS, the baseline) and then under admin, trainer and
+member JWT claims, and reports per role the latency and the rows scanned
+next to the baseline, plus how many times each policy helper (is_admin(),
+is_premium()...) ran per query. A helper that is not evaluated once per
+statement shows up with calls ≈ rows scanned: that is the policy to
+rewrite as the tables grow.
+
+On a plain Postgres the Supabase `auth` helpers (auth.uid/role/jwt, reading
+the request.jwt.* settings like PostgREST sets them) and the anon,
+authenticated and service_role roles are created when missing; on a
+`supabase start` database the real ones are used. Fixtures (admin, a member
+with a trainer and that trainer) come from scripts/plan_capture.py.
+
+Usage:
+    DATABASE_URL=... python scripts/rls_bench.py [--runs 20] [--only daily_activity feed_posts] [--save]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from assistant_bench import percentile
+from plan_capture import act_as, fixtures
+from synthetic_data import is_local
+
+# name -> (SQL with %(param)s placeholders, params filled from the fixtures)
+CASES: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "profiles": ("SELECT id, name, email, role, has_premium FROM public.profiles ORDER BY name LIMIT 50", {}),
+    "trainer_members": ("SELECT member_id, assigned_at FROM public.trainer_members "
+                        "WHERE trainer_id = %(trainer)s", {"trainer": "trainer"}),
+    "daily_activity": ("SELECT activity_date, steps, distance_km, calories_kcal FROM public.daily_activity "
+                       "WHERE member_id = %(member)s AND activity_date >= CURRENT_DATE - 30 "
+                       "ORDER BY activity_date DESC", {"member": "member"}),
+    "daily_activity:gym": ("SELECT member_id, steps FROM public.daily_activity "
+                           "WHERE activity_date = CURRENT_DATE - 1", {}),
+    "workout_set_logs": ("SELECT exercise_name, set_number, reps, weight_kg, performed_on FROM public.workout_set_logs "
+                         "WHERE member_id = %(member)s AND performed_on >= CURRENT_DATE - 30 "
+                         "ORDER BY performed_on DESC", {"member": "member"}),
+    "workout_checkins": ("SELECT id, checked_in_at FROM public.workout_checkins "
+                         "WHERE member_id = %(member)s ORDER BY checked_in_at DESC LIMIT 30", {"member": "member"}),
+    "member_workouts": ("SELECT workout_template_id, routine_slot FROM public.member_workouts "
+                        "WHERE member_id = %(member)s", {"member": "member"}),
+    "progress_records": ("SELECT date, weight_kg FROM public.progress_records "
+                         "WHERE member_id = %(member)s ORDER BY date DESC", {"member": "member"}),
+    "feed_posts": ("SELECT id, content, created_at FROM public.feed_posts ORDER BY created_at DESC LIMIT 20", {}),
+    "feed_comments": ("SELECT id, post_id, content FROM public.feed_comments ORDER BY created_at DESC LIMIT 50", {}),
+    "feed_likes": ("SELECT post_id, count(*) FROM public.feed_likes GROUP BY post_id "
+                   "ORDER BY count(*) DESC LIMIT 20", {}),
+}
+
+# label -> (database role, fixture whose id goes in the `sub` claim)
+ROLES: List[Tuple[str, str, Optional[str]]] = [
+    ("service", "service_role", None),
+    ("admin", "authenticated", "admin"),
+    ("trainer", "authenticated", "trainer"),
+    ("member", "authenticated", "member"),
+]
+
+SCAN_NODES = {"Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+# Same definitions as Supabase: the claim settings PostgREST sets per request
+AUTH_STUBS = {
+    "uid": ("uuid", "SELECT coalesce(nullif(current_setting('request.jwt.claim.sub', true), ''), "
+                    "(nullif(current_setting('request.jwt.claims', true), '')::jsonb ->> 'sub'))::uuid"),
+    "role": ("text", "SELECT coalesce(nullif(current_setting('request.jwt.claim.role', true), ''), "
+                     "(nullif(current_setting('request.jwt.claims', true), '')::jsonb ->> 'role'))::text"),
+    "jwt": ("jsonb", "SELECT coalesce(nullif(current_setting('request.jwt.claim', true), ''), "
+                     "nullif(current_setting('request.jwt.claims', true), ''))::jsonb"),
+}
+
+def ensure_auth_stubs(conn) -> List[str]:
+    """Create the missing auth helpers and API roles (plain Postgres); returns what was created"""
+    created = []
+    conn.execute("CREATE SCHEMA IF NOT EXISTS auth")
+    for name, (returns, body) in AUTH_STUBS.items():
+        if conn.execute("SELECT to_regprocedure(%s)", (f"auth.{name}()",)).fetchone()[0] is None:
+            conn.execute(f"CREATE FUNCTION auth.{name}() RETURNS {returns} LANGUAGE sql STABLE AS $$ {body} $$")
+            created.append(f"auth.{name}()")
+    for role in ("anon", "authenticated", "service_role"):
+        if conn.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (role,)).fetchone() is None:
+            conn.execute(f"CREATE ROLE {role} NOLOGIN{' BYPASSRLS' if role == 'service_role' else ''}")
+            conn.execute(f"GRANT USAGE ON SCHEMA public, auth TO {role}")
+            conn.execute(f"GRANT SELECT ON ALL TABLES IN SCHEMA public TO {role}")
+            conn.execute(f"GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public, auth TO {role}")
+            created.append(f"rol {role}")
+    return created
+
+class Measure:
+    """One query under one role"""
+
+    def __init__(self, case: str, role: str):
+        self.case = case
+        self.role = role
+        self.latencies: List[float] = []
+        self.rows = 0
+        self.scanned = 0
+        self.buffers = 0
+        self.helper_calls: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+def rows_scanned(node: Dict[str, Any]) -> int:
+    """Rows the scans produced plus the ones their filters (RLS included) threw away, over all loops"""
+    total = 0
+    if node["Node Type"] in SCAN_NODES:
+        total += (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)) * node.get("Actual Loops", 1)
+    return total + sum(rows_scanned(child) for child in node.get("Plans", []))
+
+def helper_calls(conn) -> Dict[str, int]:
+    """
+    Calls per function not yet flushed to the cumulative stats; they survive
+    across transactions until the backend goes idle, so callers diff two reads
+    """
+    return {name: calls for name, calls in conn.execute(
+        "SELECT funcname, calls FROM pg_stat_xact_user_functions "
+        "WHERE schemaname IN ('public', 'auth') ORDER BY calls DESC")}
+
+def measure(conn, case: str, sql: str, params: Dict[str, str], label: str, role: str,
+            user_id: Optional[str], runs: int, track: bool) -> Measure:
+    result = Measure(case, label)
+    try:
+        with conn.transaction(force_rollback=True):
+            if track:
+                conn.execute("SET LOCAL track_functions = 'all'")
+            if not act_as(conn, user_id, role):
+                result.error = f"no existe el rol {role}"
+                return result
+            before = helper_calls(conn) if track else {}
+            conn.execute(sql, params).fetchall()  # warm-up
+            plan = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params).fetchone()[0][0]["Plan"]
+            result.rows = plan.get("Actual Rows", 0)
+            result.scanned = rows_scanned(plan)
+            result.buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+            for _ in range(runs):
+                start = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                result.latencies.append(time.perf_counter() - start)
+            if track:
+                executions = runs + 2
+                after = helper_calls(conn)
+                result.helper_calls = {name: (calls - before.get(name, 0)) / executions
+                                       for name, calls in after.items() if calls > before.get(name, 0)}
+    except Exception as e:  # psycopg.Error; any failure of one query must not stop the others
+        result.error = str(e).splitlines()[0]
+    result.latencies.sort()
+    return result
+
+def run_bench(dsn: str, runs: int, only: Optional[List[str]], member: Optional[str]) -> List[Measure]:
+    import psycopg
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        created = ensure_auth_stubs(conn)
+        if created:
+            print(f"🧩 Stubs creados: {', '.join(created)}")
+        fixture = fixtures(conn, member, None)
+        is_super = conn.execute("SELECT rolsuper FROM pg_roles WHERE rolname = current_user").fetchone()[0]
+        if not is_super:
+            print("⚠️  Sin superusuario no se puede activar track_functions: no habrá llamadas por helper")
+        print(f"👤 admin {fixture['admin']}  entrenador {fixture['trainer'] or '-'}  socio {fixture['member']}\n")
+
+    results = []
+    with psycopg.connect(dsn) as conn:
+        for case, (sql, params) in CASES.items():
+            if only and case.split(":")[0] not in only:
+                continue
+            bound = {name: fixture.get(value, value) for name, value in params.items()}
+            for label, role, who in ROLES:
+                result = measure(conn, case, sql, bound, label, role, fixture.get(who) if who else None,
+                                 runs, is_super)
+                results.append(result)
+                if result.error:
+                    print(f"❌ {case:<20} {label:<8} {result.error[:80]}")
+                else:
+                    print(f"⏱️  {case:<20} {label:<8} {percentile(result.latencies, 50) * 1000:8.2f} ms"
+                          f" {result.rows:>6} filas {result.scanned:>8} leídas")
+    return results
+
+def print_report(results: List[Measure]):
+    print("\n" + "=" * 112)
+    print("📊 SOBRECOSTE DE RLS POR ROL (frente a service_role, que no evalúa políticas)")
+    print("=" * 112)
+    print(f"{'Consulta':<20}{'rol':<9}{'filas':>7}{'leídas':>9}{'+leídas':>9}{'bloques':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'× p50':>8}  llamadas/consulta")
+    baseline = {r.case: r for r in results if r.role == "service" and not r.error}
+    for result in results:
+        if result.error:
+            continue
+        base = baseline.get(result.case)
+        p50 = percentile(result.latencies, 50)
+        ratio = f"{p50 / percentile(base.latencies, 50):7.1f}×" if base and percentile(base.latencies, 50) else f"{'-':>8}"
+        extra = f"{result.scanned - base.scanned:+9d}" if base else f"{'-':>9}"
+        calls = ", ".join(f"{name} {n:.0f}" for name, n in result.helper_calls.items() if n >= 1)[:40]
+        print(f"{result.case:<20}{result.role:<9}{result.rows:>7}{result.scanned:>9}{extra}{result.buffers:>9}"
+              f"{p50 * 1000:9.2f}{percentile(result.latencies, 95) * 1000:9.2f}{ratio}  {calls}")
+
+    # Lo que hay que mirar primero: helpers evaluados por fila
+    for result in results:
+        per_row = [name for name, n in result.helper_calls.items() if result.scanned and n >= max(result.scanned / 2, 10)]
+        if per_row:
+            print(f"⚠️  {result.case} ({result.role}): {', '.join(per_row)} se evalúa por fila "
+                  f"(~{max(result.helper_calls[n] for n in per_row):.0f} llamadas para {result.scanned} filas leídas)")
+    for result in results:
+        if result.error:
+            print(f"❌ {result.case} ({result.role}): {result.error}")
+
+def rows_for_store(results: List[Measure]) -> Dict[str, Dict[str, Any]]:
+    """--save: one scenario per query@role, in the shape result_store.save_run expects"""
+    return {f"{r.case}@{r.role}": {"requests": 1 if r.error else len(r.latencies),
+                                   "ok": 0 if r.error else len(r.latencies),
+                                   "latency": r.latencies, "size": [], "tokens": []} for r in results}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sobrecoste de las políticas RLS por rol (service/admin/entrenador/socio)")
+    parser.add_argument("--runs", type=int, default=20, help="ejecuciones por consulta y rol (por defecto 20)")
+    parser.add_argument("--only", nargs="+", metavar="TABLA",
+                        help=f"solo estas consultas: {', '.join(sorted({c.split(':')[0] for c in CASES}))}")
+    parser.add_argument("--member", help="uuid del socio (por defecto uno con entrenador)")
+    parser.add_argument("--save", action="store_true", help="guarda las latencias en el result store (kind rls)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permite un DATABASE_URL que no es local (crea stubs si faltan)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    dsn = os.environ.get("DATABASE_URL")
+    if not dsn:
+        raise SystemExit("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+    if not is_local(dsn) and not args.allow_remote:
+        raise SystemExit("❌ DATABASE_URL no apunta a una base local; usa --allow-remote si es de pruebas")
+
+    results = run_bench(dsn, max(args.runs, 1), args.only, args.member)
+    print_report(results)
+    if args.save:
+        from result_store import save_run, store_path
+
+        run_id = save_run("rls", rows_for_store(results), dsn.split("@")[-1])
+        print(f"💾 Guardada la ejecución {run_id} → {store_path()}")
+    sys.exit(1 if any(r.error for r in results) else 0)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Linter for slow RLS policy and function patterns in the migrations
+Works on the final state of every policy and function folded from
+sql/master-schema.sql + supabase/migrations (scripts/schema_model.py, so an
+unchanged tree is a cache load) and reports, with the file:line of the
+offending text:
+
+  auth-uid-per-row    auth.uid()/auth.jwt()/auth.role() in a policy without
+                      the (SELECT ...) wrapper, evaluated once per row
+  volatile-helper     a policy calling a VOLATILE function (is_admin()...):
+                      run per row and not usable as an index condition
+  helper-per-row      a STABLE helper without arguments called bare in a
+                      policy, where (SELECT f()) would run it once
+  leading-wildcard    LIKE/ILIKE '%...' in a function or policy on a column
+                      with no trigram index: always a full scan
+  unindexed-subquery  EXISTS/IN subquery in a policy whose filter columns no
+                      index leads with, run for every row checked
+
+Files given on the command line limit the report to findings located in
+them (the pre-commit use: only the migrations being added), without them
+the whole tree is reported. Exits 1 when there are errors.
+"""
+
+import argparse
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import schema_model
+from index_advisor import covered, existing_indexes
+from schema_model import NAME, REPO_ROOT, closing_paren, ident, normalize_name
+
+ERROR, WARNING = "error", "warning"
+SEVERITY = {
+    "auth-uid-per-row": ERROR,
+    "volatile-helper": ERROR,
+    "helper-per-row": WARNING,
+    "leading-wildcard": WARNING,
+    "unindexed-subquery": WARNING,
+}
+
+AUTH_CALL = re.compile(r"\bauth\s*\.\s*(uid|jwt|role)\s*\(\s*\)", re.I)
+CALL = re.compile(r"(?<![\w.])((?:\"?\w+\"?\.)?\"?\w+\"?)\s*\(", re.I)
+WILDCARD = re.compile(r"((?:\w+\.)?\w+)\s+(?:not\s+)?i?like\s+(?:'%|concat\s*\(\s*'%|'%'\s*\|\|)", re.I)
+SUBQUERY = re.compile(r"\b(exists|in)\s*\(\s*select\b", re.I)
+FROM_ITEM = re.compile(rf"\b(?:from|join)\s+({NAME})(?:\s+(?:as\s+)?(?!on\b|where\b|join\b|left\b|inner\b|group\b|order\b|limit\b)(\w+))?", re.I)
+KEYWORDS = {"exists", "in", "select", "any", "all", "coalesce", "nullif", "lower", "upper", "array", "row",
+            "cast", "not", "and", "or", "using", "check", "values", "count", "greatest", "least"}
+
+class Finding:
+    def __init__(self, rule: str, location: str, message: str, severity: Optional[str] = None):
+        self.rule = rule
+        self.location = location
+        self.message = message
+        self.severity = severity or SEVERITY[rule]
+
+    def file(self) -> str:
+        return self.location.rsplit(":", 1)[0]
+
+def location(source: str, text: str, offset: int) -> str:
+    """file:line of `offset` inside a statement whose first character is at `source`"""
+    path, line = source.rsplit(":", 1)
+    return f"{path}:{int(line) + text.count(chr(10), 0, offset)}"
+
+def wrapped(text: str, offset: int) -> bool:
+    """The call at `offset` is the whole target list of a scalar subquery: (SELECT f() ...)"""
+    return bool(re.search(r"\(\s*select\s+$", text[:offset], re.I))
+
+def policy_expressions(sql: str) -> List[Tuple[int, int]]:
+    """(start, end) of the USING and WITH CHECK expressions of a CREATE/ALTER POLICY"""
+    spans = []
+    for match in re.finditer(r"\b(using|with\s+check)\s*\(", sql, re.I):
+        start = match.end() - 1
+        spans.append((start, closing_paren(sql, start) + 1))
+    return spans
+
+def aliases(text: str) -> Dict[str, str]:
+    """alias (and bare table name) -> table, from the FROM/JOIN items in `text`"""
+    found = {}
+    for match in FROM_ITEM.finditer(text):
+        table = normalize_name(match.group(1))
+        found[table.split(".")[-1]] = table
+        found[table] = table
+        if match.group(2):
+            found[match.group(2).lower()] = table
+    return found
+
+def column_table(model: schema_model.SchemaModel, column: str, names: Dict[str, str]) -> Tuple[Optional[str], str]:
+    """(table, column) a possibly qualified column reference belongs to, table None when unknown"""
+    if "." in column:
+        qualifier, name = column.lower().rsplit(".", 1)
+        return names.get(qualifier), name
+    name = column.lower()
+    owners = {t for t in names.values() if name in model.tables.get(t, {}).get("columns", {})}
+    return (owners.pop() if len(owners) == 1 else None), name
+
+def trigram_indexed(model: schema_model.SchemaModel, table: str, column: str) -> bool:
+    for index in model.indexes.values():
+        sql = index["sql"].lower()
+        if index["table"] == table and "trgm_ops" in sql and re.search(rf"\b{re.escape(column)}\b", sql):
+            return True
+    return False
+
+def functions_by_name(model: schema_model.SchemaModel) -> Dict[str, List[Dict]]:
+    found: Dict[str, List[Dict]] = {}
+    for signature, function in model.functions.items():
+        found.setdefault(function["name"], []).append({**function, "signature": signature})
+    return found
+
+def final_policies(model: schema_model.SchemaModel) -> List[Dict]:
+    """Policies as they end up: a later ALTER POLICY ... USING/WITH CHECK replaces the expressions"""
+    policies = {key: dict(policy) for key, policy in model.policies.items()}
+    for item in model.other:
+        match = re.match(rf"^alter\s+policy\s+(\"[^\"]+\"|\S+)\s+on\s+({NAME})", item["sql"], re.I)
+        if match and policy_expressions(item["sql"]):
+            key = f"{normalize_name(match.group(2))}|{ident(match.group(1))}"
+            if key in policies:
+                policies[key].update(sql=item["sql"], source=item["source"])
+    return list(policies.values())
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+def check_policy(model: schema_model.SchemaModel, policy: Dict, helpers: Dict[str, List[Dict]],
+                 indexes: Dict[str, List[List[str]]]) -> List[Finding]:
+    sql, source = policy["sql"], policy["source"]
+    label = f"política \"{policy['name']}\" en {policy['table']}"
+    findings = []
+    for start, end in policy_expressions(sql):
+        expression = sql[start:end]
+
+        for match in AUTH_CALL.finditer(expression):
+            if not wrapped(expression, match.start()):
+                findings.append(Finding("auth-uid-per-row", location(source, sql, start + match.start()),
+                                        f"{label}: {match.group(0)} sin (SELECT ...) se evalúa por fila"))
+
+        for match in CALL.finditer(expression):
+            name = normalize_name(match.group(1))
+            if name.split(".")[-1] in KEYWORDS or name not in helpers:
+                continue
+            at = location(source, sql, start + match.start())
+            is_wrapped = wrapped(expression, match.start())
+            volatile = [f for f in helpers[name] if f["volatility"] == "volatile"]
+            if volatile:
+                severity = WARNING if is_wrapped else ERROR
+                findings.append(Finding("volatile-helper", at,
+                                        f"{label}: {name}() es VOLATILE ({volatile[0]['source']}); "
+                                        f"decláralo STABLE{'' if is_wrapped else ' y llámalo como (SELECT ...)'}",
+                                        severity))
+            elif not is_wrapped and re.match(r"\s*\)", expression[match.end():]):
+                findings.append(Finding("helper-per-row", at,
+                                        f"{label}: {name}() sin (SELECT {name}()) se evalúa por fila"))
+
+        findings += check_subqueries(model, expression, sql, start, source, label, indexes)
+        findings += check_wildcards(model, expression, sql, start, source, label)
+    return findings
+
+def check_subqueries(model: schema_model.SchemaModel, expression: str, sql: str, offset: int, source: str,
+                     label: str, indexes: Dict[str, List[List[str]]]) -> List[Finding]:
+    findings = []
+    for match in SUBQUERY.finditer(expression):
+        open_paren = expression.index("(", match.start())
+        subquery = expression[open_paren:closing_paren(expression, open_paren) + 1]
+        names = aliases(subquery)
+        tables = set(names.values())
+        if len(tables) != 1:
+            continue  # joins inside the subquery: the planner has more options, not worth guessing
+        table = tables.pop()
+        where = re.search(r"\bwhere\b(.*)", subquery, re.I | re.S)
+        if not where or table not in model.tables:
+            continue
+        columns = []
+        for ref in re.findall(r"((?:\w+\.)?\w+)\s*=(?!>)|=\s*((?:\w+\.)?\w+)\b(?!\s*\()", where.group(1)):
+            owner, column = column_table(model, ref[0] or ref[1], names)
+            if owner == table and column not in columns:
+                columns.append(column)
+        if columns and not any(covered(indexes.get(table, []), [c]) for c in columns):
+            findings.append(Finding("unindexed-subquery", location(source, sql, offset + match.start()),
+                                    f"{label}: la subconsulta sobre {table} filtra por "
+                                    f"{', '.join(columns)} y ningún índice empieza por esa(s) columna(s)"))
+    return findings
+
+def check_wildcards(model: schema_model.SchemaModel, text: str, sql: str, offset: int, source: str,
+                    label: str) -> List[Finding]:
+    findings = []
+    names = aliases(text)
+    for match in WILDCARD.finditer(text):
+        table, column = column_table(model, match.group(1), names)
+        if table is None or column not in model.tables.get(table, {}).get("columns", {}):
+            continue
+        if not trigram_indexed(model, table, column):
+            findings.append(Finding("leading-wildcard", location(source, sql, offset + match.start()),
+                                    f"{label}: {match.group(0).strip()}… sobre {table}.{column} sin índice "
+                                    f"trigram (gin_trgm_ops): recorre la tabla entera"))
+    return findings
+
+def lint(model: schema_model.SchemaModel) -> List[Finding]:
+    helpers = functions_by_name(model)
+    indexes = existing_indexes(model)
+    findings = []
+    for policy in final_policies(model):
+        findings += check_policy(model, policy, helpers, indexes)
+    for signature, function in model.functions.items():
+        findings += check_wildcards(model, function["sql"], function["sql"], 0, function["source"],
+                                    f"función {signature}")
+    return sorted(findings, key=lambda f: (f.file(), int(f.location.rsplit(":", 1)[1]), f.rule))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Patrones lentos en políticas RLS y funciones de las migraciones")
+    parser.add_argument("files", nargs="*", help="solo los hallazgos en estos archivos (p. ej. las migraciones "
+                                                 "del commit); por defecto todo el árbol")
+    parser.add_argument("--rules", nargs="+", choices=list(SEVERITY), help="solo estas reglas")
+    parser.add_argument("--strict", action="store_true", help="los avisos también hacen fallar (exit 1)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="sin resumen, solo los hallazgos")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    model = schema_model.build_model()
+    findings = lint(model)
+    if args.rules:
+        findings = [f for f in findings if f.rule in args.rules]
+    if args.files:
+        wanted = {p.resolve().relative_to(REPO_ROOT).as_posix() if p.is_absolute() or p.exists() else p.as_posix()
+                  for p in map(schema_model.Path, args.files)}
+        findings = [f for f in findings if f.file() in wanted]
+
+    for finding in findings:
+        print(f"{finding.location}: {finding.severity} [{finding.rule}] {finding.message}")
+    errors = sum(1 for f in findings if f.severity == ERROR)
+    if not args.quiet:
+        counts = {}
+        for finding in findings:
+            counts[finding.rule] = counts.get(finding.rule, 0) + 1
+        detail = ", ".join(f"{rule} {n}" for rule, n in sorted(counts.items()))
+        print(f"\n{'❌' if errors else '⚠️ ' if findings else '✅'} {len(findings)} hallazgos ({errors} errores)"
+              f"{': ' + detail if detail else ''} — {len(model.policies)} políticas, {len(model.functions)} funciones"
+              f" en {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if errors or (args.strict and findings) else 0)
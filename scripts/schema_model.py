@@ -0,0 +1,738 @@
+#!/usr/bin/env python3
+"""
+Effective schema built from source
+Folds sql/master-schema.sql (the base the migrations were written against)
+and every supabase/migrations/*.sql, in order, into an in-memory model of
+tables, columns, constraints, indexes, policies, functions, triggers and
+views — each object remembers the file:line of its final definition. The
+model is cached on disk keyed by the file hashes and can be emitted as one
+consolidated DDL script.
+"""
+
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from sql_splitter import normalize_name, split_statements, strip_comments
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = REPO_ROOT / "supabase" / "migrations"
+BASE_SCHEMA = REPO_ROOT / "sql" / "master-schema.sql"
+CACHE_FILE = Path(__file__).resolve().parent / ".schema-cache.json"
+
+NAME = r'(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?'
+COLUMN_CLAUSES = ("constraint", "not", "null", "default", "primary", "unique", "check",
+                  "references", "generated", "collate")
+TABLE_CONSTRAINTS = ("constraint", "primary", "unique", "check", "foreign", "exclude")
+TYPE_WORDS = {"uuid", "text", "int", "integer", "bigint", "smallint", "numeric", "decimal", "real",
+              "double", "boolean", "bool", "date", "time", "timestamp", "timestamptz", "interval",
+              "json", "jsonb", "character", "varchar", "char", "bytea", "inet", "anyelement",
+              "record", "trigger", "void", "setof", "float", "float8", "float4", "int4", "int8", "serial"}
+DML = re.compile(r"^(with\b.*?\)\s*)?(insert|update|delete|merge|truncate|select\s+(?!\w+\s*\())", re.I | re.S)
+
+# ---------------------------------------------------------------------------
+# Small SQL text helpers
+# ---------------------------------------------------------------------------
+
+def split_top_level(text: str, sep: str = ",") -> List[str]:
+    """Split on `sep` outside parentheses, quotes and dollar quotes"""
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        c = text[i]
+        if c in "'\"":
+            end = text.find(c, i + 1)
+            while end != -1 and text.startswith(c * 2, end):
+                end = text.find(c, end + 2)
+            i = len(text) if end == -1 else end + 1
+            continue
+        if c == "$":
+            match = re.match(r"\$[A-Za-z_]*\$", text[i:])
+            if match:
+                end = text.find(match.group(0), i + len(match.group(0)))
+                i = len(text) if end == -1 else end + len(match.group(0))
+                continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+        i += 1
+    tail = text[start:].strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+def closing_paren(text: str, start: int) -> int:
+    """Index of the ')' matching the '(' at `start`"""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text) - 1
+
+def words(text: str) -> List[str]:
+    """Top-level tokens: parenthesised groups and quoted strings stay whole"""
+    tokens, i = [], 0
+    while i < len(text):
+        c = text[i]
+        if c.isspace():
+            i += 1
+        elif c == "(":
+            end = closing_paren(text, i)
+            tokens.append(text[i:end + 1])
+            i = end + 1
+        elif c in "'\"":
+            end = text.find(c, i + 1)
+            while end != -1 and text.startswith(c * 2, end):
+                end = text.find(c, end + 2)
+            end = len(text) - 1 if end == -1 else end
+            tokens.append(text[i:end + 1])
+            i = end + 1
+        else:
+            match = re.match(r"[^\s(]+", text[i:])
+            tokens.append(match.group(0))
+            i += len(match.group(0))
+    return tokens
+
+def join_words(tokens: List[str]) -> str:
+    """Inverse of words(): no space between a name and its argument list"""
+    out = ""
+    for token in tokens:
+        glue = "" if not out or (token.startswith("(") and re.search(r"[\w\]]$", out)
+                                 and not re.search(r"\b(in|and|or|not|as|check|exists)$", out, re.I)) else " "
+        out += glue + token
+    return out
+
+def ident(name: str) -> str:
+    """Bare lower-case identifier ("Foo" keeps its case)"""
+    return name[1:-1] if name.startswith('"') else name.lower()
+
+def function_signature(name: str, args: str) -> str:
+    """public.f(p uuid, q text DEFAULT '') -> f(uuid,text): the identity Postgres uses"""
+    types = []
+    for arg in split_top_level(args):
+        arg = re.split(r"\s+default\s+|\s*=\s*", arg, maxsplit=1, flags=re.I)[0].strip()
+        tokens = arg.split()
+        if not tokens:
+            continue
+        mode = tokens[0].lower()
+        if mode in ("in", "out", "inout", "variadic"):
+            tokens = tokens[1:]
+            if mode == "out":
+                continue
+        if len(tokens) > 1 and tokens[0].lower().rstrip("[]") not in TYPE_WORDS:
+            tokens = tokens[1:]
+        types.append(" ".join(tokens).lower())
+    return f"{normalize_name(name)}({','.join(types)})"
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+class SchemaModel:
+    """Plain dicts all the way down so the model round-trips through JSON"""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict] = OrderedDict()
+        self.indexes: Dict[str, Dict] = OrderedDict()
+        self.policies: Dict[str, Dict] = OrderedDict()  # "table|policy name"
+        self.functions: Dict[str, Dict] = OrderedDict()  # signature
+        self.triggers: Dict[str, Dict] = OrderedDict()  # "table|trigger name"
+        self.views: Dict[str, Dict] = OrderedDict()
+        self.types: Dict[str, Dict] = OrderedDict()
+        self.extensions: Dict[str, Dict] = OrderedDict()
+        self.other: List[Dict] = []  # grants, comments, dynamic DO blocks... in order
+        self.skipped_dml = 0
+        self.warnings: List[str] = []
+
+    def to_json(self) -> Dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "SchemaModel":
+        model = cls()
+        for key, value in data.items():
+            setattr(model, key, OrderedDict(value) if isinstance(value, dict) else value)
+        return model
+
+    # -- tables ---------------------------------------------------------
+
+    def table(self, name: str, source: str, create: bool = False) -> Dict:
+        key = normalize_name(name)
+        if key not in self.tables:
+            self.tables[key] = {"name": key, "columns": OrderedDict(), "constraints": OrderedDict(),
+                                "rls": False, "created": create, "source": source}
+        return self.tables[key]
+
+    def add_constraint(self, table: Dict, definition: str, name: Optional[str] = None,
+                       column: Optional[str] = None):
+        kind = re.match(r"\w+", definition).group(0).lower()
+        if not name:
+            name = self._default_constraint_name(table, kind, definition, column)
+        table["constraints"][name] = definition
+
+    def _default_constraint_name(self, table: Dict, kind: str, definition: str, column: Optional[str]) -> str:
+        """Postgres' own naming, so later DROP CONSTRAINT table_col_key etc. find them"""
+        base = table["name"].split(".")[-1]
+        if kind == "primary":
+            return f"{base}_pkey"
+        columns = [column] if column else []
+        if not columns and kind in ("unique", "foreign"):
+            inner = definition[definition.index("(") + 1:closing_paren(definition, definition.index("("))]
+            columns = [ident(c.strip()) for c in inner.split(",")]
+        if not columns and kind == "check":
+            found = [c for c in table["columns"] if re.search(rf"\b{re.escape(c)}\b", definition)]
+            columns = found[:1]
+        suffix = {"unique": "key", "check": "check", "foreign": "fkey"}.get(kind, kind)
+        name = "_".join([base] + columns + [suffix])
+        n = 0
+        candidate = name
+        while candidate in table["constraints"]:
+            n += 1
+            candidate = f"{name}{n}"
+        return candidate
+
+    def add_column(self, table: Dict, definition: str):
+        tokens = words(definition)
+        column = ident(tokens[0])
+        type_parts, i = [], 1
+        while i < len(tokens) and tokens[i].lower() not in COLUMN_CLAUSES:
+            type_parts.append(tokens[i])
+            i += 1
+        col = {"name": column, "type": join_words(type_parts), "default": None, "not_null": False,
+               "primary_key": False, "extra": []}
+        constraint_name = None
+        while i < len(tokens):
+            word = tokens[i].lower()
+            if word == "constraint":
+                constraint_name = ident(tokens[i + 1])
+                i += 2
+                continue
+            if word == "not" and i + 1 < len(tokens) and tokens[i + 1].lower() == "null":
+                col["not_null"] = True
+                i += 2
+            elif word == "null":
+                i += 1
+            elif word == "default":
+                j = i + 1
+                while j < len(tokens) and tokens[j].lower() not in COLUMN_CLAUSES:
+                    j += 1
+                col["default"] = join_words(tokens[i + 1:j])
+                i = j
+            elif word == "primary":
+                col["primary_key"] = True
+                i += 2
+            elif word == "unique":
+                self.add_constraint(table, f"UNIQUE ({column})", constraint_name, column)
+                i += 1
+            elif word == "check":
+                self.add_constraint(table, f"CHECK {tokens[i + 1]}", constraint_name, column)
+                i += 2
+            elif word == "references":
+                j = i + 1
+                while j < len(tokens) and (tokens[j].lower() not in COLUMN_CLAUSES
+                                           or tokens[j - 1].lower() in ("set", "on", "delete", "update")):
+                    j += 1
+                self.add_constraint(table, f"FOREIGN KEY ({column}) REFERENCES {join_words(tokens[i + 1:j])}",
+                                    constraint_name, column)
+                i = j
+            else:  # generated / collate: keep verbatim
+                j = i + 1
+                while j < len(tokens) and tokens[j].lower() not in COLUMN_CLAUSES:
+                    j += 1
+                col["extra"].append(join_words(tokens[i:j]))
+                i = j
+            constraint_name = None
+        table["columns"][column] = col
+
+    def drop_constraint(self, table: Dict, name: str):
+        if table["constraints"].pop(name, None) is None and name.endswith("_pkey"):
+            for col in table["columns"].values():
+                col["primary_key"] = False
+
+    # -- folding --------------------------------------------------------
+
+    def fold(self, text: str, source: str):
+        """Apply one statement to the model"""
+        head = " ".join(strip_comments(text).split())
+        lower = head.lower()
+        handlers = [
+            (r"^create\s+(?:(?:global|local)\s+)?(?:temp\w*\s+|unlogged\s+)?table\b", self._create_table),
+            (r"^alter\s+table\b", self._alter_table),
+            (r"^drop\s+table\b", self._drop_table),
+            (r"^create\s+(?:unique\s+)?index\b", self._create_index),
+            (r"^drop\s+index\b", self._drop_index),
+            (r"^create\s+policy\b", self._create_policy),
+            (r"^drop\s+policy\b", self._drop_policy),
+            (r"^alter\s+policy\b", self._alter_policy),
+            (r"^create\s+(?:or\s+replace\s+)?function\b", self._create_function),
+            (r"^drop\s+function\b", self._drop_function),
+            (r"^create\s+(?:or\s+replace\s+)?(?:constraint\s+)?trigger\b", self._create_trigger),
+            (r"^drop\s+trigger\b", self._drop_trigger),
+            (r"^create\s+(?:or\s+replace\s+)?(?:materialized\s+)?view\b", self._create_view),
+            (r"^drop\s+(?:materialized\s+)?view\b", self._drop_view),
+            (r"^create\s+type\b", self._create_type),
+            (r"^create\s+extension\b", self._create_extension),
+            (r"^do\b", self._do_block),
+            (r"^alter\s+publication\s+\S+\s+add\s+table\b", self._publication_add),
+        ]
+        for pattern, handler in handlers:
+            if re.match(pattern, lower):
+                if handler(head, text, source) is not False:
+                    return
+                break
+        if lower in ("begin", "commit", "begin;", "commit;") or not lower:
+            return
+        if DML.match(lower) and not re.match(r"^(insert\s+into|update)\s+storage\.", lower):
+            self.skipped_dml += 1
+            return
+        if not re.match(r"^(create|alter|drop|grant|revoke|comment|do|select|insert|update|set|security)\b", lower):
+            self.warnings.append(f"{source}: fragmento no reconocido, omitido: {head[:60]}")
+            return
+        self.other.append({"sql": text.strip().rstrip(";") + ";", "source": source})
+
+    def _create_table(self, head: str, text: str, source: str):
+        match = re.match(rf"^create\s+.*?table\s+(?:if\s+not\s+exists\s+)?({NAME})\s*\(", head, re.I)
+        if not match:
+            return False
+        key = normalize_name(match.group(1))
+        if key in self.tables and self.tables[key]["created"] and "if not exists" in head[:match.end()].lower():
+            return  # CREATE TABLE IF NOT EXISTS on an existing table is a no-op
+        self.tables.pop(key, None)
+        table = self.table(key, source, create=True)
+        body = head[match.end() - 1:closing_paren(head, match.end() - 1) + 1][1:-1]
+        for item in split_top_level(body):
+            first = re.match(r'"?\w+', item).group(0).lower()
+            if first in TABLE_CONSTRAINTS:
+                name = None
+                if first == "constraint":
+                    parts = item.split(None, 2)
+                    name, item = ident(parts[1]), parts[2]
+                if item.lower().startswith("primary"):
+                    cols = item[item.index("(") + 1:item.rindex(")")].split(",")
+                    if len(cols) == 1 and ident(cols[0].strip()) in table["columns"] and not name:
+                        table["columns"][ident(cols[0].strip())]["primary_key"] = True
+                        continue
+                self.add_constraint(table, item, name)
+            elif first == "like":
+                table["columns"]["__like__"] = {"name": "__like__", "type": item, "default": None,
+                                                "not_null": False, "primary_key": False, "extra": []}
+            else:
+                self.add_column(table, item)
+
+    def _alter_table(self, head: str, text: str, source: str):
+        match = re.match(rf"^alter\s+table\s+(?:if\s+exists\s+)?(?:only\s+)?({NAME})\s+(.*)$", head, re.I | re.S)
+        if not match:
+            return False
+        actions = split_top_level(match.group(2).rstrip(";"))
+        table = self.table(match.group(1), source)
+        unknown = []
+        for action in actions:
+            if not self._alter_action(table, action):
+                unknown.append(action)
+        if unknown:
+            self.other.append({"sql": f"ALTER TABLE {table['name']} {', '.join(unknown)};", "source": source})
+
+    def _alter_action(self, table: Dict, action: str) -> bool:
+        lower = action.lower()
+        m = re.match(r"^add\s+(?:column\s+)?(?:if\s+not\s+exists\s+)?(.*)$", action, re.I | re.S)
+        if m and not re.match(r"^add\s+(constraint|primary|unique|check|foreign|exclude)\b", lower):
+            column = ident(words(m.group(1))[0])
+            if column in table["columns"]:
+                return True  # IF NOT EXISTS, or guarded by EXCEPTION WHEN duplicate_column
+            self.add_column(table, m.group(1))
+            return True
+        m = re.match(r"^add\s+(?:constraint\s+(\S+)\s+)?(.*)$", action, re.I | re.S)
+        if m:
+            name = ident(m.group(1)) if m.group(1) else None
+            definition = re.sub(r"\s+not\s+valid\s*$", "", m.group(2), flags=re.I)
+            if definition.lower().startswith("primary"):
+                for col in table["columns"].values():
+                    col["primary_key"] = False
+            self.add_constraint(table, definition, name)
+            return True
+        m = re.match(r"^drop\s+(?:column\s+)?(?:if\s+exists\s+)?(\S+)", action, re.I)
+        if m and not lower.startswith("drop constraint"):
+            table["columns"].pop(ident(m.group(1)), None)
+            column = ident(m.group(1))
+            for name in [n for n, d in table["constraints"].items()
+                         if re.search(rf"\(\s*{re.escape(column)}\s*\)", d.split("REFERENCES")[0])]:
+                table["constraints"].pop(name)
+            return True
+        m = re.match(r"^drop\s+constraint\s+(?:if\s+exists\s+)?(\S+)", action, re.I)
+        if m:
+            self.drop_constraint(table, ident(m.group(1)))
+            return True
+        m = re.match(r"^alter\s+(?:column\s+)?(\S+)\s+(.*)$", action, re.I | re.S)
+        if m:
+            col = table["columns"].get(ident(m.group(1)))
+            change = m.group(2)
+            if col is None:
+                return False
+            if re.match(r"^(set\s+data\s+)?type\s+", change, re.I):
+                new_type = re.sub(r"^(set\s+data\s+)?type\s+", "", change, flags=re.I)
+                col["type"] = re.split(r"\s+using\s+", new_type, flags=re.I)[0].strip()
+            elif re.match(r"^set\s+default\s+", change, re.I):
+                col["default"] = re.sub(r"^set\s+default\s+", "", change, flags=re.I).strip()
+            elif re.match(r"^drop\s+default", change, re.I):
+                col["default"] = None
+            elif re.match(r"^set\s+not\s+null", change, re.I):
+                col["not_null"] = True
+            elif re.match(r"^drop\s+not\s+null", change, re.I):
+                col["not_null"] = False
+            else:
+                return False
+            return True
+        m = re.match(r"^rename\s+(?:column\s+)?(\S+)\s+to\s+(\S+)$", action, re.I)
+        if m and not lower.startswith("rename constraint"):
+            old, new = ident(m.group(1)), ident(m.group(2))
+            if old in table["columns"]:
+                table["columns"] = OrderedDict((new if k == old else k, dict(v, name=new) if k == old else v)
+                                               for k, v in table["columns"].items())
+                return True
+            return False
+        if re.match(r"^(enable|force)\s+row\s+level\s+security$", lower):
+            table["rls"] = True
+            return True
+        if re.match(r"^(disable|no\s+force)\s+row\s+level\s+security$", lower):
+            table["rls"] = lower.startswith("no force") and table["rls"]
+            return True
+        return False
+
+    def _drop_table(self, head: str, text: str, source: str):
+        match = re.match(r"^drop\s+table\s+(?:if\s+exists\s+)?(.*?)(\s+cascade|\s+restrict)?;?$", head, re.I)
+        for name in split_top_level(match.group(1)):
+            key = normalize_name(name)
+            self.tables.pop(key, None)
+            for store in (self.indexes, self.policies, self.triggers):
+                for k in [k for k, v in store.items() if v["table"] == key]:
+                    store.pop(k)
+
+    def orphans(self) -> List[str]:
+        """Indexes/policies on public tables no source defines (prod-only leftovers)"""
+        found = []
+        for kind, store in (("índice", self.indexes), ("política", self.policies)):
+            for key, item in store.items():
+                if item["table"] not in self.tables and "." not in item["table"]:
+                    found.append(f"{item['source']}: {kind} {key.split('|')[-1]} sobre {item['table']}, "
+                                 "tabla no definida en las fuentes")
+        return found
+
+    def _create_index(self, head: str, text: str, source: str):
+        match = re.match(rf"^create\s+(?:unique\s+)?index\s+(?:concurrently\s+)?(?:if\s+not\s+exists\s+)?({NAME})?\s*on\s+(?:only\s+)?({NAME})", head, re.I)
+        if not match:
+            return False
+        name = normalize_name(match.group(1) or f"{match.group(2)}_idx")
+        if name in self.indexes and "if not exists" in head.lower()[:60]:
+            return
+        self.indexes[name] = {"table": normalize_name(match.group(2)), "sql": head.rstrip(";") + ";",
+                              "source": source}
+
+    def _drop_index(self, head: str, text: str, source: str):
+        match = re.match(r"^drop\s+index\s+(?:concurrently\s+)?(?:if\s+exists\s+)?(.*?)(\s+cascade|\s+restrict)?;?$", head, re.I)
+        for name in split_top_level(match.group(1)):
+            self.indexes.pop(normalize_name(name), None)
+
+    def _policy_key(self, head: str, verb: str) -> Optional[Tuple[str, str]]:
+        match = re.match(rf"^{verb}\s+policy\s+(?:if\s+exists\s+)?(\"[^\"]+\"|\S+)\s+on\s+({NAME})", head, re.I)
+        if not match:
+            return None
+        return normalize_name(match.group(2)), ident(match.group(1))
+
+    def _create_policy(self, head: str, text: str, source: str):
+        key = self._policy_key(head, "create")
+        if not key:
+            return False
+        self.policies[f"{key[0]}|{key[1]}"] = {"table": key[0], "name": key[1], "sql": text.strip().rstrip(";") + ";",
+                                               "source": source}
+
+    def _drop_policy(self, head: str, text: str, source: str):
+        key = self._policy_key(head, "drop")
+        if not key:
+            return False
+        self.policies.pop(f"{key[0]}|{key[1]}", None)
+
+    def _alter_policy(self, head: str, text: str, source: str):
+        key = self._policy_key(head, "alter")
+        if not key or f"{key[0]}|{key[1]}" not in self.policies:
+            return False
+        self.other.append({"sql": text.strip().rstrip(";") + ";", "source": source})
+
+    def _create_function(self, head: str, text: str, source: str):
+        match = re.match(rf"^create\s+(?:or\s+replace\s+)?function\s+({NAME})\s*\(", head, re.I)
+        if not match:
+            return False
+        args = head[match.end():closing_paren(head, match.end() - 1)]
+        signature = function_signature(match.group(1), args)
+        body = text.strip().rstrip(";")
+        volatility = re.search(r"\b(immutable|stable|volatile)\b", _outside_body(body), re.I)
+        self.functions[signature] = {
+            "name": normalize_name(match.group(1)),
+            "sql": body + ";",
+            "source": source,
+            "volatility": (volatility.group(1) if volatility else "volatile").lower(),
+            "security_definer": bool(re.search(r"\bsecurity\s+definer\b", _outside_body(body), re.I)),
+        }
+
+    def _drop_function(self, head: str, text: str, source: str):
+        match = re.match(r"^drop\s+function\s+(?:if\s+exists\s+)?(.*?)(\s+cascade|\s+restrict)?;?$", head, re.I)
+        for item in split_top_level(match.group(1)):
+            m = re.match(rf"^({NAME})\s*(\((.*)\))?$", item.strip(), re.S)
+            if not m:
+                continue
+            if m.group(2) is None:
+                name = normalize_name(m.group(1))
+                for sig in [s for s, f in self.functions.items() if f["name"] == name]:
+                    self.functions.pop(sig)
+            else:
+                self.functions.pop(function_signature(m.group(1), m.group(3)), None)
+
+    def _create_trigger(self, head: str, text: str, source: str):
+        match = re.match(rf"^create\s+(?:or\s+replace\s+)?(?:constraint\s+)?trigger\s+(\S+)\s+.*?\bon\s+({NAME})", head, re.I)
+        if not match:
+            return False
+        table = normalize_name(match.group(2))
+        self.triggers[f"{table}|{ident(match.group(1))}"] = {"table": table, "sql": head.rstrip(";") + ";",
+                                                             "source": source}
+
+    def _drop_trigger(self, head: str, text: str, source: str):
+        match = re.match(rf"^drop\s+trigger\s+(?:if\s+exists\s+)?(\S+)\s+on\s+({NAME})", head, re.I)
+        if not match:
+            return False
+        self.triggers.pop(f"{normalize_name(match.group(2))}|{ident(match.group(1))}", None)
+
+    def _create_view(self, head: str, text: str, source: str):
+        match = re.match(rf"^create\s+(?:or\s+replace\s+)?(?:materialized\s+)?view\s+(?:if\s+not\s+exists\s+)?({NAME})", head, re.I)
+        self.views[normalize_name(match.group(1))] = {"sql": text.strip().rstrip(";") + ";", "source": source}
+
+    def _drop_view(self, head: str, text: str, source: str):
+        match = re.match(r"^drop\s+(?:materialized\s+)?view\s+(?:if\s+exists\s+)?(.*?)(\s+cascade|\s+restrict)?;?$", head, re.I)
+        for name in split_top_level(match.group(1)):
+            self.views.pop(normalize_name(name), None)
+
+    def _create_type(self, head: str, text: str, source: str):
+        match = re.match(rf"^create\s+type\s+({NAME})", head, re.I)
+        self.types[normalize_name(match.group(1))] = {"sql": head.rstrip(";") + ";", "source": source}
+
+    def _create_extension(self, head: str, text: str, source: str):
+        match = re.match(r"^create\s+extension\s+(?:if\s+not\s+exists\s+)?(\"[^\"]+\"|\S+)", head, re.I)
+        name = ident(match.group(1).rstrip(";"))
+        self.extensions[name] = {"sql": f'CREATE EXTENSION IF NOT EXISTS "{name}"'
+                                        + _extension_schema(head) + ";", "source": source}
+
+    def _publication_add(self, head: str, text: str, source: str):
+        match = re.match(r"^alter\s+publication\s+(\S+)\s+add\s+table\s+(.*?);?$", head, re.I)
+        for name in split_top_level(match.group(2)):
+            key = f"ALTER PUBLICATION {match.group(1)} ADD TABLE {normalize_name(name)}"
+            if any(o["sql"].startswith(f"DO $$ BEGIN {key};") for o in self.other):
+                continue
+            self.other.append({"sql": f"DO $$ BEGIN {key}; EXCEPTION WHEN duplicate_object THEN NULL; END $$;",
+                               "source": source})
+
+    def _do_block(self, head: str, text: str, source: str):
+        """
+        DO blocks that only wrap static DDL in exception guards / IF NOT EXISTS
+        checks are folded statement by statement; anything dynamic (DECLARE,
+        loops, EXECUTE format(...)) is kept verbatim for the final script.
+        """
+        inner = _static_do_statements(text)
+        if inner is None and not re.search(r"\b(create|alter|drop|grant|revoke|comment|execute)\b", head, re.I):
+            self.skipped_dml += 1  # data-only block (seed accounts, backfills)
+            return
+        if inner is None:
+            self.other.append({"sql": text.strip().rstrip(";") + ";", "source": source})
+            return
+        for statement in inner:
+            self.fold(statement, source)
+
+def _outside_body(function_sql: str) -> str:
+    """Function definition with the dollar-quoted body removed (for attribute checks)"""
+    return re.sub(r"(\$[A-Za-z_]*\$).*?\1", " ", function_sql, flags=re.S)
+
+def _extension_schema(head: str) -> str:
+    match = re.search(r"\bschema\s+(\S+)", head, re.I)
+    return f" SCHEMA {match.group(1).rstrip(';')}" if match else ""
+
+PL_NOISE = re.compile(r"^(begin|end(\s+if|\s+loop)?|null|exception\s+when\s+.+?\s+then\s+null)$", re.I | re.S)
+
+def _static_do_statements(text: str) -> Optional[List[str]]:
+    match = re.search(r"(\$[A-Za-z_]*\$)(.*)\1", text, re.S)
+    if not match:
+        return None
+    body = match.group(2)
+    if re.match(r"^\s*declare\b", strip_comments(body), re.I):
+        return None
+    statements = []
+    for statement in split_statements(body):
+        piece = " ".join(strip_comments(statement.text).split()).rstrip(";").strip()
+        # peel BEGIN / IF ... THEN / EXCEPTION ... THEN NULL wrappers off the front
+        while True:
+            peeled = re.sub(r"^(begin|else)\s+", "", piece, flags=re.I)
+            peeled = re.sub(r"^(if|elsif)\s+.+?\s+then\s+", "", peeled, flags=re.I | re.S)
+            peeled = re.sub(r"^exception\s+when\s+.+?\s+then\s+null\s*", "", peeled, flags=re.I | re.S)
+            peeled = re.sub(r"^end(\s+if)?\s*", "", peeled, flags=re.I) if re.match(r"^end(\s+if)?(\s|$)", peeled, re.I) else peeled
+            if peeled == piece:
+                break
+            piece = peeled
+        if not piece or PL_NOISE.match(piece):
+            continue
+        execute = re.match(r"^execute\s+'(.*)'$", piece, re.I | re.S)
+        if execute:
+            piece = execute.group(1).replace("''", "'")
+        if re.match(r"^(raise|perform|for|loop|while|return|execute|select\s+.*\binto\b|get\s+diagnostics)\b", piece, re.I):
+            return None
+        statements.append(piece)
+    return statements
+
+# ---------------------------------------------------------------------------
+# Build + cache
+# ---------------------------------------------------------------------------
+
+def source_files(include_base: bool = True) -> List[Path]:
+    files = sorted(MIGRATIONS_DIR.glob("*.sql"))
+    return ([BASE_SCHEMA] if include_base and BASE_SCHEMA.exists() else []) + files
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def fold_file(model: SchemaModel, path: Path):
+    rel = path.relative_to(REPO_ROOT).as_posix()
+    for statement in split_statements(path.read_text(encoding="utf-8-sig")):
+        model.fold(statement.text, f"{rel}:{statement.line}")
+
+def build_model(include_base: bool = True, use_cache: bool = True, cache_file: Path = CACHE_FILE) -> SchemaModel:
+    """
+    Folded model of all sources. With the cache, an unchanged tree is a JSON
+    load; when only new migrations were appended, just those are folded.
+    """
+    files = source_files(include_base)
+    hashes = [[f.relative_to(REPO_ROOT).as_posix(), file_hash(f)] for f in files]
+    # Folding rules changed (here or in the splitter that cuts the statements) -> start over
+    version = "".join(file_hash(Path(__file__).resolve().parent / name)
+                      for name in ("schema_model.py", "sql_splitter.py"))
+
+    model, done = SchemaModel(), 0
+    if use_cache and cache_file.exists():
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        except ValueError:
+            cached = {}
+        prefix = cached.get("files", [])
+        if cached.get("version") == version and prefix == hashes[:len(prefix)]:
+            model, done = SchemaModel.from_json(cached["model"]), len(prefix)
+
+    for path in files[done:]:
+        fold_file(model, path)
+
+    if use_cache and done < len(files):
+        cache_file.write_text(json.dumps({"version": version, "files": hashes, "model": model.to_json()},
+                                         ensure_ascii=False), encoding="utf-8")
+    return model
+
+def foreign_keys(model: SchemaModel) -> Dict[str, Set[str]]:
+    """table -> tables its foreign keys reference (names as normalize_name gives them)"""
+    references: Dict[str, Set[str]] = {}
+    for name, table in model.tables.items():
+        for definition in table["constraints"].values():
+            if definition.lower().startswith("foreign"):
+                target = re.split(r"\breferences\b", definition, 1, flags=re.I)[1].split("(")[0].strip()
+                references.setdefault(name, set()).add(normalize_name(target))
+    return references
+
+# ---------------------------------------------------------------------------
+# Consolidated DDL
+# ---------------------------------------------------------------------------
+
+def _defined(model: SchemaModel, table: str) -> bool:
+    return table in model.tables or "." in table
+
+def _column_sql(col: Dict) -> str:
+    if col["name"] == "__like__":
+        return col["type"]
+    parts = [_quote_ident(col["name"]), col["type"]]
+    if col["primary_key"]:
+        parts.append("PRIMARY KEY")
+    if col["default"] is not None:
+        parts.append(f"DEFAULT {col['default']}")
+    if col["not_null"] and not col["primary_key"]:
+        parts.append("NOT NULL")
+    parts.extend(col["extra"])
+    return " ".join(p for p in parts if p)
+
+def _quote_ident(name: str) -> str:
+    return name if re.match(r"^[a-z_][a-z0-9_$]*$", name) else '"' + name.replace('"', '""') + '"'
+
+def emit_ddl(model: SchemaModel, header: str = "") -> str:
+    """
+    One script that recreates the effective schema on an empty database:
+    extensions, types, tables (FKs added afterwards so order never matters),
+    functions, views, indexes, RLS + policies, triggers, then the remaining
+    statements (grants, comments, dynamic DO blocks) in their original order.
+    """
+    out = [header] if header else []
+
+    def section(title: str):
+        out.append(f"\n-- {'=' * 73}\n-- {title}\n-- {'=' * 73}\n")
+
+    if model.extensions or model.types:
+        section("Extensiones y tipos")
+        out.extend(e["sql"] for e in model.extensions.values())
+        out.extend(t["sql"] for t in model.types.values())
+
+    section("Tablas")
+    foreign_keys = []
+    for table in model.tables.values():
+        lines = [_column_sql(c) for c in table["columns"].values()]
+        for name, definition in table["constraints"].items():
+            if definition.lower().startswith("foreign"):
+                foreign_keys.append(f"ALTER TABLE {table['name']} ADD CONSTRAINT {_quote_ident(name)} {definition};")
+            else:
+                lines.append(f"CONSTRAINT {_quote_ident(name)} {definition}")
+        origin = f"-- {table['source']}" + ("" if table["created"] else "  ⚠️ solo ALTERs: definición base desconocida")
+        if table["created"]:
+            body = ",\n  ".join(lines)
+            out.append(f"{origin}\nCREATE TABLE IF NOT EXISTS {table['name']} (\n  {body}\n);\n")
+        else:
+            adds = ",\n  ".join(f"ADD COLUMN IF NOT EXISTS {_column_sql(c)}" for c in table["columns"].values())
+            out.append(f"{origin}\nALTER TABLE {table['name']}\n  {adds};\n" if adds else origin)
+    if foreign_keys:
+        section("Claves foráneas")
+        out.extend(foreign_keys)
+
+    if model.functions:
+        section("Funciones")
+        out.extend(f"-- {f['source']}\n{f['sql']}\n" for f in model.functions.values())
+    if model.views:
+        section("Vistas")
+        out.extend(f"-- {v['source']}\n{v['sql']}\n" for v in model.views.values())
+    if model.indexes:
+        section("Índices")
+        out.extend(i["sql"] for i in model.indexes.values() if _defined(model, i["table"]))
+
+    section("RLS y políticas")
+    out.extend(f"ALTER TABLE {t['name']} ENABLE ROW LEVEL SECURITY;" for t in model.tables.values() if t["rls"])
+    out.extend(f"\n-- {p['source']}\n{p['sql']}" for p in model.policies.values() if _defined(model, p["table"]))
+
+    if model.triggers:
+        section("Triggers")
+        out.extend(t["sql"] for t in model.triggers.values())
+    if model.other:
+        section("Resto (grants, comentarios, bloques dinámicos) en orden original")
+        out.extend(f"-- {o['source']}\n{o['sql']}\n" for o in model.other)
+    return "\n".join(out) + "\n"
+
+def summary(model: SchemaModel) -> str:
+    columns = sum(len(t["columns"]) for t in model.tables.values())
+    return (f"{len(model.tables)} tablas, {columns} columnas, {len(model.indexes)} índices, "
+            f"{len(model.policies)} políticas, {len(model.functions)} funciones, {len(model.triggers)} triggers, "
+            f"{len(model.views)} vistas, {len(model.other)} sentencias sueltas, "
+            f"{model.skipped_dml} sentencias de datos omitidas")
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Bulk seed loader
+Reads seed rows from SQL scripts (top-level INSERT ... VALUES), CSV, JSON or a
+JS module exporting an array (scripts/legacy/exercises-data.js) and loads them
+in chunked, set-based upserts: one statement per chunk built on
+jsonb_populate_recordset, several chunks in flight at once. Rows are matched
+on their natural key (exercises.name, recipes.name, badges.title...) so
+re-seeding updates in place instead of duplicating, with or without a
+unique constraint behind the key.
+"""
+
+import argparse
+import csv
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sql_client import SqlError, client_from_env
+from sql_splitter import normalize_name, split_statements
+
+# Natural key per table: what makes two seed rows "the same row"
+NATURAL_KEYS = {
+    "exercises": ["name"],
+    "recipes": ["name"],
+    "badges": ["title"],
+    "challenges": ["title"],
+    "invitation_codes": ["code"],
+    "workout_templates": ["trainer_id", "name"],
+    "diet_templates": ["trainer_id", "name"],
+    "progress_records": ["member_id", "date"],
+    "user_badges": ["badge_id", "member_id"],
+}
+
+TRANSACTION_CONTROL = {"BEGIN", "BEGIN TRANSACTION", "START TRANSACTION", "COMMIT", "END"}
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+
+class Unparseable(Exception):
+    """A value that is an expression (function call, subquery...), not a literal"""
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+class RowBatch:
+    """Rows for one table sharing the same column list"""
+
+    def __init__(self, table: str, columns: List[str], rows: List[Dict[str, Any]]):
+        self.table = table
+        self.columns = columns
+        self.rows = rows
+
+INSERT_HEAD = re.compile(r"^insert\s+into\s+((?:\"[^\"]+\"|[\w$]+)(?:\.(?:\"[^\"]+\"|[\w$]+))?)\s*\(([^)]*)\)\s*values\s*", re.I)
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+class ValuesParser:
+    """Parses `(lit, lit, ...), (...)` after VALUES into Python values"""
+
+    def __init__(self, text: str, pos: int):
+        self.text = text
+        self.pos = pos
+
+    def skip(self):
+        while self.pos < len(self.text):
+            if self.text[self.pos].isspace():
+                self.pos += 1
+            elif self.text.startswith("--", self.pos):
+                end = self.text.find("\n", self.pos)
+                self.pos = len(self.text) if end == -1 else end + 1
+            elif self.text.startswith("/*", self.pos):
+                end = self.text.find("*/", self.pos)
+                self.pos = len(self.text) if end == -1 else end + 2
+            else:
+                return
+
+    def peek(self) -> str:
+        self.skip()
+        return self.text[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise Unparseable(f"se esperaba '{char}' en la posición {self.pos}")
+        self.pos += 1
+
+    def tuples(self) -> Tuple[List[List[Any]], str]:
+        """All tuples, plus whatever follows them (ON CONFLICT ..., RETURNING ...)"""
+        rows = []
+        while True:
+            rows.append(self.tuple())
+            if self.peek() != ",":
+                break
+            self.pos += 1
+        return rows, self.text[self.pos:].strip().rstrip(";").strip()
+
+    def tuple(self) -> List[Any]:
+        self.expect("(")
+        values = []
+        while True:
+            values.append(self.value())
+            char = self.peek()
+            self.pos += 1
+            if char == ")":
+                return values
+            if char != ",":
+                raise Unparseable(f"carácter inesperado '{char}' en la posición {self.pos - 1}")
+
+    def value(self) -> Any:
+        self.skip()
+        text, pos = self.text, self.pos
+        if text[pos:pos + 1] == "'" or (text[pos:pos + 2].lower() == "e'"):
+            value = self.string()
+        elif text[pos:pos + 6].upper() == "ARRAY[":
+            self.pos += 6
+            value = []
+            if self.peek() == "]":
+                self.pos += 1
+            else:
+                while True:
+                    value.append(self.value())
+                    char = self.peek()
+                    self.pos += 1
+                    if char == "]":
+                        break
+                    if char != ",":
+                        raise Unparseable("ARRAY[] mal formado")
+        else:
+            number = NUMBER.match(text, pos)
+            word = WORD.match(text, pos)
+            if number:
+                self.pos = number.end()
+                literal = number.group(0)
+                value = float(literal) if any(c in literal for c in ".eE") else int(literal)
+            elif word and word.group(0).lower() in ("null", "true", "false"):
+                self.pos = word.end()
+                value = {"null": None, "true": True, "false": False}[word.group(0).lower()]
+            else:
+                raise Unparseable(f"expresión no literal: {text[pos:pos + 40]!r}")
+        return self.cast(value)
+
+    def string(self) -> str:
+        escaped = self.text[self.pos] in "eE"
+        self.pos += 2 if escaped else 1
+        out = []
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if escaped and char == "\\":
+                nxt = self.text[self.pos + 1:self.pos + 2]
+                out.append({"n": "\n", "t": "\t", "r": "\r"}.get(nxt, nxt))
+                self.pos += 2
+                continue
+            if char == "'":
+                if self.text.startswith("''", self.pos):
+                    out.append("'")
+                    self.pos += 2
+                    continue
+                self.pos += 1
+                return "".join(out)
+            out.append(char)
+            self.pos += 1
+        raise Unparseable("cadena sin cerrar")
+
+    def cast(self, value: Any) -> Any:
+        """Apply a trailing ::type where it changes the JSON shape (arrays, json)"""
+        self.skip()
+        while self.text.startswith("::", self.pos):
+            match = re.compile(r"::\s*([\w ]+?(?:\(\d+(?:,\s*\d+)?\))?(?:\[\])?)(?=[\s,)\]:]|$)").match(self.text, self.pos)
+            if not match:
+                raise Unparseable("cast no reconocido")
+            self.pos = match.end()
+            cast = match.group(1).strip().lower()
+            if isinstance(value, str) and cast in ("json", "jsonb"):
+                value = json.loads(value)
+            elif isinstance(value, str) and cast.endswith("[]"):
+                value = parse_pg_array(value)
+            self.skip()
+        return value
+
+def parse_pg_array(literal: str) -> List[Optional[str]]:
+    """'{a,"b c",NULL}' -> ['a', 'b c', None] (one dimension, which is all the seeds use)"""
+    body = literal.strip()
+    if not (body.startswith("{") and body.endswith("}")):
+        raise Unparseable(f"array no reconocido: {literal[:40]!r}")
+    items, current, quoted, i = [], [], False, 1
+    was_quoted = False
+    while i < len(body) - 1:
+        char = body[i]
+        if quoted:
+            if char == "\\":
+                current.append(body[i + 1])
+                i += 2
+                continue
+            if char == '"':
+                quoted = False
+            else:
+                current.append(char)
+        elif char == '"':
+            quoted = was_quoted = True
+        elif char == ",":
+            items.append(_array_item(current, was_quoted))
+            current, was_quoted = [], False
+        else:
+            current.append(char)
+        i += 1
+    if current or was_quoted or items:
+        items.append(_array_item(current, was_quoted))
+    return items
+
+def _array_item(chars: List[str], quoted: bool) -> Optional[str]:
+    item = "".join(chars) if quoted else "".join(chars).strip()
+    return None if not quoted and item.upper() == "NULL" else item
+
+def parse_insert(text: str) -> Optional[RowBatch]:
+    """RowBatch for a literal multi-row INSERT, or None if it must run as-is"""
+    head = INSERT_HEAD.match(text)
+    if not head:
+        return None
+    columns = [normalize_name(c.strip()) for c in head.group(2).split(",")]
+    try:
+        tuples, tail = ValuesParser(text, head.end()).tuples()
+    except Unparseable:
+        return None
+    # ON CONFLICT DO NOTHING/UPDATE is subsumed by the natural-key upsert;
+    # anything else (RETURNING, a WHERE...) changes the meaning: run as-is
+    if tail and not re.match(r"^on\s+conflict\b", tail, re.I):
+        return None
+    if any(len(values) != len(columns) for values in tuples):
+        return None
+    rows = [dict(zip(columns, values)) for values in tuples]
+    return RowBatch(normalize_name(head.group(1)), columns, rows)
+
+def read_sql(path: Path) -> List[Any]:
+    """Ordered steps: RowBatch for loadable INSERTs, raw statement text for everything else"""
+    steps = []
+    for statement in split_statements(path.read_text(encoding="utf-8")):
+        if statement.head.upper().rstrip(";").strip() in TRANSACTION_CONTROL:
+            continue  # every step already commits on its own
+        batch = parse_insert(statement.text)
+        steps.append(batch if batch else statement)
+    return steps
+
+def read_records(path: Path, table: Optional[str]) -> List[Any]:
+    """
+    CSV / JSON / JS module -> [RowBatch]; JSON may also be {"table": [rows]}.
+    A bare list of rows needs `table`: the file name (exercises-data.js) is
+    not a table, so guessing it only fails later, on the server.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            data = [{k: (v if v != "" else None) for k, v in row.items()} for row in csv.DictReader(f)]
+    elif suffix == ".js":
+        output = subprocess.run(
+            ["node", "-e", "process.stdout.write(JSON.stringify(require(process.argv[1])))", str(path.resolve())],
+            capture_output=True, text=True, check=True).stdout
+        data = json.loads(output)
+    else:
+        data = json.loads(path.read_text(encoding="utf-8"))
+
+    if not isinstance(data, dict) and not table:
+        raise ValueError(f"{path}: es una lista de filas sin tabla destino; indica --table "
+                         f"(p. ej. --table exercises)")
+    tables = data if isinstance(data, dict) else {table: data}
+    batches = []
+    for name, rows in tables.items():
+        columns = list(OrderedDict((k, None) for row in rows for k in row))
+        batches.append(RowBatch(normalize_name(name), columns, rows))
+    return batches
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def _ident(name: str) -> str:
+    return ".".join('"' + part.replace('"', '""') + '"' for part in name.split("."))
+
+def upsert_sql(table: str, columns: List[str], key: List[str], rows: List[Dict[str, Any]]) -> str:
+    """
+    One set-based statement per chunk: rows are typed by the table itself via
+    jsonb_populate_recordset, existing keys are updated, missing ones inserted.
+    Without a key it is a plain multi-row insert.
+    """
+    qualified = _ident(table if "." in table else f"public.{table}")
+    cols = ", ".join(_ident(c) for c in columns)
+    payload = _literal(json.dumps(rows, ensure_ascii=False, default=str))
+    source = f"SELECT {cols} FROM jsonb_populate_recordset(NULL::{qualified}, {payload}::jsonb)"
+    if not key:
+        return f"INSERT INTO {qualified} ({cols})\n{source};"
+
+    # Plain = lets Postgres hash-join the chunk against the table; the
+    # null-safe form can't be hashed, so only use it for keys with NULLs
+    match = " AND ".join(
+        f"t.{_ident(k)} IS NOT DISTINCT FROM src.{_ident(k)}" if any(row.get(k) is None for row in rows)
+        else f"t.{_ident(k)} = src.{_ident(k)}"
+        for k in key)
+    updates = ", ".join(f"{_ident(c)} = src.{_ident(c)}" for c in columns if c not in key)
+    update_cte = (f",\nupd AS (UPDATE {qualified} AS t SET {updates} FROM src WHERE {match})"
+                  if updates else "")
+    return (
+        f"WITH src AS ({source}){update_cte}\n"
+        f"INSERT INTO {qualified} ({cols})\n"
+        f"SELECT {cols} FROM src WHERE NOT EXISTS (SELECT 1 FROM {qualified} AS t WHERE {match});"
+    )
+
+def dedupe(rows: List[Dict[str, Any]], key: List[str]) -> List[Dict[str, Any]]:
+    """Last row wins per key, so parallel chunks never race on the same key"""
+    if not key:
+        return rows
+    unique = OrderedDict()
+    for row in rows:
+        unique[tuple(json.dumps(row.get(k), default=str) for k in key)] = row
+    return list(unique.values())
+
+def load_batch(client, pool: ThreadPoolExecutor, batch: RowBatch, key: List[str], batch_size: int) -> bool:
+    rows = dedupe(batch.rows, key)
+    chunks = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    start = time.perf_counter()
+
+    def one(chunk):
+        try:
+            client.execute(upsert_sql(batch.table, batch.columns, key, chunk))
+            return None
+        except SqlError as e:
+            return str(e)
+
+    errors = [e for e in pool.map(one, chunks) if e]
+    elapsed = time.perf_counter() - start
+    key_label = ",".join(key) if key else "sin clave (insert)"
+    status = "❌" if errors else "✅"
+    print(f"{status} {batch.table:<28} {len(rows):>7} filas  {len(chunks):>4} lotes  "
+          f"{elapsed * 1000:>8.0f} ms  {len(rows) / elapsed if elapsed else 0:>9.0f} filas/s  [{key_label}]")
+    for error in errors[:3]:
+        print(f"   ↳ {error}")
+    return not errors
+
+def merge_steps(steps: List[Any]) -> List[Any]:
+    """Merge consecutive RowBatches of the same table/columns into one (fewer, fuller chunks)"""
+    merged = []
+    for step in steps:
+        last = merged[-1] if merged else None
+        if isinstance(step, RowBatch) and isinstance(last, RowBatch) and \
+                last.table == step.table and last.columns == step.columns:
+            last.rows.extend(step.rows)
+        else:
+            merged.append(step)
+    return merged
+
+def run(client, steps: List[Any], batch_size: int, workers: int, key_override: Optional[List[str]]) -> bool:
+    """
+    Steps run in file order; a non-row statement (DO block, UPDATE, INSERT ...
+    SELECT) is a barrier executed as-is. Chunks of one table load in parallel.
+    """
+    ok = True
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for step in merge_steps(steps):
+            if isinstance(step, RowBatch):
+                key = key_override or NATURAL_KEYS.get(step.table.split(".")[-1])
+                if key is None and "id" in step.columns:
+                    key = ["id"]
+                ok = load_batch(client, pool, step, key or [], batch_size) and ok
+            else:
+                start = time.perf_counter()
+                try:
+                    client.execute(step.text)
+                    print(f"🔁 línea {step.line:<5} {step.snippet(60):<62} "
+                          f"{(time.perf_counter() - start) * 1000:>6.0f} ms (tal cual)")
+                except SqlError as e:
+                    print(f"❌ línea {step.line}: {step.snippet(60)}\n   ↳ {e}")
+                    return False
+    return ok
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Carga masiva e idempotente de seeds (SQL, CSV, JSON, JS)")
+    parser.add_argument("files", nargs="+", help="sql/FASE4-SEED-RECETAS.sql, datos.csv, scripts/legacy/exercises-data.js...")
+    parser.add_argument("--table", help="tabla destino para CSV/JSON/JS con una lista de filas (obligatoria; "
+                                        "un JSON {\"tabla\": [filas]} no la necesita)")
+    parser.add_argument("--key", help="clave natural (columnas separadas por comas), sustituye a la por defecto")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="filas por sentencia")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="lotes en paralelo")
+    parser.add_argument("--dry-run", action="store_true", help="solo muestra lo que se cargaría")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    key_override = [k.strip() for k in args.key.split(",")] if args.key else None
+
+    plan = []
+    for name in args.files:
+        path = Path(name)
+        try:
+            steps = read_sql(path) if path.suffix.lower() == ".sql" else read_records(path, args.table)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        plan.append((path, steps))
+
+    if args.dry_run:
+        for path, steps in plan:
+            print(f"📄 {path}")
+            for step in merge_steps(steps):
+                if isinstance(step, RowBatch):
+                    key = key_override or NATURAL_KEYS.get(step.table.split(".")[-1]) or \
+                        (["id"] if "id" in step.columns else [])
+                    print(f"   📦 {step.table}: {len(step.rows)} filas, clave {','.join(key) or '-'}")
+                else:
+                    print(f"   🔁 línea {step.line}: {step.snippet(70)}")
+        sys.exit(0)
+
+    client = client_from_env(pool_size=args.workers)
+    print(f"🚀 Seeds → {client.describe()} (lotes de {args.batch_size}, {args.workers} en paralelo)")
+    start = time.perf_counter()
+    ok = True
+    try:
+        for path, steps in plan:
+            print(f"\n📄 {path}")
+            ok = run(client, steps, args.batch_size, args.workers, key_override) and ok
+            if not ok:
+                break
+    finally:
+        client.close()
+    print(f"\n{'✅' if ok else '❌'} Total: {time.perf_counter() - start:.2f}s")
+    sys.exit(0 if ok else 1)
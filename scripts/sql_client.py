@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+SQL transport shared by the database scripts (migrate.py, execute_fix.py...)
+Against Supabase it POSTs to rest/v1/rpc/exec_sql over one pooled
+keep-alive client (scripts/http_client.py); with DATABASE_URL set it talks
+to Postgres directly (e.g. a local `supabase start` / docker Postgres)
+through psycopg.
+Either way one execute() call is one transaction.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import httpx
+
+import http_client
+
+# exec_sql has shipped with both argument names over time; the ledger
+# migration defines sql_query, older projects may still have sql
+EXEC_SQL_PARAMS = ["sql_query", "sql"]
+
+class SqlError(Exception):
+    """A statement batch was rejected (the whole call was rolled back)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class ExecSqlClient:
+    """Runs SQL through the exec_sql RPC with the service role key"""
+
+    def __init__(self, url: str, service_key: str, pool_size: int = 4, timeout: int = 300):
+        self.base_url = url.rstrip("/")
+        self.timeout = timeout
+        self.param: Optional[str] = None  # resolved on first call
+        # Only connection failures are retried: a resent exec_sql could run a script twice
+        self.session = http_client.make_client(
+            headers={
+                "apikey": service_key,
+                "Authorization": f"Bearer {service_key}",
+                "Content-Type": "application/json",
+            },
+            pool_size=pool_size, read_timeout=timeout, pool_timeout=None,
+            retry=http_client.TransientRetry(statuses=()), on_timing=http_client.env_timing_hooks(),
+        )
+
+    def describe(self) -> str:
+        return self.base_url
+
+    def _post(self, param: str, sql: str) -> httpx.Response:
+        return self.session.post(f"{self.base_url}/rest/v1/rpc/exec_sql", json={param: sql},
+                                 headers={"Prefer": "return=minimal"})
+
+    def execute(self, sql: str):
+        """Run `sql` in one transaction; raises SqlError with Postgres' message on failure"""
+        if self.param:
+            response = self._post(self.param, sql)
+        else:
+            # Only retry with the other argument name when PostgREST says the
+            # function signature does not exist (PGRST202) — never after the
+            # SQL itself failed, or a partially-valid script would run twice
+            for param in EXEC_SQL_PARAMS:
+                response = self._post(param, sql)
+                if not _is_missing_function(response):
+                    self.param = param
+                    break
+        if response.status_code in (200, 204):
+            return
+        if _is_missing_function(response):
+            raise SqlError("La función exec_sql no existe en este proyecto "
+                           "(python scripts/migrate.py --bootstrap)", response.status_code)
+        raise SqlError(_error_message(response), response.status_code)
+
+    def select(self, table: str, columns: str = "*") -> List[Dict]:
+        """All rows of a small table through PostgREST"""
+        response = self.session.get(f"{self.base_url}/rest/v1/{table}", params={"select": columns})
+        if response.status_code != 200:
+            raise SqlError(_error_message(response), response.status_code)
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+class PgClient:
+    """Direct Postgres connection (one per thread), for local databases"""
+
+    def __init__(self, dsn: str):
+        import psycopg  # only needed with DATABASE_URL
+
+        self.psycopg = psycopg
+        self.dsn = dsn
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def describe(self) -> str:
+        return self.dsn.split("@")[-1]
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None or conn.closed:
+            conn = self.psycopg.connect(self.dsn)
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def execute(self, sql: str):
+        conn = self._connection()
+        try:
+            # No parameters -> simple query protocol, so multi-statement scripts work
+            conn.execute(sql)
+            conn.commit()
+        except self.psycopg.Error as e:
+            conn.rollback()
+            raise SqlError(str(e).strip()) from e
+
+    def select(self, table: str, columns: str = "*") -> List[Dict]:
+        conn = self._connection()
+        try:
+            cursor = conn.execute(f"SELECT {columns} FROM public.{table}")
+            names = [c.name for c in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+            conn.commit()
+            return rows
+        except self.psycopg.Error as e:
+            conn.rollback()
+            raise SqlError(str(e).strip()) from e
+
+    def close(self):
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+
+def _is_missing_function(response: httpx.Response) -> bool:
+    if response.status_code != 404:
+        return False
+    try:
+        return response.json().get("code") == "PGRST202"
+    except ValueError:
+        return True
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        body = response.json()
+    except ValueError:
+        return f"HTTP {response.status_code}: {response.text[:300]}"
+    parts = [body.get("message") or str(body)]
+    for key in ("details", "hint"):
+        if body.get(key):
+            parts.append(f"{key}: {body[key]}")
+    return f"HTTP {response.status_code}: " + " | ".join(parts)
+
+def client_from_env(pool_size: int = 4):
+    """
+    DATABASE_URL -> direct Postgres; otherwise SUPABASE_URL (or
+    NEXT_PUBLIC_SUPABASE_URL) + SUPABASE_SERVICE_ROLE_KEY -> exec_sql RPC
+    """
+    dsn = os.environ.get("DATABASE_URL")
+    if dsn:
+        return PgClient(dsn)
+    url = os.environ.get("SUPABASE_URL") or os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        raise SystemExit("❌ Error: Falta DATABASE_URL, o NEXT_PUBLIC_SUPABASE_URL + SUPABASE_SERVICE_ROLE_KEY")
+    return ExecSqlClient(url, key, pool_size=pool_size)
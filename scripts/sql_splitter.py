@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+SQL script splitter + parallel group runner
+Splits a script into statements (aware of '...', E'...', "...", comments and
+$$ / $function$ dollar quoting), classifies them into phases — tables,
+functions, indexes, policies, data — and keeps them in file order: only a run
+of consecutive statements of a parallel phase is grouped per target table.
+Groups of one run execute concurrently on a bounded pool, each group in its
+own transaction, so one bad policy no longer aborts the whole file.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import Dict, List, Optional, Set
+
+from sql_client import SqlError
+
+DOLLAR_TAG = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+IDENT_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$")
+
+# phase -> runs in parallel per table? Phases never reorder the file (a DO
+# block must still see the INSERTs above it, a CHECK the function before it):
+# they only say which consecutive statements may run side by side
+PHASES = {
+    "setup": False,      # extensions, schemas, types
+    "tables": False,     # CREATE/ALTER TABLE: serial, FKs need file order
+    "functions": False,  # functions, triggers, views, DO blocks
+    "indexes": True,
+    "policies": True,    # RLS switches, policies, grants
+    "data": True,        # INSERT/UPDATE/DELETE seeds
+}
+
+NAME = r'((?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?)'
+TARGET_PATTERNS = [
+    re.compile(r"^create\s+(?:unique\s+)?index\s+(?:concurrently\s+)?(?:if\s+not\s+exists\s+)?(?:[\w$\"]+\s+)?on\s+(?:only\s+)?" + NAME, re.I),
+    re.compile(r"^(?:create|drop|alter)\s+policy\s+(?:if\s+exists\s+)?(?:\"[^\"]+\"|[\w$]+)\s+on\s+" + NAME, re.I),
+    re.compile(r"^alter\s+table\s+(?:if\s+exists\s+)?(?:only\s+)?" + NAME, re.I),
+    re.compile(r"^(?:grant|revoke)\s+.*?\s+on\s+(?:table\s+)?" + NAME + r"\s+(?:to|from)\b", re.I | re.S),
+    re.compile(r"^insert\s+into\s+" + NAME, re.I),
+    re.compile(r"^update\s+(?:only\s+)?" + NAME, re.I),
+    re.compile(r"^delete\s+from\s+(?:only\s+)?" + NAME, re.I),
+]
+
+class Statement:
+    def __init__(self, text: str, line: int, index: int):
+        self.text = text
+        self.line = line
+        self.index = index  # position in the file, 0-based
+        self.head = " ".join(strip_comments(text).split())
+        self.phase = classify(self.head)
+        self.target = target_table(self.head)
+
+    def snippet(self, width: int = 90) -> str:
+        return self.head if len(self.head) <= width else self.head[:width - 3] + "..."
+
+def split_statements(sql: str) -> List[Statement]:
+    """Split on top-level semicolons; returns statements with their 1-based start line"""
+    statements = []
+    start = None  # offset of the first meaningful char of the current statement
+    i, n = 0, len(sql)
+    while i < n:
+        c = sql[i]
+        if c == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+            continue
+        if c == "/" and sql.startswith("/*", i):
+            i = _skip_block_comment(sql, i)
+            continue
+        if c.isspace():
+            i += 1
+            continue
+        if start is None:
+            start = i
+        if c == "'":
+            escaped = i > 0 and sql[i - 1] in "eE" and (i < 2 or sql[i - 2] not in IDENT_CHARS)
+            i = _skip_quoted(sql, i, "'", backslash=escaped)
+        elif c == '"':
+            i = _skip_quoted(sql, i, '"')
+        elif c == "$" and (i == 0 or sql[i - 1] not in IDENT_CHARS):
+            match = DOLLAR_TAG.match(sql, i)
+            if match:
+                close = sql.find(match.group(0), match.end())
+                i = n if close == -1 else close + len(match.group(0))
+            else:
+                i += 1
+        elif c == ";":
+            statements.append(Statement(sql[start:i + 1], sql.count("\n", 0, start) + 1, len(statements)))
+            start = None
+            i += 1
+        else:
+            i += 1
+    if start is not None and sql[start:].strip():
+        statements.append(Statement(sql[start:].rstrip(), sql.count("\n", 0, start) + 1, len(statements)))
+    return statements
+
+def _skip_block_comment(sql: str, i: int) -> int:
+    depth = 0
+    while i < len(sql):
+        if sql.startswith("/*", i):
+            depth += 1
+            i += 2
+        elif sql.startswith("*/", i):
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    return i
+
+def _skip_quoted(sql: str, i: int, quote: str, backslash: bool = False) -> int:
+    i += 1
+    while i < len(sql):
+        c = sql[i]
+        if backslash and c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            if sql.startswith(quote * 2, i):
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return i
+
+def strip_comments(text: str) -> str:
+    """Statement text without -- and /* */ comments (only used for classification)"""
+    text = re.sub(r"/\*.*?\*/", " ", text, flags=re.S)
+    return re.sub(r"--[^\n]*", " ", text)
+
+def classify(head: str) -> str:
+    h = head.lower()
+    if re.match(r"(create|drop)\s+(extension|schema|type)\b|create\s+(or\s+replace\s+)?type\b|alter\s+type\b", h):
+        return "setup"
+    if re.match(r"create\s+(unique\s+)?index\b|drop\s+index\b|reindex\b", h):
+        return "indexes"
+    if re.match(r"(create|drop|alter)\s+policy\b|grant\b|revoke\b", h) or \
+            re.match(r"alter\s+table\b.*\b(enable|disable|force|no\s+force)\s+row\s+level\s+security\b", h):
+        return "policies"
+    if re.match(r"(create|alter|drop)\s+(table|sequence)\b|comment\s+on\b|truncate\b", h):
+        return "tables"
+    if re.match(r"(with\b.*)?(insert|update|delete|merge)\b", h) or re.match(r"copy\b", h):
+        return "data"
+    return "functions"  # functions, triggers, views, DO blocks, anything unknown: serial
+
+def normalize_name(name: str) -> str:
+    parts = [p.strip('"') for p in name.split(".")]
+    if len(parts) == 2 and parts[0].lower() == "public":
+        parts = parts[1:]
+    return ".".join(parts).lower()
+
+def target_table(head: str) -> Optional[str]:
+    for pattern in TARGET_PATTERNS:
+        match = pattern.match(head)
+        if match:
+            return normalize_name(match.group(1))
+    return None
+
+class Group:
+    """Statements executed together in one transaction"""
+
+    def __init__(self, phase: str, key: str, statements: List[Statement]):
+        self.phase = phase
+        self.key = key
+        self.statements = statements
+        self.depends_on: List["Group"] = []
+        self.elapsed = 0.0
+        self.error: Optional[str] = None
+        self.failed_statement: Optional[Statement] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.phase}:{self.key}"
+
+def plan(statements: List[Statement], chunk_size: int = 200,
+         references: Optional[Dict[str, Set[str]]] = None) -> List[List[Group]]:
+    """
+    Execution plan as a list of waves; groups inside a wave are independent.
+    The file is cut into runs of consecutive statements of the same phase and
+    the runs keep file order. A serial run is one group; a parallel run gets
+    one group per target table (statements without one go last), and
+    pure-INSERT groups are chunked. A data group waits for the groups of
+    earlier tables it is linked to by a foreign key (`references`: table ->
+    referenced tables, see schema_model.foreign_keys) or that it mentions;
+    chunks of a self-referencing table run one after another.
+    """
+    references = references or {}
+    waves = []
+    for phase, run in groupby(statements, key=lambda s: s.phase):
+        members = list(run)
+        if not PHASES[phase]:
+            waves.append([Group(phase, "serial", members)])
+            continue
+
+        by_table: Dict[str, List[Statement]] = {}
+        for statement in members:
+            by_table.setdefault(statement.target or "misc", []).append(statement)
+
+        groups = []
+        table_groups: Dict[str, List[Group]] = {}
+        for table, items in by_table.items():
+            insert_only = phase == "data" and all(s.head.lower().startswith("insert") for s in items)
+            size = chunk_size if insert_only else len(items)
+            chunks = [items[i:i + size] for i in range(0, len(items), size)]
+            for n, chunk in enumerate(chunks, 1):
+                key = table if len(chunks) == 1 else f"{table}#{n}"
+                group = Group(phase, key, chunk)
+                groups.append(group)
+                table_groups.setdefault(table, []).append(group)
+
+        if phase == "data":
+            first_seen = {table: items[0].index for table, items in by_table.items()}
+            for group in groups:
+                table = group.key.split("#")[0]
+                text = " ".join(s.head.lower() for s in group.statements)
+                for other, other_groups in table_groups.items():
+                    if other in (table, "misc") or first_seen[other] >= first_seen[table]:
+                        continue
+                    # A literal UUID does not name its parent: the FK graph does
+                    linked = other in references.get(table, ()) or table in references.get(other, ())
+                    if linked or re.search(r"\b" + re.escape(other.split(".")[-1]) + r"\b", text):
+                        group.depends_on.extend(other_groups)
+            for table, chunks in table_groups.items():
+                if table in references.get(table, ()):
+                    for previous, chunk in zip(chunks, chunks[1:]):
+                        chunk.depends_on.append(previous)
+        # Statements without a single target table (GRANT ... ON ALL TABLES IN
+        # SCHEMA, ON SCHEMA...) touch every table's catalog row and would race
+        # the per-table groups ("tuple concurrently updated"): run them last
+        for group in table_groups.get("misc", []):
+            group.depends_on.extend(g for g in groups if g.key.split("#")[0] != "misc")
+        waves.extend(_waves(groups))
+    return waves
+
+def _waves(groups: List[Group]) -> List[List[Group]]:
+    level: Dict[int, int] = {}
+
+    def depth(group: Group) -> int:
+        if id(group) not in level:
+            level[id(group)] = 1 + max((depth(d) for d in group.depends_on), default=-1)
+        return level[id(group)]
+
+    waves: List[List[Group]] = []
+    for group in groups:
+        d = depth(group)
+        while len(waves) <= d:
+            waves.append([])
+        waves[d].append(group)
+    return waves
+
+def _unique_tag(text: str, hint: str) -> str:
+    tag, k = f"${hint}$", 0
+    while tag in text:
+        k += 1
+        tag = f"${hint}_{k}$"
+    return tag
+
+def group_sql(group: Group) -> str:
+    """
+    One DO block that EXECUTEs each statement and tags a failure with its
+    position, so the error names the statement while the group stays atomic
+    """
+    if len(group.statements) == 1:
+        return group.statements[0].text
+    lines = []
+    for n, statement in enumerate(group.statements, 1):
+        body = statement.text.rstrip().rstrip(";")
+        tag = _unique_tag(body, f"s{n}")
+        lines.append(f"  n := {n}; EXECUTE {tag}{body}{tag};")
+    block = "\n".join(lines)
+    outer = _unique_tag(block, "split")
+    return (f"DO {outer}\nDECLARE n int := 0;\nBEGIN\n{block}\nEXCEPTION WHEN OTHERS THEN\n"
+            f"  RAISE EXCEPTION 'stmt %: %', n, SQLERRM USING ERRCODE = SQLSTATE;\nEND\n{outer};")
+
+def run_group(client, group: Group) -> Group:
+    start = time.perf_counter()
+    try:
+        client.execute(group_sql(group))
+    except SqlError as e:
+        message = str(e)
+        match = re.search(r"stmt (\d+): (.*)", message, re.S)
+        if match and len(group.statements) > 1:
+            group.failed_statement = group.statements[int(match.group(1)) - 1]
+            message = match.group(2).strip()
+        elif len(group.statements) == 1:
+            group.failed_statement = group.statements[0]
+        group.error = message
+    group.elapsed = time.perf_counter() - start
+    return group
+
+def run_plan(client, waves: List[List[Group]], workers: int = 4, source: str = "") -> bool:
+    """Run wave by wave; stop after the first wave with a failure (later waves may depend on it)"""
+    ok = True
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for number, wave in enumerate(waves, 1):
+            wave_start = time.perf_counter()
+            for group in pool.map(lambda g: run_group(client, g), wave):
+                status = "✅" if not group.error else "❌"
+                print(f"{status} [{number}] {group.label:<40} {len(group.statements):>5} sentencias "
+                      f"{group.elapsed * 1000:>9.0f} ms")
+                if group.error:
+                    ok = False
+                    where = f"{source}:{group.failed_statement.line}" if group.failed_statement else source
+                    if group.failed_statement:
+                        print(f"   ↳ {where}  {group.failed_statement.snippet()}")
+                    print(f"   ↳ {group.error}")
+            if len(wave) > 1:
+                print(f"   ⏱️ ola {number}: {len(wave)} grupos en paralelo, "
+                      f"{(time.perf_counter() - wave_start) * 1000:.0f} ms")
+            if not ok:
+                print("💡 Se detiene aquí: las fases siguientes pueden depender de esta")
+                break
+    return ok
+
+def print_plan(waves: List[List[Group]], source: str = ""):
+    for number, wave in enumerate(waves, 1):
+        for group in wave:
+            first = group.statements[0]
+            print(f"[{number}] {group.label:<40} {len(group.statements):>5} sentencias  desde {source}:{first.line}")
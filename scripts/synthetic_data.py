@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Synthetic gym dataset for scale testing
+Generates referentially consistent members, trainers and their history
+(auth.users, profiles, trainer_members, daily_activity, workout_set_logs,
+feed_posts/likes/comments, progress_records) at a chosen scale factor and
+bulk-loads it into a local Postgres with COPY.
+
+Everything is derived from (seed, table, person index), so rows are
+generated as a stream, one shard of people per worker process, and loaded in
+fixed-size chunks: memory stays flat whether it is 100k or 50M rows, and a
+second run with the same seed produces the same ids. Column lists and load
+order are checked against the schema folded from the migrations
+(scripts/schema_model.py) before anything is written. Synthetic accounts use
+the @synthetic.local domain, so --reset removes them (and, by cascade, all
+their rows) without touching real data.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from itertools import islice
+from typing import Any, Iterator, List, Optional, Tuple
+
+import schema_model
+
+SYNTHETIC_DOMAIN = "synthetic.local"
+NAMESPACE = uuid.UUID("6f1c1d2e-5a0b-4c4e-9a57-51a7be7d0a7a")
+MEMBERS_PER_SCALE = 1000
+MEMBERS_PER_TRAINER = 50
+DEFAULT_DAYS = 180
+DEFAULT_CHUNK = 50_000
+DEFAULT_WORKERS = 4
+
+NAMES_MALE = ["Said", "Javier", "Carlos", "Alejandro", "Daniel", "Pablo", "Sergio", "Adrián", "David", "Hugo",
+              "Álvaro", "Diego", "Mario", "Iván", "Rubén", "Marcos", "Raúl", "Óscar", "Jorge", "Víctor"]
+NAMES_FEMALE = ["María", "Lucía", "Laura", "Paula", "Marta", "Sara", "Carmen", "Ana", "Elena", "Irene",
+                "Claudia", "Andrea", "Nerea", "Alba", "Cristina", "Sofía", "Julia", "Noelia", "Rocío", "Inés"]
+SURNAMES = ["García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez", "Gómez",
+            "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero", "Navarro",
+            "Torres", "Domínguez", "Vázquez", "Ramos", "Gil", "Serrano", "Molina", "Castro", "Ortega", "Rubio"]
+
+# Training split -> (exercise, starting load in kg for an average member)
+SPLITS = {
+    "Torso": [("Press banca con barra", 60), ("Remo con barra", 55), ("Press militar con mancuernas", 18),
+              ("Jalón al pecho", 50), ("Curl bíceps con barra", 25), ("Extensión de tríceps en polea", 22)],
+    "Pierna": [("Sentadilla con barra", 80), ("Hack squat", 90), ("Peso muerto rumano", 70),
+               ("Prensa de piernas", 140), ("Curl femoral tumbado", 35), ("Elevación de gemelos", 60)],
+    "Empuje": [("Press inclinado con mancuernas", 24), ("Fondos en paralelas", 0), ("Aperturas en polea", 15),
+               ("Elevaciones laterales", 9), ("Press francés", 20)],
+    "Tirón": [("Dominadas", 0), ("Remo en polea baja", 55), ("Face pull", 20), ("Curl martillo", 14),
+              ("Pullover en polea", 25)],
+}
+
+POST_TEXTS = ["¡Nuevo PR en {exercise}! 💪", "Semana {week} completada sin faltar ni un día",
+              "Hoy tocaba {split}, piernas temblando 😅", "{steps} pasos hoy, objetivo cumplido ✅",
+              "Primera vez que llego a {weight} kg en {exercise}", "Constancia > motivación. Día {day}.",
+              "¿Alguien para entrenar {split} mañana temprano?", "Foto de progreso: -{kg} kg desde que empecé"]
+COMMENT_TEXTS = ["¡Enhorabuena! 🔥", "Brutal 💪", "Qué máquina", "¡A por más!", "Así se hace",
+                 "Yo me apunto", "Tremendo progreso", "👏👏👏", "Eso es constancia", "¿Qué rutina sigues?"]
+MOODS = ["muy bien", "bien", "normal", "cansado", "mal"]
+LEVELS = ["bajo", "medio", "alto"]
+
+class Config:
+    """Scale and time window; person indexes are 0 = admin, 1..trainers, then members"""
+
+    def __init__(self, scale: float, seed: int, days: int, until: date):
+        self.scale = scale
+        self.seed = seed
+        self.days = days
+        self.until = until
+        self.members = max(1, int(round(MEMBERS_PER_SCALE * scale)))
+        self.trainers = max(1, math.ceil(self.members / MEMBERS_PER_TRAINER))
+        self.people = 1 + self.trainers + self.members
+        self.first_member = 1 + self.trainers
+
+    def rng(self, kind: str, key: Any) -> random.Random:
+        """Independent, reproducible stream per (table, person/post)"""
+        return random.Random(f"{self.seed}:{kind}:{key}")
+
+    def person_id(self, index: int) -> str:
+        return str(uuid.uuid5(NAMESPACE, f"{self.seed}:person:{index}"))
+
+    def post_id(self, author: int, k: int) -> str:
+        return str(uuid.uuid5(NAMESPACE, f"{self.seed}:post:{author}:{k}"))
+
+class Person:
+    """Everything about one synthetic account that more than one table needs"""
+
+    def __init__(self, config: Config, index: int):
+        rng = config.rng("person", index)
+        self.index = index
+        self.id = config.person_id(index)
+        self.role = "admin" if index == 0 else "trainer" if index < config.first_member else "member"
+        self.sex = "male" if rng.random() < 0.55 else "female"
+        first = rng.choice(NAMES_MALE if self.sex == "male" else NAMES_FEMALE)
+        last = rng.choice(SURNAMES)
+        self.name = f"{first} {last}"
+        slug = f"{first}.{last}".lower().translate(str.maketrans("áéíóúñ", "aeioun"))
+        self.email = f"{slug}.{index}@{SYNTHETIC_DOMAIN}"
+        # Members joined at any point of the last ~1.5 windows; staff before all of them
+        joined = rng.randint(7, int(config.days * 1.5)) if self.role == "member" else config.days * 2
+        self.joined = config.until - timedelta(days=joined)
+        self.height = rng.gauss(177 if self.sex == "male" else 164, 7)
+        self.weight = rng.gauss(82 if self.sex == "male" else 65, 11)
+        self.birth_date = config.until - timedelta(days=int(rng.uniform(18, 62) * 365.25))
+        self.premium = rng.random() < 0.2
+        self.steps_goal = rng.choice([6000, 8000, 8000, 10000, 12000])
+        # Behaviour: most members log a bit, a few log everything
+        self.adherence = min(0.98, rng.betavariate(2.5, 1.5))
+        self.base_steps = rng.lognormvariate(math.log(7000), 0.35)
+        self.trains = self.role == "member" and rng.random() < 0.8
+        self.sessions_per_week = rng.choice([2, 3, 3, 4, 4, 5])
+        self.split = rng.choice([["Torso", "Pierna"], ["Empuje", "Tirón", "Pierna"],
+                                 ["Torso", "Pierna", "Empuje", "Tirón"]])
+        self.strength = rng.uniform(0.6, 1.4) * (1.0 if self.sex == "male" else 0.65)
+        self.posts_per_week = (rng.expovariate(1 / 0.4) if rng.random() < 0.35 else 0.0) \
+            if self.role == "member" else 2.0
+        self.tracks_progress = self.role == "member" and rng.random() < 0.5
+        self.weekly_weight_change = rng.choice([-0.5, -0.3, -0.1, 0.0, 0.15, 0.25])
+
+    def window(self, config: Config) -> Iterator[date]:
+        """Days with history: from joining (or the window start) until `until`"""
+        day = max(self.joined, config.until - timedelta(days=config.days))
+        while day <= config.until:
+            yield day
+            day += timedelta(days=1)
+
+def stamp(day: date, rng: random.Random, start_hour: int = 7, end_hour: int = 22) -> datetime:
+    seconds = rng.randint(start_hour * 3600, end_hour * 3600 - 1)
+    return datetime.combine(day, dtime(), tzinfo=timezone.utc) + timedelta(seconds=seconds)
+
+# ---------------------------------------------------------------------------
+# Row generators: (config, first person, last person + 1) -> tuples in column order
+# ---------------------------------------------------------------------------
+
+def gen_users(config: Config, lo: int, hi: int):
+    for i in range(lo, hi):
+        p = Person(config, i)
+        meta = {"full_name": p.name, "role": p.role, "sex": p.sex, "synthetic": True}
+        yield p.id, p.email, json.dumps(meta, ensure_ascii=False), stamp(p.joined, config.rng("joined", i))
+
+def gen_profiles(config: Config, lo: int, hi: int):
+    for i in range(lo, hi):
+        p = Person(config, i)
+        yield (p.id, p.name, p.email, p.role, p.premium, p.sex, round(p.weight, 2), round(p.height, 2),
+               p.birth_date, p.steps_goal, stamp(p.joined, config.rng("joined", i)))
+
+def gen_trainer_members(config: Config, lo: int, hi: int):
+    # Zipf-like: a few trainers carry most of the members, like real gyms
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(config.trainers)]
+    for i in range(max(lo, config.first_member), hi):
+        p = Person(config, i)
+        rng = config.rng("trainer", i)
+        trainer = 1 + rng.choices(range(config.trainers), weights)[0]
+        yield config.person_id(trainer), p.id, stamp(p.joined, rng)
+
+def gen_daily_activity(config: Config, lo: int, hi: int):
+    for i in range(max(lo, config.first_member), hi):
+        p = Person(config, i)
+        rng = config.rng("activity", i)
+        for day in p.window(config):
+            if rng.random() > p.adherence:
+                continue
+            weekend = 0.8 if day.weekday() >= 5 else 1.0
+            steps = max(300, int(rng.gauss(p.base_steps * weekend, p.base_steps * 0.25)))
+            created = stamp(day, rng, 20, 24)
+            yield (p.id, day, steps, round(steps * 0.00075, 3), int(steps * 0.04), created, created)
+
+def gen_workout_set_logs(config: Config, lo: int, hi: int):
+    for i in range(max(lo, config.first_member), hi):
+        p = Person(config, i)
+        if not p.trains:
+            continue
+        rng = config.rng("sets", i)
+        session = 0
+        for n, day in enumerate(p.window(config)):
+            if rng.random() > p.sessions_per_week / 7 * p.adherence:
+                continue
+            split = p.split[session % len(p.split)]
+            session += 1
+            progress = 1 + 0.004 * (n // 7)  # slow linear overload over the weeks
+            created = stamp(day, rng)
+            for exercise, load in rng.sample(SPLITS[split], rng.randint(4, min(6, len(SPLITS[split])))):
+                weight = round(load * p.strength * progress / 2.5) * 2.5 if load else None
+                for set_number in range(1, rng.randint(3, 4) + 1):
+                    reps = rng.randint(6, 12) if load else rng.randint(5, 15)
+                    yield p.id, exercise, day, set_number, weight, reps, created
+
+def posts_of(config: Config, p: Person) -> List[Tuple[str, datetime, bool, str]]:
+    """(post id, created_at, is_hidden, content) — shared by posts, likes and comments"""
+    if not p.posts_per_week:
+        return []
+    rng = config.rng("posts", p.index)
+    posts = []
+    for n, day in enumerate(p.window(config)):
+        if rng.random() < p.posts_per_week / 7:
+            exercise = rng.choice(SPLITS[rng.choice(p.split)])[0]
+            content = rng.choice(POST_TEXTS).format(
+                exercise=exercise, split=rng.choice(p.split), week=n // 7 + 1, day=n + 1,
+                steps=int(p.base_steps * 1.5), weight=int(60 * p.strength), kg=rng.randint(1, 9))
+            posts.append((config.post_id(p.index, len(posts)), stamp(day, rng), rng.random() < 0.01, content))
+    return posts
+
+def gen_feed_posts(config: Config, lo: int, hi: int):
+    for i in range(lo, hi):
+        p = Person(config, i)
+        for post_id, created, hidden, content in posts_of(config, p):
+            yield post_id, p.id, content, hidden, created
+
+def gen_feed_likes(config: Config, lo: int, hi: int):
+    for i in range(lo, hi):
+        for post_id, created, _, _ in posts_of(config, Person(config, i)):
+            rng = config.rng("likes", post_id)
+            # Heavy-tailed popularity: most posts get a handful, a few go "viral"
+            count = min(config.members, int(rng.paretovariate(1.6) * 3) - 1)
+            for liker in rng.sample(range(config.first_member, config.people), max(0, count)):
+                yield post_id, config.person_id(liker), min(created + timedelta(minutes=rng.expovariate(1 / 240)),
+                                                            datetime.combine(config.until, dtime.max, tzinfo=timezone.utc))
+
+def gen_feed_comments(config: Config, lo: int, hi: int):
+    for i in range(lo, hi):
+        for post_id, created, _, _ in posts_of(config, Person(config, i)):
+            rng = config.rng("comments", post_id)
+            count = 0
+            while rng.random() < 0.45 and count < 30:  # geometric, mean ~0.8
+                count += 1
+            for _ in range(count):
+                commenter = rng.randrange(config.first_member, config.people)
+                yield (post_id, config.person_id(commenter), rng.choice(COMMENT_TEXTS),
+                       created + timedelta(minutes=rng.expovariate(1 / 180)))
+
+def gen_progress_records(config: Config, lo: int, hi: int):
+    for i in range(max(lo, config.first_member), hi):
+        p = Person(config, i)
+        if not p.tracks_progress:
+            continue
+        rng = config.rng("progress", i)
+        weight = p.weight
+        waist = p.weight * (1.0 if p.sex == "male" else 1.1) + rng.uniform(-6, 6)
+        days = list(p.window(config))
+        k = 0
+        while k < len(days):
+            day = days[k]
+            yield (p.id, day, round(weight, 2), round(waist, 2), round(p.weight * 0.38 + rng.uniform(-2, 2), 2),
+                   rng.random() < p.adherence, rng.random() < p.adherence, rng.choice(MOODS),
+                   rng.choice(LEVELS), rng.choice(LEVELS), stamp(day, rng))
+            step = rng.randint(7, 14)
+            weight += p.weekly_weight_change * step / 7 + rng.gauss(0, 0.3)
+            waist += p.weekly_weight_change * step / 7 * 0.8 + rng.gauss(0, 0.3)
+            k += step
+
+# table -> (columns, generator, conflict key for an upsert load or None for plain COPY)
+TABLES = {
+    "auth.users": (["id", "email", "raw_user_meta_data", "created_at"], gen_users, None),
+    # handle_new_user() may already have created the profile from auth.users: upsert it
+    "profiles": (["id", "name", "email", "role", "has_premium", "sex", "weight_kg", "height_cm", "birth_date",
+                  "steps_goal", "created_at"], gen_profiles, ["id"]),
+    "trainer_members": (["trainer_id", "member_id", "assigned_at"], gen_trainer_members, None),
+    "daily_activity": (["member_id", "activity_date", "steps", "distance_km", "calories_kcal", "created_at",
+                        "updated_at"], gen_daily_activity, None),
+    "workout_set_logs": (["member_id", "exercise_name", "performed_on", "set_number", "weight_kg", "reps",
+                          "created_at"], gen_workout_set_logs, None),
+    "feed_posts": (["id", "author_id", "content", "is_hidden", "created_at"], gen_feed_posts, None),
+    "feed_likes": (["post_id", "user_id", "created_at"], gen_feed_likes, None),
+    "feed_comments": (["post_id", "commenter_id", "content", "created_at"], gen_feed_comments, None),
+    "progress_records": (["member_id", "date", "weight_kg", "waist_cm", "arms_cm", "diet_adherence",
+                          "activity_adherence", "mood", "stress_level", "sleep_quality", "created_at"],
+                         gen_progress_records, None),
+}
+
+# ---------------------------------------------------------------------------
+# Schema checks
+# ---------------------------------------------------------------------------
+
+def check_schema(model: schema_model.SchemaModel, tables: List[str]) -> List[str]:
+    """Generated columns must exist; NOT NULL columns without a default must be generated"""
+    problems = []
+    for table in tables:
+        if table.startswith("auth."):
+            continue  # managed by Supabase, not by our migrations
+        definition = model.tables.get(table)
+        if definition is None:
+            problems.append(f"{table}: la tabla no existe en las migraciones")
+            continue
+        columns = TABLES[table][0]
+        for column in columns:
+            if column not in definition["columns"]:
+                problems.append(f"{table}.{column}: la columna no existe en las migraciones")
+        for name, column in definition["columns"].items():
+            required = (column["not_null"] or column["primary_key"]) and column["default"] is None
+            if required and name not in columns:
+                problems.append(f"{table}.{name}: NOT NULL sin default y el generador no la rellena")
+    return problems
+
+def load_order(model: schema_model.SchemaModel, tables: List[str]) -> List[str]:
+    """`tables` plus the generated tables they reference, parents first"""
+    def parents(table: str) -> List[str]:
+        if table == "profiles":
+            return ["auth.users"]
+        constraints = (model.tables.get(table) or {}).get("constraints", {}).values()
+        targets = [schema_model.normalize_name(c.split("REFERENCES", 1)[1].split("(")[0].strip())
+                   for c in constraints if "REFERENCES" in c]
+        return [t for t in targets if t in TABLES and t != table]
+
+    ordered: List[str] = []
+    visiting = set()
+
+    def visit(table: str):
+        if table in ordered or table in visiting:
+            return
+        visiting.add(table)
+        for parent in parents(table):
+            visit(parent)
+        ordered.append(table)
+
+    for table in tables:
+        visit(table)
+    return ordered
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def shards(config: Config, workers: int) -> List[Tuple[int, int]]:
+    """Person index ranges, several per worker so the slow shards do not serialize the end"""
+    size = max(1, math.ceil(config.people / (workers * 4)))
+    return [(lo, min(lo + size, config.people)) for lo in range(0, config.people, size)]
+
+def _qualified(table: str) -> str:
+    return table if "." in table else f"public.{table}"
+
+def load_shard(dsn: Optional[str], config: Config, table: str, lo: int, hi: int, chunk: int) -> int:
+    """Generate and COPY one shard of `table`, committing every `chunk` rows; returns the row count"""
+    columns, generator, conflict = TABLES[table]
+    rows = generator(config, lo, hi)
+    if dsn is None:  # --dry-run: generation only
+        return sum(1 for _ in rows)
+
+    import psycopg  # only needed to load
+
+    cols = ", ".join(columns)
+    total = 0
+    with psycopg.connect(dsn) as conn:
+        conn.execute("SET synchronous_commit = off")
+        try:
+            # The rows are consistent by construction: skip the per-row FK
+            # trigger checks like pg_restore does (superuser only, i.e. local)
+            conn.execute("SET session_replication_role = replica")
+        except psycopg.errors.InsufficientPrivilege:
+            pass
+        conn.commit()
+        while True:
+            batch = list(islice(rows, chunk))
+            if not batch:
+                break
+            with conn.cursor() as cursor:
+                target = _qualified(table)
+                if conflict:
+                    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS _synthetic_stage "
+                                   f"(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+                    target = "_synthetic_stage"
+                with cursor.copy(f"COPY {target} ({cols}) FROM STDIN") as copy:
+                    for row in batch:
+                        copy.write_row(row)
+                if conflict:
+                    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in conflict)
+                    cursor.execute(f"INSERT INTO {_qualified(table)} ({cols}) SELECT {cols} FROM _synthetic_stage "
+                                   f"ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET {updates}")
+            conn.commit()
+            total += len(batch)
+    return total
+
+def existing_synthetic(dsn: str) -> int:
+    import psycopg
+
+    with psycopg.connect(dsn) as conn:
+        if conn.execute("SELECT to_regclass('auth.users')").fetchone()[0] is None:
+            raise SystemExit("❌ La base no tiene auth.users: usa la Postgres local de `supabase start`")
+        return conn.execute("SELECT count(*) FROM auth.users WHERE email LIKE %s",
+                            (f"%@{SYNTHETIC_DOMAIN}",)).fetchone()[0]
+
+def reset(dsn: str) -> int:
+    """Delete every synthetic account; the FKs cascade to profiles and all their rows"""
+    import psycopg
+
+    with psycopg.connect(dsn) as conn:
+        conn.execute("DELETE FROM public.profiles WHERE email LIKE %s", (f"%@{SYNTHETIC_DOMAIN}",))
+        deleted = conn.execute("DELETE FROM auth.users WHERE email LIKE %s", (f"%@{SYNTHETIC_DOMAIN}",)).rowcount
+        conn.commit()
+    return deleted
+
+def analyze(dsn: str, tables: List[str]):
+    """Fresh statistics, or the first EXPLAINs at the new scale plan against an empty table"""
+    import psycopg
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for table in tables:
+            conn.execute(f"ANALYZE {_qualified(table)}")
+
+def is_local(dsn: str) -> bool:
+    host = dsn.split("@")[-1].split("/")[0].split(":")[0] if "@" in dsn else ""
+    return "host=/" in dsn or host in ("", "localhost", "127.0.0.1", "::1", "db", "postgres")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dataset sintético de gimnasio para pruebas de escala")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"factor de escala: {MEMBERS_PER_SCALE} socios por unidad (por defecto 1)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="días de historial (por defecto 180)")
+    parser.add_argument("--until", type=date.fromisoformat, default=date.today(),
+                        help="último día con datos, AAAA-MM-DD (por defecto hoy)")
+    parser.add_argument("--seed", type=int, default=1, help="semilla: misma semilla, mismos datos e ids")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES),
+                        help="solo estas tablas y las que referencian (por defecto todas, en orden de claves foráneas)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="procesos generando/cargando en paralelo")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="filas por COPY/commit")
+    parser.add_argument("--reset", action="store_true", help="borra antes los datos sintéticos existentes")
+    parser.add_argument("--dry-run", action="store_true", help="solo genera y cuenta filas, sin base de datos")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permite un DATABASE_URL que no es local (nunca contra producción)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = Config(args.scale, args.seed, args.days, args.until)
+    model = schema_model.build_model()
+    tables = load_order(model, args.tables or list(TABLES))
+
+    problems = check_schema(model, tables)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        print("💥 El generador no cuadra con el esquema de supabase/migrations: actualiza TABLES")
+        sys.exit(1)
+
+    dsn = None
+    if not args.dry_run:
+        dsn = os.environ.get("DATABASE_URL")
+        if not dsn:
+            raise SystemExit("❌ Error: Falta DATABASE_URL (Postgres local, p. ej. la de `supabase start`)")
+        if not is_local(dsn) and not args.allow_remote:
+            raise SystemExit("❌ DATABASE_URL no apunta a una base local; usa --allow-remote si es de pruebas")
+        if args.reset:
+            print(f"🧹 Borradas {reset(dsn)} cuentas sintéticas (y sus filas en cascada)")
+        elif existing_synthetic(dsn):
+            raise SystemExit("❌ Ya hay datos sintéticos en la base: relanza con --reset para regenerarlos")
+
+    print(f"🏋️ Escala {args.scale}: {config.members} socios, {config.trainers} entrenadores, "
+          f"{args.days} días hasta {args.until} (semilla {args.seed}) → {dsn.split('@')[-1] if dsn else 'dry-run'}")
+    start = time.perf_counter()
+    grand_total = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for table in tables:
+            table_start = time.perf_counter()
+            futures = [pool.submit(load_shard, dsn, config, table, lo, hi, args.chunk)
+                       for lo, hi in shards(config, max(1, args.workers))]
+            try:
+                rows = sum(f.result() for f in futures)
+            except Exception as e:
+                print(f"❌ {table}: {str(e).strip().splitlines()[0]}")
+                sys.exit(1)
+            elapsed = time.perf_counter() - table_start
+            grand_total += rows
+            print(f"✅ {table:<20} {rows:>11,} filas  {elapsed:>7.1f} s  {rows / elapsed if elapsed else 0:>9,.0f} filas/s")
+
+    if dsn:
+        analyze(dsn, tables)
+    elapsed = time.perf_counter() - start
+    print(f"\n📊 Total: {grand_total:,} filas en {elapsed:.1f}s ({grand_total / elapsed if elapsed else 0:,.0f} filas/s)")
@@ -4,55 +4,28 @@ Focused Test for NEW Admin Assistant Tools Only
 Testing: list_members, list_workouts, get_member_activity
 """
 
-import requests
-import json
-import time
+import os
 import sys
 
+from assistant_client import api_request
+from cassette import cassette_from_env
+from rate_limiter import scheduler_from_env
+
 # Configuration
-BASE_URL = "https://fitness-clubhouse.preview.emergentagent.com"
+# ASSISTANT_BASE_URL=http://127.0.0.1:8787 points the suite at scripts/assistant_stub_server.py
+BASE_URL = os.environ.get("ASSISTANT_BASE_URL", "https://fitness-clubhouse.preview.emergentagent.com").rstrip("/")
 API_ENDPOINT = f"{BASE_URL}/api/admin-assistant"
 TIMEOUT = 60
 
+# Fires immediately; 429/503 are retried with Retry-After / jittered backoff
+SCHEDULER = scheduler_from_env()
+
+# ASSISTANT_CASSETTE=record|replay|refresh replays stored responses instead of paying LLM latency
+CASSETTE = cassette_from_env()
+
 def make_api_request(message: str, timeout: int = TIMEOUT):
     """Make a request to the Admin Assistant API"""
-    payload = {
-        "messages": [
-            {
-                "role": "user", 
-                "content": message
-            }
-        ]
-    }
-    
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    print(f"🔄 Sending request: {message}")
-    
-    try:
-        response = requests.post(
-            API_ENDPOINT, 
-            json=payload, 
-            headers=headers, 
-            timeout=timeout
-        )
-        
-        print(f"📊 Status Code: {response.status_code}")
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"❌ Error Response: {response.text}")
-            return {"error": f"HTTP {response.status_code}: {response.text}"}
-            
-    except requests.exceptions.Timeout:
-        print(f"⏰ Request timed out after {timeout} seconds")
-        return {"error": "Request timeout"}
-    except requests.exceptions.RequestException as e:
-        print(f"🚫 Request failed: {str(e)}")
-        return {"error": str(e)}
+    return api_request(API_ENDPOINT, message, timeout, SCHEDULER, CASSETTE)
 
 def test_new_tools():
     """Test only the NEW Admin Assistant tools"""
@@ -87,11 +60,6 @@ def test_new_tools():
         print(f"🧪 TEST {i}: {test['name'].upper()}")
         print(f"{'='*60}")
         
-        # Wait between requests to avoid rate limits
-        if i > 1:
-            print("⏳ Waiting 45 seconds to avoid rate limits...")
-            time.sleep(45)
-        
         response = make_api_request(test["message"])
         
         success = False
@@ -192,6 +160,9 @@ def test_new_tools():
         print(f"  {status} - {result['name']}")
         print(f"    📝 {result['details']}")
     
+    if CASSETTE.enabled:
+        print(f"\n{CASSETTE.report()}")
+    
     # Determine overall status
     if working_tools == total_tools:
         print(f"\n🎉 ALL NEW TOOLS ARE WORKING PERFECTLY!")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Per-tool latency benchmark for the Admin Assistant tools
+Used by `backend_test.py tools`: calls each tool through the test-only
+/api/admin-assistant/tools entry point (ENABLE_TOOL_BENCH on the server), so
+the numbers are the tool's own database/API cost without Claude in front of it.
+Arguments are synthesized from each tool's JSON schema, with real ids taken
+from list_members/list_trainers/list_workouts/list_recent_posts.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from assistant_bench import percentile
+from assistant_client import make_async_client, parse_server_timing
+
+# *_id parameter -> (listing tool, key of the list in its result)
+FIXTURE_SOURCES = {
+    "member_id": ("list_members", "members"),
+    "trainer_id": ("list_trainers", "trainers"),
+    "workout_id": ("list_workouts", "workouts"),
+    "post_id": ("list_recent_posts", "posts"),
+}
+
+# Small routine for the routine-editing tools (they work on the draft, not the DB)
+SAMPLE_ROUTINE = {
+    "routine_name": "Rutina benchmark",
+    "days": [{"day_number": 1, "day_name": "Torso", "exercises": [
+        {"exercise_name": "Press banca con barra", "sets": 4, "reps": "8-10", "rest_seconds": 90},
+        {"exercise_name": "Remo con barra", "sets": 4, "reps": "8-10", "rest_seconds": 90},
+    ]}],
+}
+
+# Parameter name -> value, for the ones a generic per-type default would make meaningless
+SAMPLE_VALUES: Dict[str, Any] = {
+    "query": "sentadilla",
+    "muscle_group": "pierna",
+    "routine_data": SAMPLE_ROUTINE,
+    "day_index": 1,
+    "exercise_name": "Press banca con barra",
+    "exercise_name_to_replace": "Press banca con barra",
+    "new_exercise_name": "Press inclinado con mancuernas",
+    "days": 7,
+    "limit": 20,
+    "food_name": "benchmark",
+    "note": "nota de benchmark",
+    "note_text": "benchmark",
+    "title": "Aviso de benchmark",
+    "message": "Mensaje de benchmark",
+    "prompt": "Dieta de prueba",
+    "correction": "Menos carbohidratos",
+    "current_diet_content": "# Dieta de prueba",
+    "calories": 2200, "protein_g": 170, "carbs_g": 230, "fat_g": 70,
+}
+
+class ToolSample:
+    """One call: client wall time, the route's `tool` Server-Timing and the response size"""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.outcome = "ok"
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.client = 0.0
+        self.server: Optional[float] = None
+        self.size = 0
+
+async def fetch_catalog(client: httpx.AsyncClient, endpoint: str) -> Dict[str, Any]:
+    """GET the tool catalog; 404 means the server was deployed without ENABLE_TOOL_BENCH"""
+    try:
+        response = await client.get(endpoint)
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Cannot reach {endpoint}: {e}") from e
+    if response.status_code == 404:
+        raise RuntimeError("Tool bench disabled on the server (set ENABLE_TOOL_BENCH=1 and redeploy)")
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response.json()
+
+async def call_tool(client: httpx.AsyncClient, endpoint: str, tool: str, args: Dict[str, Any]) -> ToolSample:
+    sample = ToolSample(tool)
+    start = time.perf_counter()
+    try:
+        response = await client.post(endpoint, json={"tool": tool, "args": args})
+    except httpx.TimeoutException:
+        sample.outcome, sample.error = "timeout", "Request timeout"
+        sample.client = time.perf_counter() - start
+        return sample
+    except httpx.HTTPError as e:
+        sample.outcome, sample.error = "connection", str(e)
+        sample.client = time.perf_counter() - start
+        return sample
+    sample.client = time.perf_counter() - start
+    sample.status = response.status_code
+    sample.size = len(response.content)
+    sample.server = parse_server_timing(response.headers.get("server-timing")).get("tool")
+    try:
+        body = response.json()
+    except ValueError:
+        body = {"error": response.text[:200]}
+    result = body.get("result")
+    if response.status_code != 200:
+        sample.outcome, sample.error = f"HTTP {response.status_code}", body.get("error")
+    elif isinstance(result, dict) and result.get("success") is False:
+        # The executor answered but failed (missing row, bad args): not a latency we want to compare
+        sample.outcome, sample.error = "tool error", result.get("error")
+    return sample
+
+async def discover_fixtures(client: httpx.AsyncClient, endpoint: str, names: List[str]) -> Dict[str, Any]:
+    """First row of each listing tool the catalog has -> {"member_id": ..., "member_name": ...}"""
+    fixtures: Dict[str, Any] = {}
+    for param, (tool, key) in FIXTURE_SOURCES.items():
+        if tool not in names:
+            continue
+        response = await client.post(endpoint, json={"tool": tool, "args": {}})
+        rows = (response.json().get("result") or {}).get(key) if response.status_code == 200 else None
+        if rows:
+            fixtures[param] = rows[0].get("id")
+            if param == "member_id":
+                fixtures["member_name"] = rows[0].get("name")
+    return fixtures
+
+def synthetic_args(parameters: Dict[str, Any], fixtures: Dict[str, Any],
+                   override: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Required arguments from the JSON schema (ids from the fixtures, enums -> first
+    value, then SAMPLE_VALUES, then a per-type default), merged with `override`.
+    None when an id is required and no fixture exists for it.
+    """
+    properties = parameters.get("properties") or {}
+    args: Dict[str, Any] = {}
+    for name in parameters.get("required") or []:
+        spec = properties.get(name) or {}
+        if name.endswith("_id"):
+            if name not in fixtures:
+                return None
+            args[name] = fixtures[name]
+        elif name == "search":
+            args[name] = fixtures.get("member_name") or "a"
+        elif spec.get("enum"):
+            args[name] = spec["enum"][0]
+        elif name in SAMPLE_VALUES:
+            args[name] = SAMPLE_VALUES[name]
+        else:
+            args[name] = {"string": "benchmark", "integer": 1, "number": 1, "boolean": False,
+                          "array": [], "object": {}}.get(spec.get("type"), "benchmark")
+    args.update(override or {})
+    return args
+
+def select_tools(catalog: Dict[str, Any], only: Optional[List[str]], include_writes: bool,
+                 include_external: bool) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """(tools to run, reasons for the skipped ones)"""
+    selected, skipped = [], []
+    for tool in catalog["tools"]:
+        name = tool["name"]
+        if only and name not in only:
+            continue
+        if not tool["readOnly"] and not (include_writes and catalog.get("writes")):
+            skipped.append(f"{name}: writes data (needs --include-writes and ENABLE_TOOL_BENCH=writes)")
+        elif tool["externalApi"] and not include_external:
+            skipped.append(f"{name}: calls an external API (needs --include-external)")
+        else:
+            selected.append(tool)
+    return selected, skipped
+
+async def run_tools(base_url: str, runs: int, concurrency: int, timeout: int = 60,
+                    only: Optional[List[str]] = None, include_writes: bool = False,
+                    include_external: bool = False,
+                    overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[Dict[str, List[ToolSample]], List[str]]:
+    """
+    `runs` calls per tool, tools one after another so they do not skew each
+    other, at most `concurrency` calls of the same tool in flight
+    """
+    endpoint = f"{base_url}/api/admin-assistant/tools"
+    overrides = overrides or {}
+    async with make_async_client(concurrency, timeout) as client:
+        catalog = await fetch_catalog(client, endpoint)
+        tools, skipped = select_tools(catalog, only, include_writes, include_external)
+        fixtures = await discover_fixtures(client, endpoint, [t["name"] for t in catalog["tools"]])
+        print(f"🧷 Fixtures: {', '.join(f'{k}={v}' for k, v in fixtures.items()) or 'none'}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        samples: Dict[str, List[ToolSample]] = {}
+        for tool in tools:
+            name = tool["name"]
+            args = synthetic_args(tool["parameters"], fixtures, overrides.get(name))
+            if args is None:
+                skipped.append(f"{name}: no fixture for a required id (pass it with --args)")
+                continue
+
+            async def one():
+                async with semaphore:
+                    return await call_tool(client, endpoint, name, args)
+
+            samples[name] = await asyncio.gather(*(one() for _ in range(runs)))
+            ok = [s for s in samples[name] if s.outcome == "ok"]
+            mark = "🔧" if len(ok) == runs else "❌"
+            print(f"{mark} {name:<28} {len(ok)}/{runs} ok  {json.dumps(args, ensure_ascii=False)[:60]}")
+    return samples, skipped
+
+def print_tool_report(samples: Dict[str, List[ToolSample]], skipped: List[str]):
+    print("\n" + "=" * 104)
+    print("📊 PER-TOOL LATENCY (ms; server = Server-Timing `tool`, client = full round trip)")
+    print("=" * 104)
+    print(f"{'Tool':<30}{'ok':>5}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'client p50':>12}{'size p50':>10}  errors")
+
+    def ms(values: List[float], p: float) -> str:
+        return f"{percentile(values, p) * 1000:9.1f}" if values else f"{'-':>9}"
+
+    # Slowest first: the list is a to-do list for indexes/query fixes
+    def slowest(item):
+        server = sorted(s.server for s in item[1] if s.outcome == "ok" and s.server is not None)
+        return -percentile(server, 50)
+
+    for name, items in sorted(samples.items(), key=slowest):
+        ok = [s for s in items if s.outcome == "ok"]
+        server = sorted(s.server for s in ok if s.server is not None)
+        client = sorted(s.client for s in ok)
+        sizes = sorted(float(s.size) for s in ok)
+        errors = [s for s in items if s.outcome != "ok"]
+        first_error = f"{errors[0].outcome}: {errors[0].error}"[:40] if errors else ""
+        print(f"{name:<30}{len(ok):>5}{ms(server, 50)}{ms(server, 90)}{ms(server, 99)}{ms(server, 100)}"
+              f"{percentile(client, 50) * 1000:12.1f}{percentile(sizes, 50):10.0f}  {first_error}")
+
+    for reason in skipped:
+        print(f"⏭️  {reason}")
@@ -0,0 +1,54 @@
+-- =========================================================================
+-- NL VIP CLUB - Ledger de migraciones + exec_sql para scripts/migrate.py
+-- scripts/migrate.py aplica supabase/migrations/*.sql por la API REST
+-- (rpc/exec_sql) y apunta cada versión aplicada en schema_migrations, así
+-- un entorno nuevo se monta con un solo comando reanudable en vez de pegar
+-- archivo por archivo en el SQL Editor.
+--
+-- En un proyecto sin exec_sql este archivo hay que pegarlo UNA vez a mano
+-- (`python scripts/migrate.py --bootstrap` lo imprime); a partir de ahí el
+-- runner se encarga del resto, incluido este mismo archivo (es idempotente).
+-- =========================================================================
+
+CREATE TABLE IF NOT EXISTS public.schema_migrations (
+  version     text        PRIMARY KEY,          -- nombre del archivo sin .sql
+  checksum    text        NOT NULL,             -- sha256 del contenido aplicado
+  duration_ms numeric,
+  applied_at  timestamptz NOT NULL DEFAULT now()
+);
+
+-- Sin políticas: solo service_role (que ignora RLS) lee/escribe el ledger
+ALTER TABLE public.schema_migrations ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.schema_migrations FROM anon, authenticated;
+
+-- Proyectos con un exec_sql(sql text) anterior: CREATE OR REPLACE no puede
+-- renombrar el parámetro ("cannot change name of input parameter"), así que
+-- se borra antes. Solo si el nombre no coincide, para no tocar los permisos
+-- al volver a aplicar este archivo.
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_proc
+             WHERE proname = 'exec_sql' AND pronamespace = 'public'::regnamespace
+               AND proargtypes = '25'::oidvector
+               AND proargnames IS DISTINCT FROM ARRAY['sql_query']) THEN
+    DROP FUNCTION public.exec_sql(text);
+  END IF;
+END $$;
+
+-- Ejecuta SQL arbitrario. Cada llamada por PostgREST es UNA transacción:
+-- si falla cualquier sentencia del lote, no queda nada aplicado a medias.
+CREATE OR REPLACE FUNCTION public.exec_sql(sql_query text)
+ RETURNS void
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path TO 'public', 'pg_catalog'
+AS $function$
+BEGIN
+  EXECUTE sql_query;
+END;
+$function$;
+
+-- SEGURIDAD: PostgreSQL otorga EXECUTE a PUBLIC por defecto; esto solo debe
+-- poder llamarlo service_role
+REVOKE EXECUTE ON FUNCTION public.exec_sql(text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.exec_sql(text) TO service_role;
@@ -0,0 +1,117 @@
+-- Resúmenes precalculados de actividad por socio: get_member_activity y el
+-- cron de insignias recorrían daily_activity / workout_checkins enteros en
+-- cada llamada para sumar pasos o calcular rachas. Estas tablas las mantiene
+-- scripts/activity_rollups.py (job con service role) de forma incremental:
+-- solo recalcula los días, semanas y socios con filas nuevas o modificadas
+-- desde la última marca de agua (activity_rollup_state).
+--
+-- Día activo = mismo criterio que cron/award-badges: fecha UTC de un
+-- check-in de entrenamiento, o un día de daily_activity con pasos > 0.
+
+-- Un registro por socio y día con datos (pasos de daily_activity + check-ins
+-- de ese día). Es la base compacta de la que salen semanas y rachas.
+CREATE TABLE IF NOT EXISTS public.member_activity_days (
+  member_id UUID NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  steps INTEGER NOT NULL DEFAULT 0,
+  distance_km NUMERIC NOT NULL DEFAULT 0,
+  calories_kcal INTEGER NOT NULL DEFAULT 0,
+  workouts INTEGER NOT NULL DEFAULT 0,
+  active BOOLEAN GENERATED ALWAYS AS (steps > 0 OR workouts > 0) STORED,
+  PRIMARY KEY (member_id, day)
+);
+
+-- Semanas ISO (lunes) por socio
+CREATE TABLE IF NOT EXISTS public.member_activity_weeks (
+  member_id UUID NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+  week_start DATE NOT NULL,
+  steps BIGINT NOT NULL DEFAULT 0,
+  distance_km NUMERIC NOT NULL DEFAULT 0,
+  calories_kcal BIGINT NOT NULL DEFAULT 0,
+  workouts INTEGER NOT NULL DEFAULT 0,
+  days_tracked INTEGER NOT NULL DEFAULT 0,
+  active_days INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (member_id, week_start)
+);
+
+-- Estado por socio: rachas y totales de todo el histórico.
+-- current_streak es la racha que termina en last_active_date; sigue viva
+-- si last_active_date >= CURRENT_DATE - 1 (quien lee decide con la fecha).
+CREATE TABLE IF NOT EXISTS public.member_activity_summary (
+  member_id UUID PRIMARY KEY REFERENCES public.profiles(id) ON DELETE CASCADE,
+  current_streak INTEGER NOT NULL DEFAULT 0,
+  current_streak_start DATE,
+  longest_streak INTEGER NOT NULL DEFAULT 0,
+  last_active_date DATE,
+  active_days INTEGER NOT NULL DEFAULT 0,
+  total_steps BIGINT NOT NULL DEFAULT 0,
+  total_workouts INTEGER NOT NULL DEFAULT 0,
+  rolled_up_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Marca de agua por tabla de origen: hasta dónde se ha leído, y cuántas
+-- filas nuevas o cambiadas leyó la última pasada
+CREATE TABLE IF NOT EXISTS public.activity_rollup_state (
+  source TEXT PRIMARY KEY,
+  watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+  last_rows BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- checked_in_at no sirve de marca de agua: un check-in sincronizado tarde
+-- llega con la fecha del entreno, anterior a la marca, y no se vería nunca.
+-- created_at es cuándo entró la fila (las ya existentes se quedan con la
+-- hora de la migración; la primera pasada del job es completa de todos modos)
+ALTER TABLE public.workout_checkins
+  ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+
+-- El job busca lo cambiado desde la marca: sin estos índices cada pasada
+-- incremental sería un seq scan de todo el histórico. daily_activity solo se
+-- escribe vía rpc_update_daily_steps, que siempre pone updated_at = now()
+CREATE INDEX IF NOT EXISTS idx_daily_activity_updated_at
+  ON public.daily_activity (updated_at);
+CREATE INDEX IF NOT EXISTS idx_workout_checkins_created_at
+  ON public.workout_checkins (created_at);
+
+ALTER TABLE public.member_activity_days ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.member_activity_weeks ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.member_activity_summary ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.activity_rollup_state ENABLE ROW LEVEL SECURITY;
+
+-- Lectura: el socio lo suyo, admin todo, el entrenador sus socios asignados
+-- (mismo criterio que daily_activity). Solo escribe el job (service role).
+CREATE POLICY member_activity_days_select ON public.member_activity_days
+  FOR SELECT USING (
+    member_id = (SELECT auth.uid())
+    OR (SELECT is_admin())
+    OR EXISTS (
+      SELECT 1 FROM public.trainer_members
+      WHERE trainer_members.trainer_id = (SELECT auth.uid())
+        AND trainer_members.member_id = member_activity_days.member_id
+    )
+  );
+
+CREATE POLICY member_activity_weeks_select ON public.member_activity_weeks
+  FOR SELECT USING (
+    member_id = (SELECT auth.uid())
+    OR (SELECT is_admin())
+    OR EXISTS (
+      SELECT 1 FROM public.trainer_members
+      WHERE trainer_members.trainer_id = (SELECT auth.uid())
+        AND trainer_members.member_id = member_activity_weeks.member_id
+    )
+  );
+
+CREATE POLICY member_activity_summary_select ON public.member_activity_summary
+  FOR SELECT USING (
+    member_id = (SELECT auth.uid())
+    OR (SELECT is_admin())
+    OR EXISTS (
+      SELECT 1 FROM public.trainer_members
+      WHERE trainer_members.trainer_id = (SELECT auth.uid())
+        AND trainer_members.member_id = member_activity_summary.member_id
+    )
+  );
+
+CREATE POLICY activity_rollup_state_admin_select ON public.activity_rollup_state
+  FOR SELECT USING ((SELECT is_admin()));
@@ -0,0 +1,108 @@
+-- Resumen del gimnasio precalculado: rpc_get_gym_dashboard hacía siete
+-- COUNT(*) sobre profiles, workout_checkins, feed_posts... en cada "Dame el
+-- resumen del gimnasio", y con miles de socios e histórico de check-ins cada
+-- apertura era un recorrido de las tablas enteras. Ahora lee una fila que
+-- refresca un job (scripts/dashboard_snapshot.py, service role) y solo
+-- recalcula en vivo si la foto es más vieja que p_max_age_seconds o si se
+-- pide explícitamente (p_force_fresh).
+
+-- Una sola fila (id = 1): la última foto y lo que costó calcularla
+CREATE TABLE IF NOT EXISTS public.gym_dashboard_snapshot (
+  id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  data JSONB NOT NULL,
+  computed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  compute_ms NUMERIC
+);
+
+ALTER TABLE public.gym_dashboard_snapshot ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY gym_dashboard_snapshot_admin_select ON public.gym_dashboard_snapshot
+  FOR SELECT USING ((SELECT is_admin()));
+
+-- Los recuentos de siempre (mismas claves que devolvía rpc_get_gym_dashboard).
+-- Interna: solo la llaman las dos funciones de abajo
+CREATE OR REPLACE FUNCTION public.gym_dashboard_counts()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path TO 'public'
+AS $$
+  SELECT jsonb_build_object(
+    'total_members',          (SELECT COUNT(*) FROM profiles WHERE role = 'member'),
+    'total_trainers',         (SELECT COUNT(*) FROM profiles WHERE role = 'trainer'),
+    'new_members_this_month', (SELECT COUNT(*) FROM profiles WHERE role = 'member' AND created_at >= date_trunc('month', CURRENT_DATE)),
+    'active_challenges',      (SELECT COUNT(*) FROM challenges WHERE is_active = true),
+    'total_checkins_this_week',(SELECT COUNT(*) FROM workout_checkins WHERE checked_in_at >= date_trunc('week', CURRENT_DATE)),
+    'posts_today',            (SELECT COUNT(*) FROM feed_posts WHERE created_at >= CURRENT_DATE AND is_hidden = false),
+    'reported_posts',         (SELECT COUNT(DISTINCT post_id) FROM feed_reports)
+  );
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.gym_dashboard_counts() FROM PUBLIC, anon, authenticated;
+
+-- Recalcula y guarda la foto. Para el job con service role; los admins
+-- fuerzan el refresco con rpc_get_gym_dashboard(p_force_fresh => true)
+CREATE OR REPLACE FUNCTION public.rpc_refresh_gym_dashboard()
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+DECLARE
+  v_started TIMESTAMP WITH TIME ZONE := clock_timestamp();
+  v_data JSONB;
+BEGIN
+  v_data := gym_dashboard_counts();
+  INSERT INTO gym_dashboard_snapshot (id, data, computed_at, compute_ms)
+  VALUES (1, v_data, NOW(), EXTRACT(EPOCH FROM clock_timestamp() - v_started) * 1000)
+  ON CONFLICT (id) DO UPDATE SET
+    data = EXCLUDED.data, computed_at = EXCLUDED.computed_at, compute_ms = EXCLUDED.compute_ms;
+  RETURN v_data || jsonb_build_object('snapshot_at', NOW(), 'age_seconds', 0, 'source', 'live');
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.rpc_refresh_gym_dashboard() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rpc_refresh_gym_dashboard() TO service_role;
+
+-- Cambia de firma (parámetros con valor por defecto: rpc('rpc_get_gym_dashboard')
+-- sin argumentos sigue funcionando) y deja de ser STABLE porque puede escribir
+DROP FUNCTION IF EXISTS public.rpc_get_gym_dashboard();
+
+CREATE OR REPLACE FUNCTION public.rpc_get_gym_dashboard(
+  p_max_age_seconds INTEGER DEFAULT 900,
+  p_force_fresh BOOLEAN DEFAULT false
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+DECLARE
+  v_snapshot gym_dashboard_snapshot%ROWTYPE;
+BEGIN
+  IF NOT is_admin() THEN RAISE EXCEPTION 'Solo administradores pueden usar esta función'; END IF;
+
+  SELECT * INTO v_snapshot FROM gym_dashboard_snapshot WHERE id = 1;
+
+  IF FOUND AND NOT p_force_fresh
+     AND v_snapshot.computed_at >= NOW() - make_interval(secs => GREATEST(p_max_age_seconds, 0)) THEN
+    RETURN v_snapshot.data || jsonb_build_object(
+      'snapshot_at', v_snapshot.computed_at,
+      'age_seconds', FLOOR(EXTRACT(EPOCH FROM NOW() - v_snapshot.computed_at)),
+      'source', 'snapshot');
+  END IF;
+
+  -- Foto caducada: si otro admin ya la está recalculando se devuelve la vieja
+  -- (marcada como tal) en vez de lanzar los mismos recuentos en paralelo
+  IF FOUND AND NOT p_force_fresh AND NOT pg_try_advisory_xact_lock(hashtext('gym_dashboard_snapshot')) THEN
+    RETURN v_snapshot.data || jsonb_build_object(
+      'snapshot_at', v_snapshot.computed_at,
+      'age_seconds', FLOOR(EXTRACT(EPOCH FROM NOW() - v_snapshot.computed_at)),
+      'source', 'stale');
+  END IF;
+
+  RETURN rpc_refresh_gym_dashboard();
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.rpc_get_gym_dashboard(INTEGER, BOOLEAN) TO authenticated;
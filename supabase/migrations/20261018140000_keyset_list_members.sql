@@ -0,0 +1,52 @@
+-- Listado de socios paginado por clave (keyset): list_members del asistente
+-- llamaba a rpc_find_member con p_search = '' y metía la plantilla entera en
+-- el contexto del modelo y en toolResults. Cada página se pide "después de"
+-- la última fila devuelta (nombre, id), así que la página N cuesta lo mismo
+-- que la primera (sin OFFSET) y un alta o baja entre páginas no duplica ni
+-- salta socios. La exportación completa (/api/admin/members-export) recorre
+-- las mismas páginas.
+
+-- Orden estable (nombre, id) de los socios; coalesce para que los perfiles
+-- sin nombre también tengan posición en el cursor
+CREATE INDEX IF NOT EXISTS idx_profiles_member_name_id
+  ON public.profiles (coalesce(name, ''), id)
+  WHERE role = 'member';
+
+CREATE OR REPLACE FUNCTION public.rpc_list_members(
+  p_limit INTEGER DEFAULT 20,
+  p_after_name TEXT DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL,
+  p_search TEXT DEFAULT NULL
+)
+RETURNS TABLE (id UUID, name TEXT, email TEXT, trainer_name TEXT, has_diet BOOLEAN, has_workout BOOLEAN,
+               has_premium BOOLEAN, created_at TIMESTAMP WITH TIME ZONE)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+BEGIN
+  IF NOT is_admin() THEN RAISE EXCEPTION 'Solo administradores pueden usar esta función'; END IF;
+  RETURN QUERY
+  SELECT
+    p.id, p.name, p.email,
+    t.name AS trainer_name,
+    EXISTS(SELECT 1 FROM member_diets   md WHERE md.member_id = p.id) AS has_diet,
+    EXISTS(SELECT 1 FROM member_workouts mw WHERE mw.member_id = p.id) AS has_workout,
+    p.has_premium, p.created_at
+  FROM profiles p
+  -- Un solo entrenador por socio: con un JOIN normal un socio con dos
+  -- asignaciones saldría dos veces y el cursor se repetiría
+  LEFT JOIN LATERAL (
+    SELECT tp.name FROM trainer_members tm JOIN profiles tp ON tp.id = tm.trainer_id
+    WHERE tm.member_id = p.id ORDER BY tm.assigned_at LIMIT 1
+  ) t ON true
+  WHERE p.role = 'member'
+    AND (p_after_id IS NULL
+         OR (coalesce(p.name, ''), p.id) > (coalesce(p_after_name, ''), p_after_id))
+    AND (coalesce(p_search, '') = ''
+         OR p.name ILIKE '%' || p_search || '%' OR p.email ILIKE '%' || p_search || '%')
+  ORDER BY coalesce(p.name, ''), p.id
+  LIMIT LEAST(GREATEST(coalesce(p_limit, 20), 1), 500);
+END;
+$$;
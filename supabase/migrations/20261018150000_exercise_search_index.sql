@@ -0,0 +1,171 @@
+-- Índice de búsqueda del catálogo de ejercicios: search_exercise_catalog se
+-- traía el catálogo global entero en cada llamada y buscaba subcadenas en
+-- JavaScript, así que "sentadilla hack" no encontraba "Hack squat", "jalon"
+-- no encontraba "Jalón..." y una errata ("sentadila") no encontraba nada.
+--
+-- Los términos de cada ejercicio (nombre, name_aliases y su traducción
+-- es ↔ en) y sus trigramas los precalcula scripts/exercise_index.py; aquí
+-- solo se guardan y se consultan. Se parte igual que pg_trgm (cada palabra
+-- con dos espacios delante y uno detrás) pero en tablas normales, sin
+-- extensiones, con texto en minúsculas y sin tildes (exercise_search_fold).
+
+-- Minúsculas, sin tildes ni signos: lo mismo que fold() en el indexador
+CREATE OR REPLACE FUNCTION public.exercise_search_fold(p_text TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT trim(regexp_replace(
+    translate(lower(coalesce(p_text, '')),
+              'áàâäãåéèêëíìîïóòôöõúùûüñçýÁÀÂÄÃÅÉÈÊËÍÌÎÏÓÒÔÖÕÚÙÛÜÑÇÝ',
+              'aaaaaaeeeeiiiiooooouuuuncyaaaaaaeeeeiiiiooooouuuuncy'),
+    '[^a-z0-9]+', ' ', 'g'))
+$$;
+
+-- Trigramas de un texto ya normalizado: "  w", " wo", "wor"... por palabra
+CREATE OR REPLACE FUNCTION public.exercise_trigrams(p_folded TEXT)
+RETURNS SETOF TEXT
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT DISTINCT substr('  ' || w || ' ', i, 3)
+  FROM regexp_split_to_table(p_folded, ' ') AS w,
+       generate_series(1, length(w) + 1) AS i
+  WHERE w <> ''
+$$;
+
+CREATE TABLE IF NOT EXISTS public.exercise_search_terms (
+  id BIGSERIAL PRIMARY KEY,
+  exercise_id UUID NOT NULL REFERENCES public.exercises(id) ON DELETE CASCADE,
+  term TEXT NOT NULL,
+  folded TEXT NOT NULL,
+  kind TEXT NOT NULL CHECK (kind IN ('name', 'alias', 'translation')),
+  trigram_count INTEGER NOT NULL,
+  UNIQUE (exercise_id, folded)
+);
+
+CREATE TABLE IF NOT EXISTS public.exercise_search_trigrams (
+  trigram TEXT NOT NULL,
+  term_id BIGINT NOT NULL REFERENCES public.exercise_search_terms(id) ON DELETE CASCADE,
+  PRIMARY KEY (trigram, term_id)
+);
+
+-- Para el ON DELETE CASCADE al invalidar los términos de un ejercicio
+CREATE INDEX IF NOT EXISTS idx_exercise_search_trigrams_term_id
+  ON public.exercise_search_trigrams (term_id);
+
+-- Sin políticas: solo el indexador (service role) y la RPC de abajo
+ALTER TABLE public.exercise_search_terms ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.exercise_search_trigrams ENABLE ROW LEVEL SECURITY;
+
+-- Si cambia el nombre o los alias de un ejercicio sus términos dejan de
+-- valer: se borran y la RPC lo busca por subcadena hasta el próximo indexado
+CREATE OR REPLACE FUNCTION public.exercise_search_invalidate()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+BEGIN
+  DELETE FROM exercise_search_terms WHERE exercise_id = NEW.id;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS exercises_search_invalidate ON public.exercises;
+CREATE TRIGGER exercises_search_invalidate
+  AFTER UPDATE OF name, name_aliases ON public.exercises
+  FOR EACH ROW
+  WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.name_aliases IS DISTINCT FROM NEW.name_aliases)
+  EXECUTE FUNCTION public.exercise_search_invalidate();
+
+-- Top-k de ejercicios globales para un texto libre. coverage = parte de los
+-- trigramas buscados que tiene el mejor término del ejercicio (1 si lo
+-- contiene tal cual), similarity = trigramas comunes / trigramas de ambos.
+-- Sin texto, lista el grupo muscular por nombre como antes.
+-- force_custom_plan: con el plan genérico que plpgsql usa a partir de la
+-- sexta llamada (sin conocer los trigramas de la consulta) pasaba de ~3 ms
+-- a ~40 ms.
+CREATE OR REPLACE FUNCTION public.rpc_search_exercises(
+  p_query TEXT,
+  p_muscle_group TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 10,
+  p_min_coverage REAL DEFAULT 0.5
+)
+RETURNS TABLE (name TEXT, muscle_primary TEXT, default_sets INTEGER, default_reps TEXT,
+               default_rest_seconds INTEGER, matched TEXT, score REAL)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path TO 'public'
+SET plan_cache_mode TO 'force_custom_plan'
+AS $$
+DECLARE
+  v_query TEXT := exercise_search_fold(p_query);
+  v_muscle TEXT := exercise_search_fold(p_muscle_group);
+  v_limit INTEGER := LEAST(GREATEST(coalesce(p_limit, 10), 1), 50);
+BEGIN
+  IF v_query = '' THEN
+    RETURN QUERY
+    SELECT e.name::text, e.muscle_primary::text, e.default_sets, e.default_reps::text, e.default_rest_seconds,
+           NULL::text, NULL::real
+    FROM exercises e
+    WHERE e.is_global = true
+      AND (v_muscle = '' OR exercise_search_fold(e.muscle_primary) LIKE '%' || v_muscle || '%')
+    ORDER BY e.name
+    LIMIT v_limit;
+    RETURN;
+  END IF;
+
+  RETURN QUERY
+  WITH grams AS (
+    SELECT g FROM exercise_trigrams(v_query) AS g
+  ), total AS (
+    SELECT count(*)::real AS n FROM grams
+  ), hits AS (
+    SELECT t.term_id, count(*)::real AS shared
+    FROM exercise_search_trigrams t JOIN grams ON grams.g = t.trigram
+    GROUP BY t.term_id
+  ), scored AS (
+    SELECT st.exercise_id, st.term,
+           CASE WHEN position(v_query IN st.folded) > 0 THEN 1 ELSE h.shared / total.n END AS coverage,
+           h.shared / (total.n + st.trigram_count - h.shared) AS similarity
+    FROM hits h
+    JOIN exercise_search_terms st ON st.id = h.term_id
+    CROSS JOIN total
+  ), best AS (
+    SELECT DISTINCT ON (s.exercise_id) s.exercise_id, s.term, s.coverage, s.similarity
+    FROM scored s
+    ORDER BY s.exercise_id, s.coverage DESC, s.similarity DESC
+  ), candidates AS (
+    SELECT b.exercise_id, b.term, (0.75 * b.coverage + 0.25 * b.similarity)::real AS score
+    FROM best b
+    WHERE b.coverage >= p_min_coverage
+    UNION ALL
+    -- Ejercicios aún sin indexar (nuevos o editados): subcadena sobre el
+    -- nombre y los alias; matched = el primero que la contiene
+    SELECT e.id, m.term, 1::real
+    FROM exercises e
+    CROSS JOIN LATERAL (
+      SELECT t.term
+      FROM unnest(array_prepend(e.name::text, coalesce(e.name_aliases, '{}'::text[])))
+           WITH ORDINALITY AS t(term, ord)
+      WHERE position(v_query IN exercise_search_fold(t.term)) > 0
+      ORDER BY t.ord
+      LIMIT 1
+    ) m
+    WHERE e.is_global = true
+      AND NOT EXISTS (SELECT 1 FROM exercise_search_terms st WHERE st.exercise_id = e.id)
+  )
+  SELECT e.name::text, e.muscle_primary::text, e.default_sets, e.default_reps::text, e.default_rest_seconds,
+         c.term, c.score
+  FROM candidates c
+  JOIN exercises e ON e.id = c.exercise_id
+  WHERE e.is_global = true
+    AND (v_muscle = '' OR exercise_search_fold(e.muscle_primary) LIKE '%' || v_muscle || '%')
+  ORDER BY c.score DESC, e.name
+  LIMIT v_limit;
+END;
+$$;
@@ -0,0 +1,67 @@
+import math
+
+from assistant_bench import percentile
+from result_store import bootstrap_difference, compare_runs, mann_whitney_z, one_sided_p
+
+
+def test_percentile_interpolates_between_samples():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 100) == 4.0
+    assert percentile(values, 50) == 2.5
+    assert math.isclose(percentile(values, 95), 3.85)
+
+
+def test_percentile_edge_cases():
+    assert percentile([], 95) == 0.0
+    assert percentile([7.0], 50) == 7.0
+
+
+def test_mann_whitney_z_sign_and_symmetry():
+    old = [1.0, 2.0, 3.0, 4.0, 5.0]
+    new = [6.0, 7.0, 8.0, 9.0, 10.0]
+    z = mann_whitney_z(old, new)
+    assert z > 0
+    assert math.isclose(mann_whitney_z(new, old), -z)
+    # Complete separation of 5 vs 5: U = 25, mean 12.5, sd sqrt(5*5*11/12)
+    assert math.isclose(z, 12.5 / math.sqrt(25 * 11 / 12))
+    assert one_sided_p(z) < 0.01
+
+
+def test_mann_whitney_z_ties():
+    assert mann_whitney_z([2.0] * 5, [2.0] * 5) == 0.0
+    assert mann_whitney_z([1.0, 2.0, 2.0], [2.0, 2.0, 3.0]) > 0
+
+
+def test_bootstrap_flags_a_tail_that_moves_alone():
+    old = [1.0] * 95 + [1.2] * 5
+    new = [1.0] * 90 + [3.0] * 10
+    # The medians are equal: Mann-Whitney sees little
+    assert one_sided_p(mann_whitney_z(old, new)) > 0.01
+    lower, upper, p_value = bootstrap_difference(old, new, 95)
+    assert 0 < lower <= upper
+    assert p_value < 0.05
+
+
+def run(latency):
+    return {"scenarios": {"chat": {"requests": len(latency), "ok": len(latency), "latency": latency,
+                                   "size": [], "tokens": []}}}
+
+
+def test_compare_runs_gates_p95_with_the_bootstrap():
+    thresholds = {"latency_p95": 0.10, "size_p50": 0.05, "tokens_p50": 0.05}
+    old = run([1.0] * 95 + [1.2] * 5)
+    new = run([1.0] * 90 + [3.0] * 10)
+    findings, _ = compare_runs(old, new, thresholds)
+    latency = next(f for f in findings if f.metric == "latency_p95")
+    assert latency.verdict == "regression"
+    assert latency.interval is not None
+    findings, _ = compare_runs(old, old, thresholds)
+    assert all(f.verdict == "ok" for f in findings)
+
+
+def test_single_sample_runs_are_never_gated():
+    thresholds = {"latency_p95": 0.10, "size_p50": 0.05, "tokens_p50": 0.05}
+    findings, _ = compare_runs(run([1.0]), run([5.0]), thresholds)
+    latency = next(f for f in findings if f.metric == "latency_p95")
+    assert latency.verdict == "few samples"
@@ -0,0 +1,95 @@
+from sql_splitter import plan, split_statements
+
+
+def texts(sql):
+    return [s.text for s in split_statements(sql)]
+
+
+def labels(waves):
+    return [[group.label for group in wave] for wave in waves]
+
+
+def test_dollar_quoted_bodies_keep_their_semicolons():
+    sql = (
+        "CREATE FUNCTION f() RETURNS void AS $$ BEGIN PERFORM 1; END; $$ LANGUAGE plpgsql;\n"
+        "CREATE FUNCTION g() RETURNS void AS $body$ BEGIN RAISE NOTICE '$$;'; END; $body$ LANGUAGE plpgsql;\n"
+        "SELECT 1;"
+    )
+    parts = texts(sql)
+    assert len(parts) == 3
+    assert parts[1].endswith("LANGUAGE plpgsql;")
+
+
+def test_dollar_inside_identifier_is_not_a_tag():
+    assert len(texts("SELECT a$b$c FROM t; SELECT 2;")) == 2
+
+
+def test_nested_block_comments():
+    sql = "/* outer /* inner; */ still comment; */ SELECT 1; -- tail;\nSELECT 2;"
+    parts = texts(sql)
+    assert parts == ["SELECT 1;", "SELECT 2;"]
+
+
+def test_escape_strings_and_doubled_quotes():
+    sql = "INSERT INTO t VALUES (E'it\\'s; fine'); INSERT INTO t VALUES ('a''b;c'); SELECT 3;"
+    parts = texts(sql)
+    assert len(parts) == 3
+    assert parts[0] == "INSERT INTO t VALUES (E'it\\'s; fine');"
+
+
+def test_backslash_is_literal_outside_escape_strings():
+    sql = "INSERT INTO t VALUES ('C:\\'); SELECT 2;"
+    assert len(texts(sql)) == 2
+
+
+def test_start_lines_are_one_based():
+    statements = split_statements("\n-- note\nSELECT 1;\n\nSELECT\n 2;")
+    assert [s.line for s in statements] == [3, 5]
+
+
+def test_do_block_runs_after_the_inserts_above_it():
+    sql = (
+        "INSERT INTO plans (id) VALUES (1);\n"
+        "DO $$ BEGIN UPDATE plans SET id = 2; END $$;\n"
+        "INSERT INTO plans (id) VALUES (3);\n"
+    )
+    waves = plan(split_statements(sql))
+    assert labels(waves) == [["data:plans"], ["functions:serial"], ["data:plans"]]
+
+
+def test_check_constraint_runs_after_its_function():
+    sql = (
+        "CREATE TABLE t (v int);\n"
+        "CREATE FUNCTION ok(v int) RETURNS boolean AS $$ SELECT v > 0 $$ LANGUAGE sql;\n"
+        "ALTER TABLE t ADD CONSTRAINT t_v CHECK (ok(v));\n"
+    )
+    order = [s.index for wave in plan(split_statements(sql)) for g in wave for s in g.statements]
+    assert order == [0, 1, 2]
+
+
+def test_data_waits_for_tables_it_mentions():
+    sql = (
+        "INSERT INTO plans (id) VALUES (1);\n"
+        "INSERT INTO members (plan_id) SELECT id FROM plans;\n"
+        "INSERT INTO notices (title) VALUES ('x');\n"
+    )
+    assert labels(plan(split_statements(sql))) == [["data:plans", "data:notices"], ["data:members"]]
+
+
+def test_data_waits_for_fk_parents_named_by_literal_id():
+    sql = (
+        "INSERT INTO workout_days (id) VALUES ('11111111-1111-1111-1111-111111111111');\n"
+        "INSERT INTO workout_exercises (day_id) VALUES ('11111111-1111-1111-1111-111111111111');\n"
+    )
+    statements = split_statements(sql)
+    assert labels(plan(statements)) == [["data:workout_days", "data:workout_exercises"]]
+    references = {"workout_exercises": {"workout_days"}}
+    assert labels(plan(statements, references=references)) == [["data:workout_days"], ["data:workout_exercises"]]
+
+
+def test_self_referencing_chunks_run_in_order():
+    sql = "".join(f"INSERT INTO nodes (id, parent) VALUES ({i}, {i - 1});\n" for i in range(4))
+    statements = split_statements(sql)
+    assert len(plan(statements, chunk_size=2)) == 1
+    waves = plan(statements, chunk_size=2, references={"nodes": {"nodes"}})
+    assert [len(wave) for wave in waves] == [1, 1]